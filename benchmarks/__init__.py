@@ -0,0 +1,7 @@
+"""
+Замеры производительности методов DB на локальном PostgreSQL
+
+Запуск:
+    python -m benchmarks run --scale 10k --scale 1m
+    python -m benchmarks compare benchmarks/results/old.json benchmarks/results/new.json
+"""
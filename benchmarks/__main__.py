@@ -0,0 +1,59 @@
+"""
+Командная строка замеров: python -m benchmarks run|compare
+"""
+
+import argparse
+import sys
+
+from .cases import CASES
+from .dataset import SCALES
+from .runner import compare_results, run_benchmarks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Замеры методов DB на PostgreSQL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Прогнать сценарии и записать результаты в JSON")
+    run.add_argument("--scale", action="append", choices=list(SCALES),
+                     help="Масштаб данных (можно указать несколько раз; по умолчанию 10k)")
+    run.add_argument("--case", action="append", choices=list(CASES),
+                     help="Сценарий (можно указать несколько раз; по умолчанию все)")
+    run.add_argument("--iterations", type=int, help="Число замеров на сценарий")
+    run.add_argument("--warmup", type=int, default=2, help="Число прогревочных вызовов")
+    run.add_argument("--max-seconds", type=float, default=30.0, help="Ограничение времени на сценарий")
+    run.add_argument("--seed", type=int, default=42, help="Зерно генератора данных")
+    run.add_argument("--durable", action="store_true", help="Не отключать fsync во временном кластере")
+    run.add_argument("--output", help="Файл результатов")
+    server = run.add_argument_group("готовый сервер (вместо временного кластера; схема базы пересоздаётся!)")
+    server.add_argument("--host")
+    server.add_argument("--port", type=int, default=5432)
+    server.add_argument("--dbname", default="library_bench")
+    server.add_argument("--user", default="postgres")
+    server.add_argument("--password", default="")
+
+    compare = commands.add_parser("compare", help="Сравнить два файла результатов")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="Допустимое ухудшение p95 и ops/s (доля, по умолчанию 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        return compare_results(args.baseline, args.current, args.threshold)
+
+    params = None
+    if args.host:
+        params = {"host": args.host, "port": args.port, "dbname": args.dbname,
+                  "user": args.user, "password": args.password}
+    output = run_benchmarks(
+        args.scale or ["10k"], args.case or list(CASES), params=params, seed=args.seed,
+        iterations=args.iterations, warmup=args.warmup, max_seconds=args.max_seconds,
+        durable=args.durable, output=args.output,
+    )
+    print(f"Результаты: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
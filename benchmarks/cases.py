@@ -0,0 +1,121 @@
+"""
+Сценарии замеров: каждый готовит данные и возвращает операцию, которую runner вызывает много раз
+"""
+
+import random
+from decimal import Decimal
+from typing import Any, Callable, Dict, NamedTuple
+
+
+class Case(NamedTuple):
+    """Сценарий: setup(db, counts, rng) → операция op(i); iterations — число вызовов по умолчанию."""
+    setup: Callable[..., Callable[[int], Any]]
+    iterations: int
+
+
+def _expect_list(result):
+    if not isinstance(result, list):
+        raise RuntimeError(f"Ожидался список строк, получено: {result!r}")
+    return result
+
+
+def _insert_data(db, counts, rng):
+    genres = list(db.tables["Books"].c.genre.type.enums)
+
+    def op(i):
+        success, error = db.insert_data("Books", {
+            "title": f"Замер вставки {rng.getrandbits(48):x}-{i}",
+            "authors": ["Автор замера"],
+            "genre": rng.choice(genres),
+            "deposit_amount": Decimal(300),
+            "daily_rental_rate": Decimal(30),
+        })
+        if not success:
+            raise RuntimeError(error)
+        return 1
+    return op
+
+
+def _get_sorted_data(db, counts, rng):
+    # Замеряем запрос, а не кэш результатов: повторный reader_id иначе отдавался бы из кэша
+    db.result_cache.enabled = False
+
+    def op(i):
+        reader_id = rng.randrange(1, counts["Readers"] + 1)
+        return len(_expect_list(db.get_sorted_data(
+            "Issued_Books", [("issue_date", False)], condition={"reader_id": reader_id}
+        )))
+    return op
+
+
+def _get_sorted_data_cached(db, counts, rng):
+    # Чтение из кэша результатов: одинаковый запрос, после первого вызова — попадания
+    reader_id = rng.randrange(1, counts["Readers"] + 1)
+
+    def op(i):
+        return len(_expect_list(db.get_sorted_data(
+            "Issued_Books", [("issue_date", False)], condition={"reader_id": reader_id}
+        )))
+    return op
+
+
+def _get_joined_summary(db, counts, rng):
+    def op(i):
+        return len(_expect_list(db.get_joined_summary(
+            left_table="Issued_Books", right_table="Readers", join_on=[("reader_id", "reader_id")],
+            columns=["t1.recording_id", "t1.issue_date", "t2.last_name", "t2.phone"],
+            sort_columns=[("t1.issue_date", False)], limit=100
+        )))
+    return op
+
+
+def _text_search(db, counts, rng):
+    def op(i):
+        return len(_expect_list(db.text_search("Books", "title", str(rng.randrange(1000)), "LIKE")))
+    return op
+
+
+def _select_with_filters(db, counts, rng):
+    def op(i):
+        book_id = rng.randrange(1, counts["Books"] + 1)
+        return len(_expect_list(db.select_with_filters(
+            "Issued_Books", where_conditions={"book_id": book_id}, order_by=[("issue_date", False)], limit=50
+        )))
+    return op
+
+
+def _update_string_values(db, counts, rng):
+    def op(i):
+        # Чередование UPPER/LOWER: каждое обновление действительно меняет строки
+        if not db.update_string_values_in_table("Readers", "address", "UPPER" if i % 2 == 0 else "LOWER"):
+            raise RuntimeError("update_string_values_in_table вернул False")
+        return counts["Readers"]
+    return op
+
+
+def _alter_column_type(db, counts, rng):
+    def op(i):
+        # Смена масштаба NUMERIC переписывает таблицу целиком
+        result = db.alter_column_type("Issued_Books", "damage_fine", "NUMERIC(12,2)" if i % 2 == 0 else "NUMERIC(10,2)")
+        if result is not True:
+            raise RuntimeError(result)
+        return counts["Issued_Books"]
+    return op
+
+
+# Порядок важен: изменяющие сценарии идут последними
+CASES: Dict[str, Case] = {
+    "get_sorted_data": Case(_get_sorted_data, 50),
+    "get_sorted_data_cached": Case(_get_sorted_data_cached, 200),
+    "get_joined_summary": Case(_get_joined_summary, 50),
+    "text_search": Case(_text_search, 50),
+    "select_with_filters": Case(_select_with_filters, 100),
+    "insert_data": Case(_insert_data, 200),
+    "update_string_values_in_table": Case(_update_string_values, 6),
+    "alter_column_type": Case(_alter_column_type, 4),
+}
+
+
+def make_rng(seed: int, case_name: str) -> random.Random:
+    """Генератор, одинаковый для сценария при одном seed (не зависит от набора запущенных сценариев)."""
+    return random.Random(f"{seed}:{case_name}")
@@ -0,0 +1,112 @@
+"""
+Временный кластер PostgreSQL (initdb + pg_ctl) для замеров
+"""
+
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from typing import Dict, List, Optional
+
+# Замеры сравнивают код приложения, а не диск: сброс на диск отключён,
+# если не указано durable=True
+FAST_SETTINGS = {
+    "fsync": "off",
+    "synchronous_commit": "off",
+    "full_page_writes": "off",
+}
+
+
+def find_pg_bindir() -> str:
+    """
+    Каталог с initdb/pg_ctl: из PATH, из pg_config --bindir или
+    /usr/lib/postgresql/<версия>/bin (старшая версия).
+    """
+    initdb = shutil.which("initdb")
+    if initdb:
+        return os.path.dirname(initdb)
+    pg_config = shutil.which("pg_config")
+    if pg_config:
+        bindir = subprocess.run([pg_config, "--bindir"], capture_output=True, text=True).stdout.strip()
+        if os.path.exists(os.path.join(bindir, "initdb")):
+            return bindir
+    candidates = glob.glob("/usr/lib/postgresql/*/bin/initdb")
+    if candidates:
+        candidates.sort(key=lambda path: int(path.split("/")[-3]) if path.split("/")[-3].isdigit() else 0)
+        return os.path.dirname(candidates[-1])
+    raise RuntimeError("initdb не найден: установите PostgreSQL или укажите --host/--port готового сервера")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+class TempCluster:
+    """
+    Кластер PostgreSQL во временном каталоге: initdb, pg_ctl start, createdb.
+    При выходе из with сервер останавливается, каталог удаляется.
+
+    Пример:
+        with TempCluster() as cluster:
+            db = DB(**cluster.connection_params())
+    """
+
+    def __init__(self, dbname: str = "library_bench", user: str = "postgres", durable: bool = False,
+                 settings: Optional[Dict[str, str]] = None, bindir: Optional[str] = None):
+        self.dbname = dbname
+        self.user = user
+        self.settings = {} if durable else dict(FAST_SETTINGS)
+        self.settings.update(settings or {})
+        self.bindir = bindir
+        self.port: Optional[int] = None
+        self.workdir: Optional[str] = None
+
+    def _run(self, tool: str, *args: str):
+        result = subprocess.run([os.path.join(self.bindir, tool), *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{tool} завершился с кодом {result.returncode}: {result.stderr.strip()}")
+
+    def start(self):
+        if hasattr(os, "geteuid") and os.geteuid() == 0:
+            raise RuntimeError("initdb нельзя запускать от root: запустите замеры от обычного пользователя "
+                               "или укажите --host/--port готового сервера")
+        self.bindir = self.bindir or find_pg_bindir()
+        self.workdir = tempfile.mkdtemp(prefix="bench-pg-")
+        data_dir = os.path.join(self.workdir, "data")
+        self.port = _free_port()
+        self._run("initdb", "-D", data_dir, "-U", self.user, "-A", "trust", "-E", "UTF8", "--no-locale")
+
+        options: List[str] = [f"-p {self.port}", f"-k {self.workdir}", "-c listen_addresses=localhost"]
+        options += [f"-c {name}={value}" for name, value in self.settings.items()]
+        self._run("pg_ctl", "-D", data_dir, "-l", os.path.join(self.workdir, "server.log"),
+                  "-w", "-o", " ".join(options), "start")
+        self._run("createdb", "-h", "localhost", "-p", str(self.port), "-U", self.user, self.dbname)
+
+    def stop(self):
+        if self.workdir is None:
+            return
+        data_dir = os.path.join(self.workdir, "data")
+        if os.path.exists(os.path.join(data_dir, "postmaster.pid")):
+            subprocess.run([os.path.join(self.bindir, "pg_ctl"), "-D", data_dir, "-m", "fast", "-w", "stop"],
+                           capture_output=True)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+        self.workdir = None
+
+    def connection_params(self) -> Dict[str, object]:
+        """Параметры для конструктора DB."""
+        return {"host": "localhost", "port": self.port, "dbname": self.dbname, "user": self.user, "password": ""}
+
+    def __enter__(self) -> "TempCluster":
+        try:
+            self.start()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
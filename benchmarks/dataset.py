@@ -0,0 +1,33 @@
+"""
+Наполнение Books/Readers/Issued_Books данными заданного объёма для замеров
+"""
+
+from typing import Any, Dict
+
+from db.data_generator import LibraryDataGenerator
+
+# Масштаб → число записей о выдаче; книг в 10 раз меньше, читателей — в 20
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def scale_counts(scale: str) -> Dict[str, int]:
+    """Число строк каждой таблицы для масштаба ("10k", "1m", "10m")."""
+    loans = SCALES[scale]
+    return {"Books": max(loans // 10, 100), "Readers": max(loans // 20, 50), "Issued_Books": loans}
+
+
+def load_dataset(db, scale: str, seed: int = 42) -> Dict[str, Any]:
+    """
+    Пересоздаёт схему и заполняет таблицы генератором LibraryDataGenerator (COPY).
+
+    Returns:
+        {'rows': {таблица: число строк}, 'seconds': {таблица: время загрузки}}
+    """
+    counts = scale_counts(scale)
+    generator = LibraryDataGenerator(books=counts["Books"], readers=counts["Readers"],
+                                     loans=counts["Issued_Books"], seed=seed)
+    stats = generator.populate(db)
+
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM ANALYZE")
+    return {"rows": counts, "seconds": {table_name: entry["seconds"] for table_name, entry in stats.items()}}
@@ -0,0 +1,230 @@
+"""
+Запуск сценариев, сбор задержек/пропускной способности/пикового RSS и сравнение результатов
+"""
+
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from db.log_pipeline import setup_logging
+
+from .cases import CASES, make_rng
+
+logger = logging.getLogger("Benchmarks")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль методом ближайшего ранга (значения отсортированы по возрастанию)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples_ms: List[float], rows: int, elapsed: float) -> Dict[str, Any]:
+    """Сводка по замерам одного сценария."""
+    ordered = sorted(samples_ms)
+    return {
+        "iterations": len(ordered),
+        "elapsed_s": elapsed,
+        "ops_per_s": len(ordered) / elapsed if elapsed else 0.0,
+        "rows_per_s": rows / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50": percentile(ordered, 0.50),
+            "p95": percentile(ordered, 0.95),
+            "p99": percentile(ordered, 0.99),
+            "max": ordered[-1] if ordered else 0.0,
+        },
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS текущего процесса, МБ (ru_maxrss: КБ в Linux, байты в macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(params: Dict[str, Any], case_name: str, counts: Dict[str, int], seed: int,
+             iterations: int, warmup: int, max_seconds: float, log_file: str) -> Dict[str, Any]:
+    """
+    Выполняет один сценарий. Вызывается в отдельном процессе, поэтому
+    ru_maxrss — пиковый RSS именно этого сценария.
+    """
+    from db.Class_DB_refactored import DB
+
+    setup_logging(log_file, console=False)
+    db = DB(**params)
+    if not db.connect():
+        raise RuntimeError("Не удалось подключиться к базе данных")
+    try:
+        case = CASES[case_name]
+        op = case.setup(db, counts, make_rng(seed, case_name))
+        for i in range(warmup):
+            op(i)
+
+        samples: List[float] = []
+        rows = 0
+        started = time.perf_counter()
+        for i in range(warmup, warmup + iterations):
+            op_started = time.perf_counter()
+            rows += op(i) or 0
+            samples.append((time.perf_counter() - op_started) * 1000)
+            # Медленные сценарии на большом объёме ограничены по времени (но не меньше 3 замеров)
+            if len(samples) >= 3 and time.perf_counter() - started > max_seconds:
+                break
+        result = summarize(samples, rows, time.perf_counter() - started)
+        result["peak_rss_mb"] = peak_rss_mb()
+        return result
+    finally:
+        db.disconnect()
+
+
+def _git_revision() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=root, capture_output=True, text=True).stdout.strip())
+        return {"commit": commit or None, "dirty": dirty}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def run_benchmarks(scales: Sequence[str], case_names: Sequence[str], params: Optional[Dict[str, Any]] = None,
+                   seed: int = 42, iterations: Optional[int] = None, warmup: int = 2, max_seconds: float = 30.0,
+                   durable: bool = False, output: Optional[str] = None) -> str:
+    """
+    Прогоняет сценарии на каждом масштабе и записывает результаты в JSON.
+
+    Args:
+        scales: Масштабы данных ("10k", "1m", "10m")
+        case_names: Сценарии из CASES
+        params: Параметры подключения к готовому серверу (None — временный кластер);
+            схема базы пересоздаётся
+        seed: Зерно генератора данных и параметров запросов
+        iterations: Число замеров (None — значение сценария по умолчанию)
+        warmup: Число прогревочных вызовов
+        max_seconds: Ограничение времени на сценарий
+        durable: Не отключать fsync во временном кластере
+        output: Файл результатов (по умолчанию benchmarks/results/<время>-<коммит>.json)
+
+    Returns:
+        Путь к файлу результатов
+    """
+    from db.Class_DB_refactored import DB
+    from .cluster import TempCluster
+    from .dataset import load_dataset
+
+    revision = _git_revision()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{(revision['commit'] or 'nogit')[:10]}.json")
+    log_file = os.path.splitext(output)[0] + ".log"
+    setup_logging(log_file, console=False)
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "git": revision,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "temp_cluster": params is None,
+            "durable": durable or params is not None,
+        },
+        "loads": [],
+        "results": [],
+    }
+
+    for scale in scales:
+        cluster = TempCluster(durable=durable) if params is None else None
+        try:
+            if cluster is not None:
+                cluster.start()
+            connection = cluster.connection_params() if cluster is not None else params
+            db = DB(**connection)
+            if not db.connect():
+                raise RuntimeError("Не удалось подключиться к базе данных")
+            try:
+                with db.engine.connect() as conn:
+                    report["meta"]["server_version"] = conn.exec_driver_sql("SHOW server_version").scalar()
+                print(f"[{scale}] загрузка данных...", flush=True)
+                load = load_dataset(db, scale, seed)
+            finally:
+                db.disconnect()
+            report["loads"].append({"scale": scale, **load})
+
+            for case_name in case_names:
+                print(f"[{scale}] {case_name}...", flush=True)
+                entry: Dict[str, Any] = {"scale": scale, "case": case_name}
+                # Новый процесс на сценарий: пиковый RSS не накапливается между сценариями
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    future = pool.submit(run_case, connection, case_name, load["rows"], seed,
+                                         iterations or CASES[case_name].iterations, warmup, max_seconds, log_file)
+                    try:
+                        entry.update(future.result())
+                    except Exception as e:
+                        entry["error"] = str(e)
+                        logger.error("Сценарий %s (%s) завершился ошибкой: %s", case_name, scale, e)
+                report["results"].append(entry)
+        finally:
+            if cluster is not None:
+                cluster.stop()
+
+    report["meta"]["finished_at"] = datetime.now().isoformat(timespec="seconds")
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    return output
+
+
+def compare_results(baseline_path: str, current_path: str, threshold: float = 0.10) -> int:
+    """
+    Сравнивает два файла результатов по p95 и пропускной способности.
+
+    Regression — p95 вырос или ops/s упал больше чем на threshold.
+
+    Returns:
+        Код выхода: 1 при наличии регрессий, иначе 0
+    """
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(current_path, encoding="utf-8") as file:
+        current = json.load(file)
+
+    base_index = {(entry["scale"], entry["case"]): entry for entry in baseline["results"] if "error" not in entry}
+    regressions = 0
+    print(f"{'масштаб':<8} {'сценарий':<32} {'p95 было':>10} {'p95 стало':>10} {'Δp95':>8} {'Δops/s':>8}")
+    for entry in current["results"]:
+        key = (entry["scale"], entry["case"])
+        base = base_index.get(key)
+        if base is None or "error" in entry:
+            status = entry.get("error", "нет в базовом прогоне")
+            print(f"{key[0]:<8} {key[1]:<32} {status}")
+            continue
+        p95_change = entry["latency_ms"]["p95"] / base["latency_ms"]["p95"] - 1 if base["latency_ms"]["p95"] else 0.0
+        ops_change = entry["ops_per_s"] / base["ops_per_s"] - 1 if base["ops_per_s"] else 0.0
+        regressed = p95_change > threshold or ops_change < -threshold
+        regressions += regressed
+        print(f"{key[0]:<8} {key[1]:<32} {base['latency_ms']['p95']:>10.2f} {entry['latency_ms']['p95']:>10.2f} "
+              f"{p95_change:>+8.1%} {ops_change:>+8.1%}{'  REGRESSION' if regressed else ''}")
+    return 1 if regressions else 0
@@ -5,10 +5,15 @@ Custom widgets for the database application
 from .array_line_edit import ArrayLineEdit
 from .enum_editor import EnumEditor
 from .null_handler import NullHandlerWidget, NullValueDisplay
+from .keyset_table_model import KeysetTableModel, format_cell_value
+from .columnar_table_model import ColumnarTableModel
 
 __all__ = [
     'ArrayLineEdit',
     'EnumEditor',
     'NullHandlerWidget',
-    'NullValueDisplay'
+    'NullValueDisplay',
+    'KeysetTableModel',
+    'ColumnarTableModel',
+    'format_cell_value'
 ]
@@ -0,0 +1,55 @@
+"""
+Сортировка загруженных результатов на стороне клиента (без повторного запроса к БД)
+"""
+
+from array import array
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, List, Sequence
+
+
+def sort_key(value: Any):
+    """
+    Ключ сортировки с учётом типа: числа (int/float/Decimal) сравниваются как числа,
+    даты — как даты, строки — без учёта регистра, массивы — поэлементно.
+    """
+    if isinstance(value, bool):
+        return 0, int(value)
+    if isinstance(value, (int, float, Decimal)):
+        return 0, value
+    if isinstance(value, datetime):
+        return 1, value.replace(tzinfo=None)
+    if isinstance(value, date):
+        # date и datetime несравнимы между собой — приводим к datetime
+        return 1, datetime(value.year, value.month, value.day)
+    if isinstance(value, time):
+        return 2, value.replace(tzinfo=None)
+    if isinstance(value, str):
+        return 3, value.casefold(), value
+    if isinstance(value, (list, tuple)):
+        return 4, tuple((1,) if item is None else (0, sort_key(item)) for item in value)
+    if value is None:
+        return 9,
+    return 5, str(value)
+
+
+def sorted_permutation(values: Sequence[Any], ascending: bool = True) -> List[int]:
+    """
+    Возвращает перестановку индексов строк, упорядочивающую values.
+
+    NULL располагаются как в PostgreSQL: в конце при ASC и в начале при DESC.
+    Сортировка устойчивая, поэтому повторные клики сохраняют порядок равных строк.
+    """
+    if isinstance(values, array):
+        # Однородный числовой столбец без NULL: сравнение без ключевой функции
+        return sorted(range(len(values)), key=values.__getitem__, reverse=not ascending)
+
+    nulls = [i for i, value in enumerate(values) if value is None]
+    present = [i for i, value in enumerate(values) if value is not None]
+    try:
+        # list.sort вычисляет ключ один раз на элемент
+        present.sort(key=lambda i: sort_key(values[i]), reverse=not ascending)
+    except TypeError:
+        # Несравнимые значения внутри одной группы типов — сравниваем как строки
+        present.sort(key=lambda i: str(values[i]), reverse=not ascending)
+    return present + nulls if ascending else nulls + present
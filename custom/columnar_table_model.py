@@ -0,0 +1,122 @@
+"""
+Колоночная модель таблицы только для чтения для больших результатов запросов
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from custom.client_sort import sorted_permutation
+from custom.keyset_table_model import format_cell_value
+
+
+def _compact_column(values: Sequence[Any]) -> Sequence[Any]:
+    """
+    Упаковывает однородный числовой столбец без NULL в array.array
+    (8 байт на значение вместо объекта Python); остальные столбцы остаются списками.
+    """
+    if not values:
+        return []
+    first_type = type(values[0])
+    if first_type is int:
+        if all(type(v) is int for v in values):
+            try:
+                return array("q", values)
+            except OverflowError:
+                return list(values)
+    elif first_type is float:
+        if all(type(v) is float for v in values):
+            return array("d", values)
+    return list(values)
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """
+    Модель для результатов расширенного SELECT и CTE.
+
+    Данные хранятся по столбцам (array.array для числовых столбцов, списки для
+    остальных), строки-словари после загрузки не удерживаются. Значения
+    форматируются в data() только для ячеек, которые запрашивает представление.
+    """
+
+    def __init__(self, header_map: Dict[str, str] = None, parent=None):
+        super().__init__(parent)
+        self._header_map = header_map or {}
+        self._columns: List[str] = []
+        self._data: List[Sequence[Any]] = []
+        self._row_count = 0
+        # Перестановка строк после клиентской сортировки (None — исходный порядок)
+        self._order: Optional[Sequence[int]] = None
+
+    def set_rows(self, rows: List[Dict[str, Any]]):
+        """Загружает результат запроса (список словарей с одинаковым набором ключей)."""
+        self.beginResetModel()
+        if rows:
+            self._columns = list(rows[0].keys())
+            # Транспонирование выполняется в C-коде zip, без цикла Python по ячейкам
+            transposed = zip(*(tuple(row.values()) for row in rows))
+            self._data = [_compact_column(column) for column in transposed]
+            self._row_count = len(rows)
+        else:
+            self._columns = []
+            self._data = []
+            self._row_count = 0
+        self._order = None
+        self.endResetModel()
+
+    # ------------------------------------------------------------------
+    # Интерфейс QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = index.row() if self._order is None else self._order[index.row()]
+        return format_cell_value(self._data[index.column()][row])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            if 0 <= section < len(self._columns):
+                column = self._columns[section]
+                return self._header_map.get(column, column)
+            return None
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Сортирует строки в памяти: меняется только перестановка индексов."""
+        if not 0 <= column < len(self._columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        # Перестановку храним компактно: 8 байт на строку
+        self._order = array("q", sorted_permutation(self._data[column], order == Qt.AscendingOrder))
+        self.layoutChanged.emit()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ------------------------------------------------------------------
+    # Вспомогательные методы
+    # ------------------------------------------------------------------
+    def column_names(self) -> List[str]:
+        """Исходные (не переведённые) имена столбцов."""
+        return list(self._columns)
+
+    def column_values(self, column: int) -> Sequence[Any]:
+        """Значения столбца в исходном порядке (без копирования)."""
+        return self._data[column]
+
+    def row_dict(self, row: int) -> Dict[str, Any]:
+        """Собирает отображаемую строку в виде словаря (для экспорта и диалогов)."""
+        if self._order is not None:
+            row = self._order[row]
+        return {name: values[row] for name, values in zip(self._columns, self._data)}
@@ -0,0 +1,276 @@
+"""
+Модель таблицы с ленивой подгрузкой строк через keyset-пагинацию
+"""
+
+from decimal import Decimal
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+from custom.client_sort import sort_key, sorted_permutation
+
+
+# Функция загрузки страницы: (курсор, размер страницы) -> (строки, курсор следующей страницы или None)
+PageFetcher = Callable[[Optional[tuple], int], Tuple[List[Dict[str, Any]], Optional[tuple]]]
+
+
+def format_cell_value(value: Any) -> str:
+    """Преобразует значение из БД в строку для отображения в ячейке таблицы."""
+    if isinstance(value, list):
+        return ", ".join(map(str, value))
+    if isinstance(value, (float, Decimal)):
+        return f"{value:.2f}"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, 'isoformat'):  # datetime/time
+        return value.isoformat()
+    if value is None:
+        return ""
+    return str(value)
+
+
+class KeysetTableModel(QAbstractTableModel):
+    """
+    Табличная модель только для чтения, подгружающая данные страницами.
+
+    Строки запрашиваются у fetch_page по мере прокрутки (canFetchMore/fetchMore),
+    курсор следующей страницы хранится в модели — OFFSET не используется,
+    поэтому стоимость первой отрисовки и прокрутки не зависит от размера таблицы.
+
+    Если известны первичный ключ и столбец сортировки, изменения отдельных строк
+    применяются к загруженным данным на месте (apply_insert/apply_update/apply_delete).
+    Порядок текста задаёт collation БД, поэтому при сортировке по текстовому столбцу
+    строки вставляются на место, только если результат загружен полностью.
+    """
+
+    def __init__(self, fetch_page: PageFetcher, header_map: Dict[str, str] = None,
+                 page_size: int = 200, key_column: str = None, sort_column: str = None,
+                 ascending: bool = True, parent=None):
+        super().__init__(parent)
+        self._fetch_page = fetch_page
+        self._header_map = header_map or {}
+        self._page_size = page_size
+        self._key_column = key_column
+        self._sort_column = sort_column or key_column
+        self._ascending = ascending
+        self._rows: List[Dict[str, Any]] = []
+        self._columns: List[str] = []
+        self._cursor: Optional[tuple] = None
+        self._exhausted = False
+
+    # ------------------------------------------------------------------
+    # Загрузка данных
+    # ------------------------------------------------------------------
+    def load_first_page(self):
+        """Сбрасывает модель и загружает первую страницу."""
+        self.beginResetModel()
+        rows, cursor = self._fetch_page(None, self._page_size)
+        self._rows = list(rows)
+        self._columns = list(self._rows[0].keys()) if self._rows else []
+        self._cursor = cursor
+        self._exhausted = cursor is None
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+
+        rows, cursor = self._fetch_page(self._cursor, self._page_size)
+        self._cursor = cursor
+        self._exhausted = cursor is None
+        if not rows:
+            self._exhausted = True
+            return
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    # ------------------------------------------------------------------
+    # Интерфейс QAbstractTableModel
+    # ------------------------------------------------------------------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        value = self._rows[index.row()].get(self._columns[index.column()])
+        return format_cell_value(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            if 0 <= section < len(self._columns):
+                column = self._columns[section]
+                return self._header_map.get(column, column)
+            return None
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Сортирует строки в памяти, если результат загружен полностью (иначе ничего не делает)."""
+        self.sort_loaded(column, order == Qt.AscendingOrder)
+
+    def sort_loaded(self, column: int, ascending: bool = True) -> bool:
+        """
+        Сортирует уже загруженные строки без обращения к БД.
+
+        Returns:
+            False, если результат загружен не полностью — тогда нужен повторный запрос.
+        """
+        if not self._exhausted or not 0 <= column < len(self._columns):
+            return False
+        name = self._columns[column]
+        permutation = sorted_permutation([row.get(name) for row in self._rows], ascending)
+        self.layoutAboutToBeChanged.emit()
+        self._rows = [self._rows[i] for i in permutation]
+        self.layoutChanged.emit()
+        self._sort_column, self._ascending = name, ascending
+        return True
+
+    # ------------------------------------------------------------------
+    # Точечные изменения
+    # ------------------------------------------------------------------
+    def can_patch(self) -> bool:
+        """Можно ли применять изменения строк без перезапроса (ключ и столбец сортировки загружены)."""
+        return (self._key_column is not None and self._key_column in self._columns
+                and self._sort_column in self._columns)
+
+    def _order_key(self, row: Dict[str, Any]):
+        # Порядок keyset-запроса: столбец сортировки (NULL в конце при ASC), затем первичный ключ
+        value = row.get(self._sort_column)
+        return value is None, sort_key(value), sort_key(row.get(self._key_column))
+
+    def _insert_position(self, row: Dict[str, Any]) -> int:
+        """Позиция строки среди загруженных (двоичный поиск по порядку сортировки)."""
+        key = self._order_key(row)
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self._order_key(self._rows[middle])
+            if (middle_key < key) if self._ascending else (middle_key > key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _is_text_order(self, row: Dict[str, Any]) -> bool:
+        """Сравниваются ли строки по тексту (столбец сортировки или ключ — строковые)."""
+        for column in (self._sort_column, self._key_column):
+            value = row.get(column)
+            if value is None:
+                value = next((loaded.get(column) for loaded in self._rows
+                              if loaded.get(column) is not None), None)
+            if isinstance(value, str):
+                return True
+        return False
+
+    def _find_row(self, key: Any) -> int:
+        for position, row in enumerate(self._rows):
+            if row.get(self._key_column) == key:
+                return position
+        return -1
+
+    def _place_row(self, row: Dict[str, Any]) -> bool:
+        """Вставляет строку на её место; False — место в частично загруженном результате неизвестно."""
+        if not self._exhausted and self._is_text_order(row):
+            # sort_key не совпадает с collation БД: строка, вставленная в загруженную часть,
+            # может прийти ещё раз со следующей страницей
+            return False
+        position = self._insert_position(row)
+        if position == len(self._rows) and not self._exhausted:
+            # Строка после последней загруженной — она придёт со следующими страницами
+            return True
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, row)
+        self.endInsertRows()
+        return True
+
+    def _remove_row(self, position: int):
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._rows[position]
+        self.endRemoveRows()
+
+    def apply_insert(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Вставляет новые строки на их места в порядке сортировки.
+
+        Returns:
+            False, если изменения нельзя применить на месте — нужен перезапрос.
+        """
+        if not self.can_patch():
+            return False
+        try:
+            for row in rows:
+                if not self._place_row({column: row.get(column) for column in self._columns}):
+                    return False
+        except TypeError:
+            return False
+        return True
+
+    def apply_update(self, rows: List[Dict[str, Any]]) -> bool:
+        """Заменяет изменённые строки; строка с новым значением сортировки переезжает."""
+        if not self.can_patch():
+            return False
+        try:
+            for row in rows:
+                row = {column: row.get(column) for column in self._columns}
+                position = self._find_row(row[self._key_column])
+                if position < 0:
+                    # Строка могла переместиться в загруженную часть из ещё не загруженной
+                    if not self._place_row(row):
+                        return False
+                elif self._rows[position].get(self._sort_column) == row[self._sort_column]:
+                    self._rows[position] = row
+                    self.dataChanged.emit(self.index(position, 0),
+                                          self.index(position, len(self._columns) - 1))
+                else:
+                    self._remove_row(position)
+                    if not self._place_row(row):
+                        return False
+        except TypeError:
+            return False
+        return True
+
+    def apply_delete(self, keys: List[Any]) -> bool:
+        """Удаляет строки с указанными значениями первичного ключа."""
+        if not self.can_patch():
+            return False
+        keys = set(keys)
+        for position in reversed(range(len(self._rows))):
+            if self._rows[position].get(self._key_column) in keys:
+                self._remove_row(position)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ------------------------------------------------------------------
+    # Вспомогательные методы
+    # ------------------------------------------------------------------
+    def column_names(self) -> List[str]:
+        """Исходные (не переведённые) имена столбцов."""
+        return list(self._columns)
+
+    def loaded_rows(self) -> List[Dict[str, Any]]:
+        """Уже загруженные строки (без запроса следующих страниц)."""
+        return self._rows
+
+    def is_fully_loaded(self) -> bool:
+        """True, если все строки результата уже загружены."""
+        return self._exhausted
@@ -6,9 +6,19 @@ from sqlalchemy.engine import Engine
 from sqlalchemy import create_engine, MetaData, inspect, UniqueConstraint, CheckConstraint, Boolean, Enum, ARRAY
 from sqlalchemy import Table, Column, Integer, String, Numeric, Date, ForeignKey, text
 import logging
+import threading
 from datetime import date
 from typing import Optional, Dict, Any, List, Tuple
 
+from .id_allocators import IdAllocator, make_id_allocator
+from .schema_cache import SchemaCache
+from .matview_scheduler import MatviewRefreshScheduler
+from .query_log import QueryLog
+from .result_cache import ResultCache
+from .change_journal import ChangeJournal
+from .pool_metrics import PoolMetrics
+from .key_cache import KnownKeyCache
+from .instrumentation import Instrumentation, instrument_methods
 from .mixins import (
     ConnectionMixin,
     MetadataMixin,
@@ -17,10 +27,24 @@ from .mixins import (
     ConstraintsMixin,
     SearchMixin,
     StringOperationsMixin,
-    CustomTypesMixin
+    CustomTypesMixin,
+    FullTextSearchMixin,
+    MaterializedViewsMixin,
+    AggregateSummaryMixin,
+    IndexAdvisorMixin,
+    InstrumentationMixin
 )
 
 
+# Не замеряются: вызываются на каждом шаге других методов или только читают метрики
+_UNTIMED_METHODS = (
+    "is_connected", "format_db_error", "session", "get_info", "get_backend_pid",
+    "get_pool_stats", "get_cache_stats", "get_performance_snapshot",
+    "set_performance_tracking", "reset_performance_metrics", "export_performance_metrics",
+)
+
+
+@instrument_methods(exclude=_UNTIMED_METHODS)
 class DB(
     ConnectionMixin,
     MetadataMixin,
@@ -29,7 +53,12 @@ class DB(
     ConstraintsMixin,
     SearchMixin,
     StringOperationsMixin,
-    CustomTypesMixin
+    CustomTypesMixin,
+    FullTextSearchMixin,
+    MaterializedViewsMixin,
+    AggregateSummaryMixin,
+    IndexAdvisorMixin,
+    InstrumentationMixin
 ):
     """
     Основной класс для работы с базой данных PostgreSQL.
@@ -43,6 +72,11 @@ class DB(
     - SearchMixin: поиск и фильтрация
     - StringOperationsMixin: строковые операции
     - CustomTypesMixin: работа с пользовательскими типами
+    - FullTextSearchMixin: индексируемый текстовый и полнотекстовый поиск
+    - MaterializedViewsMixin: обновление материализованных представлений по расписанию
+    - AggregateSummaryMixin: итоговые таблицы с инкрементальным пересчётом агрегатов
+    - IndexAdvisorMixin: подбор индексов по журналу запросов
+    - InstrumentationMixin: время методов и запросов, выгрузка метрик
     """
     
     def __init__(self,
@@ -53,7 +87,13 @@ class DB(
                  password: str = "root",
                  sslmode: str = "prefer",
                  connect_timeout: int = 5,
-                 log_file: str = "db_app.log"):
+                 log_file: str = "db_app.log",
+                 id_allocator="sequence",
+                 pool_size: int = 5,
+                 max_overflow: int = 10,
+                 pool_timeout: float = 30.0,
+                 pool_recycle: int = 1800,
+                 pool_pre_ping_idle: Optional[float] = 30.0):
         """
         Инициализация класса DB.
         
@@ -66,6 +106,13 @@ class DB(
             sslmode: Режим SSL
             connect_timeout: Таймаут подключения
             log_file: Файл для логирования
+            id_allocator: Стратегия выделения ID ("sequence", "gap_reuse" или объект IdAllocator)
+            pool_size: Число постоянно открытых соединений пула
+            max_overflow: Сколько соединений сверх pool_size можно открыть при нагрузке
+            pool_timeout: Сколько секунд ждать свободного соединения
+            pool_recycle: Через сколько секунд переоткрывать соединение (-1 — не переоткрывать)
+            pool_pre_ping_idle: Проверять соединение, простоявшее в пуле дольше стольких
+                секунд (0 — при каждой выдаче, None — не проверять)
         """
         self.host = host
         self.port = port
@@ -74,15 +121,48 @@ class DB(
         self.password = password
         self.sslmode = sslmode
         self.connect_timeout = connect_timeout
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_timeout = pool_timeout
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping_idle = pool_pre_ping_idle
+        self.pool_metrics = PoolMetrics()
+        # Соединение, закреплённое за потоком блоком session()
+        self._session_local = threading.local()
+        # Предупреждение о неактивном соединении уже записано (is_connected)
+        self._disconnected_warned = False
         self.engine: Optional[Engine] = None
         self.metadata: Optional[MetaData] = None
         self.tables: Dict[str, Table] = {}
+        # PID серверного процесса PostgreSQL для соединения, выданного каждому потоку
+        self._backend_pids: Dict[int, int] = {}
+        self._backend_pids_lock = threading.Lock()
+        self.id_allocator: IdAllocator = make_id_allocator(id_allocator)
+        self.schema_cache = SchemaCache()
+        # Результаты частых чтений; DDL (сброс кэша схемы) сбрасывает и их
+        self.result_cache = ResultCache()
+        self.schema_cache.add_listener(self.result_cache.on_schema_changed)
+        # Изменения строк (по RETURNING) для точечного обновления таблицы в главном окне
+        self.change_journal = ChangeJournal()
+        self.schema_cache.add_listener(self.change_journal.record_reload)
+        # Недавно найденные значения ключей для пакетной проверки внешних ключей
+        self.key_cache = KnownKeyCache()
+        self.schema_cache.add_listener(self.key_cache.invalidate)
+        self._search_support_ready: Optional[bool] = None
+        self._matview_stats: Dict[str, Dict[str, Any]] = {}
+        self._matview_jobs: Dict[str, Dict[str, Any]] = {}
+        self._matview_lock = threading.Lock()
+        self.matview_scheduler = MatviewRefreshScheduler(self._scheduled_matview_refresh)
+        # Статистика запросов приложения для советника по индексам
+        self.query_log = QueryLog()
+        # Гистограммы задержек методов и SQL-шаблонов (панель «Производительность»)
+        self.instrumentation = Instrumentation()
         
         # Настройка логирования - используем централизованный логгер
         self.logger = logging.getLogger("DB")
         self.logger.setLevel(logging.INFO)
         
-        self.logger.info(f"Инициализация DB для {dbname} на {host}:{port}")
+        self.logger.info("Инициализация DB для %s на %s:%s", dbname, host, port)
 
     def get_info(self) -> Dict[str, Any]:
         """
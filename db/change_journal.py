@@ -0,0 +1,81 @@
+"""
+Журнал изменений строк, сделанных приложением
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class ChangeJournal:
+    """
+    Последовательность изменений строк: вставка, обновление и удаление
+    с самими строками из RETURNING. По журналу окно с таблицей применяет
+    изменения к уже загруженным строкам вместо полного перезапроса.
+
+    Запись "reload" означает, что изменение нельзя описать построчно
+    (массовое обновление, каскад по внешнему ключу, триггер) — таблицу
+    нужно перечитать. Журнал хранит не более max_entries записей: если
+    нужные записи уже вытеснены, since() возвращает None.
+    """
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+    RELOAD = "reload"
+
+    def __init__(self, max_entries: int = 1000, max_rows: int = 1000):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._entries: "deque[Dict[str, Any]]" = deque(maxlen=max_entries)
+        self._position = 0
+
+    def position(self) -> int:
+        """Номер последней записи (точка отсчёта для since)."""
+        with self._lock:
+            return self._position
+
+    def record(self, table_name: str, operation: str, key_column: Optional[str] = None,
+               rows: Optional[List[Dict[str, Any]]] = None):
+        """
+        Добавляет изменение.
+
+        Args:
+            table_name: Таблица
+            operation: INSERT, UPDATE, DELETE или RELOAD
+            key_column: Первичный ключ (по нему строки сопоставляются с загруженными)
+            rows: Строки после изменения (для DELETE достаточно ключа)
+        """
+        rows = rows or []
+        if operation != self.RELOAD and (key_column is None or len(rows) > self.max_rows):
+            # Слишком крупное изменение дешевле применить повторным запросом
+            operation, rows = self.RELOAD, []
+        with self._lock:
+            self._position += 1
+            self._entries.append({
+                "position": self._position,
+                "table": table_name,
+                "operation": operation,
+                "key": key_column,
+                "rows": rows,
+            })
+
+    def record_reload(self, table_names: Optional[Iterable[str]] = None):
+        """Отмечает таблицы (None — все) как изменённые без построчного описания."""
+        for table_name in (table_names if table_names is not None else [None]):
+            self.record(table_name, self.RELOAD)
+
+    def since(self, position: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Изменения после position по порядку. Запись RELOAD с table=None
+        относится ко всем таблицам.
+
+        Returns:
+            Список изменений или None, если часть из них уже вытеснена из журнала
+        """
+        with self._lock:
+            if self._position == position:
+                return []
+            if not self._entries or self._entries[0]["position"] > position + 1:
+                return None
+            return [entry for entry in self._entries if entry["position"] > position]
@@ -0,0 +1,557 @@
+"""
+Компиляция CHECK-ограничений в функции Python для проверки строк без обращения к БД
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+# Лексемы: "идентификатор", 'строка', число, многосимвольные операторы, слово, одиночный символ
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<quoted>"(?:[^"]|"")*")
+      | (?P<string>'(?:[^']|'')*')
+      | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+      | (?P<op>::|<=|>=|<>|!=|[=<>(),+\-*/\[\]])
+      | (?P<word>[A-Za-z_][\w$]*)
+    )''', re.X)
+
+_COMPARISONS = {
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+}
+
+_ARITHMETIC = {
+    "+": lambda a, b: a + b,
+    "-": lambda a, b: a - b,
+    "*": lambda a, b: a * b,
+    "/": lambda a, b: a / b,
+}
+
+# Продолжения составных имён типов: character varying, double precision, timestamp without time zone
+_TYPE_NAME_TAIL = {"varying", "precision", "without", "with", "time", "zone"}
+_INTEGER_TYPES = {"integer", "int", "int2", "int4", "int8", "smallint", "bigint"}
+_NUMERIC_TYPES = {"numeric", "decimal", "real", "float4", "float8", "double precision", "money"}
+_TEXT_TYPES = {"text", "varchar", "character varying", "character", "char", "bpchar", "name"}
+
+Evaluator = Callable[[Dict[str, Any]], Any]
+
+
+class CheckCompileError(ValueError):
+    """Выражение CHECK содержит конструкцию, которую компилятор не поддерживает."""
+
+
+class _Unknown(Exception):
+    """Значение выражения нельзя вычислить в Python (несравнимые типы и т.п.)."""
+
+
+class CompiledCheck:
+    """
+    CHECK-ограничение, скомпилированное в функцию.
+
+    evaluate() следует трёхзначной логике SQL: ограничение нарушено, только
+    если выражение равно FALSE; NULL (None) ограничение не нарушает.
+    """
+
+    def __init__(self, sql: str, columns: FrozenSet[str], evaluator: Evaluator):
+        self.sql = sql
+        self.columns = columns
+        self._evaluator = evaluator
+
+    def evaluate(self, row: Dict[str, Any]) -> Optional[bool]:
+        """
+        Вычисляет выражение для строки.
+
+        Returns:
+            True/False — результат; None — NULL или значение нельзя вычислить
+            (не хватает столбцов, несравнимые типы)
+        """
+        if not self.columns.issubset(row.keys()):
+            return None
+        try:
+            result = self._evaluator(row)
+        except (_Unknown, TypeError, ValueError, ArithmeticError, InvalidOperation):
+            return None
+        return None if result is None else bool(result)
+
+    def is_violated(self, row: Dict[str, Any]) -> bool:
+        """True, если строка точно нарушает ограничение."""
+        return self.evaluate(row) is False
+
+
+@lru_cache(maxsize=512)
+def compile_check(sql: str) -> CompiledCheck:
+    """
+    Компилирует выражение CHECK (в виде CheckConstraint.sqltext или
+    pg_get_constraintdef) в CompiledCheck. Результат кэшируется по тексту.
+
+    Поддерживаются: сравнения, BETWEEN [SYMMETRIC], IN, op ANY/ALL (ARRAY[...]),
+    IS [NOT] NULL/TRUE/FALSE, AND/OR/NOT, арифметика, приведения ::тип,
+    функции array_length, cardinality, length, lower, upper, trim, abs, coalesce
+    и CURRENT_DATE.
+
+    Raises:
+        CheckCompileError: выражение содержит неподдерживаемую конструкцию
+    """
+    parser = _Parser(sql)
+    evaluator = parser.parse()
+    return CompiledCheck(sql, frozenset(parser.columns), evaluator)
+
+
+def _tokenize(sql: str) -> List[Tuple[str, str]]:
+    tokens, position = [], 0
+    sql = sql.rstrip()
+    while position < len(sql):
+        match = _TOKEN.match(sql, position)
+        if match is None or match.end() == position:
+            raise CheckCompileError(f"Неожиданный символ в выражении CHECK: {sql[position:position + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word":
+            # Имена без кавычек PostgreSQL приводит к нижнему регистру
+            value = value.lower()
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Рекурсивный спуск по выражению CHECK; каждое правило возвращает функцию от строки."""
+
+    def __init__(self, sql: str):
+        self.tokens = _tokenize(sql)
+        self.position = 0
+        self.columns = set()
+
+    # --- навигация по лексемам ---
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def accept(self, *values: str) -> Optional[str]:
+        kind, value = self.peek()
+        if kind in ("op", "word") and value in values:
+            self.position += 1
+            return value
+        return None
+
+    def expect(self, value: str):
+        if self.accept(value) is None:
+            raise CheckCompileError(f"Ожидалось '{value}', получено {self.peek()[1]!r}")
+
+    # --- грамматика ---
+    def parse(self) -> Evaluator:
+        evaluator = self.parse_or()
+        if self.position != len(self.tokens):
+            raise CheckCompileError(f"Неподдерживаемая конструкция: {self.peek()[1]!r}")
+        return evaluator
+
+    def parse_or(self) -> Evaluator:
+        operands = [self.parse_and()]
+        while self.accept("or"):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else _logical_or(operands)
+
+    def parse_and(self) -> Evaluator:
+        operands = [self.parse_not()]
+        while self.accept("and"):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else _logical_and(operands)
+
+    def parse_not(self) -> Evaluator:
+        if self.accept("not"):
+            operand = self.parse_not()
+            return lambda row: _not(operand(row))
+        return self.parse_predicate()
+
+    def parse_predicate(self) -> Evaluator:
+        left = self.parse_additive()
+
+        op = self.accept(*_COMPARISONS)
+        if op is not None:
+            quantifier = self.accept("any", "some", "all")
+            if quantifier is not None:
+                self.expect("(")
+                right = self.parse_or()
+                self.expect(")")
+                return _quantified(op, quantifier, left, right)
+            return _comparison(op, left, self.parse_additive())
+
+        if self.accept("is"):
+            negate = self.accept("not") is not None
+            target = self.accept("null", "true", "false")
+            if target is None:
+                raise CheckCompileError(f"Неподдерживаемая конструкция IS {self.peek()[1]!r}")
+            return _is(left, target, negate)
+
+        negate = self.accept("not") is not None
+        if self.accept("between"):
+            symmetric = self.accept("symmetric") is not None
+            low = self.parse_additive()
+            self.expect("and")
+            high = self.parse_additive()
+            return _between(left, low, high, symmetric, negate)
+        if self.accept("in"):
+            self.expect("(")
+            items = self.parse_list(")")
+            return _in(left, items, negate)
+        if negate:
+            raise CheckCompileError(f"Неподдерживаемая конструкция NOT {self.peek()[1]!r}")
+        return left
+
+    def parse_additive(self) -> Evaluator:
+        left = self.parse_multiplicative()
+        while True:
+            op = self.accept("+", "-")
+            if op is None:
+                return left
+            left = _arithmetic(op, left, self.parse_multiplicative())
+
+    def parse_multiplicative(self) -> Evaluator:
+        left = self.parse_unary()
+        while True:
+            op = self.accept("*", "/")
+            if op is None:
+                return left
+            left = _arithmetic(op, left, self.parse_unary())
+
+    def parse_unary(self) -> Evaluator:
+        if self.accept("-"):
+            operand = self.parse_unary()
+            return lambda row: _negate(operand(row))
+        if self.accept("+"):
+            return self.parse_unary()
+        return self.parse_postfix()
+
+    def parse_postfix(self) -> Evaluator:
+        evaluator = self.parse_primary()
+        while self.accept("::"):
+            evaluator = _cast(evaluator, self.parse_type_name())
+        return evaluator
+
+    def parse_type_name(self) -> Tuple[str, bool]:
+        kind, value = self.peek()
+        if kind == "quoted":
+            self.position += 1
+            name = value[1:-1].replace('""', '"')
+        elif kind == "word":
+            self.position += 1
+            name = value
+            while self.peek()[0] == "word" and self.peek()[1] in _TYPE_NAME_TAIL:
+                name += " " + self.tokens[self.position][1]
+                self.position += 1
+        else:
+            raise CheckCompileError(f"Ожидалось имя типа, получено {value!r}")
+        if self.accept("("):
+            # Модификаторы типа (numeric(10,2), varchar(255)) на проверку не влияют
+            self.parse_list(")")
+        is_array = False
+        while self.accept("["):
+            self.expect("]")
+            is_array = True
+        return name, is_array
+
+    def parse_list(self, closing: str) -> List[Evaluator]:
+        items = []
+        if self.accept(closing):
+            return items
+        while True:
+            items.append(self.parse_or())
+            if self.accept(closing):
+                return items
+            self.expect(",")
+
+    def parse_primary(self) -> Evaluator:
+        kind, value = self.peek()
+        if kind is None:
+            raise CheckCompileError("Неожиданный конец выражения CHECK")
+        self.position += 1
+
+        if kind == "number":
+            number = Decimal(value) if any(c in value for c in ".eE") else int(value)
+            return lambda row: number
+        if kind == "string":
+            text_value = value[1:-1].replace("''", "'")
+            return lambda row: text_value
+        if kind == "quoted":
+            return self.column(value[1:-1].replace('""', '"'))
+        if kind == "op" and value == "(":
+            inner = self.parse_or()
+            self.expect(")")
+            return inner
+        if kind == "word":
+            if value == "null":
+                return lambda row: None
+            if value in ("true", "false"):
+                flag = value == "true"
+                return lambda row: flag
+            if value == "current_date":
+                return lambda row: date.today()
+            if value == "array" and self.accept("["):
+                items = self.parse_list("]")
+                return lambda row: [item(row) for item in items]
+            if self.accept("("):
+                return _function(value, self.parse_list(")"))
+            return self.column(value)
+        raise CheckCompileError(f"Неподдерживаемая конструкция: {value!r}")
+
+    def column(self, name: str) -> Evaluator:
+        self.columns.add(name)
+        return lambda row: row[name]
+
+
+# --- вычисление ---
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value) if not isinstance(value, Decimal) else value
+
+
+def _to_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value.strip()[:10], "%Y-%m-%d").date()
+    raise _Unknown()
+
+
+def _coerce_pair(a: Any, b: Any) -> Tuple[Any, Any]:
+    """Приводит операнды к сравнимым типам так же, как это сделала бы БД для литералов."""
+    if isinstance(a, date) or isinstance(b, date):
+        return _to_date(a), _to_date(b)
+    if _is_number(a) and _is_number(b):
+        if isinstance(a, float) != isinstance(b, float):
+            return _to_decimal(a), _to_decimal(b)
+        return a, b
+    if _is_number(a) and isinstance(b, str):
+        return _to_decimal(a), _to_decimal(b.strip())
+    if isinstance(a, str) and _is_number(b):
+        return _to_decimal(a.strip()), _to_decimal(b)
+    if type(a) is not type(b) and not (isinstance(a, str) and isinstance(b, str)):
+        if not (isinstance(a, bool) and isinstance(b, bool)):
+            raise _Unknown()
+    return a, b
+
+
+def _compare(op: str, a: Any, b: Any) -> Optional[bool]:
+    if a is None or b is None:
+        return None
+    a, b = _coerce_pair(a, b)
+    return _COMPARISONS[op](a, b)
+
+
+def _comparison(op: str, left: Evaluator, right: Evaluator) -> Evaluator:
+    return lambda row: _compare(op, left(row), right(row))
+
+
+def _logical_and(operands: List[Evaluator]) -> Evaluator:
+    return lambda row: _all_of(operand(row) for operand in operands)
+
+
+def _logical_or(operands: List[Evaluator]) -> Evaluator:
+    return lambda row: _any_of(operand(row) for operand in operands)
+
+
+def _not(value: Any) -> Optional[bool]:
+    return None if value is None else not value
+
+
+def _is(operand: Evaluator, target: str, negate: bool) -> Evaluator:
+    expected = {"null": None, "true": True, "false": False}[target]
+
+    def evaluate(row):
+        value = operand(row)
+        if target == "null":
+            matched = value is None
+        else:
+            matched = value is not None and bool(value) == expected
+        return matched != negate
+    return evaluate
+
+
+def _all_of(values) -> Optional[bool]:
+    """AND по уже вычисленным значениям (трёхзначная логика)."""
+    result = True
+    for value in values:
+        if value is None:
+            result = None
+        elif not value:
+            return False
+    return result
+
+
+def _any_of(values) -> Optional[bool]:
+    """OR по уже вычисленным значениям (трёхзначная логика)."""
+    result = False
+    for value in values:
+        if value is None:
+            result = None
+        elif value:
+            return True
+    return result
+
+
+def _between(operand: Evaluator, low: Evaluator, high: Evaluator, symmetric: bool, negate: bool) -> Evaluator:
+    def evaluate(row):
+        value, low_value, high_value = operand(row), low(row), high(row)
+        if symmetric and low_value is not None and high_value is not None:
+            low_value, high_value = sorted(_coerce_pair(low_value, high_value))
+        result = _all_of((_compare(">=", value, low_value), _compare("<=", value, high_value)))
+        return _not(result) if negate else result
+    return evaluate
+
+
+def _in(operand: Evaluator, items: List[Evaluator], negate: bool) -> Evaluator:
+    def evaluate(row):
+        value = operand(row)
+        result = _any_of(_compare("=", value, item(row)) for item in items)
+        return _not(result) if negate else result
+    return evaluate
+
+
+def _quantified(op: str, quantifier: str, left: Evaluator, right: Evaluator) -> Evaluator:
+    combine = _all_of if quantifier == "all" else _any_of
+
+    def evaluate(row):
+        value, items = left(row), right(row)
+        if items is None:
+            return None
+        if not isinstance(items, (list, tuple)):
+            raise _Unknown()
+        return combine(_compare(op, value, item) for item in items)
+    return evaluate
+
+
+def _arithmetic(op: str, left: Evaluator, right: Evaluator) -> Evaluator:
+    def evaluate(row):
+        a, b = left(row), right(row)
+        if a is None or b is None:
+            return None
+        if isinstance(a, date) and _is_number(b) and op in "+-":
+            # date ± integer — сдвиг на число дней
+            return a + timedelta(days=int(b)) if op == "+" else a - timedelta(days=int(b))
+        if isinstance(a, date) and isinstance(b, date) and op == "-":
+            return (a - b).days
+        if not (_is_number(a) and _is_number(b)):
+            raise _Unknown()
+        if isinstance(a, float) != isinstance(b, float):
+            a, b = _to_decimal(a), _to_decimal(b)
+        if op == "/" and isinstance(a, int) and isinstance(b, int):
+            # Целочисленное деление SQL отбрасывает дробную часть
+            return int(a / b)
+        return _ARITHMETIC[op](a, b)
+    return evaluate
+
+
+def _negate(value: Any) -> Any:
+    if value is None:
+        return None
+    if not _is_number(value):
+        raise _Unknown()
+    return -value
+
+
+def _cast_value(value: Any, type_name: str) -> Any:
+    if value is None:
+        return None
+    if type_name in _INTEGER_TYPES:
+        return int(_to_decimal(value.strip() if isinstance(value, str) else value))
+    if type_name in _NUMERIC_TYPES:
+        return _to_decimal(value.strip() if isinstance(value, str) else value)
+    if type_name == "date":
+        return _to_date(value)
+    if type_name in ("boolean", "bool"):
+        if isinstance(value, str):
+            return value.strip().lower() in ("t", "true", "yes", "on", "1")
+        return bool(value)
+    if type_name in _TEXT_TYPES:
+        return value if isinstance(value, str) else str(value)
+    # Пользовательские типы (ENUM и др.) сравниваются по значению как есть
+    return value
+
+
+def _cast(operand: Evaluator, type_info: Tuple[str, bool]) -> Evaluator:
+    type_name, is_array = type_info
+
+    def evaluate(row):
+        value = operand(row)
+        if is_array and isinstance(value, (list, tuple)):
+            return [_cast_value(item, type_name) for item in value]
+        return _cast_value(value, type_name)
+    return evaluate
+
+
+def _array_length(values, dimension=1):
+    if values is None or dimension is None:
+        return None
+    if not isinstance(values, (list, tuple)):
+        raise _Unknown()
+    # Как в PostgreSQL: у пустого массива нет измерений — результат NULL
+    if dimension != 1 or not values:
+        return None
+    return len(values)
+
+
+def _text_function(function: Callable[[str], Any]) -> Callable[[Any], Any]:
+    def evaluate(value):
+        if value is None:
+            return None
+        if not isinstance(value, str):
+            raise _Unknown()
+        return function(value)
+    return evaluate
+
+
+def _cardinality(values):
+    if values is None:
+        return None
+    if not isinstance(values, (list, tuple)):
+        raise _Unknown()
+    return len(values)
+
+
+def _abs(value):
+    if value is None:
+        return None
+    if not _is_number(value):
+        raise _Unknown()
+    return abs(value)
+
+
+def _coalesce(*values):
+    return next((value for value in values if value is not None), None)
+
+
+_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "array_length": _array_length,
+    "cardinality": _cardinality,
+    "length": _text_function(len),
+    "char_length": _text_function(len),
+    "character_length": _text_function(len),
+    "lower": _text_function(str.lower),
+    "upper": _text_function(str.upper),
+    "btrim": _text_function(str.strip),
+    "trim": _text_function(str.strip),
+    "abs": _abs,
+    "coalesce": _coalesce,
+}
+
+
+def _function(name: str, arguments: List[Evaluator]) -> Evaluator:
+    function = _FUNCTIONS.get(name)
+    if function is None:
+        raise CheckCompileError(f"Функция {name}() не поддерживается")
+    return lambda row: function(*(argument(row) for argument in arguments))
@@ -0,0 +1,326 @@
+"""
+Детерминированный генератор данных библиотеки заданного объёма (Books, Readers, Issued_Books)
+"""
+
+import random
+import time
+from array import array
+from bisect import bisect
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+_ADJECTIVES = ["Тихий", "Последний", "Белый", "Чёрный", "Золотой", "Старый", "Новый", "Далёкий", "Северный",
+               "Южный", "Тайный", "Забытый", "Вечный", "Морской", "Лесной", "Горный", "Ночной", "Зимний",
+               "Летний", "Осенний"]
+_NOUNS = ["сад", "город", "берег", "путь", "дом", "лес", "огонь", "ветер", "остров", "мост", "замок", "век",
+          "свет", "голос", "след", "круг", "мир", "сон", "знак", "час"]
+_SURNAMES = ["Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Васильев", "Соколов", "Михайлов", "Новиков",
+             "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев", "Семёнов", "Егоров", "Павлов", "Козлов",
+             "Степанов", "Николаев", "Орлов", "Андреев", "Макаров", "Никитин", "Захаров", "Зайцев", "Соловьёв",
+             "Борисов", "Яковлев", "Григорьев"]
+_MALE_NAMES = ["Александр", "Сергей", "Дмитрий", "Андрей", "Алексей", "Иван", "Михаил", "Николай", "Павел",
+               "Владимир"]
+_FEMALE_NAMES = ["Анна", "Мария", "Елена", "Ольга", "Наталья", "Татьяна", "Ирина", "Светлана", "Екатерина",
+                 "Юлия"]
+# Отчество: (мужская форма, женская форма)
+_PATRONYMICS = [("Александрович", "Александровна"), ("Сергеевич", "Сергеевна"), ("Иванович", "Ивановна"),
+                ("Петрович", "Петровна"), ("Михайлович", "Михайловна"), ("Николаевич", "Николаевна"),
+                ("Андреевич", "Андреевна"), ("Викторович", "Викторовна")]
+_CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург", "Самара", "Омск", "Пермь"]
+_STREETS = ["Ленина", "Мира", "Садовая", "Школьная", "Лесная", "Советская", "Молодёжная", "Центральная",
+            "Набережная", "Гагарина"]
+
+# Доли жанров (жанры, которых нет в словаре, получают вес 2)
+GENRE_WEIGHTS = {"Роман": 12, "Детектив": 10, "Фэнтези": 8, "Научная фантастика": 8, "Классика": 8,
+                 "Детская литература": 7, "Триллер": 6, "Приключения": 5, "Поэзия": 4, "Биография": 3}
+# Состав читателей: категория → (доля, процент скидки)
+DISCOUNT_MIX = {"Обычный": (60, 0), "Студент": (20, 15), "Пенсионер": (12, 25), "Член_клуба": (5, 10),
+                "Ветеран": (3, 50)}
+# Повреждения при возврате: тип → (доля, штраф в процентах от залога)
+DAMAGE_MIX = {"Нет": (900, 0), "Царапина": (50, 5), "Запачкана": (20, 10), "Порвана_обложка": (15, 20),
+              "Потеряна_страница": (10, 30), "Утеряна": (5, 100)}
+
+
+class ZipfSampler:
+    """Выбор номера 0..n-1 с вероятностью, пропорциональной 1 / (номер + 1) ** s."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self._cum_weights = list(accumulate((rank + 1) ** -s for rank in range(n)))
+        self._total = self._cum_weights[-1]
+        self._random = rng.random
+
+    def __call__(self) -> int:
+        return bisect(self._cum_weights, self._random() * self._total)
+
+
+def _cents(value: int) -> Decimal:
+    return Decimal(value).scaleb(-2)
+
+
+class LibraryDataGenerator:
+    """
+    Генератор строк Books, Readers и Issued_Books.
+
+    Один seed — одни и те же данные. У каждой таблицы свой генератор случайных
+    чисел, поэтому данные таблицы не зависят от того, какие ещё таблицы
+    генерировались. Строки соблюдают все CHECK и UNIQUE из _build_metadata;
+    идентификаторы книг и читателей считаются равными 1..books и 1..readers
+    (таблицы заполняются с нуля).
+
+    Популярность книг распределена по Ципфу (book_skew), активность
+    читателей — тоже (reader_skew, меньше — равномернее). Выдачи идут
+    в порядке дат: часть возвращается с опозданием (overdue_rate), выдачи,
+    срок возврата которых позже end_date, остаются открытыми.
+    """
+
+    def __init__(self,
+                 books: int = 1_000,
+                 readers: int = 500,
+                 loans: int = 10_000,
+                 seed: int = 42,
+                 book_skew: float = 1.1,
+                 reader_skew: float = 0.6,
+                 start_date: date = date(2020, 1, 1),
+                 end_date: date = date(2024, 12, 31),
+                 overdue_rate: float = 0.15,
+                 overdue_mean_days: float = 10.0,
+                 genre_weights: Optional[Dict[str, int]] = None,
+                 discount_mix: Optional[Dict[str, tuple]] = None,
+                 damage_mix: Optional[Dict[str, tuple]] = None):
+        if books < 1 or readers < 1 or loans < 0:
+            raise ValueError("Число книг и читателей должно быть положительным, выдач — неотрицательным")
+        if end_date < start_date:
+            raise ValueError("end_date раньше start_date")
+        self.books_count = books
+        self.readers_count = readers
+        self.loans_count = loans
+        self.seed = seed
+        self.book_skew = book_skew
+        self.reader_skew = reader_skew
+        self.start_date = start_date
+        self.end_date = end_date
+        self.overdue_rate = overdue_rate
+        self.overdue_mean_days = overdue_mean_days
+        self.genre_weights = genre_weights or GENRE_WEIGHTS
+        self.discount_mix = discount_mix or DISCOUNT_MIX
+        self.damage_mix = damage_mix or DAMAGE_MIX
+        self._prices: Optional[tuple] = None
+        self._discounts: Optional[tuple] = None
+
+    def _rng(self, stream: str) -> random.Random:
+        return random.Random(f"{self.seed}:{stream}")
+
+    # ------------------------------------------------------------------
+    # Атрибуты, общие для нескольких таблиц
+    # ------------------------------------------------------------------
+    def _book_prices(self):
+        """(залог, ставка в день) каждой книги в копейках; нужны и книгам, и выдачам."""
+        if self._prices is None:
+            rng = self._rng("prices")
+            deposits, rates = array("l"), array("l")
+            for _ in range(self.books_count):
+                rate = rng.randrange(10, 200) * 100
+                rates.append(rate)
+                deposits.append(rate * rng.randrange(5, 15))
+            self._prices = (deposits, rates)
+        return self._prices
+
+    def _reader_categories(self):
+        """(индекс категории, процент скидки) каждого читателя."""
+        if self._discounts is None:
+            rng = self._rng("discounts")
+            names = list(self.discount_mix)
+            picks = rng.choices(range(len(names)), weights=[self.discount_mix[name][0] for name in names],
+                                k=self.readers_count)
+            categories = array("b", picks)
+            percents = array("b", (self.discount_mix[names[index]][1] for index in picks))
+            self._discounts = (categories, percents)
+        return self._discounts
+
+    # ------------------------------------------------------------------
+    # Таблицы
+    # ------------------------------------------------------------------
+    def books(self, genres: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """Строки Books; genres — допустимые значения ENUM (по умолчанию ключи genre_weights)."""
+        rng = self._rng("books")
+        genres = list(genres or self.genre_weights)
+        genre_cum = list(accumulate(self.genre_weights.get(genre, 2) for genre in genres))
+        deposits, rates = self._book_prices()
+        # Пул авторов; у популярных авторов больше книг
+        authors_pool = max(self.books_count // 4, 1)
+        author = ZipfSampler(authors_pool, 1.0, rng)
+        combos = len(_ADJECTIVES) * len(_NOUNS)
+
+        for i in range(self.books_count):
+            # Номер части делает название уникальным, а значит и пару (title, authors)
+            title = f"{_ADJECTIVES[i % len(_ADJECTIVES)]} {_NOUNS[i // len(_ADJECTIVES) % len(_NOUNS)]}"
+            if i >= combos:
+                title += f". Книга {i // combos + 1}"
+            count = min(1 if rng.random() < 0.85 else rng.choice((2, 3)), authors_pool)
+            names = []
+            while len(names) < count:
+                name = self._author_name(author())
+                if name not in names:
+                    names.append(name)
+            yield {
+                "title": title,
+                "authors": names,
+                "genre": genres[bisect(genre_cum, rng.random() * genre_cum[-1])],
+                "deposit_amount": _cents(deposits[i]),
+                "daily_rental_rate": _cents(rates[i]),
+            }
+
+    @staticmethod
+    def _author_name(index: int) -> str:
+        first = _MALE_NAMES[index % len(_MALE_NAMES)]
+        last = _SURNAMES[index // len(_MALE_NAMES) % len(_SURNAMES)]
+        initial = chr(ord("А") + index // (len(_MALE_NAMES) * len(_SURNAMES)) % 32)
+        return f"{first} {initial}. {last}"
+
+    def readers(self) -> Iterator[Dict[str, Any]]:
+        """Строки Readers."""
+        rng = self._rng("readers")
+        names = list(self.discount_mix)
+        categories, percents = self._reader_categories()
+        for i in range(self.readers_count):
+            female = rng.random() < 0.55
+            surname = rng.choice(_SURNAMES)
+            patronymic = rng.choice(_PATRONYMICS)[female] if rng.random() < 0.95 else None
+            yield {
+                "last_name": surname + "а" if female else surname,
+                "first_name": rng.choice(_FEMALE_NAMES if female else _MALE_NAMES),
+                "middle_name": patronymic,
+                "address": f"г. {rng.choice(_CITIES)}, ул. {rng.choice(_STREETS)}, "
+                           f"д. {rng.randrange(1, 150)}, кв. {rng.randrange(1, 300)}",
+                # Уникальный телефон делает уникальной и четвёрку (ФИО, телефон)
+                "phone": f"+79{i + 1:09d}",
+                "discount_category": names[categories[i]],
+                "discount_percent": percents[i],
+            }
+
+    def loans(self) -> Iterator[Dict[str, Any]]:
+        """Строки Issued_Books в порядке дат выдачи."""
+        rng = self._rng("loans")
+        random_ = rng.random
+        deposits, rates = self._book_prices()
+        _, percents = self._reader_categories()
+
+        # Номер по популярности → id; перестановка, чтобы популярные книги не шли подряд
+        book_ids = list(range(1, self.books_count + 1))
+        rng.shuffle(book_ids)
+        reader_ids = list(range(1, self.readers_count + 1))
+        rng.shuffle(reader_ids)
+        pick_book = ZipfSampler(self.books_count, self.book_skew, rng)
+        pick_reader = ZipfSampler(self.readers_count, self.reader_skew, rng)
+
+        damage_names = list(self.damage_mix)
+        damage_cum = list(accumulate(self.damage_mix[name][0] for name in damage_names))
+
+        # (книга, читатель) по дате возврата: UNIQUE (book_id, reader_id, actual_return_date).
+        # Выдача не может вернуться раньше, чем выдана, — прошедшие даты забываются
+        returned_on: Dict[date, set] = {}
+        for issue_date, count in self._loans_per_day():
+            for expired in [day for day in returned_on if day < issue_date]:
+                del returned_on[expired]
+            for _ in range(count):
+                book = pick_book()
+                book_id = book_ids[book]
+                reader_id = reader_ids[pick_reader()]
+                period = (14, 21, 30)[int(random_() * 3)]
+                if random_() < self.overdue_rate:
+                    days = period + 1 + int(rng.expovariate(1 / self.overdue_mean_days))
+                else:
+                    days = 1 + int(random_() * period)
+                returned = issue_date + timedelta(days=days)
+                row = {
+                    "book_id": book_id,
+                    "reader_id": reader_id,
+                    "issue_date": issue_date,
+                    "expected_return_date": issue_date + timedelta(days=period),
+                    "actual_return_date": None,
+                    "damage_type": damage_names[0],
+                    "damage_fine": Decimal(0),
+                    "final_rental_cost": None,
+                    "paid": False,
+                    "actual_rental_days": None,
+                }
+                attempts = 0
+                while returned <= self.end_date and (book_id, reader_id) in returned_on.get(returned, ()):
+                    # Та же книга у того же читателя с тем же днём возврата: другой читатель,
+                    # а если их слишком мало — возврат на день позже
+                    attempts += 1
+                    if attempts <= 10:
+                        reader_id = reader_ids[pick_reader()]
+                    else:
+                        days += 1
+                        returned += timedelta(days=1)
+                if returned <= self.end_date:
+                    returned_on.setdefault(returned, set()).add((book_id, reader_id))
+                    damage = bisect(damage_cum, random_() * damage_cum[-1])
+                    rate = rates[book_id - 1]
+                    row.update(
+                        reader_id=reader_id,
+                        actual_return_date=returned,
+                        actual_rental_days=days,
+                        final_rental_cost=_cents(rate * days * (100 - percents[reader_id - 1]) // 100),
+                        damage_type=damage_names[damage],
+                        damage_fine=_cents(deposits[book_id - 1] * self.damage_mix[damage_names[damage]][1] // 100),
+                        paid=random_() < 0.95,
+                    )
+                yield row
+
+    def _loans_per_day(self) -> Iterator[tuple]:
+        """(дата, число выдач): в выходные выдач на треть больше; сумма точно равна loans_count."""
+        days = (self.end_date - self.start_date).days + 1
+        weights = [1.3 if (self.start_date + timedelta(days=day)).weekday() >= 5 else 1.0 for day in range(days)]
+        total = sum(weights)
+        issued = 0
+        cumulative = 0.0
+        for day, weight in enumerate(weights):
+            cumulative += weight
+            target = round(self.loans_count * cumulative / total)
+            if target > issued:
+                yield self.start_date + timedelta(days=day), target - issued
+                issued = target
+
+    # ------------------------------------------------------------------
+    # Загрузка
+    # ------------------------------------------------------------------
+    def check_enums(self, db):
+        """Проверяет, что жанры, категории скидок и типы повреждений есть в ENUM схемы."""
+        for table_name, column_name, values in (("Books", "genre", self.genre_weights),
+                                                ("Readers", "discount_category", self.discount_mix),
+                                                ("Issued_Books", "damage_type", self.damage_mix)):
+            allowed = set(db.tables[table_name].c[column_name].type.enums)
+            unknown = set(values) - allowed
+            if unknown:
+                raise ValueError(f"{table_name}.{column_name}: значений нет в ENUM: {sorted(unknown)}")
+
+    def populate(self, db, recreate: bool = True) -> Dict[str, Dict[str, float]]:
+        """
+        Заполняет таблицы через COPY (insert_many без построчной проверки в Python;
+        ограничения проверяет сама БД).
+
+        Args:
+            db: Подключённый экземпляр DB
+            recreate: Пересоздать схему перед загрузкой (id должны начинаться с 1)
+
+        Returns:
+            {таблица: {'rows': вставлено, 'seconds': время}}
+        """
+        self.check_enums(db)
+        if recreate and not (db.drop_schema() and db.create_schema()):
+            raise RuntimeError("Не удалось пересоздать схему")
+
+        genres: List[str] = list(db.tables["Books"].c.genre.type.enums)
+        stats = {}
+        for table_name, rows in (("Books", self.books(genres)), ("Readers", self.readers()),
+                                 ("Issued_Books", self.loans())):
+            started = time.perf_counter()
+            inserted, errors = db.insert_many(table_name, rows, method="copy", validate=False)
+            if errors:
+                raise RuntimeError(f"Ошибка загрузки {table_name}: {errors[0][1]}")
+            stats[table_name] = {"rows": inserted, "seconds": time.perf_counter() - started}
+        return stats
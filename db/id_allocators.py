@@ -0,0 +1,145 @@
+"""
+Стратегии выделения первичных ключей для вставки записей
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+
+class IdAllocator:
+    """
+    Базовая стратегия выделения ID.
+
+    allocate() вызывается внутри транзакции вставки и возвращает явный ID
+    либо None — тогда значение назначает сама БД (identity/sequence).
+    """
+
+    name = "base"
+
+    def allocate(self, conn, table_name: str, pk_col: str) -> Optional[int]:
+        return None
+
+    def release(self, table_name: str, ids: Iterable[int]):
+        """Сообщает стратегии об освободившихся (удалённых) ID."""
+
+    def reset(self, table_name: Optional[str] = None):
+        """Сбрасывает закэшированное состояние (например, после DDL)."""
+
+
+class SequenceIdAllocator(IdAllocator):
+    """
+    ID назначает PostgreSQL через identity/sequence столбца.
+
+    Вставка O(1), безопасна при конкурентной работе; удалённые ID повторно не используются.
+    """
+
+    name = "sequence"
+
+
+class GapReuseIdAllocator(IdAllocator):
+    """
+    Повторно использует «дыры» в нумерации первичного ключа.
+
+    Свободные диапазоны хранятся в процессе в виде кучи (start, end), поэтому
+    выбор минимального свободного ID стоит O(log n). Куча загружается один раз
+    (оконная функция по индексу PK), пополняется при удалениях через release()
+    и перечитывается раз в refresh_interval секунд. Когда дыр нет, ID назначает
+    sequence столбца — счётчик последовательности не рассинхронизируется.
+
+    Выделение сериализуется транзакционной advisory-блокировкой на таблицу, а
+    кандидат перепроверяется точечным поиском по PK: другие процессы со своим
+    кэшем не получат тот же ID.
+    """
+
+    name = "gap_reuse"
+
+    def __init__(self, refresh_interval: float = 300.0):
+        self.refresh_interval = refresh_interval
+        self.logger = logging.getLogger("DB")
+        self._lock = threading.Lock()
+        self._free: Dict[str, List[Tuple[int, int]]] = {}
+        self._loaded_at: Dict[str, float] = {}
+
+    def allocate(self, conn, table_name: str, pk_col: str) -> Optional[int]:
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"id_alloc:{table_name}"}
+        )
+        with self._lock:
+            if self._is_stale(table_name):
+                self._load_gaps(conn, table_name, pk_col)
+            heap = self._free[table_name]
+
+            exists_sql = text(f'SELECT 1 FROM "{table_name}" WHERE "{pk_col}" = :id')
+            while heap:
+                start, end = heapq.heappop(heap)
+                if start < end:
+                    heapq.heappush(heap, (start + 1, end))
+                # Кэш мог устареть: ID мог занять другой процесс
+                if conn.execute(exists_sql, {"id": start}).first() is None:
+                    return start
+        return None
+
+    def release(self, table_name: str, ids: Iterable[int]):
+        with self._lock:
+            heap = self._free.get(table_name)
+            if heap is None:
+                # Состояние ещё не загружено — дыры найдутся при первой загрузке
+                return
+            for free_id in ids:
+                if isinstance(free_id, int):
+                    heapq.heappush(heap, (free_id, free_id))
+
+    def reset(self, table_name: Optional[str] = None):
+        with self._lock:
+            if table_name is None:
+                self._free.clear()
+                self._loaded_at.clear()
+            else:
+                self._free.pop(table_name, None)
+                self._loaded_at.pop(table_name, None)
+
+    def _is_stale(self, table_name: str) -> bool:
+        loaded_at = self._loaded_at.get(table_name)
+        return loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval
+
+    def _load_gaps(self, conn, table_name: str, pk_col: str):
+        """Читает свободные диапазоны ID ниже текущего максимума."""
+        rows = conn.execute(text(f"""
+            SELECT gap_start, gap_end FROM (
+                SELECT "{pk_col}" + 1 AS gap_start,
+                       LEAD("{pk_col}") OVER (ORDER BY "{pk_col}") - 1 AS gap_end
+                FROM "{table_name}"
+                UNION ALL
+                SELECT 1, MIN("{pk_col}") - 1 FROM "{table_name}"
+            ) gaps
+            WHERE gap_end >= gap_start
+        """)).fetchall()
+        heap = [(int(start), int(end)) for start, end in rows]
+        heapq.heapify(heap)
+        self._free[table_name] = heap
+        self._loaded_at[table_name] = time.monotonic()
+        self.logger.info("Загружено %s диапазонов свободных ID для '%s'", len(heap), table_name)
+
+
+ID_ALLOCATORS = {
+    SequenceIdAllocator.name: SequenceIdAllocator,
+    GapReuseIdAllocator.name: GapReuseIdAllocator,
+}
+
+
+def make_id_allocator(strategy) -> IdAllocator:
+    """Создаёт стратегию по имени ("sequence", "gap_reuse") или возвращает переданный объект."""
+    if isinstance(strategy, IdAllocator):
+        return strategy
+    if strategy is None:
+        return SequenceIdAllocator()
+    try:
+        return ID_ALLOCATORS[strategy]()
+    except KeyError:
+        raise ValueError(f"Неизвестная стратегия выделения ID: {strategy}")
@@ -0,0 +1,197 @@
+"""
+Подбор индексов-кандидатов по тексту запросов
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .sql_utils import strip_sql_comments, unquote_identifier
+
+_IDENT = r'(?:"[^"]+"|[A-Za-z_][\w$]*)'
+_COLREF = rf'(?:({_IDENT})\s*\.\s*)?({_IDENT})'
+_CAST = r'(?:\s*::\s*\w+(?:\s*\[\])?)?'
+
+_KEYWORDS = {
+    "select", "from", "where", "join", "on", "and", "or", "not", "in", "is", "null", "true", "false",
+    "left", "right", "inner", "outer", "full", "cross", "natural", "using", "group", "order", "by",
+    "having", "limit", "offset", "fetch", "union", "all", "any", "some", "exists", "between", "like",
+    "ilike", "similar", "to", "as", "asc", "desc", "nulls", "first", "last", "case", "when", "then",
+    "else", "end", "distinct", "with", "lateral", "window", "for", "array", "interval", "current_date",
+    "now", "rollup", "cube", "grouping", "sets", "tablesample", "returning", "set", "values", "update",
+    "delete", "insert", "into", "only",
+}
+
+_TABLE_REF = re.compile(
+    rf'\b(?:FROM|JOIN|UPDATE|INTO)\s+(?:ONLY\s+)?({_IDENT})(?!\s*[.(])(?:\s+(?:AS\s+)?({_IDENT}))?', re.I)
+
+# (шаблон, вид использования столбца)
+_PREDICATES = [
+    # a.x = b.y — соединение
+    (re.compile(rf'{_COLREF}{_CAST}\s*=\s*{_COLREF}{_CAST}(?!\s*\()'), "join"),
+    (re.compile(rf'{_COLREF}{_CAST}\s+(?:NOT\s+)?(?:I?LIKE|SIMILAR\s+TO)\b', re.I), "pattern"),
+    (re.compile(rf'{_COLREF}{_CAST}\s*!?~\*?', re.I), "pattern"),
+    (re.compile(rf'\b(?:LOWER|UPPER|array_to_string|search_array_to_text)\s*\(\s*{_COLREF}{_CAST}'
+                rf'[^)]*\)\s*(?:(?:NOT\s+)?(?:I?LIKE|SIMILAR\s+TO)\b|!?~)', re.I), "pattern"),
+    (re.compile(rf'{_COLREF}{_CAST}\s*(?:@>|<@|&&)', re.I), "array"),
+    (re.compile(rf'\bANY\s*\(\s*{_COLREF}{_CAST}\s*\)', re.I), "array"),
+    (re.compile(rf'{_COLREF}{_CAST}\s*(?:=|\bIN\s*\(|\bIS\s+(?:NOT\s+)?NULL)', re.I), "eq"),
+    (re.compile(rf'{_COLREF}{_CAST}\s*(?:<=|>=|<(?![>=@])|>(?!=)|\bBETWEEN\b)', re.I), "range"),
+]
+
+_ORDER_BY = re.compile(r'\bORDER\s+BY\s+(.+?)(?=\bLIMIT\b|\bOFFSET\b|\bFETCH\b|\bFOR\b|\)|$)', re.I | re.S)
+
+
+def _table_aliases(sql: str, table_columns: Dict[str, Set[str]]) -> Dict[str, str]:
+    """Сопоставляет алиасы и имена таблиц запроса известным таблицам."""
+    aliases = {}
+    for match in _TABLE_REF.finditer(sql):
+        table = unquote_identifier(match.group(1))
+        if table not in table_columns:
+            # Имена без кавычек PostgreSQL приводит к нижнему регистру, а таблицы могут быть "Books"
+            table = next((name for name in table_columns if name.lower() == table.lower()), None)
+        if table is None:
+            continue
+        aliases[table] = table
+        aliases[match.group(1).strip('"')] = table
+        alias = match.group(2)
+        if alias and alias.lower() not in _KEYWORDS:
+            aliases[alias.strip('"')] = table
+    return aliases
+
+
+def _resolve_column(qualifier: Optional[str], column: str, aliases: Dict[str, str],
+                    table_columns: Dict[str, Set[str]]) -> Optional[Tuple[str, str]]:
+    column = column.strip('"')
+    if column.lower() in _KEYWORDS:
+        return None
+    if qualifier:
+        table = aliases.get(qualifier.strip('"'))
+        if table and column in table_columns[table]:
+            return table, column
+        return None
+    owners = {table for table in aliases.values() if column in table_columns[table]}
+    if len(owners) == 1:
+        return owners.pop(), column
+    return None
+
+
+def extract_column_usage(sql: str, table_columns: Dict[str, Set[str]]) -> List[Tuple[str, str, str]]:
+    """
+    Находит столбцы, по которым запрос фильтрует, соединяет и сортирует.
+
+    Args:
+        sql: Текст запроса
+        table_columns: {таблица: множество столбцов} известных таблиц
+
+    Returns:
+        Список (таблица, столбец, вид): вид — "eq", "range", "join", "sort",
+        "pattern" (LIKE/регулярные выражения) или "array" (@>, &&, ANY).
+    """
+    sql = strip_sql_comments(sql)
+    # Строковые литералы могут содержать что угодно, включая похожие на условия фрагменты
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    aliases = _table_aliases(sql, table_columns)
+    if not aliases:
+        return []
+
+    usage: List[Tuple[str, str, str]] = []
+    seen_spans: Set[Tuple[int, int]] = set()
+    for pattern, kind in _PREDICATES:
+        for match in pattern.finditer(sql):
+            if match.span(2) in seen_spans:
+                continue
+            groups = match.groups()
+            refs = [(groups[0], groups[1])]
+            if kind == "join":
+                refs.append((groups[2], groups[3]))
+            resolved = [_resolve_column(q, c, aliases, table_columns) for q, c in refs]
+            if kind == "join" and not all(resolved):
+                continue
+            seen_spans.add(match.span(2))
+            usage.extend((table, column, kind) for table, column in filter(None, resolved))
+
+    for match in _ORDER_BY.finditer(sql):
+        for item in match.group(1).split(","):
+            ref = re.match(rf'\s*{_COLREF}\s*(?:ASC|DESC|NULLS|$)', item, re.I)
+            if ref:
+                resolved = _resolve_column(ref.group(1), ref.group(2), aliases, table_columns)
+                if resolved:
+                    usage.append((*resolved, "sort"))
+    return usage
+
+
+def propose_indexes(queries: Iterable[Dict[str, Any]], table_columns: Dict[str, Set[str]],
+                    array_columns: Set[Tuple[str, str]], max_columns: int = 3) -> List[Dict[str, Any]]:
+    """
+    Формирует индексы-кандидаты по статистике запросов.
+
+    B-tree — по столбцам равенства, затем одному столбцу диапазона/сортировки
+    и по столбцам соединений; GIN — для массивов; GIN pg_trgm — для LIKE и
+    регулярных выражений. Одинаковые кандидаты разных запросов объединяются,
+    их вес — суммарное время этих запросов.
+
+    Args:
+        queries: Элементы статистики: query, calls, total_ms (и sample)
+        table_columns: {таблица: столбцы}
+        array_columns: Пары (таблица, столбец) столбцов-массивов
+
+    Returns:
+        Список кандидатов: table, method ("btree", "gin", "trigram"), columns,
+        reason, calls, total_ms, queries (элементы статистики), по убыванию total_ms.
+    """
+    candidates: Dict[Tuple[str, str, Tuple[str, ...]], Dict[str, Any]] = {}
+
+    def add(table, method, columns, reason, query):
+        key = (table, method, tuple(columns))
+        candidate = candidates.setdefault(key, {
+            "table": table, "method": method, "columns": list(columns),
+            "reason": reason, "calls": 0, "total_ms": 0.0, "queries": [],
+        })
+        candidate["calls"] += query.get("calls", 1)
+        candidate["total_ms"] += query.get("total_ms", 0.0)
+        candidate["queries"].append(query)
+
+    for query in queries:
+        usage = extract_column_usage(query["query"], table_columns)
+        by_table: Dict[str, Dict[str, List[str]]] = {}
+        for table, column, kind in usage:
+            kinds = by_table.setdefault(table, {})
+            if column not in kinds.setdefault(kind, []):
+                kinds[kind].append(column)
+
+        for table, kinds in by_table.items():
+            eq = [col for col in kinds.get("eq", []) if (table, col) not in array_columns]
+            ordered = [col for col in kinds.get("range", []) + kinds.get("sort", []) if col not in eq]
+            btree_columns = (eq + ordered[:1])[:max_columns]
+            if btree_columns:
+                add(table, "btree", btree_columns, "условия WHERE / ORDER BY", query)
+            for column in kinds.get("join", []):
+                add(table, "btree", [column], "соединение (JOIN)", query)
+            for column in kinds.get("array", []):
+                add(table, "gin", [column], "поиск по элементам массива", query)
+            for column in kinds.get("pattern", []):
+                add(table, "trigram", [column], "LIKE / регулярные выражения", query)
+
+    return sorted(candidates.values(), key=lambda c: c["total_ms"], reverse=True)
+
+
+def is_covered(candidate: Dict[str, Any], existing: List[Dict[str, Any]]) -> bool:
+    """
+    Проверяет, покрывает ли кандидата уже существующий индекс.
+
+    Args:
+        existing: [{'method', 'columns', 'definition'}] индексов таблицы
+    """
+    columns = candidate["columns"]
+    for index in existing:
+        if candidate["method"] == "btree" and index["method"] == "btree":
+            if index["columns"][:len(columns)] == columns:
+                return True
+        elif candidate["method"] == "gin" and index["method"] == "gin":
+            if index["columns"] == columns:
+                return True
+        elif candidate["method"] == "trigram" and "gin_trgm_ops" in index["definition"]:
+            if f'"{columns[0]}"' in index["definition"] or re.search(rf'\b{re.escape(columns[0])}\b',
+                                                                     index["definition"]):
+                return True
+    return False
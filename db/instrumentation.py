@@ -0,0 +1,369 @@
+"""
+Замеры времени методов DB и запросов к БД: гистограммы задержек, строки, объём, ошибки
+"""
+
+import functools
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .sql_utils import normalize_sql
+
+# Границы корзин гистограммы задержек, мс (последняя корзина — +Inf)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами (как histogram в Prometheus)."""
+
+    __slots__ = ("counts", "count", "sum_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.sum_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля (линейная интерполяция внутри корзины), мс."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS_MS[index - 1] if index > 0 else 0.0
+                upper = LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max_ms)
+            seen += count
+        return self.max_ms
+
+
+class _Series:
+    """Статистика одного метода или шаблона запроса."""
+
+    __slots__ = ("histogram", "errors", "rows", "bytes")
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        histogram = self.histogram
+        return {
+            "calls": histogram.count,
+            "errors": self.errors,
+            "total_ms": histogram.sum_ms,
+            "mean_ms": histogram.sum_ms / histogram.count if histogram.count else 0.0,
+            "p50_ms": histogram.quantile(0.5),
+            "p95_ms": histogram.quantile(0.95),
+            "p99_ms": histogram.quantile(0.99),
+            "max_ms": histogram.max_ms,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "buckets": list(histogram.counts),
+        }
+
+
+def estimate_size(value: Any, sample: int = 20) -> int:
+    """
+    Примерный объём результата в байтах: для списка строк — средний размер
+    первых sample строк (сумма sys.getsizeof значений), умноженный на их число.
+    """
+    if isinstance(value, tuple) and value and isinstance(value[-1], list):
+        # Методы вида (..., rows)
+        value = value[-1]
+    if not isinstance(value, list) or not value:
+        return 0
+    head = value[:sample]
+    total = 0
+    for row in head:
+        values = row.values() if isinstance(row, dict) else row if isinstance(row, (list, tuple)) else (row,)
+        total += sum(sys.getsizeof(item) for item in values)
+    return total * len(value) // len(head)
+
+
+def _row_count(value: Any) -> int:
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, tuple) and value and isinstance(value[-1], list):
+        return len(value[-1])
+    return 0
+
+
+class Instrumentation:
+    """
+    Сборщик метрик: по методам DB (декоратор timed) и по нормализованным
+    SQL-шаблонам (события before_cursor_execute/after_cursor_execute/handle_error
+    движка). Для каждой серии хранится гистограмма задержек, число ошибок,
+    число строк и примерный объём полученных данных.
+
+    Объём данных известен только для результата метода (список строк); он же
+    приписывается последнему запросу, выполненному внутри этого вызова.
+    Вложенные вызовы методов учитываются и во внешнем, и во внутреннем методе.
+    """
+
+    _START_KEY = "instrumentation_start"
+
+    def __init__(self, max_statements: int = 500):
+        self.enabled = True
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _Series] = {}
+        self._statements: Dict[str, _Series] = {}
+        self._local = threading.local()
+        self.started_at = time.time()
+
+    # ------------------------------------------------------------------
+    # Методы
+    # ------------------------------------------------------------------
+    def record_method(self, name: str, elapsed_ms: float, result: Any = None, error: bool = False,
+                      rows: Optional[int] = None):
+        """Учитывает вызов метода (rows — число строк, если его нельзя узнать из result)."""
+        if rows is None:
+            rows = 0 if error else _row_count(result)
+        size = estimate_size(result) if rows and result is not None else 0
+        with self._lock:
+            series = self._methods.get(name)
+            if series is None:
+                series = self._methods[name] = _Series()
+            series.histogram.observe(elapsed_ms)
+            series.errors += error
+            series.rows += rows
+            series.bytes += size
+            # Объём приписывается запросу только один раз — при выходе из внешнего вызова
+            statement = getattr(self._local, "last_statement", None)
+            if size and not getattr(self._local, "depth", 0) and statement in self._statements:
+                self._statements[statement].bytes += size
+
+    def _enter_method(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.last_statement = None
+        self._local.depth = depth + 1
+
+    def _exit_method(self):
+        self._local.depth -= 1
+
+    # ------------------------------------------------------------------
+    # Запросы (обработчики событий движка)
+    # ------------------------------------------------------------------
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(self._START_KEY, []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(self._START_KEY)
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if self.enabled:
+            rows = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+            self._record_statement(statement, elapsed_ms, rows)
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        starts = connection.info.get(self._START_KEY) if connection is not None else None
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if self.enabled and exception_context.statement:
+            self._record_statement(exception_context.statement, elapsed_ms, 0, error=True)
+
+    def _record_statement(self, statement: str, elapsed_ms: float, rows: int, error: bool = False):
+        template = normalize_sql(statement)
+        with self._lock:
+            series = self._statements.get(template)
+            if series is None:
+                if len(self._statements) >= self.max_statements:
+                    # Вытесняем самый редкий шаблон
+                    rare = min(self._statements, key=lambda key: self._statements[key].histogram.count)
+                    del self._statements[rare]
+                series = self._statements[template] = _Series()
+            series.histogram.observe(elapsed_ms)
+            series.errors += error
+            series.rows += rows
+        self._local.last_statement = template
+
+    # ------------------------------------------------------------------
+    # Выгрузка
+    # ------------------------------------------------------------------
+    def reset(self):
+        """Обнуляет все серии."""
+        with self._lock:
+            self._methods.clear()
+            self._statements.clear()
+            self.started_at = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Снимок метрик.
+
+        Returns:
+            {'started_at', 'taken_at', 'buckets_ms',
+             'methods': [{'name', 'calls', 'errors', 'total_ms', 'mean_ms', 'p50_ms',
+                          'p95_ms', 'p99_ms', 'max_ms', 'rows', 'bytes', 'buckets'}],
+             'statements': [{'query', 'query_id', ...те же поля}]}
+            Списки отсортированы по суммарному времени.
+        """
+        with self._lock:
+            methods = [{"name": name, **series.snapshot()} for name, series in self._methods.items()]
+            statements = [{"query": query, "query_id": self.query_id(query), **series.snapshot()}
+                          for query, series in self._statements.items()]
+        methods.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        statements.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return {
+            "started_at": self.started_at,
+            "taken_at": time.time(),
+            "buckets_ms": list(LATENCY_BUCKETS_MS),
+            "methods": methods,
+            "statements": statements,
+        }
+
+    @staticmethod
+    def query_id(query: str) -> str:
+        """Короткий устойчивый идентификатор шаблона запроса (метка для Prometheus)."""
+        return hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus (для textfile collector node_exporter)."""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        for prefix, label, entries in (
+                ("db_method", "method", [(e, {"method": e["name"]}) for e in snapshot["methods"]]),
+                ("db_statement", "query_id",
+                 [(e, {"query_id": e["query_id"], "query": e["query"][:200]}) for e in snapshot["statements"]]),
+        ):
+            lines += [
+                f"# HELP {prefix}_duration_seconds Время выполнения ({label})",
+                f"# TYPE {prefix}_duration_seconds histogram",
+            ]
+            for entry, labels in entries:
+                cumulative = 0
+                for bound, count in zip(itertools.chain(LATENCY_BUCKETS_MS, ["+Inf"]), entry["buckets"]):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else repr(bound / 1000)
+                    lines.append(f"{prefix}_duration_seconds_bucket{_labels(labels, le=le)} {cumulative}")
+                lines.append(f"{prefix}_duration_seconds_sum{_labels(labels)} {entry['total_ms'] / 1000!r}")
+                lines.append(f"{prefix}_duration_seconds_count{_labels(labels)} {entry['calls']}")
+            for metric, field, help_text in (("errors_total", "errors", "Число ошибок"),
+                                             ("rows_total", "rows", "Число строк"),
+                                             ("bytes_total", "bytes", "Примерный объём полученных данных")):
+                lines += [f"# HELP {prefix}_{metric} {help_text} ({label})", f"# TYPE {prefix}_{metric} counter"]
+                lines += [f"{prefix}_{metric}{_labels(labels)} {entry[field]}" for entry, labels in entries]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str, fmt: str = "prometheus"):
+        """
+        Атомарно записывает метрики в файл (сначала во временный файл рядом).
+
+        Args:
+            path: Путь к файлу
+            fmt: "prometheus" или "json"
+        """
+        if fmt not in ("prometheus", "json"):
+            raise ValueError(f"Неизвестный формат метрик: {fmt}")
+        content = self.to_prometheus() if fmt == "prometheus" else self.to_json()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _labels(labels: Dict[str, Any], **extra: Any) -> str:
+    items = {**labels, **extra}
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in items.items()) + "}"
+
+
+def timed(name: str, function: Callable) -> Callable:
+    """
+    Оборачивает метод DB замером времени: результат (или ошибка) учитывается в
+    self.instrumentation. Для генераторов время считается до исчерпания.
+    """
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(self, *args, **kwargs):
+            instrumentation = getattr(self, "instrumentation", None)
+            if instrumentation is None or not instrumentation.enabled:
+                yield from function(self, *args, **kwargs)
+                return
+            start = time.perf_counter()
+            rows = error = 0
+            try:
+                for item in function(self, *args, **kwargs):
+                    rows += len(item) if isinstance(item, list) else 1
+                    yield item
+            except Exception:
+                error = 1
+                raise
+            finally:
+                instrumentation.record_method(name, (time.perf_counter() - start) * 1000,
+                                              error=bool(error), rows=rows)
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, "instrumentation", None)
+        if instrumentation is None or not instrumentation.enabled:
+            return function(self, *args, **kwargs)
+        instrumentation._enter_method()
+        start = time.perf_counter()
+        try:
+            result = function(self, *args, **kwargs)
+        except Exception:
+            instrumentation.record_method(name, (time.perf_counter() - start) * 1000, error=True)
+            raise
+        finally:
+            instrumentation._exit_method()
+        instrumentation.record_method(name, (time.perf_counter() - start) * 1000, result)
+        return result
+    return wrapper
+
+
+def instrument_methods(exclude: Tuple[str, ...] = ()) -> Callable[[type], type]:
+    """
+    Декоратор класса: оборачивает timed все публичные методы, объявленные в
+    классе и его базовых классах (миксинах), кроме exclude.
+    """
+    def decorate(cls: type) -> type:
+        seen = set()
+        for klass in cls.__mro__:
+            if klass is object:
+                continue
+            for attr_name, attr in vars(klass).items():
+                if attr_name.startswith("_") or attr_name in exclude or attr_name in seen:
+                    continue
+                seen.add(attr_name)
+                if inspect.isfunction(attr) and not hasattr(attr, "__wrapped__"):
+                    setattr(cls, attr_name, timed(attr_name, attr))
+        return cls
+    return decorate
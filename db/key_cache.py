@@ -0,0 +1,71 @@
+"""
+Кэш ключей, существование которых уже подтверждено запросом к БД
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+class KnownKeyCache:
+    """
+    Короткоживущий кэш существующих значений ключевых столбцов
+    (таблица, столбец) → {значение: момент подтверждения}.
+
+    Используется проверкой внешних ключей: ключ, найденный недавно, повторно
+    не запрашивается. Хранятся только найденные значения — отсутствие ключа
+    всегда перепроверяется. Удаление и изменение строк таблицы сбрасывает её
+    ключи (invalidate); TTL ограничивает срок для изменений в обход приложения.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_keys: int = 100_000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys: Dict[Tuple[str, str], Dict[Any, float]] = {}
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def known(self, table_name: str, column_name: str, values: Iterable[Any]) -> Set[Any]:
+        """Значения из values, существование которых подтверждено не позже ttl секунд назад."""
+        now = time.monotonic()
+        with self._lock:
+            keys = self._keys.get((table_name, column_name), {})
+            found = {value for value in values if now - keys.get(value, float("-inf")) <= self.ttl}
+            self.hits += len(found)
+            return found
+
+    def add(self, table_name: str, column_name: str, values: Iterable[Any]):
+        """Запоминает подтверждённые значения."""
+        now = time.monotonic()
+        with self._lock:
+            keys = self._keys.setdefault((table_name, column_name), {})
+            before = len(keys)
+            for value in values:
+                keys[value] = now
+            self._size += len(keys) - before
+            if self._size > self.max_keys:
+                # Переполнение — проще начать заново, чем вытеснять по одному
+                self._keys = {(table_name, column_name): keys}
+                self._size = len(keys)
+
+    def record_misses(self, count: int):
+        """Учитывает значения, которые пришлось запросить из БД."""
+        with self._lock:
+            self.misses += count
+
+    def invalidate(self, table_names: Optional[Iterable[str]] = None):
+        """Сбрасывает ключи таблиц (None — все)."""
+        with self._lock:
+            if table_names is None:
+                self._keys.clear()
+            else:
+                names = set(table_names)
+                self._keys = {key: values for key, values in self._keys.items() if key[0] not in names}
+            self._size = sum(len(values) for values in self._keys.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Попадания, промахи и число хранимых ключей."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "keys": self._size}
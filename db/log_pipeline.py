@@ -0,0 +1,193 @@
+"""
+Асинхронное логирование: запись в файл в отдельном потоке, JSON-записи, прореживание частых сообщений
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+# Значения, которые не изменятся до записи в файл: сообщение с такими аргументами
+# можно форматировать в потоке записи, а не в вызывающем
+_IMMUTABLE_ARGS = (str, int, float, bool, type(None), bytes, Decimal, date, datetime, BaseException)
+
+# Атрибуты LogRecord; всё остальное — поля, переданные через extra
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _is_immutable(value: Any) -> bool:
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_immutable(item) for item in value)
+    return isinstance(value, _IMMUTABLE_ARGS)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Одна запись — одна строка JSON: ts, level, logger, thread, msg, поля из extra,
+    а также suppressed (сколько похожих записей пропущено) и exc (трассировка).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Прореживает частые записи: из записей с одним шаблоном сообщения (логгер + msg
+    до подстановки аргументов) за interval секунд пропускаются первые burst,
+    остальные отбрасываются. Следующая пропущенная запись получает поле
+    suppressed — сколько записей было отброшено перед ней.
+
+    Записи уровня выше max_level (по умолчанию — предупреждения и ошибки)
+    проходят всегда.
+    """
+
+    def __init__(self, burst: int = 20, interval: float = 1.0, max_level: int = logging.INFO,
+                 max_templates: int = 10_000):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.max_level = max_level
+        self.max_templates = max_templates
+        self._lock = threading.Lock()
+        # шаблон → [начало окна, записей в окне, отброшено]
+        self._windows: Dict[Tuple[str, Any], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                if len(self._windows) >= self.max_templates:
+                    self._windows.clear()
+                window = self._windows[key] = [now, 0, 0]
+            elif now - window[0] >= self.interval:
+                window[0], window[1] = now, 0
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            suppressed, window[2] = window[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который не форматирует сообщение в вызывающем потоке, если
+    аргументы неизменяемы: подстановка аргументов, JSON и запись в файл
+    выполняются потоком QueueListener. Очередь внутрипроцессная, поэтому
+    запись не нужно готовить к сериализации.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if args and not (isinstance(args, tuple) and _is_immutable(args)):
+            # Изменяемые аргументы (списки, словари) к моменту записи могут измениться
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def setup_logging(log_file: str = "db/db_app.log",
+                  level: int = logging.INFO,
+                  max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5,
+                  json_format: bool = True,
+                  console: bool = True,
+                  sample_burst: int = 20,
+                  sample_interval: float = 1.0) -> logging.handlers.QueueListener:
+    """
+    Настраивает корневой логгер: записи попадают в очередь (DeferredQueueHandler),
+    а в файл с ротацией по размеру и в консоль их пишет отдельный поток
+    QueueListener. Повторный вызов заменяет прежнюю настройку.
+
+    Args:
+        log_file: Файл журнала
+        level: Уровень корневого логгера
+        max_bytes: Размер файла, после которого он ротируется
+        backup_count: Сколько ротированных файлов хранить
+        json_format: Писать в файл JSON-строки (иначе — текстовый формат)
+        console: Дублировать записи в консоль (текстом)
+        sample_burst: Сколько записей одного шаблона уровня INFO и ниже пропускать за sample_interval
+        sample_interval: Окно прореживания, секунды (0 — не прореживать)
+
+    Returns:
+        Запущенный QueueListener (останавливается автоматически при выходе)
+    """
+    global _listener
+    text_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                                       datefmt='%Y-%m-%d %H:%M:%S')
+
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter() if json_format else text_formatter)
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(text_formatter)
+        handlers.append(console_handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    if sample_interval > 0:
+        queue_handler.addFilter(SamplingFilter(burst=sample_burst, interval=sample_interval))
+
+    with _listener_lock:
+        stop_logging()
+        root_logger = logging.getLogger()
+        root_logger.setLevel(level)
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+            handler.close()
+        root_logger.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Дописывает оставшиеся в очереди записи и останавливает поток записи."""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+atexit.register(stop_logging)
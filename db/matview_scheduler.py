@@ -0,0 +1,120 @@
+"""
+Фоновый планировщик обновления материализованных представлений
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class MatviewRefreshScheduler:
+    """
+    Обновляет материализованные представления по расписанию в отдельном потоке.
+
+    У каждого представления свой интервал. Поток запускается при первом
+    schedule() и спит до ближайшего срока; изменение расписания будит его.
+    Само обновление выполняет функция refresh_func(name) -> bool, переданная
+    владельцем (DB), поэтому планировщик не знает о SQL.
+    """
+
+    def __init__(self, refresh_func: Callable[[str], bool]):
+        self.logger = logging.getLogger("DB")
+        self._refresh_func = refresh_func
+        self._cond = threading.Condition()
+        # Куча (время следующего запуска, имя); устаревшие записи отбрасываются по _due
+        self._heap: List[Tuple[float, str]] = []
+        self._intervals: Dict[str, float] = {}
+        self._due: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def schedule(self, name: str, interval_seconds: float, run_now: bool = False):
+        """Назначает (или меняет) интервал обновления представления."""
+        if interval_seconds <= 0:
+            raise ValueError("Интервал обновления должен быть положительным")
+        with self._cond:
+            self._intervals[name] = float(interval_seconds)
+            due = time.monotonic() + (0 if run_now else interval_seconds)
+            self._due[name] = due
+            heapq.heappush(self._heap, (due, name))
+            self._stopping = False
+            self._ensure_thread()
+            self._cond.notify()
+
+    def unschedule(self, name: str) -> bool:
+        """Снимает представление с расписания."""
+        with self._cond:
+            self._due.pop(name, None)
+            removed = self._intervals.pop(name, None) is not None
+            self._cond.notify()
+            return removed
+
+    def jobs(self) -> Dict[str, Dict[str, float]]:
+        """Текущее расписание: {имя: {'interval': сек, 'next_run_in': сек}}."""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                name: {"interval": interval, "next_run_in": max(0.0, self._due.get(name, now) - now)}
+                for name, interval in self._intervals.items()
+            }
+
+    def stop(self, timeout: float = 5.0):
+        """Останавливает поток и очищает расписание."""
+        with self._cond:
+            self._stopping = True
+            self._heap.clear()
+            self._intervals.clear()
+            self._due.clear()
+            thread = self._thread
+            self._cond.notify()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="matview-refresh", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                name = self._next_due_locked()
+                if name is None:
+                    return
+            try:
+                self._refresh_func(name)
+            except Exception as e:
+                self.logger.error("Ошибка планового обновления '%s': %s", name, e)
+
+            with self._cond:
+                interval = self._intervals.get(name)
+                if interval is not None and not self._stopping:
+                    # Следующий срок отсчитываем от окончания обновления, чтобы запуски не накладывались
+                    due = time.monotonic() + interval
+                    self._due[name] = due
+                    heapq.heappush(self._heap, (due, name))
+
+    def _next_due_locked(self) -> Optional[str]:
+        """Ждёт ближайшего срока; возвращает имя представления или None при остановке."""
+        while not self._stopping:
+            if not self._heap:
+                if not self._intervals:
+                    self._thread = None
+                    return None
+                self._cond.wait()
+                continue
+            due, name = self._heap[0]
+            if self._due.get(name) != due:
+                heapq.heappop(self._heap)
+                continue
+            delay = due - time.monotonic()
+            if delay > 0:
+                self._cond.wait(delay)
+                continue
+            heapq.heappop(self._heap)
+            self._due.pop(name, None)
+            return name
+        self._thread = None
+        return None
@@ -10,6 +10,11 @@ from .constraints_mixin import ConstraintsMixin
 from .search_mixin import SearchMixin
 from .string_operations_mixin import StringOperationsMixin
 from .custom_types_mixin import CustomTypesMixin
+from .full_text_search_mixin import FullTextSearchMixin
+from .materialized_views_mixin import MaterializedViewsMixin
+from .aggregate_summary_mixin import AggregateSummaryMixin
+from .index_advisor_mixin import IndexAdvisorMixin
+from .instrumentation_mixin import InstrumentationMixin
 
 __all__ = [
     'ConnectionMixin',
@@ -19,5 +24,10 @@ __all__ = [
     'ConstraintsMixin',
     'SearchMixin',
     'StringOperationsMixin',
-    'CustomTypesMixin'
+    'CustomTypesMixin',
+    'FullTextSearchMixin',
+    'MaterializedViewsMixin',
+    'AggregateSummaryMixin',
+    'IndexAdvisorMixin',
+    'InstrumentationMixin'
 ]
@@ -0,0 +1,459 @@
+"""
+Миксин для итоговых таблиц с инкрементальным (триггерным) пересчётом агрегатов
+"""
+
+import json
+import logging
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class AggregateSummaryMixin:
+    """
+    Миксин для итоговых таблиц (summary tables).
+
+    Итоговая таблица хранит по строке на группу и поддерживается триггером
+    AFTER INSERT/UPDATE/DELETE исходной таблицы: на каждое изменение строки
+    к агрегатам группы применяется только разница (COUNT/SUM — вычитание
+    и прибавление, MIN/MAX — LEAST/GREATEST, а при удалении текущего
+    минимума/максимума — пересчёт только этой группы). Поэтому чтение
+    агрегатов не требует сканирования исходной таблицы.
+
+    Группировка возможна по столбцам исходной таблицы и по столбцам таблиц,
+    на которые она ссылается внешним ключом ("Books.genre" для Issued_Books).
+    Изменения самих справочных столбцов (например, смена жанра книги) в итоги
+    не попадают — после них нужен rebuild_summary_table().
+
+    Описание итоговой таблицы хранится в её комментарии (префикс "summary:").
+    """
+
+    SUMMARY_COMMENT_PREFIX = "summary:"
+    SUMMARY_FUNCTIONS = ("COUNT", "SUM", "MIN", "MAX")
+    # Служебный счётчик строк группы: группа удаляется, когда он становится равен 0
+    ROWS_COLUMN = "__rows"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Инициализируем логгер для этого миксина
+        self.logger = logging.getLogger("DB")
+
+    # ------------------------------------------------------------------
+    # Создание и удаление
+    # ------------------------------------------------------------------
+    def create_summary_table(
+            self,
+            summary_name: str,
+            source_table: str,
+            group_by: List[str],
+            aggregates: Dict[str, Tuple[str, Optional[str]]]
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Создаёт итоговую таблицу, заполняет её и включает инкрементальный пересчёт.
+
+        Args:
+            summary_name: Имя итоговой таблицы
+            source_table: Исходная таблица (например, "Issued_Books")
+            group_by: Столбцы группировки: "reader_id" или "Books.genre"
+                (столбец таблицы, на которую ссылается внешний ключ)
+            aggregates: {имя столбца итога: (функция, столбец)}; функция —
+                COUNT, SUM, MIN или MAX, столбец None означает COUNT(*).
+                Пример: {"loans": ("COUNT", None), "revenue": ("SUM", "final_rental_cost")}
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        definition = {
+            "source": source_table,
+            "group_by": list(group_by),
+            "aggregates": {alias: [func.upper(), column] for alias, (func, column) in aggregates.items()},
+        }
+        try:
+            spec = self._resolve_summary_spec(summary_name, definition)
+        except ValueError as e:
+            self.logger.error("Некорректное описание итоговой таблицы '%s': %s", summary_name, e)
+            return False, str(e)
+
+        if self.schema_cache.has_table(summary_name):
+            return False, f"Таблица '{summary_name}' уже существует"
+
+        key_columns = ", ".join(f'"{key["alias"]}"' for key in spec["keys"])
+        try:
+            with self.engine.begin() as conn:
+                # Блокируем запись в исходную таблицу до включения триггера, чтобы не потерять изменения
+                conn.execute(text(f'LOCK TABLE "{source_table}" IN SHARE ROW EXCLUSIVE MODE'))
+                conn.execute(text(
+                    f'CREATE TABLE "{summary_name}" AS {self._summary_select_sql(spec)} WITH NO DATA'
+                ))
+                conn.execute(text(
+                    f'CREATE UNIQUE INDEX "{summary_name}_key" ON "{summary_name}" ({key_columns})'
+                ))
+                conn.execute(text(f'INSERT INTO "{summary_name}" {self._summary_select_sql(spec)}'))
+                conn.execute(text(self._summary_function_sql(spec)))
+                conn.execute(text(f"""
+                    CREATE TRIGGER "{spec['trigger']}"
+                    AFTER INSERT OR UPDATE OR DELETE ON "{source_table}"
+                    FOR EACH ROW EXECUTE FUNCTION "{spec['function']}"()
+                """))
+                conn.execute(text(f"""
+                    CREATE TRIGGER "{spec['truncate_trigger']}"
+                    AFTER TRUNCATE ON "{source_table}"
+                    FOR EACH STATEMENT EXECUTE FUNCTION "{spec['function']}"()
+                """))
+                conn.execute(
+                    text(f'COMMENT ON TABLE "{summary_name}" IS :comment'),
+                    {"comment": self.SUMMARY_COMMENT_PREFIX + json.dumps(definition, ensure_ascii=False)}
+                )
+            self._refresh_metadata([summary_name])
+            # Триггер меняет итоговую таблицу при каждой записи в исходную
+            self.result_cache.add_dependency(source_table, summary_name)
+            self.logger.info("Итоговая таблица '%s' по '%s' создана", summary_name, source_table)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка создания итоговой таблицы '{summary_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def drop_summary_table(self, summary_name: str) -> Tuple[bool, Optional[str]]:
+        """Удаляет итоговую таблицу вместе с триггерами и функцией пересчёта."""
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        definition = self._summary_definition(summary_name)
+        if definition is None:
+            return False, f"'{summary_name}' не является итоговой таблицей"
+
+        spec = self._summary_object_names(summary_name)
+        source_table = definition["source"]
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(f'DROP TRIGGER IF EXISTS "{spec["trigger"]}" ON "{source_table}"'))
+                conn.execute(text(f'DROP TRIGGER IF EXISTS "{spec["truncate_trigger"]}" ON "{source_table}"'))
+                conn.execute(text(f'DROP FUNCTION IF EXISTS "{spec["function"]}"()'))
+                conn.execute(text(f'DROP TABLE IF EXISTS "{summary_name}"'))
+            self._refresh_metadata([summary_name])
+            self.logger.info("Итоговая таблица '%s' удалена", summary_name)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка удаления итоговой таблицы '{summary_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def rebuild_summary_table(self, summary_name: str) -> Tuple[bool, Optional[str]]:
+        """
+        Полностью пересчитывает итоговую таблицу по исходной
+        (после изменения справочных данных или для сверки).
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        definition = self._summary_definition(summary_name)
+        if definition is None:
+            return False, f"'{summary_name}' не является итоговой таблицей"
+
+        try:
+            spec = self._resolve_summary_spec(summary_name, definition)
+            with self.engine.begin() as conn:
+                conn.execute(text(f'LOCK TABLE "{spec["source"]}" IN SHARE MODE'))
+                conn.execute(text(f'DELETE FROM "{summary_name}"'))
+                conn.execute(text(f'INSERT INTO "{summary_name}" {self._summary_select_sql(spec)}'))
+            self._invalidate_results([summary_name])
+            self.logger.info("Итоговая таблица '%s' пересчитана", summary_name)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка пересчёта итоговой таблицы '{summary_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+    def get_summary_tables(self) -> List[Dict[str, Any]]:
+        """Возвращает итоговые таблицы: [{'name', 'source', 'group_by', 'aggregates'}]."""
+        if not self.is_connected():
+            return []
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(text("""
+                    SELECT c.relname, obj_description(c.oid, 'pg_class')
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE c.relkind = 'r' AND n.nspname = current_schema()
+                      AND obj_description(c.oid, 'pg_class') LIKE :prefix
+                    ORDER BY c.relname
+                """), {"prefix": self.SUMMARY_COMMENT_PREFIX + "%"}).fetchall()
+            return [
+                {"name": name, **json.loads(comment[len(self.SUMMARY_COMMENT_PREFIX):])}
+                for name, comment in rows
+            ]
+        except Exception as e:
+            self.logger.error("Ошибка получения итоговых таблиц: %s", self.format_db_error(e))
+            return []
+
+    def _register_summary_dependencies(self):
+        """Сообщает кэшу результатов, какие итоговые таблицы меняются вместе с исходными."""
+        for summary in self.get_summary_tables():
+            self.result_cache.add_dependency(summary["source"], summary["name"])
+
+    def get_summary(self, summary_name: str, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Читает агрегаты из итоговой таблицы.
+
+        Args:
+            summary_name: Имя итоговой таблицы
+            filters: {столбец группировки: значение} — выбрать только эти группы
+
+        Returns:
+            Список строк (без служебного счётчика строк группы)
+        """
+        if not self.is_connected():
+            return []
+
+        definition = self._summary_definition(summary_name)
+        if definition is None:
+            self.logger.error("'%s' не является итоговой таблицей", summary_name)
+            return []
+
+        try:
+            columns = [key.split(".")[-1] for key in definition["group_by"]] + list(definition["aggregates"])
+            select_list = ", ".join(f'"{col}"' for col in columns)
+            sql = f'SELECT {select_list} FROM "{summary_name}"'
+            params = {}
+            if filters:
+                conditions = []
+                for i, (column, value) in enumerate(filters.items()):
+                    if column not in columns:
+                        raise ValueError(f"Неизвестный столбец итоговой таблицы: {column}")
+                    conditions.append(f'"{column}" = :f{i}')
+                    params[f"f{i}"] = value
+                sql += " WHERE " + " AND ".join(conditions)
+            with self._connection() as conn:
+                result = conn.execute(text(sql), params)
+                return [dict(row._mapping) for row in result]
+        except Exception as e:
+            self.logger.error("Ошибка чтения итоговой таблицы '%s': %s", summary_name, self.format_db_error(e))
+            return []
+
+    def _summary_definition(self, summary_name: str) -> Optional[Dict[str, Any]]:
+        """Описание итоговой таблицы из её комментария или None."""
+        try:
+            with self._connection() as conn:
+                comment = conn.execute(text("""
+                    SELECT obj_description(c.oid, 'pg_class')
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE c.relname = :name AND c.relkind = 'r' AND n.nspname = current_schema()
+                """), {"name": summary_name}).scalar()
+        except Exception as e:
+            self.logger.error("Ошибка чтения описания '%s': %s", summary_name, self.format_db_error(e))
+            return None
+        if not comment or not comment.startswith(self.SUMMARY_COMMENT_PREFIX):
+            return None
+        return json.loads(comment[len(self.SUMMARY_COMMENT_PREFIX):])
+
+    # ------------------------------------------------------------------
+    # Построение SQL
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _summary_object_names(summary_name: str) -> Dict[str, str]:
+        return {
+            "function": f"{summary_name}_maintain"[:63],
+            "trigger": f"{summary_name}_maintain"[:63],
+            "truncate_trigger": f"{summary_name}_truncate"[:63],
+        }
+
+    def _resolve_summary_spec(self, summary_name: str, definition: Dict[str, Any]) -> Dict[str, Any]:
+        """Проверяет описание и разрешает столбцы справочных таблиц через внешние ключи."""
+        source = definition["source"]
+        names = [summary_name, source] + list(definition["group_by"]) + list(definition["aggregates"])
+        if any('"' in name or "'" in name for name in names):
+            raise ValueError("Имена не должны содержать кавычки")
+        if not self.schema_cache.has_table(source):
+            raise ValueError(f"Таблица '{source}' не существует")
+        if not definition["group_by"]:
+            raise ValueError("Нужен хотя бы один столбец группировки")
+        if not definition["aggregates"]:
+            raise ValueError("Нужна хотя бы одна агрегатная функция")
+
+        source_columns = set(self.schema_cache.get_column_names(source))
+        foreign_keys = self.schema_cache.get_foreign_keys(source)
+
+        keys = []
+        for i, entry in enumerate(definition["group_by"]):
+            if "." not in entry:
+                if entry not in source_columns:
+                    raise ValueError(f"Столбец '{entry}' не найден в '{source}'")
+                keys.append({"alias": entry, "column": entry, "table": None})
+                continue
+
+            table, column = entry.split(".", 1)
+            fk = next((fk for fk in foreign_keys
+                       if fk["referred_table"] == table and len(fk["constrained_columns"]) == 1), None)
+            if fk is None:
+                raise ValueError(f"Нет внешнего ключа из '{source}' в '{table}'")
+            if column not in self.schema_cache.get_column_names(table):
+                raise ValueError(f"Столбец '{column}' не найден в '{table}'")
+            keys.append({
+                "alias": column, "column": column, "table": table, "join": f"j{i}",
+                "fk": fk["constrained_columns"][0], "ref": fk["referred_columns"][0],
+            })
+
+        aggregates = []
+        for alias, (func, column) in definition["aggregates"].items():
+            if func not in self.SUMMARY_FUNCTIONS:
+                raise ValueError(f"Функция {func} не поддерживается (допустимы {', '.join(self.SUMMARY_FUNCTIONS)})")
+            if column is None and func != "COUNT":
+                raise ValueError(f"Для {func} нужно указать столбец")
+            if column is not None and column not in source_columns:
+                raise ValueError(f"Столбец '{column}' не найден в '{source}'")
+            aggregates.append({"alias": alias, "func": func, "column": column})
+
+        aliases = [key["alias"] for key in keys] + [agg["alias"] for agg in aggregates] + [self.ROWS_COLUMN]
+        if len(set(aliases)) != len(aliases):
+            raise ValueError("Имена столбцов итоговой таблицы должны быть уникальны")
+
+        return {"name": summary_name, "source": source, "keys": keys, "aggregates": aggregates,
+                **self._summary_object_names(summary_name)}
+
+    @staticmethod
+    def _summary_source_key(key: Dict[str, Any]) -> str:
+        """Выражение ключа группы в запросе к исходной таблице (с соединениями)."""
+        if key["table"] is None:
+            return f'src."{key["column"]}"'
+        return f'{key["join"]}."{key["column"]}"'
+
+    def _summary_from_sql(self, spec: Dict[str, Any]) -> str:
+        joins = [
+            f'LEFT JOIN "{key["table"]}" {key["join"]} ON {key["join"]}."{key["ref"]}" = src."{key["fk"]}"'
+            for key in spec["keys"] if key["table"] is not None
+        ]
+        return " ".join([f'FROM "{spec["source"]}" src'] + joins)
+
+    def _summary_select_sql(self, spec: Dict[str, Any]) -> str:
+        """Полный пересчёт итогов (заполнение и rebuild)."""
+        select_list = [f'{self._summary_source_key(key)} AS "{key["alias"]}"' for key in spec["keys"]]
+        select_list.append(f'COUNT(*) AS "{self.ROWS_COLUMN}"')
+        for agg in spec["aggregates"]:
+            if agg["column"] is None:
+                expr = "COUNT(*)"
+            elif agg["func"] == "SUM":
+                # В итоговой таблице сумма хранится без NULL, чтобы к ней можно было прибавлять разницу
+                expr = f'COALESCE(SUM(src."{agg["column"]}"), 0)'
+            else:
+                expr = f'{agg["func"]}(src."{agg["column"]}")'
+            select_list.append(f'{expr} AS "{agg["alias"]}"')
+        group_by = ", ".join(str(i + 1) for i in range(len(spec["keys"])))
+        return f"SELECT {', '.join(select_list)} {self._summary_from_sql(spec)} GROUP BY {group_by}"
+
+    def _summary_function_sql(self, spec: Dict[str, Any]) -> str:
+        """Текст триггерной функции, применяющей разницу OLD/NEW к итоговой таблице."""
+        summary = spec["name"]
+        rows = self.ROWS_COLUMN
+        keys = spec["keys"]
+
+        declare = []
+        for i, key in enumerate(keys):
+            table = key["table"] or spec["source"]
+            declare.append(f'k_{i} "{table}"."{key["column"]}"%TYPE;')
+
+        def assign_keys(row: str) -> str:
+            lines = []
+            for i, key in enumerate(keys):
+                if key["table"] is None:
+                    lines.append(f'k_{i} := {row}."{key["column"]}";')
+                else:
+                    lines.append(
+                        f'k_{i} := (SELECT d."{key["column"]}" FROM "{key["table"]}" d '
+                        f'WHERE d."{key["ref"]}" = {row}."{key["fk"]}");'
+                    )
+            return "\n".join(lines)
+
+        # Сравнение с переменными через = (использует индекс) с отдельной веткой для NULL
+        key_match = " AND ".join(
+            f'(s."{key["alias"]}" = k_{i} OR (s."{key["alias"]}" IS NULL AND k_{i} IS NULL))'
+            for i, key in enumerate(keys)
+        )
+        recompute_match = " AND ".join(
+            f"{self._summary_source_key(key)} IS NOT DISTINCT FROM k_{i}" for i, key in enumerate(keys)
+        )
+        lock_group = (
+            f"PERFORM pg_advisory_xact_lock(hashtext('{summary}'), "
+            f"hashtext(concat_ws('|', {', '.join(f'k_{i}::text' for i in range(len(keys)))})));"
+        )
+
+        subtract, add, insert_values = [f'"{rows}" = s."{rows}" - 1'], [f'"{rows}" = s."{rows}" + 1'], ["1"]
+        for agg in spec["aggregates"]:
+            alias, column = agg["alias"], agg["column"]
+            if agg["func"] == "COUNT":
+                delta = "1" if column is None else f'(NEW."{column}" IS NOT NULL)::int'
+                old_delta = "1" if column is None else f'(OLD."{column}" IS NOT NULL)::int'
+                subtract.append(f'"{alias}" = s."{alias}" - {old_delta}')
+                add.append(f'"{alias}" = s."{alias}" + {delta}')
+                insert_values.append(delta)
+            elif agg["func"] == "SUM":
+                subtract.append(f'"{alias}" = s."{alias}" - COALESCE(OLD."{column}", 0)')
+                add.append(f'"{alias}" = s."{alias}" + COALESCE(NEW."{column}", 0)')
+                insert_values.append(f'COALESCE(NEW."{column}", 0)')
+            else:
+                # Удалён текущий минимум/максимум — пересчитываем только эту группу
+                op, combine = ("<=", "LEAST") if agg["func"] == "MIN" else (">=", "GREATEST")
+                subtract.append(
+                    f'"{alias}" = CASE WHEN OLD."{column}" IS NOT NULL AND OLD."{column}" {op} s."{alias}" '
+                    f'THEN (SELECT {agg["func"]}(src."{column}") {self._summary_from_sql(spec)} '
+                    f'WHERE {recompute_match}) ELSE s."{alias}" END'
+                )
+                add.append(f'"{alias}" = {combine}(s."{alias}", NEW."{column}")')
+                insert_values.append(f'NEW."{column}"')
+
+        # Изменение строки, не затрагивающее ни ключи, ни агрегируемые столбцы, пропускаем
+        watched = []
+        for key in keys:
+            watched.append(key["column"] if key["table"] is None else key["fk"])
+        watched.extend(agg["column"] for agg in spec["aggregates"] if agg["column"] is not None)
+        watched = list(dict.fromkeys(watched))
+        old_row = ", ".join(f'OLD."{col}"' for col in watched)
+        new_row = ", ".join(f'NEW."{col}"' for col in watched)
+
+        columns = ", ".join([f'"{key["alias"]}"' for key in keys] + [f'"{rows}"'] +
+                            [f'"{agg["alias"]}"' for agg in spec["aggregates"]])
+        values = ", ".join([f"k_{i}" for i in range(len(keys))] + insert_values)
+
+        return f"""
+CREATE OR REPLACE FUNCTION "{spec['function']}"() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+{chr(10).join(declare)}
+BEGIN
+IF to_regclass('"{summary}"') IS NULL THEN
+    -- Итоговая таблица удалена в обход drop_summary_table
+    RETURN NULL;
+END IF;
+IF TG_OP = 'TRUNCATE' THEN
+    DELETE FROM "{summary}";
+    RETURN NULL;
+END IF;
+IF TG_OP = 'UPDATE' AND ROW({old_row}) IS NOT DISTINCT FROM ROW({new_row}) THEN
+    RETURN NULL;
+END IF;
+
+IF TG_OP IN ('UPDATE', 'DELETE') THEN
+{assign_keys('OLD')}
+{lock_group}
+UPDATE "{summary}" s SET {', '.join(subtract)} WHERE {key_match};
+DELETE FROM "{summary}" s WHERE {key_match} AND s."{rows}" <= 0;
+END IF;
+
+IF TG_OP IN ('INSERT', 'UPDATE') THEN
+{assign_keys('NEW')}
+{lock_group}
+UPDATE "{summary}" s SET {', '.join(add)} WHERE {key_match};
+IF NOT FOUND THEN
+    INSERT INTO "{summary}" ({columns}) VALUES ({values});
+END IF;
+END IF;
+RETURN NULL;
+END;
+$$
+"""
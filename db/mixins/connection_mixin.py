@@ -3,10 +3,15 @@
 """
 
 import logging
-from sqlalchemy.engine import Engine
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import SQLAlchemyError
-from typing import Optional
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError, DisconnectionError
+from typing import Any, Dict, Iterator, Optional
+
+from ..pool_metrics import MeteredQueuePool
 
 
 class ConnectionMixin:
@@ -43,16 +48,44 @@ class ConnectionMixin:
                 f"?sslmode={self.sslmode}&connect_timeout={self.connect_timeout}"
             )
 
-            self.engine = create_engine(url, future=True, pool_pre_ping=True)
+            # Встроенный pool_pre_ping проверяет соединение при каждой выдаче (лишний
+            # SELECT 1 на каждый запрос) — проверяем только простаивавшие (_on_pool_checkout).
+            # LIFO выдаёт последнее возвращённое соединение: оно реже успевает простоять.
+            self.engine = create_engine(
+                url,
+                future=True,
+                poolclass=MeteredQueuePool,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+                pool_recycle=self.pool_recycle,
+                pool_use_lifo=True,
+                pool_pre_ping=False,
+            )
+            self.engine.pool.metrics = self.pool_metrics
+            event.listen(self.engine, "connect", self._on_pool_connect)
+            event.listen(self.engine, "checkout", self._on_pool_checkout)
+            event.listen(self.engine, "checkin", self._on_pool_checkin)
+            event.listen(self.engine, "invalidate", self._on_pool_invalidate)
+            event.listen(self.engine, "before_cursor_execute", self.query_log.before_cursor_execute)
+            event.listen(self.engine, "after_cursor_execute", self.query_log.after_cursor_execute)
+            event.listen(self.engine, "handle_error", self.query_log.handle_error)
+            event.listen(self.engine, "before_cursor_execute", self.instrumentation.before_cursor_execute)
+            event.listen(self.engine, "after_cursor_execute", self.instrumentation.after_cursor_execute)
+            event.listen(self.engine, "handle_error", self.instrumentation.handle_error)
+            self.schema_cache.bind(self.engine)
+            self._search_support_ready = None
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
 
-            self.logger.info(f"Подключено: {self.dbname}@{self.host}:{self.port}")
+            self.logger.info("Подключено: %s@%s:%s", self.dbname, self.host, self.port)
+            self._disconnected_warned = False
             self._build_metadata()
+            self._register_summary_dependencies()
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка подключения: {self.format_db_error(e)}")
+            self.logger.error("Ошибка подключения: %s", self.format_db_error(e))
             self.engine = None
             return False
 
@@ -63,17 +96,176 @@ class ConnectionMixin:
             return
 
         try:
+            # Плановые обновления представлений используют engine — останавливаем их первыми
+            self.matview_scheduler.stop()
+            with self._matview_lock:
+                self._matview_jobs.clear()
+                self._matview_stats.clear()
             self.engine.dispose()
             self.engine = None
+            self.schema_cache.bind(None)
+            self._search_support_ready = None
+            with self._backend_pids_lock:
+                self._backend_pids.clear()
             self.metadata = None
             self.tables.clear()
+            self._disconnected_warned = False
             self.logger.info(" Соединение с БД успешно закрыто.")
         except Exception as e:
-            self.logger.error(f"Ошибка при закрытии соединения: {e}")
+            self.logger.error("Ошибка при закрытии соединения: %s", e)
 
     def is_connected(self) -> bool:
-        """Проверяет, активно ли соединение с БД (логирует только при ошибке)."""
+        """
+        Проверяет, активно ли соединение с БД. Предупреждение пишется один раз
+        после потери соединения, повторные проверки — только на уровне DEBUG.
+        """
         if self.engine is None:
-            self.logger.warning("⚠Проверка подключения: соединение не активно.")
+            if self._disconnected_warned:
+                self.logger.debug("Проверка подключения: соединение не активно.")
+            else:
+                self._disconnected_warned = True
+                self.logger.warning("⚠Проверка подключения: соединение не активно.")
             return False
         return True
+
+    def _on_pool_connect(self, dbapi_connection, connection_record):
+        self.pool_metrics.add("connects")
+
+    def _on_pool_invalidate(self, dbapi_connection, connection_record, exception):
+        self.pool_metrics.add("invalidations")
+
+    def _on_pool_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        """
+        Проверяет соединение, простоявшее в пуле дольше pool_pre_ping_idle, и
+        запоминает PID серверного процесса соединения, выданного текущему потоку.
+        """
+        self.pool_metrics.add("checkouts")
+        idle_since = connection_record.info.get("checked_in_at")
+        if (self.pool_pre_ping_idle is not None and idle_since is not None
+                and time.monotonic() - idle_since >= self.pool_pre_ping_idle):
+            self.pool_metrics.add("pings")
+            try:
+                cursor = dbapi_connection.cursor()
+                try:
+                    cursor.execute("SELECT 1")
+                finally:
+                    cursor.close()
+            except Exception as e:
+                self.pool_metrics.add("ping_failures")
+                self.logger.warning("Соединение из пула не отвечает, открывается новое: %s", e)
+                # Пул закроет это соединение и повторит выдачу с новым
+                raise DisconnectionError() from e
+
+        pid = connection_record.info.get("backend_pid")
+        if pid is None:
+            # PQbackendPID не обращается к серверу — значение берётся из libpq
+            pid = dbapi_connection.get_backend_pid()
+            connection_record.info["backend_pid"] = pid
+        with self._backend_pids_lock:
+            self._backend_pids[threading.get_ident()] = pid
+
+    def _on_pool_checkin(self, dbapi_connection, connection_record):
+        """Забывает PID соединения, возвращённого в пул, и запоминает начало простоя."""
+        connection_record.info["checked_in_at"] = time.monotonic()
+        pid = connection_record.info.get("backend_pid")
+        with self._backend_pids_lock:
+            for thread_id, thread_pid in list(self._backend_pids.items()):
+                if thread_pid == pid:
+                    del self._backend_pids[thread_id]
+
+    @contextmanager
+    def session(self) -> Iterator[Optional[Connection]]:
+        """
+        Закрепляет за текущим потоком одно соединение: чтения через
+        _connection() внутри блока используют его, а не берут соединение из
+        пула на каждый запрос. Удобно для диалога, делающего много мелких
+        запросов. Вложенные session() используют то же соединение.
+
+        Соединение сессии работает в режиме AUTOCOMMIT, чтобы между запросами
+        не оставалась открытой транзакция (она держала бы блокировки и мешала
+        DDL). Записи выполняются в собственных транзакциях через engine.begin().
+        """
+        local = self._session_local
+        if getattr(local, "conn", None) is not None or not self.is_connected():
+            yield getattr(local, "conn", None)
+            return
+
+        local.conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            yield local.conn
+        finally:
+            conn, local.conn = local.conn, None
+            try:
+                conn.close()
+            except Exception as e:
+                self.logger.warning("Ошибка закрытия соединения сессии: %s", self.format_db_error(e))
+
+    @contextmanager
+    def _connection(self) -> Iterator[Connection]:
+        """
+        Соединение для чтения: соединение сессии текущего потока (см. session)
+        или новое соединение из пула.
+        """
+        local = self._session_local
+        conn = getattr(local, "conn", None)
+        if conn is None or conn.engine is not self.engine:
+            with self.engine.connect() as conn:
+                yield conn
+            return
+
+        if conn.invalidated or conn.closed:
+            # Соединение потеряно (перезапуск сервера) — сессия продолжается с новым
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn = local.conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        self.pool_metrics.add("session_reuses")
+        yield conn
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Счётчики пула соединений и его текущее состояние.
+
+        Returns:
+            {'checkouts', 'connects', 'waits', 'wait_time_ms', 'max_wait_ms', 'timeouts',
+             'peak_overflow', 'pings', 'ping_failures', 'invalidations', 'session_reuses',
+             'size', 'checked_out', 'checked_in', 'overflow'} — последние четыре
+            только при активном подключении
+        """
+        return self.pool_metrics.stats(self.engine.pool if self.engine is not None else None)
+
+    def get_backend_pid(self, thread_id: Optional[int] = None) -> Optional[int]:
+        """
+        Возвращает PID серверного процесса соединения, которое сейчас держит поток.
+
+        Args:
+            thread_id: Идентификатор потока (по умолчанию — текущий поток)
+        """
+        if thread_id is None:
+            thread_id = threading.get_ident()
+        with self._backend_pids_lock:
+            return self._backend_pids.get(thread_id)
+
+    def cancel_backend(self, pid: int) -> bool:
+        """
+        Отменяет выполняющийся на сервере запрос через pg_cancel_backend.
+
+        Args:
+            pid: PID серверного процесса (см. get_backend_pid)
+
+        Returns:
+            bool: True, если сервер принял запрос на отмену
+        """
+        if not self.is_connected():
+            return False
+        try:
+            with self.engine.connect() as conn:
+                cancelled = conn.execute(
+                    text("SELECT pg_cancel_backend(:pid)"), {"pid": pid}
+                ).scalar()
+            self.logger.info("Запрос на отмену backend PID=%s: %s", pid, 'принят' if cancelled else 'отклонён')
+            return bool(cancelled)
+        except Exception as e:
+            self.logger.error("Ошибка при отмене запроса (PID=%s): %s", pid, self.format_db_error(e))
+            return False
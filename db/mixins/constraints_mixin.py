@@ -3,7 +3,7 @@
 """
 
 import logging
-from sqlalchemy import inspect, text
+from sqlalchemy import text
 from typing import List, Dict, Any, Tuple
 import re
 
@@ -31,7 +31,7 @@ class ConstraintsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f"Таблица '{table_name}' не существует")
+                self.logger.error("Таблица '%s' не существует", table_name)
                 return False
 
             constraint_type = constraint_type.upper()
@@ -64,7 +64,7 @@ class ConstraintsMixin:
                         return False
 
                     if not self.record_exists_ex_table(ref_table):
-                        self.logger.error(f"Ссылочная таблица '{ref_table}' не существует")
+                        self.logger.error("Ссылочная таблица '%s' не существует", ref_table)
                         return False
 
                     cols_str = ", ".join(f'"{c}"' for c in (cols if isinstance(cols, list) else [cols]))
@@ -72,22 +72,22 @@ class ConstraintsMixin:
                     sql += f"FOREIGN KEY ({cols_str}) REFERENCES \"{ref_table}\" ({ref_cols_str})"
 
                 case _:
-                    self.logger.error(f"Неизвестный тип ограничения: {constraint_type}")
+                    self.logger.error("Неизвестный тип ограничения: %s", constraint_type)
                     return False
 
             sql += ";"
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" Ограничение '{constraint_name}' успешно добавлено к '{table_name}'")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Ограничение '%s' успешно добавлено к '%s'", constraint_name, table_name)
             return True
 
         except Exception as e:
             msg = self.format_db_error(e)
-            self.logger.error(f" Ошибка добавления ограничения: {msg}")
+            self.logger.error(" Ошибка добавления ограничения: %s", msg)
             return False
 
     def drop_constraint(self, table_name: str, constraint_name: str) -> bool:
@@ -101,30 +101,30 @@ class ConstraintsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f"Таблица '{table_name}' не существует")
+                self.logger.error("Таблица '%s' не существует", table_name)
                 return False
 
-            self.logger.info(f"Удаление ограничения '{constraint_name}' из таблицы '{table_name}'")
+            self.logger.info("Удаление ограничения '%s' из таблицы '%s'", constraint_name, table_name)
 
             # Проверяем существование ограничения (если метод get_table_constraints реализован)
             constraints = self.get_table_constraints(table_name)
             if not any(c.get("name") == constraint_name for c in constraints):
-                self.logger.warning(f" Ограничение '{constraint_name}' не найдено — возможно, оно уже удалено")
+                self.logger.warning(" Ограничение '%s' не найдено — возможно, оно уже удалено", constraint_name)
                 return False
 
             sql = f'ALTER TABLE "{table_name}" DROP CONSTRAINT "{constraint_name}";'
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" Ограничение '{constraint_name}' успешно удалено из '{table_name}'")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Ограничение '%s' успешно удалено из '%s'", constraint_name, table_name)
             return True
 
         except Exception as e:
             msg = self.format_db_error(e)
-            self.logger.error(f" Ошибка удаления ограничения '{constraint_name}': {msg}")
+            self.logger.error(" Ошибка удаления ограничения '%s': %s", constraint_name, msg)
             return False
 
     def get_table_constraints(self, table_name: str) -> List[Dict[str, Any]]:
@@ -136,10 +136,9 @@ class ConstraintsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f"Таблица '{table_name}' не существует")
+                self.logger.error("Таблица '%s' не существует", table_name)
                 return []
 
-            insp = inspect(self.engine)
             constraints = []
 
             # Обработчик добавления ограничения (чтобы не дублировать код)
@@ -153,14 +152,14 @@ class ConstraintsMixin:
                 })
 
             # --- CHECK ---
-            for chk in insp.get_check_constraints(table_name):
+            for chk in self.schema_cache.get_check_constraints(table_name):
                 add_constraint(
                     chk["name"], "CHECK",
                     str(chk.get("sqltext", "")),
                 )
 
             # --- UNIQUE ---
-            for uq in insp.get_unique_constraints(table_name):
+            for uq in self.schema_cache.get_unique_constraints(table_name):
                 cols = uq.get("column_names", [])
                 add_constraint(
                     uq["name"], "UNIQUE",
@@ -168,7 +167,7 @@ class ConstraintsMixin:
                 )
 
             # --- FOREIGN KEY ---
-            for fk in insp.get_foreign_keys(table_name):
+            for fk in self.schema_cache.get_foreign_keys(table_name):
                 add_constraint(
                     fk["name"], "FOREIGN KEY",
                     f"FOREIGN KEY ({', '.join(fk['constrained_columns'])}) "
@@ -178,11 +177,11 @@ class ConstraintsMixin:
                     foreign_columns=fk["referred_columns"]
                 )
 
-            self.logger.info(f"Найдено {len(constraints)} ограничений в '{table_name}'")
+            self.logger.info("Найдено %s ограничений в '%s'", len(constraints), table_name)
             return constraints
 
         except Exception as e:
-            self.logger.error(f"Ошибка получения ограничений таблицы '{table_name}': {self.format_db_error(e)}")
+            self.logger.error("Ошибка получения ограничений таблицы '%s': %s", table_name, self.format_db_error(e))
             return []
 
     def get_column_constraints(self, table_name: str, column_name: str) -> Dict[str, Any]:
@@ -210,11 +209,9 @@ class ConstraintsMixin:
         }
 
         try:
-            inspector = inspect(self.engine)
-
             # Проверяем существование таблицы и колонки
             if table_name not in self.tables or column_name not in self.tables[table_name].c:
-                self.logger.error(f"Таблица '{table_name}' или столбец '{column_name}' не найдены.")
+                self.logger.error("Таблица '%s' или столбец '%s' не найдены.", table_name, column_name)
                 return constraints
 
             column = self.tables[table_name].c[column_name]
@@ -259,7 +256,7 @@ class ConstraintsMixin:
                     constraints['allowed_values'] = list(item_type.enums)
 
             # --- 3. Парсинг CHECK ограничений ---
-            check_constraints = inspector.get_check_constraints(table_name)
+            check_constraints = self.schema_cache.get_check_constraints(table_name)
 
             # Собираем все другие колонки таблицы
             all_other_columns = [col.name for col in self.tables[table_name].columns if col.name != column_name]
@@ -354,17 +351,17 @@ class ConstraintsMixin:
 
             # --- Короткий лог ---
             self.logger.info(
-                f"[CONSTRAINTS] {table_name}.{column_name}: type={constraints['data_type']}, "
-                f"nullable={constraints['nullable']}, default={constraints['default']}, "
-                f"range=({constraints['min_value']}, {constraints['max_value']}), "
-                f"cross_checks={len(constraints['cross_field_checks'])}"
+                "[CONSTRAINTS] %s.%s: type=%s, nullable=%s, default=%s, range=(%s, %s), cross_checks=%s",
+                table_name, column_name, constraints['data_type'], constraints['nullable'], constraints['default'],
+                constraints['min_value'], constraints['max_value'], len(constraints['cross_field_checks'])
             )
 
             return constraints
 
         except Exception as e:
             user_friendly_msg = self.format_db_error(e)
-            self.logger.error(f"Ошибка получения ограничений для '{table_name}.{column_name}': {user_friendly_msg}")
+            self.logger.error("Ошибка получения ограничений для '%s.%s': %s",
+                              table_name, column_name, user_friendly_msg)
             return constraints
 
     def get_predefined_joins(self) -> Dict[Tuple[str, str], Tuple[str, str]]:
@@ -398,7 +395,7 @@ class ConstraintsMixin:
                 predefined_joins[(child_table, parent_table)] = (child_column, parent_column)
                 predefined_joins[(parent_table, child_table)] = (parent_column, child_column)
 
-        self.logger.info(f"Сгенерировано {len(predefined_joins)} предопределенных соединений")
+        self.logger.info("Сгенерировано %s предопределенных соединений", len(predefined_joins))
         return predefined_joins
 
     def alter_column_constraints(self, table_name: str, column_name: str,
@@ -413,12 +410,12 @@ class ConstraintsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f" Таблица '{table_name}' не существует.")
+                self.logger.error(" Таблица '%s' не существует.", table_name)
                 return False
 
             columns = self.get_column_names(table_name)
             if column_name not in columns:
-                self.logger.error(f" Столбец '{column_name}' не найден в '{table_name}'.")
+                self.logger.error(" Столбец '%s' не найден в '%s'.", column_name, table_name)
                 return False
 
             with self.engine.begin() as conn:
@@ -431,12 +428,12 @@ class ConstraintsMixin:
                         )).scalar() or 0
                         
                         if null_count > 0:
-                            self.logger.error(f" Невозможно установить NOT NULL: найдено {null_count} NULL значений.")
+                            self.logger.error(" Невозможно установить NOT NULL: найдено %s NULL значений.", null_count)
                             return False
 
                     action = "DROP NOT NULL" if nullable else "SET NOT NULL"
                     sql = f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" {action};'
-                    self.logger.info(f"{action} для столбца '{table_name}.{column_name}'")
+                    self.logger.info("%s для столбца '%s.%s'", action, table_name, column_name)
                     conn.execute(text(sql))
 
                 # Изменение DEFAULT
@@ -450,20 +447,21 @@ class ConstraintsMixin:
                             default_sql = str(default)
                         sql = f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" SET DEFAULT {default_sql};'
                     
-                    self.logger.info(f"Изменение DEFAULT для столбца '{table_name}.{column_name}'")
+                    self.logger.info("Изменение DEFAULT для столбца '%s.%s'", table_name, column_name)
                     conn.execute(text(sql))
 
                 # Добавление CHECK ограничения
                 if check_condition:
                     constraint_name = f'chk_{table_name}_{column_name}'
                     sql = f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{constraint_name}" CHECK ({check_condition});'
-                    self.logger.info(f"Добавление CHECK ограничения для столбца '{table_name}.{column_name}'")
+                    self.logger.info("Добавление CHECK ограничения для столбца '%s.%s'", table_name, column_name)
                     conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" Ограничения столбца '{column_name}' успешно изменены в '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Ограничения столбца '%s' успешно изменены в '%s'.", column_name, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка изменения ограничений столбца '{table_name}.{column_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка изменения ограничений столбца '%s.%s': %s",
+                              table_name, column_name, self.format_db_error(e))
             return False
@@ -3,9 +3,105 @@
 """
 
 import logging
-from sqlalchemy import func, select, asc, desc, text, inspect
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import date
+import re
+from array import array
+from sqlalchemy import func, select, asc, desc, text
+from sqlalchemy import String, Integer, Numeric, Date, Boolean, Enum, ARRAY, CheckConstraint
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable
+from datetime import date, datetime
+from decimal import Decimal
+
+from ..check_compiler import CheckCompileError, compile_check
+from ..sql_utils import strip_sql_comments
+
+# Ожидаемые типы Python для типов столбцов (_validate_data)
+_PY_TYPES = {
+    String: str,
+    Enum: str,
+    Integer: int,
+    Numeric: (int, float, Decimal),
+    Date: (str, date),
+    Boolean: bool,
+    ARRAY: list,
+}
+
+_INTEGER_TEXT = re.compile(r'\s*[+-]?\d+\s*')
+
+
+def _coerce_key(value: Any, python_type: type) -> Any:
+    """
+    Приводит значение внешнего ключа к типу столбца без потери точности:
+    5.7 для INTEGER не превращается в 5 (PostgreSQL округлил бы его до 6).
+    ValueError/ArithmeticError — значение нельзя привести без потерь.
+    """
+    if python_type is int:
+        if isinstance(value, bool):
+            raise ValueError(value)
+        if isinstance(value, int):
+            return value
+        if isinstance(value, (float, Decimal)) and value == int(value):
+            return int(value)
+        if isinstance(value, str) and _INTEGER_TEXT.fullmatch(value):
+            return int(value)
+        raise ValueError(value)
+    if isinstance(value, python_type):
+        return value
+    return python_type(value)
+
+
+class _BulkRowError(Exception):
+    """Ошибка БД, привязанная к конкретной строке массовой вставки."""
+
+    def __init__(self, index: int, error: Exception):
+        super().__init__(str(error))
+        self.index = index
+        self.error = error
+
+
+class _CopyRowReader:
+    """Файлоподобный объект для copy_expert: формирует CSV из строк по мере чтения."""
+
+    def __init__(self, rows: Iterator[Tuple]):
+        self._rows = rows
+        self._buffer = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += ",".join(self._format(value) for value in row) + "\n"
+            self.rows += 1
+        if size < 0:
+            chunk, self._buffer = self._buffer, ""
+        else:
+            chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    @classmethod
+    def _format(cls, value: Any) -> str:
+        # Пустое значение без кавычек — NULL, всё остальное передаём в кавычках
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, (list, tuple)):
+            value = cls._array_literal(value)
+        elif isinstance(value, date):
+            value = value.isoformat()
+        return '"' + str(value).replace('"', '""') + '"'
+
+    @staticmethod
+    def _array_literal(items) -> str:
+        elements = []
+        for item in items:
+            if item is None:
+                elements.append("NULL")
+            else:
+                escaped = str(item).replace("\\", "\\\\").replace('"', '\\"')
+                elements.append(f'"{escaped}"')
+        return "{" + ",".join(elements) + "}"
 
 
 class CrudMixin:
@@ -22,13 +118,13 @@ class CrudMixin:
             return []
 
         if table_name not in self.tables:
-            self.logger.error(f" Таблица '{table_name}' не определена в метаданных.")
+            self.logger.error(" Таблица '%s' не определена в метаданных.", table_name)
             return []
 
         try:
-            self.logger.info(f" SELECT * FROM \"{table_name}\"")
+            self.logger.info(" SELECT * FROM \"%s\"", table_name)
             table = self.tables[table_name]
-            with self.engine.connect() as conn:
+            with self._connection() as conn:
                 result = conn.execute(table.select())
                 rows = [dict(row._mapping) for row in result]
 
@@ -38,13 +134,36 @@ class CrudMixin:
                     if isinstance(value, list):
                         row[key] = ', '.join(value)
 
-            self.logger.info(f" Получено {len(rows)} строк из '{table_name}'.")
+            self.logger.info(" Получено %s строк из '%s'.", len(rows), table_name)
             return rows
 
         except Exception as e:
-            self.logger.error(f" Ошибка чтения таблицы '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка чтения таблицы '%s': %s", table_name, self.format_db_error(e))
             return []
 
+    def stream_table_data(self, table_name: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Потоковый вариант get_table_data: возвращает генератор пачек строк.
+
+        Строки читаются через серверный (именованный) курсор psycopg2, поэтому
+        в памяти одновременно находится не более batch_size строк.
+        """
+        if not self.is_connected():
+            return
+
+        if table_name not in self.tables:
+            self.logger.error(" Таблица '%s' не определена в метаданных.", table_name)
+            return
+
+        self.logger.info(" Потоковый SELECT * FROM \"%s\" (пачки по %s)", table_name, batch_size)
+        for batch in self._stream_statement(self.tables[table_name].select(), batch_size, table_name):
+            # Преобразуем списки (например, авторов) в строку, как в get_table_data
+            for row in batch:
+                for key, value in row.items():
+                    if isinstance(value, list):
+                        row[key] = ', '.join(value)
+            yield batch
+
     def _validate_data(self, table_name: str, data: Dict[str, Any]) -> List[str]:
         """
         Универсальная валидация данных перед вставкой/обновлением.
@@ -54,91 +173,201 @@ class CrudMixin:
         if table_name not in self.tables:
             return [f" Таблица '{table_name}' не найдена в метаданных."]
 
-        table = self.tables[table_name]
+        plan = self._validation_plan(self.tables[table_name])
         errors = []
 
-        for column in table.columns:
-            col_name = column.name
+        for col_name, skip_if_missing, required, py_type, is_date, enum_values in plan["columns"]:
             value = data.get(col_name)
-            is_nullable = column.nullable
 
             # --- 1️⃣ Автоинкремент PK: можно не передавать
-            if column.primary_key and column.autoincrement and value is None:
+            if skip_if_missing and value is None:
                 continue
 
             # --- 2️⃣ NOT NULL + без default → ошибка, если значение не передано
-            if not is_nullable and value is None and column.default is None:
+            if required and value is None:
                 errors.append(f"Поле '{col_name}' обязательно (NOT NULL), но не заполнено.")
                 continue
 
             # --- 3️⃣ Проверка типов
-            from sqlalchemy import String, Integer, Numeric, Date, Boolean, Enum, ARRAY
-            py_type = {
-                String: str,
-                Enum: str,
-                Integer: int,
-                Numeric: (int, float),
-                Date: (str, date),
-                Boolean: bool,
-                ARRAY: list
-            }.get(type(column.type))
-
             if value is not None and py_type and not isinstance(value, py_type):
                 errors.append(
                     f"Поле '{col_name}' имеет неверный тип. Ожидался {py_type}, получен {type(value)}."
                 )
 
             # --- 4️⃣ Проверка формата даты (если строка)
-            if isinstance(column.type, Date) and isinstance(value, str):
-                from datetime import datetime
+            if is_date and isinstance(value, str):
                 try:
                     datetime.strptime(value, "%Y-%m-%d")
                 except ValueError:
                     errors.append(f"Поле '{col_name}' должно быть в формате 'YYYY-MM-DD', получено '{value}'.")
 
             # --- 5️⃣ Проверка ENUM
-            if isinstance(column.type, Enum) and value is not None:
-                if value not in column.type.enums:
-                    errors.append(
-                        f"Поле '{col_name}' имеет недопустимое значение '{value}'. "
-                        f"Допустимые: {list(column.type.enums)}."
-                    )
-
-        # --- 6️⃣ Проверка CHECK-ограничений (универсально!)
-        from sqlalchemy import CheckConstraint
+            if enum_values is not None and value is not None and value not in enum_values:
+                errors.append(
+                    f"Поле '{col_name}' имеет недопустимое значение '{value}'. "
+                    f"Допустимые: {list(enum_values)}."
+                )
+
+        # --- 6️⃣ Проверка CHECK-ограничений (скомпилированные выражения, см. db/check_compiler.py)
+        for expr, check in plan["checks"]:
+            if check.is_violated(data):
+                errors.append(f"Нарушено ограничение CHECK: {expr}")
+
+        return errors
+
+    def _validation_plan(self, table) -> Dict[str, Any]:
+        """
+        План проверки строк таблицы для _validate_data: по столбцу — (имя, автоинкрементный PK,
+        обязателен, ожидаемый тип Python, дата, допустимые значения ENUM), и скомпилированные
+        CHECK-ограничения. Строится один раз на объект Table и хранится в table.info —
+        после ALTER метаданные перечитываются в новый Table, и план строится заново.
+        """
+        plan = table.info.get("validation_plan")
+        if plan is not None:
+            return plan
+
+        columns = []
+        for column in table.columns:
+            columns.append((
+                column.name,
+                bool(column.primary_key and column.autoincrement),
+                not column.nullable and column.default is None,
+                _PY_TYPES.get(type(column.type)),
+                isinstance(column.type, Date),
+                tuple(column.type.enums) if isinstance(column.type, Enum) else None,
+            ))
+
+        checks = []
         for constraint in table.constraints:
             if isinstance(constraint, CheckConstraint) and constraint.sqltext is not None:
                 expr = str(constraint.sqltext)
                 try:
-                    # подставляем значения для проверки
-                    expr_eval = expr
-                    for k, v in data.items():
-                        val = f"'{v}'" if isinstance(v, str) else v
-                        expr_eval = expr_eval.replace(k, str(val))
-                    if not eval(expr_eval):
-                        errors.append(f"Нарушено ограничение CHECK: {expr}")
-                except Exception:
-                    # если проверку невозможно вычислить — просто пропускаем
-                    pass
+                    checks.append((expr, compile_check(expr)))
+                except CheckCompileError as e:
+                    # Такое ограничение проверит сама БД при записи
+                    self.logger.debug("CHECK '%s' таблицы '%s' не проверяется заранее: %s", expr, table.name, e)
 
-        return errors
+        plan = {"columns": columns, "checks": checks}
+        table.info["validation_plan"] = plan
+        return plan
 
     def _check_foreign_key_exists(self, table_name: str, column_name: str, value: Any) -> bool:
         """Универсально проверяет, существует ли запись с указанным значением во внешней таблице."""
-        if not value or table_name not in self.tables:
+        if not value:
             return False
+        existing = self._existing_keys(table_name, column_name, [value])
+        return existing is not None and value in existing
 
-        table = self.tables[table_name]
-        column = getattr(table.c, column_name, None)
-        if column is None or not self.is_connected():
-            return False
+    def _existing_keys(self, table_name: str, column_name: str, values: Iterable[Any]) -> Optional[set]:
+        """
+        Возвращает значения из values, присутствующие в table_name.column_name.
+        Значения, найденные недавно, берутся из self.key_cache, остальные
+        проверяются одним запросом "= ANY(:ids)". None — проверка не удалась.
+
+        Значения приводятся к типу столбца ("5" → 5 для INTEGER, см. _coerce_key),
+        иначе массив строк в "= ANY" вызвал бы ошибку типов; значения, которые
+        нельзя привести без потерь, считаются отсутствующими.
+        """
+        if table_name not in self.tables or column_name not in self.tables[table_name].c:
+            return None
 
         try:
-            with self.engine.connect() as conn:
-                return conn.execute(table.select().where(column == value).limit(1)).first() is not None
+            python_type = self.tables[table_name].c[column_name].type.python_type
+        except NotImplementedError:
+            python_type = None
+        converted: Dict[Any, Any] = {}
+        for value in values:
+            if value is None:
+                continue
+            if python_type is None:
+                converted[value] = value
+                continue
+            try:
+                converted[value] = _coerce_key(value, python_type)
+            except (TypeError, ValueError, ArithmeticError):
+                continue
+
+        found = self._existing_typed_keys(table_name, column_name, set(converted.values()))
+        if found is None:
+            return None
+        return {value for value, key in converted.items() if key in found}
+
+    def _existing_typed_keys(self, table_name: str, column_name: str, values: set) -> Optional[set]:
+        """_existing_keys для значений, уже приведённых к типу столбца."""
+        existing = self.key_cache.known(table_name, column_name, values)
+        unknown = values - existing
+        if not unknown:
+            return existing
+        if not self.is_connected():
+            return None
+
+        try:
+            with self._connection() as conn:
+                found = {row[0] for row in conn.execute(
+                    text(f'SELECT DISTINCT "{column_name}" FROM "{table_name}" WHERE "{column_name}" = ANY(:ids)'),
+                    {"ids": list(unknown)}
+                )}
         except Exception as e:
-            self.logger.error(f" Ошибка проверки внешнего ключа {table_name}.{column_name}: {e}")
-            return False
+            self.logger.error(" Ошибка проверки внешнего ключа %s.%s: %s",
+                              table_name, column_name, self.format_db_error(e))
+            return None
+
+        self.key_cache.record_misses(len(unknown))
+        self.key_cache.add(table_name, column_name, found)
+        return existing | found
+
+    def check_foreign_keys(self, table_name: str, rows: List[Dict[str, Any]]) -> Dict[int, List[str]]:
+        """
+        Проверяет внешние ключи сразу для многих строк: значения всех строк,
+        ссылающиеся на один столбец, проверяются одним запросом, поэтому пачка
+        выдач книг проверяется двумя запросами (Books и Readers), а не двумя на строку.
+
+        Составные внешние ключи и ссылки таблицы на саму себя не проверяются —
+        их проверит БД при вставке. Если проверка не удалась (ошибка запроса),
+        строки со ссылками на этот столбец считаются ошибочными.
+
+        Args:
+            table_name: Таблица, в которую записываются строки
+            rows: Строки (словари столбец → значение)
+
+        Returns:
+            Dict[int, List[str]]: {индекс строки: [ошибки]} только для строк с ошибками
+        """
+        if table_name not in self.tables or not rows:
+            return {}
+
+        # (таблица, столбец) ссылки → [столбцы этой таблицы, ссылающиеся на него]
+        references: Dict[Tuple[str, str], List[str]] = {}
+        for fk in self.tables[table_name].foreign_keys:
+            try:
+                target = fk.column
+            except Exception:
+                continue
+            if len(fk.constraint.columns) != 1 or target.table.name == table_name:
+                continue
+            references.setdefault((target.table.name, target.name), []).append(fk.parent.name)
+
+        errors: Dict[int, List[str]] = {}
+        for (target_table, target_column), columns in references.items():
+            values = {row.get(col) for row in rows for col in columns} - {None}
+            existing = self._existing_keys(target_table, target_column, values)
+            if existing is None:
+                # Непроверенная строка не считается корректной
+                for index, row in enumerate(rows):
+                    for col in columns:
+                        if row.get(col) is not None:
+                            errors.setdefault(index, []).append(
+                                f"Поле '{col}': не удалось проверить ссылку на {target_table}.{target_column}."
+                            )
+                continue
+            for index, row in enumerate(rows):
+                for col in columns:
+                    value = row.get(col)
+                    if value is not None and value not in existing:
+                        errors.setdefault(index, []).append(
+                            f"Поле '{col}': значение {value!r} отсутствует в {target_table}.{target_column}."
+                        )
+        return errors
 
     def insert_data(self, table_name: str, data: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
         """Вставляет одну запись в таблицу с проверкой данных и учётом значений по умолчанию.
@@ -150,72 +379,211 @@ class CrudMixin:
         errors = self._validate_data(table_name, data)
         if errors:
             for e in errors:
-                self.logger.warning(f" Ошибка валидации: {e}")
+                self.logger.warning(" Ошибка валидации: %s", e)
             return False, "; ".join(errors)
 
         try:
             table = self.tables[table_name]
             pk_col = self._get_primary_key_column(table_name)
-            free_id = self._find_min_free_id(table_name)
-            if free_id is None:
-                msg = " Не удалось найти свободный ID."
-                self.logger.error(msg)
-                return False, msg
-
-            # --- Подготовка данных ---
-            values = data.copy()
-            values[pk_col] = free_id
 
-            # Исключаем автоинкрементные поля
+            # Исключаем автоинкрементные поля — их значение выдаёт стратегия self.id_allocator
             insert_data = {
-                col.name: values.get(col.name, col.default.arg if col.default is not None else None)
+                col.name: data.get(col.name, col.default.arg if col.default is not None else None)
                 for col in table.columns if not (col.primary_key and col.autoincrement)
             }
 
-            self.logger.info(f"🟢 INSERT INTO {table_name} (ID={free_id}) ...")
+            self.logger.info("🟢 INSERT INTO %s (%s) ...", table_name, self.id_allocator.name)
 
             # --- Выполнение вставки ---
             with self.engine.begin() as conn:
-                conn.execute(table.insert().values(**insert_data))
-
-            self.logger.info(f" Успешно вставлена запись с ID={free_id}.")
+                allocated_id = None
+                if pk_col in table.c and table.c[pk_col].autoincrement:
+                    allocated_id = self.id_allocator.allocate(conn, table_name, pk_col)
+                if allocated_id is not None:
+                    insert_data[pk_col] = allocated_id
+                # Вставленная строка целиком (с DEFAULT и значениями триггеров) — для журнала изменений
+                stmt = table.insert().values(**insert_data).returning(*table.c)
+                new_row = dict(conn.execute(stmt).mappings().one())
+
+            self._record_row_changes(table_name, self.change_journal.INSERT, [new_row])
+            self.logger.info(" Успешно вставлена запись с ID=%s.", new_row.get(pk_col))
             return True, None
 
         except Exception as e:
             error_msg = f"Ошибка вставки в '{table_name}': {self.format_db_error(e)}"
-            self.logger.error(f" {error_msg}")
+            self.logger.error(" %s", error_msg)
             return False, error_msg
 
-    def _find_min_free_id(self, table_name: str) -> int:
-        """Находит минимальный свободный ID в указанной таблице (или 1, если таблица пуста)."""
+    def insert_many(
+            self,
+            table_name: str,
+            rows: Iterable[Dict[str, Any]],
+            method: str = "copy",
+            batch_size: int = 5000,
+            validate: bool = True
+    ) -> Tuple[int, List[Tuple[int, str]]]:
+        """
+        Массовая вставка записей в одной транзакции.
+
+        Каждая строка проходит ту же валидацию, что и в insert_data, а внешние ключи
+        проверяются пачками (check_foreign_keys); строки с ошибками пропускаются
+        и попадают в отчёт. Если ошибку вернула сама БД (FK, CHECK, UNIQUE),
+        транзакция откатывается целиком, а в отчёте указывается номер виновной строки.
+        Автоинкрементный PK назначает sequence столбца.
+
+        Args:
+            table_name: Имя таблицы
+            rows: Строки (словари); может быть генератором — данные передаются потоком
+            method: "copy" (COPY FROM STDIN), "values" (execute_values) или "executemany"
+            batch_size: Размер пачки для "values"/"executemany"
+            validate: Проверять строки в Python (False — для заведомо корректных данных,
+                например сгенерированных; ограничения всё равно проверит БД)
+
+        Returns:
+            Tuple[int, List[Tuple[int, str]]]: (число вставленных строк, [(индекс строки, ошибка)])
+        """
         if not self.is_connected():
-            return 1
+            return 0, [(-1, "Нет подключения к базе данных.")]
+        if table_name not in self.tables:
+            return 0, [(-1, f"Таблица '{table_name}' не найдена в метаданных.")]
+        if method not in ("copy", "values", "executemany"):
+            return 0, [(-1, f"Неизвестный метод вставки: {method}")]
 
+        table = self.tables[table_name]
+        columns = [col for col in table.columns if not (col.primary_key and col.autoincrement)]
+        defaults = {
+            col.name: col.default.arg if col.default is not None and col.default.is_scalar else None
+            for col in columns
+        }
+        errors: List[Tuple[int, str]] = []
+        # Исходные индексы строк, прошедших валидацию (для сопоставления ошибок БД)
+        accepted = array("q")
+
+        def valid_rows() -> Iterator[Tuple]:
+            if not validate:
+                for index, row in enumerate(rows):
+                    accepted.append(index)
+                    yield tuple(row.get(name, default) for name, default in defaults.items())
+                return
+            chunk: List[Tuple[int, Dict[str, Any]]] = []
+            for index, row in enumerate(rows):
+                row_errors = self._validate_data(table_name, row)
+                if row_errors:
+                    errors.append((index, "; ".join(row_errors)))
+                    continue
+                chunk.append((index, row))
+                if len(chunk) >= batch_size:
+                    yield from checked(chunk)
+                    chunk = []
+            yield from checked(chunk)
+
+        def checked(chunk: List[Tuple[int, Dict[str, Any]]]) -> Iterator[Tuple]:
+            # Внешние ключи проверяются пачкой: по запросу на таблицу, а не на строку
+            fk_errors = self.check_foreign_keys(table_name, [row for _, row in chunk])
+            for position, (index, row) in enumerate(chunk):
+                if position in fk_errors:
+                    errors.append((index, "; ".join(fk_errors[position])))
+                    continue
+                accepted.append(index)
+                yield tuple(row.get(name, default) for name, default in defaults.items())
+
+        self.logger.info(" Массовая вставка в '%s' (метод: %s)", table_name, method)
         try:
-            pk = self._get_primary_key_column(table_name)
-            with self.engine.connect() as conn:
-                max_id = conn.execute(text(f'SELECT COALESCE(MAX("{pk}"), 0) FROM "{table_name}"')).scalar()
-                result = conn.execute(text(f"""
-                    SELECT MIN(id)
-                    FROM generate_series(1, {max_id + 1}) AS g(id)
-                    WHERE id NOT IN (SELECT "{pk}" FROM "{table_name}")
-                """))
-                return result.scalar() or max_id + 1
-
+            with self.engine.begin() as conn:
+                if method != "executemany" and conn.dialect.driver != "psycopg2":
+                    # COPY и execute_values доступны только в psycopg2
+                    self.logger.warning(" Драйвер %s не поддерживает '%s', используется executemany",
+                                        conn.dialect.driver, method)
+                    method = "executemany"
+                if method == "copy":
+                    inserted = self._copy_rows(conn.connection.dbapi_connection, table_name, columns, valid_rows())
+                else:
+                    inserted = self._insert_batches(conn, table, columns, method, valid_rows(),
+                                                    accepted, batch_size)
+        except _BulkRowError as e:
+            errors.append((e.index, self.format_db_error(e.error)))
+            self.logger.error(" Массовая вставка в '%s' отменена: строка %s: %s", table_name, e.index, e.error)
+            return 0, errors
         except Exception as e:
-            self.logger.error(f" Ошибка поиска свободного ID: {self.format_db_error(e)}")
-            # fallback — берём MAX+1
+            index = self._copy_error_row_index(e, accepted)
+            errors.append((index, self.format_db_error(e)))
+            self.logger.error(" Массовая вставка в '%s' отменена: %s", table_name, self.format_db_error(e))
+            return 0, errors
+
+        self._invalidate_results([table_name], self.change_journal.INSERT)
+        errors.sort()
+        self.logger.info(" Вставлено %s записей в '%s', отклонено %s.", inserted, table_name, len(errors))
+        return inserted, errors
+
+    def _copy_rows(self, raw_conn, table_name: str, columns, values: Iterator[Tuple]) -> int:
+        """Передаёт строки через COPY ... FROM STDIN в формате CSV, не накапливая их в памяти."""
+        column_list = ", ".join(f'"{col.name}"' for col in columns)
+        reader = _CopyRowReader(values)
+        with raw_conn.cursor() as cursor:
+            cursor.copy_expert(f'COPY "{table_name}" ({column_list}) FROM STDIN WITH (FORMAT csv)', reader)
+        return reader.rows
+
+    def _insert_batches(self, conn, table, columns, method: str, values: Iterator[Tuple],
+                        accepted, batch_size: int) -> int:
+        """Вставляет строки пачками через execute_values или executemany."""
+        names = [col.name for col in columns]
+        inserted = 0
+        batch: List[Tuple] = []
+
+        def flush():
+            nonlocal inserted
+            if not batch:
+                return
+            first = len(accepted) - len(batch)
+            savepoint = conn.begin_nested()
             try:
-                with self.engine.connect() as conn:
-                    max_id = conn.execute(text(f'SELECT COALESCE(MAX("{pk}"), 0) FROM "{table_name}"')).scalar()
-                    return max_id + 1
+                self._execute_batch(conn, table, names, method, batch, batch_size)
+                savepoint.commit()
             except Exception:
-                return 1
+                savepoint.rollback()
+                # Ищем виновную строку, чтобы сообщить её номер, и отменяем всю вставку
+                for offset, row in enumerate(batch):
+                    try:
+                        with conn.begin_nested():
+                            conn.execute(table.insert().values(dict(zip(names, row))))
+                    except Exception as row_error:
+                        raise _BulkRowError(accepted[first + offset], row_error)
+                raise
+            inserted += len(batch)
+            batch.clear()
+
+        for row in values:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        return inserted
+
+    @staticmethod
+    def _execute_batch(conn, table, names: List[str], method: str, batch: List[Tuple], page_size: int):
+        if method == "values":
+            from psycopg2.extras import execute_values
+            column_list = ", ".join(f'"{name}"' for name in names)
+            with conn.connection.dbapi_connection.cursor() as cursor:
+                execute_values(cursor, f'INSERT INTO "{table.name}" ({column_list}) VALUES %s',
+                               batch, page_size=page_size)
+        else:
+            conn.execute(table.insert(), [dict(zip(names, row)) for row in batch])
+
+    @staticmethod
+    def _copy_error_row_index(error: Exception, accepted) -> int:
+        """Извлекает номер строки из контекста ошибки COPY ("COPY Books, line 42")."""
+        match = re.search(r"COPY \S+, line (\d+)", str(error))
+        if match:
+            line = int(match.group(1)) - 1
+            if 0 <= line < len(accepted):
+                return accepted[line]
+        return -1
 
     def _get_primary_key_column(self, table_name: str) -> str:
         """Возвращает имя первичного ключа таблицы (универсально, без жёстких привязок)."""
         if table_name not in self.tables:
-            self.logger.error(f" Таблица '{table_name}' не найдена в метаданных.")
+            self.logger.error(" Таблица '%s' не найдена в метаданных.", table_name)
             return "id"
 
         table = self.tables[table_name]
@@ -228,7 +596,7 @@ class CrudMixin:
             if name in table.columns:
                 return name
 
-        self.logger.warning(f" Первичный ключ не найден для таблицы '{table_name}'. Возвращено 'id'.")
+        self.logger.warning(" Первичный ключ не найден для таблицы '%s'. Возвращено 'id'.", table_name)
         return "id"
 
     def record_exists(self, table_name: str, condition: Dict[str, Any]) -> bool:
@@ -244,23 +612,23 @@ class CrudMixin:
                 if col is not None:
                     valid_conds.append(col == v)
                 else:
-                    self.logger.warning(f" Колонка '{k}' отсутствует в таблице '{table_name}'.")
+                    self.logger.warning(" Колонка '%s' отсутствует в таблице '%s'.", k, table_name)
 
             if not valid_conds:
-                self.logger.error(f" Нет корректных условий для поиска в '{table_name}'.")
+                self.logger.error(" Нет корректных условий для поиска в '%s'.", table_name)
                 return False
 
             stmt = table.select().where(*valid_conds).limit(1)
-            self.logger.info(f" Проверка записи в '{table_name}' по условию {condition}")
+            self.logger.info(" Проверка записи в '%s' по условию %s", table_name, condition)
 
-            with self.engine.connect() as conn:
+            with self._connection() as conn:
                 exists = conn.execute(stmt).first() is not None
 
-            self.logger.info(f" Запись {'найдена' if exists else 'не найдена'} в '{table_name}'.")
+            self.logger.info(" Запись %s в '%s'.", 'найдена' if exists else 'не найдена', table_name)
             return exists
 
         except Exception as e:
-            self.logger.error(f" Ошибка проверки записи в '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка проверки записи в '%s': %s", table_name, self.format_db_error(e))
             return False
 
     def delete_data(self, table_name: str, condition: Dict[str, Any]) -> bool:
@@ -276,24 +644,34 @@ class CrudMixin:
                 if col is not None:
                     where_clauses.append(col == v)
                 else:
-                    self.logger.warning(f" Колонка '{k}' отсутствует в таблице '{table_name}'.")
+                    self.logger.warning(" Колонка '%s' отсутствует в таблице '%s'.", k, table_name)
 
             if not where_clauses:
-                self.logger.error(f" Нет корректных условий для удаления в '{table_name}'.")
+                self.logger.error(" Нет корректных условий для удаления в '%s'.", table_name)
                 return False
 
             stmt = table.delete().where(*where_clauses)
-            self.logger.info(f" Удаление записей из '{table_name}' по условию {condition}")
+            pk_col = self._get_primary_key_column(table_name)
+            has_pk = pk_col in table.c
+            if has_pk:
+                stmt = stmt.returning(table.c[pk_col])
+            self.logger.info(" Удаление записей из '%s' по условию %s", table_name, condition)
 
             with self.engine.begin() as conn:
                 result = conn.execute(stmt)
-                count = result.rowcount or 0
+                freed_ids = [row[0] for row in result] if has_pk else []
+                count = len(freed_ids) if has_pk else (result.rowcount or 0)
 
-            self.logger.info(f" Удалено {count} записей из '{table_name}'.")
+            # Освободившиеся ID может переиспользовать стратегия выделения
+            self.id_allocator.release(table_name, freed_ids)
+            self._record_row_changes(table_name, self.change_journal.DELETE,
+                                     [{pk_col: pk} for pk in freed_ids] if has_pk else None)
+
+            self.logger.info(" Удалено %s записей из '%s'.", count, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка удаления из '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка удаления из '%s': %s", table_name, self.format_db_error(e))
             return False
 
     def update_data(self, table_name: str, condition: Dict[str, Any], new_values: Dict[str, Any]) -> bool:
@@ -309,10 +687,10 @@ class CrudMixin:
                 if hasattr(table.c, col):
                     valid_values[col] = val
                 else:
-                    self.logger.warning(f" Колонка '{col}' отсутствует в таблице '{table_name}'.")
+                    self.logger.warning(" Колонка '%s' отсутствует в таблице '%s'.", col, table_name)
 
             if not valid_values:
-                self.logger.error(f" Нет корректных колонок для обновления в '{table_name}'.")
+                self.logger.error(" Нет корректных колонок для обновления в '%s'.", table_name)
                 return False
 
             # --- Формируем WHERE ---
@@ -322,25 +700,29 @@ class CrudMixin:
                 if col is not None:
                     where_clauses.append(col == v)
                 else:
-                    self.logger.warning(f" Колонка '{k}' отсутствует в условии WHERE таблицы '{table_name}'.")
+                    self.logger.warning(" Колонка '%s' отсутствует в условии WHERE таблицы '%s'.", k, table_name)
 
             if not where_clauses:
-                self.logger.error(f" Нет корректных условий WHERE для обновления в '{table_name}'.")
+                self.logger.error(" Нет корректных условий WHERE для обновления в '%s'.", table_name)
                 return False
 
             # --- Выполнение обновления ---
-            stmt = table.update().where(*where_clauses).values(**valid_values)
-            self.logger.info(f"📝 UPDATE '{table_name}' SET {list(valid_values.keys())} WHERE {condition}")
+            stmt = table.update().where(*where_clauses).values(**valid_values).returning(*table.c)
+            self.logger.info("📝 UPDATE '%s' SET %s WHERE %s", table_name, list(valid_values.keys()), condition)
 
             with self.engine.begin() as conn:
-                result = conn.execute(stmt)
-                count = result.rowcount or 0
+                updated_rows = [dict(row) for row in conn.execute(stmt).mappings()]
+                count = len(updated_rows)
 
-            self.logger.info(f" Обновлено {count} записей в '{table_name}'.")
+            # При изменении первичного ключа прежние строки по RETURNING не найти — только перечитывание
+            pk_col = self._get_primary_key_column(table_name)
+            self._record_row_changes(table_name, self.change_journal.UPDATE,
+                                     None if pk_col in valid_values else updated_rows)
+            self.logger.info(" Обновлено %s записей в '%s'.", count, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка обновления '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка обновления '%s': %s", table_name, self.format_db_error(e))
             return False
 
     def get_sorted_data(
@@ -356,57 +738,320 @@ class CrudMixin:
         if not self.is_connected() or table_name not in self.tables:
             return []
 
+        try:
+            stmt = self._build_sorted_select(
+                table_name, sort_columns, condition, aggregate_functions, group_by, columns
+            )
+
+            self.logger.info(" Выполнение запроса сортировки для '%s'", table_name)
+            rows = self._cached_rows(stmt, [table_name])
+            self.logger.info(" Получено %s строк из '%s'", len(rows), table_name)
+            return rows
+
+        except Exception as e:
+            self.logger.error(" Ошибка сортировки в '%s': %s", table_name, self.format_db_error(e))
+            return []
+
+    def stream_sorted_data(
+            self,
+            table_name: str,
+            sort_columns: List[tuple],
+            condition: Dict[str, Any] = None,
+            aggregate_functions: Dict[str, str] = None,
+            group_by: List[str] = None,
+            columns: List[str] = None,
+            batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Потоковый вариант get_sorted_data: возвращает генератор пачек строк (списков словарей).
+
+        Результат не материализуется целиком — строки приходят с сервера
+        через именованный курсор по batch_size штук.
+        """
+        if not self.is_connected() or table_name not in self.tables:
+            return
+
+        try:
+            stmt = self._build_sorted_select(
+                table_name, sort_columns, condition, aggregate_functions, group_by, columns
+            )
+        except Exception as e:
+            self.logger.error(" Ошибка сортировки в '%s': %s", table_name, self.format_db_error(e))
+            return
+
+        self.logger.info(" Потоковый запрос сортировки для '%s' (пачки по %s)", table_name, batch_size)
+        yield from self._stream_statement(stmt, batch_size, table_name)
+
+    def get_sorted_page(
+            self,
+            table_name: str,
+            sort_columns: List[tuple],
+            columns: List[str] = None,
+            after: Optional[tuple] = None,
+            limit: int = 200
+    ) -> Tuple[List[Dict[str, Any]], Optional[tuple]]:
+        """
+        Возвращает одну страницу отсортированных данных с keyset-пагинацией (без OFFSET).
+
+        Ключ страницы — (значение первого столбца сортировки, первичный ключ).
+        after — курсор последней строки предыдущей страницы (None для первой страницы).
+
+        Returns:
+            (строки страницы, курсор для следующей страницы или None, если данные закончились)
+        """
+        if not self.is_connected() or table_name not in self.tables:
+            return [], None
+
         table = self.tables[table_name]
         try:
-            # --- SELECT ---
-            if aggregate_functions:
-                select_fields = []
-                for alias, func_expr in aggregate_functions.items():
-                    # Пример: aggregate_functions = {"total_books": "COUNT(id_book)"}
-                    select_fields.append(text(f"{func_expr} AS {alias}"))
-                stmt = select(*select_fields)
+            pk_name = self._get_primary_key_column(table_name)
+            if pk_name not in table.c:
+                self.logger.error(" Нет первичного ключа для keyset-пагинации в '%s'", table_name)
+                return [], None
+
+            sort_name, ascending = sort_columns[0] if sort_columns else (pk_name, True)
+            if sort_name not in table.c:
+                self.logger.warning(" Колонка сортировки '%s' не найдена в '%s', используется PK",
+                                    sort_name, table_name)
+                sort_name, ascending = pk_name, True
+
+            sort_expr = f'"{table_name}"."{sort_name}"'
+            pk_expr = f'"{table_name}"."{pk_name}"'
+            keys = [(sort_expr, ascending, table.c[sort_name].nullable)]
+            if sort_name != pk_name:
+                keys.append((pk_expr, ascending, False))
+
+            valid_cols = [table.c[c] for c in (columns or []) if c in table.c] or list(table.c)
+            stmt = select(
+                *valid_cols,
+                table.c[sort_name].label("__keyset_sort"),
+                table.c[pk_name].label("__keyset_pk")
+            )
+
+            if after is not None:
+                cursor_values = after if sort_name != pk_name else after[:1]
+                condition_sql, params = self._keyset_condition(keys, cursor_values)
+                stmt = stmt.where(text(condition_sql).bindparams(**params))
+
+            stmt = stmt.order_by(*[text(self._keyset_order_sql(expr, asc_)) for expr, asc_, _ in keys])
+            stmt = stmt.limit(limit)
+
+            self.logger.info(" Keyset-страница '%s' (limit=%s, после=%s)", table_name, limit, after)
+            rows = self._cached_rows(stmt, [table_name])
+
+            next_cursor = None
+            for row in rows:
+                next_cursor = (row.pop("__keyset_sort"), row.pop("__keyset_pk"))
+            if len(rows) < limit:
+                next_cursor = None
+
+            self.logger.info(" Получено %s строк страницы из '%s'", len(rows), table_name)
+            return rows, next_cursor
+
+        except Exception as e:
+            self.logger.error(" Ошибка keyset-пагинации в '%s': %s", table_name, self.format_db_error(e))
+            return [], None
+
+    @staticmethod
+    def _keyset_order_sql(expr: str, ascending: bool) -> str:
+        """ORDER BY для ключа keyset-пагинации (явно фиксирует порядок NULL, как в PostgreSQL по умолчанию)."""
+        return f"{expr} ASC NULLS LAST" if ascending else f"{expr} DESC NULLS FIRST"
+
+    @staticmethod
+    def _keyset_condition(keys: List[Tuple[str, bool, bool]], cursor: tuple,
+                          prefix: str = "ks") -> Tuple[str, Dict[str, Any]]:
+        """
+        Строит условие «строго после курсора» для keyset-пагинации.
+
+        Args:
+            keys: Список (SQL-выражение, по возрастанию, может ли быть NULL) в порядке сортировки
+            cursor: Значения ключей последней полученной строки
+
+        Returns:
+            (SQL-условие с именованными параметрами, словарь параметров)
+        """
+        params: Dict[str, Any] = {}
+        disjuncts = []
+        for i, (expr, ascending, nullable) in enumerate(keys):
+            parts = []
+            # Все предыдущие ключи равны значениям курсора
+            for j in range(i):
+                prev_expr, value = keys[j][0], cursor[j]
+                if value is None:
+                    parts.append(f"{prev_expr} IS NULL")
+                else:
+                    params[f"{prefix}_{j}"] = value
+                    parts.append(f"{prev_expr} = :{prefix}_{j}")
+
+            # Текущий ключ строго «дальше» значения курсора (NULLS LAST для ASC, NULLS FIRST для DESC)
+            value = cursor[i]
+            if ascending:
+                if value is None:
+                    continue
+                params[f"{prefix}_{i}"] = value
+                if nullable:
+                    parts.append(f"({expr} > :{prefix}_{i} OR {expr} IS NULL)")
+                else:
+                    parts.append(f"{expr} > :{prefix}_{i}")
             else:
-                if columns:
-                    valid_cols = [getattr(table.c, c) for c in columns if hasattr(table.c, c)]
-                    if not valid_cols:
-                        valid_cols = [table]
-                    stmt = select(*valid_cols)
+                if value is None:
+                    parts.append(f"{expr} IS NOT NULL")
                 else:
-                    stmt = select(table)
+                    params[f"{prefix}_{i}"] = value
+                    parts.append(f"{expr} < :{prefix}_{i}")
+            disjuncts.append("(" + " AND ".join(parts) + ")")
 
-            # --- WHERE ---
-            if condition:
-                for col, val in condition.items():
-                    if hasattr(table.c, col):
-                        stmt = stmt.where(getattr(table.c, col) == val)
-                    else:
-                        self.logger.warning(f" Колонка '{col}' не найдена в '{table_name}'")
-
-            # --- GROUP BY ---
-            if group_by:
-                group_cols = [getattr(table.c, col) for col in group_by if hasattr(table.c, col)]
-                if group_cols:
-                    stmt = stmt.group_by(*group_cols)
-
-            # --- ORDER BY ---
-            if sort_columns:
-                order_clauses = []
-                for col, ascending in sort_columns:
-                    if hasattr(table.c, col):
-                        order_clauses.append(asc(getattr(table.c, col)) if ascending else desc(getattr(table.c, col)))
-                if order_clauses:
-                    stmt = stmt.order_by(*order_clauses)
+        return (" OR ".join(disjuncts) if disjuncts else "FALSE"), params
 
-            self.logger.info(f" Выполнение запроса сортировки для '{table_name}'")
-            with self.engine.connect() as conn:
-                result = conn.execute(stmt)
-                rows = [dict(row._mapping) for row in result]
-            self.logger.info(f" Получено {len(rows)} строк из '{table_name}'")
-            return rows
+    def _build_sorted_select(
+            self,
+            table_name: str,
+            sort_columns: List[tuple],
+            condition: Dict[str, Any] = None,
+            aggregate_functions: Dict[str, str] = None,
+            group_by: List[str] = None,
+            columns: List[str] = None
+    ):
+        """Строит SELECT с фильтрацией, группировкой, агрегатами и сортировкой для get_sorted_data."""
+        table = self.tables[table_name]
+
+        # --- SELECT ---
+        if aggregate_functions:
+            select_fields = []
+            for alias, func_expr in aggregate_functions.items():
+                # Пример: aggregate_functions = {"total_books": "COUNT(id_book)"}
+                select_fields.append(text(f"{func_expr} AS {alias}"))
+            stmt = select(*select_fields)
+        else:
+            if columns:
+                valid_cols = [getattr(table.c, c) for c in columns if hasattr(table.c, c)]
+                if not valid_cols:
+                    valid_cols = [table]
+                stmt = select(*valid_cols)
+            else:
+                stmt = select(table)
+
+        # --- WHERE ---
+        if condition:
+            for col, val in condition.items():
+                if hasattr(table.c, col):
+                    stmt = stmt.where(getattr(table.c, col) == val)
+                else:
+                    self.logger.warning(" Колонка '%s' не найдена в '%s'", col, table_name)
+
+        # --- GROUP BY ---
+        if group_by:
+            group_cols = [getattr(table.c, col) for col in group_by if hasattr(table.c, col)]
+            if group_cols:
+                stmt = stmt.group_by(*group_cols)
+
+        # --- ORDER BY ---
+        if sort_columns:
+            order_clauses = []
+            for col, ascending in sort_columns:
+                if hasattr(table.c, col):
+                    order_clauses.append(asc(getattr(table.c, col)) if ascending else desc(getattr(table.c, col)))
+            if order_clauses:
+                stmt = stmt.order_by(*order_clauses)
+
+        return stmt
 
+    def _stream_statement(self, stmt, batch_size: int, table_name: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Выполняет запрос через серверный курсор (stream_results/yield_per) и отдаёт строки пачками.
+        Соединение удерживается только пока генератор не исчерпан или не закрыт.
+        Ошибка посреди чтения (потеря соединения, отмена запроса) пробрасывается
+        потребителю, чтобы оборванный поток нельзя было принять за конец данных.
+        """
+        batch_size = max(1, int(batch_size))
+        total = 0
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+                for partition in result.mappings().partitions():
+                    total += len(partition)
+                    yield [dict(row) for row in partition]
+            self.logger.info(" Потоково получено %s строк из '%s'", total, table_name)
         except Exception as e:
-            self.logger.error(f" Ошибка сортировки в '{table_name}': {self.format_db_error(e)}")
-            return []
+            self.logger.error(" Ошибка потокового чтения '%s' после %s строк: %s",
+                              table_name, total, self.format_db_error(e))
+            raise
+
+    # ------------------------------------------------------------------
+    # Кэш результатов
+    # ------------------------------------------------------------------
+    def _cached_rows(self, stmt, tables: Iterable[str], params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """
+        Выполняет SELECT через кэш результатов (self.result_cache).
+
+        Args:
+            stmt: Выражение SQLAlchemy или SQL-текст
+            tables: Таблицы, изменение которых делает результат устаревшим
+            params: Параметры SQL-текста
+        """
+        if isinstance(stmt, str):
+            stmt = text(stmt)
+        compiled = stmt.compile(dialect=self.engine.dialect)
+
+        def load():
+            with self._connection() as conn:
+                return [dict(row._mapping) for row in conn.execute(stmt, params or {})]
+
+        return self.result_cache.get_or_load(str(compiled), {**compiled.params, **(params or {})}, tables, load)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика кэша результатов, кэша схемы и кэша ключей: попадания, промахи, размер."""
+        return {"results": self.result_cache.stats(), "schema": self.schema_cache.stats(),
+                "keys": self.key_cache.stats()}
+
+    def _record_row_changes(self, table_name: str, operation: str, rows: Optional[List[Dict[str, Any]]]):
+        """
+        Записывает построчное изменение в журнал (self.change_journal) и сбрасывает кэш.
+
+        Args:
+            rows: Строки из RETURNING (None — изменение нельзя описать построчно)
+        """
+        pk_col = self._get_primary_key_column(table_name)
+        if rows is None or pk_col not in self.tables[table_name].c:
+            self.change_journal.record_reload([table_name])
+        else:
+            self.change_journal.record(table_name, operation, pk_col, rows)
+        self._invalidate_results([table_name], operation, journaled=True)
+
+    def _invalidate_results(self, table_names: Iterable[str], operation: Optional[str] = None,
+                            journaled: bool = False):
+        """
+        Сбрасывает кэш результатов изменённых таблиц и таблиц, ссылающихся на них
+        внешними ключами (ON DELETE/UPDATE CASCADE и SET NULL меняют и их).
+        INSERT каскадов не вызывает, поэтому для него ссылающиеся таблицы
+        не затрагиваются; operation=None — операция неизвестна.
+
+        Все затронутые таблицы, кроме уже записанных в журнал изменений
+        (journaled=True), отмечаются в журнале для полного перечитывания.
+        """
+        names = set(table_names)
+        changed = set(names)
+        pending = [] if operation == self.change_journal.INSERT else list(names)
+        while pending:
+            target = pending.pop()
+            for table in self.tables.values():
+                if table.name not in names and any(
+                        fk.target_fullname.split(".")[-2] == target for fk in table.foreign_keys):
+                    names.add(table.name)
+                    pending.append(table.name)
+        affected = self.result_cache.invalidate(names)
+        self.key_cache.invalidate(affected)
+        self.change_journal.record_reload(sorted(affected - changed if journaled else affected))
+
+    @staticmethod
+    def _is_read_only_sql(query: str) -> bool:
+        """Запрос только читает данные (SELECT без INTO, SHOW, EXPLAIN без ANALYZE)."""
+        sql = strip_sql_comments(query).strip().upper()
+        if sql.startswith("SELECT"):
+            return not re.search(r"\bINTO\b", sql)
+        if sql.startswith("EXPLAIN"):
+            return "ANALYZE" not in sql
+        return sql.startswith(("SHOW", "VALUES", "TABLE"))
 
     def execute_query(self, query: str, params: Dict[str, Any] = None, fetch: str = None) -> Any:
         """Универсально выполняет SQL-запрос с логированием и безопасной обработкой ошибок."""
@@ -414,23 +1059,30 @@ class CrudMixin:
             return None
 
         try:
-            self.logger.info(f" Выполнение SQL: {query[:100]}...")
-            with self.engine.begin() as conn:
-                result = conn.execute(text(query), params or {})
-
-                if fetch == "one":
-                    return result.fetchone()
-                elif fetch == "all":
-                    return result.fetchall()
-                elif fetch == "scalar":
-                    return result.scalar()
-                elif fetch == "dict":
-                    return [dict(row._mapping) for row in result.fetchall()]
-                else:
-                    return result.rowcount
+            self.logger.info(" Выполнение SQL: %s...", query[:100])
+            try:
+                with self.engine.begin() as conn:
+                    result = conn.execute(text(query), params or {})
+
+                    if fetch == "one":
+                        return result.fetchone()
+                    elif fetch == "all":
+                        return result.fetchall()
+                    elif fetch == "scalar":
+                        return result.scalar()
+                    elif fetch == "dict":
+                        return [dict(row._mapping) for row in result.fetchall()]
+                    else:
+                        return result.rowcount
+            finally:
+                if not self._is_read_only_sql(query):
+                    # Какие таблицы изменил произвольный запрос, неизвестно — после фиксации сбрасываем весь кэш
+                    self.result_cache.invalidate()
+                    self.key_cache.invalidate()
+                    self.change_journal.record_reload()
 
         except Exception as e:
-            self.logger.error(f" Ошибка выполнения SQL: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка выполнения SQL: %s", self.format_db_error(e))
             return None
 
     def record_exists_ex_table(self, table_name: str) -> bool:
@@ -438,12 +1090,11 @@ class CrudMixin:
         if not self.is_connected():
             return False
         try:
-            insp = inspect(self.engine)
-            exists = table_name in insp.get_table_names()
-            self.logger.info(f" Таблица '{table_name}' {'существует' if exists else 'не найдена'} в БД")
+            exists = self.schema_cache.has_table(table_name)
+            self.logger.info(" Таблица '%s' %s в БД", table_name, 'существует' if exists else 'не найдена')
             return exists
         except Exception as e:
-            self.logger.error(f" Ошибка проверки таблицы '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка проверки таблицы '%s': %s", table_name, self.format_db_error(e))
             return False
 
     def count_records_filtered(self, table_name: str, condition: Dict[str, Any] = None) -> int:
@@ -461,15 +1112,15 @@ class CrudMixin:
                     if hasattr(table.c, col):
                         stmt = stmt.where(getattr(table.c, col) == val)
                     else:
-                        self.logger.warning(f" Колонка '{col}' отсутствует в таблице '{table_name}'")
+                        self.logger.warning(" Колонка '%s' отсутствует в таблице '%s'", col, table_name)
 
             # Выполнение
-            with self.engine.connect() as conn:
+            with self._connection() as conn:
                 count = conn.execute(stmt).scalar_one()
 
-            self.logger.info(f" Подсчитано {count} записей в '{table_name}' с фильтрацией: {condition or '{}'}")
+            self.logger.info(" Подсчитано %s записей в '%s' с фильтрацией: %s", count, table_name, condition or '{}')
             return count
 
         except Exception as e:
-            self.logger.error(f" Ошибка подсчёта записей '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка подсчёта записей '%s': %s", table_name, self.format_db_error(e))
             return 0
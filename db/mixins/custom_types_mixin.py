@@ -45,13 +45,14 @@ class CustomTypesMixin:
             # Создаём ENUM тип
             sql = f"CREATE TYPE {type_name} AS ENUM ({values_str})"
             
-            self.logger.info(f"Создание ENUM типа: {sql}")
+            self.logger.info("Создание ENUM типа: %s", sql)
             
             with self.engine.connect() as conn:
                 conn.execute(text(sql))
                 conn.commit()
             
-            self.logger.info(f"ENUM тип '{type_name}' успешно создан")
+            self.schema_cache.invalidate()
+            self.logger.info("ENUM тип '%s' успешно создан", type_name)
             return True, None
             
         except Exception as e:
@@ -98,13 +99,14 @@ class CustomTypesMixin:
             # Создаём составной тип
             sql = f"CREATE TYPE {type_name} AS ({fields_str})"
             
-            self.logger.info(f"Создание составного типа: {sql}")
+            self.logger.info("Создание составного типа: %s", sql)
             
             with self.engine.connect() as conn:
                 conn.execute(text(sql))
                 conn.commit()
             
-            self.logger.info(f"Составной тип '{type_name}' успешно создан")
+            self.schema_cache.invalidate()
+            self.logger.info("Составной тип '%s' успешно создан", type_name)
             return True, None
             
         except Exception as e:
@@ -145,34 +147,33 @@ class CustomTypesMixin:
             ORDER BY t.typname
             """
             
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql))
-                rows = result.fetchall()
+            # Типы меняются только DDL — результат кэшируется до сброса кэша схемы
+            rows = self._cached_rows(sql, [self.result_cache.SCHEMA])
+            
+            types_list = []
+            for row in rows:
+                type_dict = {
+                    'type_name': row['type_name'],
+                    'type_kind': row['type_kind'],
+                    'owner': row['owner'],
+                    'description': row['description'] if row['description'] else ''
+                }
+                
+                # Для ENUM типов получаем значения
+                if row['type_kind'] == 'enum':
+                    type_dict['values'] = self.get_enum_values(row['type_name'])
                 
-                types_list = []
-                for row in rows:
-                    type_dict = {
-                        'type_name': row[0],
-                        'type_kind': row[1],
-                        'owner': row[2],
-                        'description': row[3] if row[3] else ''
-                    }
-                    
-                    # Для ENUM типов получаем значения
-                    if row[1] == 'enum':
-                        type_dict['values'] = self.get_enum_values(row[0])
-                    
-                    # Для составных типов получаем поля
-                    elif row[1] == 'composite':
-                        type_dict['fields'] = self.get_composite_fields(row[0])
-                    
-                    types_list.append(type_dict)
+                # Для составных типов получаем поля
+                elif row['type_kind'] == 'composite':
+                    type_dict['fields'] = self.get_composite_fields(row['type_name'])
                 
-                self.logger.info(f"Найдено {len(types_list)} пользовательских типов")
-                return types_list
+                types_list.append(type_dict)
+            
+            self.logger.info("Найдено %s пользовательских типов", len(types_list))
+            return types_list
                 
         except Exception as e:
-            self.logger.error(f"Ошибка при получении пользовательских типов: {self.format_db_error(e)}")
+            self.logger.error("Ошибка при получении пользовательских типов: %s", self.format_db_error(e))
             return []
     
     def get_enum_values(self, type_name: str) -> List[str]:
@@ -194,13 +195,11 @@ class CustomTypesMixin:
             ORDER BY e.enumsortorder
             """
             
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql), {"type_name": type_name})
-                rows = result.fetchall()
-                return [row[0] for row in rows]
+            rows = self._cached_rows(sql, [self.result_cache.SCHEMA], {"type_name": type_name})
+            return [row['enumlabel'] for row in rows]
                 
         except Exception as e:
-            self.logger.error(f"Ошибка при получении значений ENUM: {self.format_db_error(e)}")
+            self.logger.error("Ошибка при получении значений ENUM: %s", self.format_db_error(e))
             return []
     
     def get_composite_fields(self, type_name: str) -> List[Dict[str, str]]:
@@ -226,13 +225,11 @@ class CustomTypesMixin:
             ORDER BY a.attnum
             """
             
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql), {"type_name": type_name})
-                rows = result.fetchall()
-                return [{'name': row[0], 'type': row[1]} for row in rows]
+            rows = self._cached_rows(sql, [self.result_cache.SCHEMA], {"type_name": type_name})
+            return [{'name': row['field_name'], 'type': row['field_type']} for row in rows]
                 
         except Exception as e:
-            self.logger.error(f"Ошибка при получении полей составного типа: {self.format_db_error(e)}")
+            self.logger.error("Ошибка при получении полей составного типа: %s", self.format_db_error(e))
             return []
     
     def drop_custom_type(self, type_name: str, cascade: bool = False) -> Tuple[bool, Optional[str]]:
@@ -256,13 +253,18 @@ class CustomTypesMixin:
             cascade_clause = "CASCADE" if cascade else "RESTRICT"
             sql = f"DROP TYPE {type_name} {cascade_clause}"
             
-            self.logger.info(f"Удаление типа: {sql}")
+            self.logger.info("Удаление типа: %s", sql)
             
             with self.engine.connect() as conn:
                 conn.execute(text(sql))
                 conn.commit()
             
-            self.logger.info(f"Тип '{type_name}' успешно удалён")
+            # Типы столбцов, использовавших удалённый тип, изменились
+            self.schema_cache.invalidate()
+            affected_tables = self._tables_using_type(type_name)
+            if affected_tables:
+                self._refresh_metadata(affected_tables)
+            self.logger.info("Тип '%s' успешно удалён", type_name)
             return True, None
             
         except Exception as e:
@@ -295,13 +297,18 @@ class CustomTypesMixin:
             
             sql = f"ALTER TYPE {type_name} ADD VALUE '{value}'{position_clause}"
             
-            self.logger.info(f"Добавление значения в ENUM: {sql}")
+            self.logger.info("Добавление значения в ENUM: %s", sql)
             
             with self.engine.connect() as conn:
                 conn.execute(text(sql))
                 conn.commit()
             
-            self.logger.info(f"Значение '{value}' добавлено в тип '{type_name}'")
+            self.schema_cache.invalidate()
+            # Обновляем список значений ENUM у таблиц, использующих тип
+            affected_tables = self._tables_using_type(type_name)
+            if affected_tables:
+                self._refresh_metadata(affected_tables)
+            self.logger.info("Значение '%s' добавлено в тип '%s'", value, type_name)
             return True, None
             
         except Exception as e:
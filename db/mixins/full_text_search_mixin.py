@@ -0,0 +1,323 @@
+"""
+Миксин индексируемого текстового поиска: триграммные (pg_trgm) и полнотекстовые (tsvector) индексы
+"""
+
+import logging
+from sqlalchemy import text, String, ARRAY
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class FullTextSearchMixin:
+    """
+    Миксин для текстового поиска, использующего индексы.
+
+    Поисковое выражение по столбцу (см. _search_document_sql) совпадает
+    с выражением индекса, поэтому LIKE/ILIKE/регулярные выражения используют
+    GIN-индекс pg_trgm, а поиск по словам — GIN-индекс по to_tsvector.
+    Массивы (например, authors) индексируются через IMMUTABLE-обёртку
+    над array_to_string.
+    """
+
+    ARRAY_TO_TEXT_FUNCTION = "search_array_to_text"
+    DEFAULT_TS_CONFIG = "russian"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Инициализируем логгер для этого миксина
+        self.logger = logging.getLogger("DB")
+
+    # ------------------------------------------------------------------
+    # Подготовка БД
+    # ------------------------------------------------------------------
+    def ensure_search_support(self) -> Tuple[bool, Optional[str]]:
+        """
+        Устанавливает расширение pg_trgm и функцию преобразования массива в текст.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                # array_to_string имеет пометку STABLE и не может входить в индексное выражение
+                conn.execute(text(f"""
+                    CREATE OR REPLACE FUNCTION {self.ARRAY_TO_TEXT_FUNCTION}(text[])
+                    RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE
+                    AS 'SELECT array_to_string($1, '' '')'
+                """))
+            self._search_support_ready = True
+            self.logger.info("Поддержка индексного поиска (pg_trgm) подготовлена")
+            return True, None
+        except Exception as e:
+            self._search_support_ready = False
+            error_msg = f"Ошибка подготовки индексного поиска: {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def _is_search_support_ready(self) -> bool:
+        """Проверяет (один раз за подключение), установлены ли pg_trgm и функция для массивов."""
+        if self._search_support_ready is None:
+            try:
+                with self._connection() as conn:
+                    self._search_support_ready = bool(conn.execute(text("""
+                        SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')
+                           AND EXISTS (SELECT 1 FROM pg_proc WHERE proname = :fn)
+                    """), {"fn": self.ARRAY_TO_TEXT_FUNCTION}).scalar())
+            except Exception as e:
+                self.logger.warning("Не удалось проверить поддержку индексного поиска: %s", self.format_db_error(e))
+                self._search_support_ready = False
+        return self._search_support_ready
+
+    # ------------------------------------------------------------------
+    # Выражения поиска
+    # ------------------------------------------------------------------
+    def _search_column_kind(self, table_name: str, column_name: str) -> str:
+        """Возвращает 'text', 'array' (текстовый массив) или 'other'."""
+        table = self.tables.get(table_name)
+        if table is None or column_name not in table.c:
+            return "other"
+        col_type = table.c[column_name].type
+        if isinstance(col_type, ARRAY):
+            return "array" if isinstance(col_type.item_type, String) else "other"
+        if isinstance(col_type, String):
+            return "text"
+        return "other"
+
+    def _search_document_sql(self, table_name: str, column_name: str) -> Optional[str]:
+        """
+        Текстовое выражение столбца, пригодное для индекса, или None,
+        если для столбца нельзя построить индексируемое выражение.
+        """
+        kind = self._search_column_kind(table_name, column_name)
+        if kind == "text":
+            return f'"{column_name}"'
+        if kind == "array" and self._is_search_support_ready():
+            return f'{self.ARRAY_TO_TEXT_FUNCTION}("{column_name}"::text[])'
+        return None
+
+    def _search_expression(self, table_name: str, column_name: str) -> Tuple[str, bool]:
+        """
+        Выражение для LIKE/регулярных выражений по столбцу.
+
+        Returns:
+            (SQL-выражение, может ли оно использовать триграммный индекс)
+        """
+        document = self._search_document_sql(table_name, column_name)
+        if document is not None:
+            return document, True
+        return f'"{column_name}"::text', False
+
+    def _tsvector_sql(self, table_name: str, column_name: str, config: str) -> Optional[str]:
+        document = self._search_document_sql(table_name, column_name)
+        if document is None:
+            return None
+        # Выражение должно совпадать с выражением индекса, поэтому config — литерал
+        # (имя проверяется _is_ts_config до построения SQL)
+        config_literal = config.replace("'", "''")
+        return f"to_tsvector('{config_literal}'::regconfig, COALESCE({document}, ''))"
+
+    def _is_ts_config(self, config: str) -> bool:
+        """Есть ли в БД конфигурация полнотекстового поиска с таким именем."""
+        with self._connection() as conn:
+            return bool(conn.execute(
+                text("SELECT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = :cfg)"), {"cfg": config}
+            ).scalar())
+
+    # ------------------------------------------------------------------
+    # Управление индексами
+    # ------------------------------------------------------------------
+    def create_trigram_index(self, table_name: str, column_name: str) -> Tuple[bool, Optional[str]]:
+        """
+        Создаёт GIN-индекс pg_trgm для LIKE/ILIKE/регулярных выражений и нечёткого поиска.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+        ok, error = self.ensure_search_support()
+        if not ok:
+            return False, error
+
+        document = self._search_document_sql(table_name, column_name)
+        if document is None:
+            return False, f"Столбец '{column_name}' не является текстовым или текстовым массивом"
+
+        index_name = f"trgm_{table_name}_{column_name}".lower()[:63]
+        sql = f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" USING gin (({document}) gin_trgm_ops)'
+        return self._create_search_index(table_name, index_name, sql)
+
+    def create_fulltext_index(self, table_name: str, column_name: str,
+                              config: str = DEFAULT_TS_CONFIG) -> Tuple[bool, Optional[str]]:
+        """
+        Создаёт GIN-индекс по to_tsvector для поиска по словам с учётом морфологии.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+        ok, error = self.ensure_search_support()
+        if not ok:
+            return False, error
+        if not self._is_ts_config(config):
+            return False, f"Неизвестная конфигурация полнотекстового поиска: '{config}'"
+
+        tsvector = self._tsvector_sql(table_name, column_name, config)
+        if tsvector is None:
+            return False, f"Столбец '{column_name}' не является текстовым или текстовым массивом"
+
+        index_name = f"fts_{table_name}_{column_name}_{config}".lower()[:63]
+        sql = f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{table_name}" USING gin ({tsvector})'
+        return self._create_search_index(table_name, index_name, sql)
+
+    def _create_search_index(self, table_name: str, index_name: str, sql: str) -> Tuple[bool, Optional[str]]:
+        try:
+            self.logger.info("Создание поискового индекса: %s", sql)
+            with self.engine.begin() as conn:
+                conn.execute(text(sql))
+            self.schema_cache.invalidate([table_name])
+            self.logger.info("Индекс '%s' создан", index_name)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка создания индекса '{index_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def drop_search_index(self, index_name: str) -> Tuple[bool, Optional[str]]:
+        """Удаляет поисковый индекс (trgm_* или fts_*)."""
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+            self.schema_cache.invalidate()
+            self.logger.info("Поисковый индекс '%s' удалён", index_name)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка удаления индекса '{index_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def get_search_indexes(self, table_name: str = None) -> List[Dict[str, Any]]:
+        """Возвращает созданные поисковые индексы: [{'table', 'index', 'kind', 'definition'}]."""
+        if not self.is_connected():
+            return []
+        try:
+            sql = """
+                SELECT tablename, indexname, indexdef
+                FROM pg_indexes
+                WHERE schemaname = current_schema()
+                  AND (indexname LIKE 'trgm\\_%' OR indexname LIKE 'fts\\_%')
+            """
+            params = {}
+            if table_name:
+                sql += " AND tablename = :table"
+                params["table"] = table_name
+            with self._connection() as conn:
+                rows = conn.execute(text(sql + " ORDER BY tablename, indexname"), params).fetchall()
+            return [
+                {
+                    "table": row[0],
+                    "index": row[1],
+                    "kind": "trigram" if row[1].startswith("trgm_") else "fulltext",
+                    "definition": row[2],
+                }
+                for row in rows
+            ]
+        except Exception as e:
+            self.logger.error("Ошибка получения поисковых индексов: %s", self.format_db_error(e))
+            return []
+
+    # ------------------------------------------------------------------
+    # Поиск с ранжированием
+    # ------------------------------------------------------------------
+    def full_text_search(
+            self,
+            table_name: str,
+            column_name: str,
+            search_query: str,
+            config: str = DEFAULT_TS_CONFIG,
+            limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Поиск по словам (websearch_to_tsquery: «война мир», "точная фраза", -исключить)
+        с ранжированием ts_rank_cd. Ранг возвращается в поле '__rank'.
+        limit=None — все найденные строки.
+        """
+        if not self.is_connected() or table_name not in self.tables:
+            return []
+        try:
+            if not self._is_ts_config(config):
+                self.logger.error("Неизвестная конфигурация полнотекстового поиска: '%s'", config)
+                return []
+        except Exception as e:
+            self.logger.error("Ошибка проверки конфигурации поиска: %s", self.format_db_error(e))
+            return []
+
+        tsvector = self._tsvector_sql(table_name, column_name, config)
+        if tsvector is None:
+            self.logger.error("Полнотекстовый поиск по '%s.%s' невозможен", table_name, column_name)
+            return []
+
+        try:
+            sql = f"""
+                SELECT "{table_name}".*, ts_rank_cd({tsvector}, query) AS "__rank"
+                FROM "{table_name}", websearch_to_tsquery(CAST(:cfg AS regconfig), :search_query) AS query
+                WHERE {tsvector} @@ query
+                ORDER BY "__rank" DESC
+                LIMIT :limit
+            """
+            self.logger.info("Полнотекстовый поиск в '%s.%s': '%s'", table_name, column_name, search_query)
+            with self._connection() as conn:
+                result = conn.execute(text(sql), {"search_query": search_query, "cfg": config, "limit": limit})
+                rows = [dict(row._mapping) for row in result]
+            self.logger.info("Найдено %s строк (полнотекстовый поиск)", len(rows))
+            return rows
+        except Exception as e:
+            self.logger.error("Ошибка полнотекстового поиска: %s", self.format_db_error(e))
+            return []
+
+    def similarity_search(
+            self,
+            table_name: str,
+            column_name: str,
+            search_query: str,
+            threshold: float = 0.3,
+            limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Нечёткий поиск по триграммам (устойчив к опечаткам), сортировка по
+        word_similarity. Степень сходства возвращается в поле '__similarity'.
+        limit=None — все найденные строки.
+        """
+        if not self.is_connected() or table_name not in self.tables:
+            return []
+        if not self._is_search_support_ready():
+            self.logger.error("Нечёткий поиск недоступен: не установлено расширение pg_trgm")
+            return []
+
+        expression, _ = self._search_expression(table_name, column_name)
+        try:
+            sql = f"""
+                SELECT *, word_similarity(:search_query, {expression}) AS "__similarity"
+                FROM "{table_name}"
+                WHERE :search_query <% {expression}
+                ORDER BY "__similarity" DESC
+                LIMIT :limit
+            """
+            self.logger.info("Нечёткий поиск в '%s.%s': '%s'", table_name, column_name, search_query)
+            with self.engine.begin() as conn:
+                # Порог влияет на оператор <%, который использует триграммный индекс
+                conn.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+                             {"t": str(threshold)})
+                result = conn.execute(text(sql), {"search_query": search_query, "limit": limit})
+                rows = [dict(row._mapping) for row in result]
+            self.logger.info("Найдено %s строк (нечёткий поиск)", len(rows))
+            return rows
+        except Exception as e:
+            self.logger.error("Ошибка нечёткого поиска: %s", self.format_db_error(e))
+            return []
@@ -0,0 +1,281 @@
+"""
+Миксин советника по индексам: статистика запросов, кандидаты, гипотетические планы, CREATE INDEX CONCURRENTLY
+"""
+
+import json
+import logging
+from sqlalchemy import text, ARRAY
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..index_advisor import is_covered, propose_indexes
+
+
+class IndexAdvisorMixin:
+    """
+    Миксин для подбора индексов по реальной нагрузке приложения.
+
+    Источник статистики — pg_stat_statements (если расширение установлено
+    и доступно) или собственный журнал запросов приложения (QueryLog).
+    Выигрыш кандидатов оценивается по стоимости планов с гипотетическими
+    индексами hypopg; без hypopg кандидаты показываются без оценки.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Инициализируем логгер для этого миксина
+        self.logger = logging.getLogger("DB")
+
+    # ------------------------------------------------------------------
+    # Статистика запросов
+    # ------------------------------------------------------------------
+    def _has_extension(self, conn, name: str) -> bool:
+        return bool(conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = :name)"), {"name": name}
+        ).scalar())
+
+    def get_query_stats(self, limit: int = 50) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Самые затратные запросы.
+
+        Returns:
+            (источник: "pg_stat_statements" или "query_log",
+             [{'query', 'calls', 'total_ms', 'mean_ms', 'max_ms', 'sample', 'generic'}])
+            sample — текст, пригодный для EXPLAIN; generic=True — sample содержит
+            параметры $n и требует EXPLAIN (GENERIC_PLAN).
+        """
+        if not self.is_connected():
+            return "query_log", []
+
+        try:
+            with self._connection() as conn:
+                if self._has_extension(conn, "pg_stat_statements"):
+                    generic = conn.execute(text("SHOW server_version_num")).scalar()
+                    generic_supported = int(generic) >= 160000
+                    rows = conn.execute(text("""
+                        SELECT query, calls, total_exec_time, mean_exec_time, max_exec_time
+                        FROM pg_stat_statements
+                        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                        ORDER BY total_exec_time DESC
+                        LIMIT :limit
+                    """), {"limit": limit * 2}).fetchall()
+                    stats = [
+                        {
+                            "query": row[0], "calls": row[1], "total_ms": row[2],
+                            "mean_ms": row[3], "max_ms": row[4],
+                            "sample": row[0] if generic_supported else None, "generic": True,
+                        }
+                        for row in rows if not self.query_log._is_ignored(row[0])
+                    ]
+                    return "pg_stat_statements", stats[:limit]
+        except Exception as e:
+            self.logger.warning("pg_stat_statements недоступен, используется журнал приложения: %s",
+                                self.format_db_error(e))
+
+        stats = self.query_log.top(limit)
+        for entry in stats:
+            entry["generic"] = False
+        return "query_log", stats
+
+    def reset_query_stats(self):
+        """Очищает журнал запросов приложения."""
+        self.query_log.clear()
+        self.logger.info("Журнал запросов приложения очищен")
+
+    # ------------------------------------------------------------------
+    # Кандидаты
+    # ------------------------------------------------------------------
+    def suggest_indexes(self, limit: int = 50, estimate: bool = True) -> Dict[str, Any]:
+        """
+        Подбирает индексы для самых затратных запросов.
+
+        Returns:
+            {'source', 'queries', 'hypopg': bool, 'candidates': [...]}
+            Кандидат: table, method, columns, reason, calls, total_ms, name,
+            definition (часть CREATE INDEX после имени), cost_before, cost_after,
+            benefit (доля снижения стоимости связанных запросов) или None.
+        """
+        source, queries = self.get_query_stats(limit)
+        result = {"source": source, "queries": queries, "hypopg": False, "candidates": []}
+        if not self.is_connected() or not queries:
+            return result
+
+        table_columns = {name: {col.name for col in table.c} for name, table in self.tables.items()}
+        array_columns = {
+            (name, col.name) for name, table in self.tables.items()
+            for col in table.c if isinstance(col.type, ARRAY)
+        }
+
+        candidates = []
+        for candidate in propose_indexes(queries, table_columns, array_columns):
+            existing = self._existing_index_shapes(candidate["table"])
+            if is_covered(candidate, existing):
+                continue
+            candidate["name"], candidate["definition"] = self._index_ddl_parts(candidate)
+            if candidate["definition"] is None:
+                continue
+            candidate.update(cost_before=None, cost_after=None, benefit=None)
+            candidates.append(candidate)
+        result["candidates"] = candidates
+
+        if estimate and candidates:
+            result["hypopg"] = self._estimate_with_hypopg(candidates)
+        return result
+
+    def _existing_index_shapes(self, table_name: str) -> List[Dict[str, Any]]:
+        """Существующие индексы таблицы в виде {'method', 'columns', 'definition'}."""
+        shapes = []
+        pk = self.schema_cache.get_pk_constraint(table_name)
+        if pk.get("constrained_columns"):
+            shapes.append({"method": "btree", "columns": pk["constrained_columns"], "definition": ""})
+        for index in self.schema_cache.get_indexes(table_name):
+            method = index.get("dialect_options", {}).get("postgresql_using", "btree")
+            shapes.append({"method": method, "columns": list(index["column_names"]), "definition": ""})
+
+        # Индексы по выражениям (в том числе триграммные) распознаём по определению
+        with self._connection() as conn:
+            for (definition,) in conn.execute(text("""
+                SELECT indexdef FROM pg_indexes
+                WHERE schemaname = current_schema() AND tablename = :table
+            """), {"table": table_name}):
+                shapes.append({"method": "expression", "columns": [], "definition": definition})
+        return shapes
+
+    def _index_ddl_parts(self, candidate: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """Имя индекса и часть CREATE INDEX после имени: ON "t" USING ... (...)."""
+        table, columns = candidate["table"], candidate["columns"]
+        if candidate["method"] == "trigram":
+            document = self._search_document_sql(table, columns[0])
+            if document is None:
+                return "", None
+            name = f"trgm_{table}_{columns[0]}".lower()[:63]
+            return name, f'ON "{table}" USING gin (({document}) gin_trgm_ops)'
+        column_list = ", ".join(f'"{col}"' for col in columns)
+        prefix = "gin" if candidate["method"] == "gin" else "idx"
+        name = f"{prefix}_{table}_{'_'.join(columns)}".lower()[:63]
+        return name, f'ON "{table}" USING {candidate["method"]} ({column_list})'
+
+    def _estimate_with_hypopg(self, candidates: List[Dict[str, Any]]) -> bool:
+        """
+        Сравнивает стоимость планов связанных запросов без индекса и с
+        гипотетическим индексом hypopg. Возвращает False, если hypopg недоступен.
+        """
+        try:
+            with self.engine.begin() as conn:
+                if not self._has_extension(conn, "hypopg"):
+                    self.logger.info("Расширение hypopg не установлено — выигрыш индексов не оценивается")
+                    return False
+
+                try:
+                    base_costs: Dict[str, Optional[float]] = {}
+                    for candidate in candidates:
+                        queries = [q for q in candidate["queries"] if q.get("sample")]
+                        if not queries:
+                            continue
+                        for query in queries:
+                            if query["query"] not in base_costs:
+                                base_costs[query["query"]] = self._plan_cost(conn, query)
+
+                        try:
+                            # hypopg поддерживает B-tree; для GIN оценка не строится
+                            with conn.begin_nested():
+                                index_oid = conn.execute(
+                                    text("SELECT indexrelid FROM hypopg_create_index(:ddl)"),
+                                    {"ddl": f"CREATE INDEX {candidate['definition']}"}
+                                ).scalar()
+                        except Exception as e:
+                            self.logger.info("hypopg не смог создать индекс %s: %s",
+                                             candidate['name'], self.format_db_error(e))
+                            continue
+
+                        before = after = 0.0
+                        for query in queries:
+                            base = base_costs.get(query["query"])
+                            cost = self._plan_cost(conn, query)
+                            if base is None or cost is None:
+                                continue
+                            before += base * query.get("calls", 1)
+                            after += cost * query.get("calls", 1)
+                        conn.execute(text("SELECT hypopg_drop_index(:oid)"), {"oid": index_oid})
+
+                        if before > 0:
+                            candidate["cost_before"] = before
+                            candidate["cost_after"] = after
+                            candidate["benefit"] = max(0.0, 1 - after / before)
+                finally:
+                    # Гипотетические индексы живут в сеансе, а соединение вернётся в пул
+                    conn.execute(text("SELECT hypopg_reset()"))
+            candidates.sort(key=lambda c: (c["benefit"] or 0) * c["total_ms"], reverse=True)
+            return True
+        except Exception as e:
+            self.logger.error("Ошибка оценки индексов: %s", self.format_db_error(e))
+            return False
+
+    def _plan_cost(self, conn, query: Dict[str, Any]) -> Optional[float]:
+        """Стоимость плана запроса без выполнения."""
+        options = "GENERIC_PLAN, FORMAT JSON" if query.get("generic") else "FORMAT JSON"
+        try:
+            with conn.begin_nested():
+                plan = conn.execute(text(f"EXPLAIN ({options}) {query['sample']}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return float(plan[0]["Plan"]["Total Cost"])
+        except Exception as e:
+            self.logger.debug("Не удалось получить план для оценки: %s", self.format_db_error(e))
+            return None
+
+    # ------------------------------------------------------------------
+    # Создание индексов
+    # ------------------------------------------------------------------
+    def create_index_concurrently(self, table_name: str, index_name: str,
+                                  definition: str) -> Tuple[bool, Optional[str]]:
+        """
+        Создаёт индекс без блокировки записи в таблицу (CREATE INDEX CONCURRENTLY).
+
+        Args:
+            table_name: Таблица
+            index_name: Имя индекса
+            definition: Часть команды после имени: ON "t" USING btree ("col")
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        if "gin_trgm_ops" in definition:
+            ok, error = self.ensure_search_support()
+            if not ok:
+                return False, error
+
+        sql = f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" {definition}'
+        try:
+            self.logger.info("Создание индекса: %s", sql)
+            # CONCURRENTLY нельзя выполнять внутри транзакции
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(sql))
+            self.schema_cache.invalidate([table_name])
+            self.logger.info("Индекс '%s' создан", index_name)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка создания индекса '{index_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            self._drop_invalid_index(index_name)
+            return False, error_msg
+
+    def _drop_invalid_index(self, index_name: str):
+        """Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс — удаляем его."""
+        try:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                invalid = conn.execute(text("""
+                    SELECT EXISTS (
+                        SELECT 1 FROM pg_index i
+                        JOIN pg_class c ON c.oid = i.indexrelid
+                        JOIN pg_namespace n ON n.oid = c.relnamespace
+                        WHERE c.relname = :name AND n.nspname = current_schema() AND NOT i.indisvalid
+                    )
+                """), {"name": index_name}).scalar()
+                if invalid:
+                    conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+                    self.logger.info("Невалидный индекс '%s' удалён", index_name)
+        except Exception as e:
+            self.logger.error("Не удалось удалить невалидный индекс '%s': %s", index_name, self.format_db_error(e))
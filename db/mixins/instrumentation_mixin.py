@@ -0,0 +1,60 @@
+"""
+Миксин метрик производительности: задержки методов и запросов, выгрузка в Prometheus/JSON
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+
+class InstrumentationMixin:
+    """
+    Миксин для просмотра и выгрузки метрик, которые собирает self.instrumentation
+    (класс Instrumentation): время вызова публичных методов DB и время
+    выполнения SQL-шаблонов, строки, примерный объём данных и ошибки.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Инициализируем логгер для этого миксина
+        self.logger = logging.getLogger("DB")
+
+    def get_performance_snapshot(self) -> Dict[str, Any]:
+        """
+        Снимок метрик производительности.
+
+        Returns:
+            {'started_at', 'taken_at', 'enabled', 'buckets_ms', 'methods': [...], 'statements': [...]}
+            Поля элементов methods/statements описаны в Instrumentation.snapshot.
+        """
+        snapshot = self.instrumentation.snapshot()
+        snapshot["enabled"] = self.instrumentation.enabled
+        return snapshot
+
+    def set_performance_tracking(self, enabled: bool):
+        """Включает или выключает сбор метрик (накопленные значения сохраняются)."""
+        self.instrumentation.enabled = enabled
+        self.logger.info("Сбор метрик производительности %s", 'включён' if enabled else 'выключен')
+
+    def reset_performance_metrics(self):
+        """Обнуляет накопленные метрики."""
+        self.instrumentation.reset()
+        self.logger.info("Метрики производительности сброшены")
+
+    def export_performance_metrics(self, path: str, fmt: str = "prometheus") -> Tuple[bool, Optional[str]]:
+        """
+        Записывает метрики в файл.
+
+        Args:
+            path: Путь к файлу (для node_exporter — *.prom в каталоге textfile collector)
+            fmt: "prometheus" (текстовый формат экспозиции) или "json" (снимок)
+
+        Returns:
+            (успех, сообщение об ошибке)
+        """
+        try:
+            self.instrumentation.write(path, fmt)
+            self.logger.info("Метрики производительности (%s) записаны в %s", fmt, path)
+            return True, None
+        except (OSError, ValueError) as e:
+            self.logger.error("Ошибка записи метрик в %s: %s", path, e)
+            return False, str(e)
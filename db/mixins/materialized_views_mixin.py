@@ -0,0 +1,323 @@
+"""
+Миксин для управления материализованными представлениями: REFRESH CONCURRENTLY, расписание, актуальность
+"""
+
+import logging
+import time
+from datetime import datetime
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class MaterializedViewsMixin:
+    """
+    Миксин для обновления материализованных представлений.
+
+    REFRESH ... CONCURRENTLY не блокирует читателей представления, но требует
+    уникального индекса без выражений и условия WHERE — при необходимости он
+    создаётся автоматически. Для каждого обновления запоминаются время,
+    длительность, число строк и счётчик изменений базовых таблиц
+    (pg_stat_user_tables), по которому определяется, устарели ли данные.
+    """
+
+    # Типы без btree-сравнения не могут входить в уникальный индекс
+    _UNINDEXABLE_TYPES = ("json", "xml", "point", "line", "lseg", "box", "path", "polygon", "circle")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Инициализируем логгер для этого миксина
+        self.logger = logging.getLogger("DB")
+
+    # ------------------------------------------------------------------
+    # Сведения о представлениях
+    # ------------------------------------------------------------------
+    def get_materialized_views(self) -> List[str]:
+        """Возвращает имена материализованных представлений текущей схемы."""
+        if not self.is_connected():
+            return []
+        try:
+            with self._connection() as conn:
+                result = conn.execute(text("""
+                    SELECT matviewname FROM pg_matviews
+                    WHERE schemaname = current_schema()
+                    ORDER BY matviewname
+                """))
+                return [row[0] for row in result]
+        except Exception as e:
+            self.logger.error("Ошибка получения материализованных представлений: %s", self.format_db_error(e))
+            return []
+
+    def _matview_info(self, conn, view_name: str) -> Optional[Dict[str, Any]]:
+        """Заполнено ли представление и есть ли у него индекс, пригодный для CONCURRENTLY."""
+        row = conn.execute(text("""
+            SELECT c.relispopulated,
+                   EXISTS (
+                       SELECT 1 FROM pg_index i
+                       WHERE i.indrelid = c.oid AND i.indisunique AND i.indisvalid
+                         AND i.indpred IS NULL AND i.indexprs IS NULL
+                   ),
+                   pg_total_relation_size(c.oid)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = :name AND c.relkind = 'm' AND n.nspname = current_schema()
+        """), {"name": view_name}).first()
+        if row is None:
+            return None
+        return {"populated": bool(row[0]), "has_unique_index": bool(row[1]), "size_bytes": row[2]}
+
+    def _matview_base_changes(self, conn, view_name: str) -> Optional[int]:
+        """
+        Суммарное число вставок/обновлений/удалений в таблицах, из которых
+        строится представление (по зависимостям правила _RETURN).
+        """
+        return conn.execute(text("""
+            SELECT COALESCE(SUM(s.n_tup_ins + s.n_tup_upd + s.n_tup_del), 0)
+            FROM pg_stat_user_tables s
+            WHERE s.relid IN (
+                SELECT d.refobjid
+                FROM pg_rewrite r
+                JOIN pg_class mv ON mv.oid = r.ev_class
+                JOIN pg_namespace n ON n.oid = mv.relnamespace
+                JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+                WHERE mv.relname = :name AND n.nspname = current_schema()
+                  AND d.refobjid <> mv.oid
+            )
+        """), {"name": view_name}).scalar()
+
+    # ------------------------------------------------------------------
+    # Уникальный индекс для CONCURRENTLY
+    # ------------------------------------------------------------------
+    def create_matview_unique_index(self, view_name: str,
+                                    columns: List[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Создаёт уникальный индекс, необходимый для REFRESH ... CONCURRENTLY.
+
+        Если столбцы не указаны, выбирается первый столбец-идентификатор (id, *_id),
+        значения которого уникальны и не NULL, иначе — все индексируемые столбцы.
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        try:
+            with self._connection() as conn:
+                if columns is None:
+                    columns = self._pick_matview_unique_columns(conn, view_name)
+                if not columns:
+                    return False, f"Не удалось подобрать уникальный ключ для '{view_name}'"
+
+            index_name = f"uq_{view_name}".lower()[:63]
+            column_list = ", ".join(f'"{col}"' for col in columns)
+            sql = f'CREATE UNIQUE INDEX IF NOT EXISTS "{index_name}" ON "{view_name}" ({column_list})'
+            self.logger.info("Создание уникального индекса для REFRESH CONCURRENTLY: %s", sql)
+            with self.engine.begin() as conn:
+                conn.execute(text(sql))
+            self.schema_cache.invalidate([view_name])
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка создания уникального индекса для '{view_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg
+
+    def _pick_matview_unique_columns(self, conn, view_name: str) -> List[str]:
+        rows = conn.execute(text("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = :name AND n.nspname = current_schema()
+              AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum
+        """), {"name": view_name}).fetchall()
+        columns = [name for name, type_name in rows
+                   if type_name.split("(")[0].split("[")[0] not in self._UNINDEXABLE_TYPES]
+        if not columns:
+            return []
+
+        # Один проход по представлению проверяет все кандидаты сразу
+        id_columns = [col for col in columns if col.lower() == "id" or col.lower().endswith("_id")]
+        checks = ["COUNT(*)"]
+        for col in id_columns:
+            checks.append(f'COUNT(DISTINCT "{col}") = COUNT(*) AND COUNT("{col}") = COUNT(*)')
+        all_columns = ", ".join(f'"{col}"' for col in columns)
+        checks.append(f"(SELECT COUNT(*) FROM (SELECT DISTINCT {all_columns} FROM \"{view_name}\") d) = COUNT(*)")
+        result = conn.execute(text(f'SELECT {", ".join(checks)} FROM "{view_name}"')).first()
+
+        for col, is_unique in zip(id_columns, result[1:-1]):
+            if is_unique:
+                return [col]
+        return columns if result[-1] else []
+
+    # ------------------------------------------------------------------
+    # Обновление
+    # ------------------------------------------------------------------
+    def refresh_materialized_view(self, view_name: str, concurrently: bool = True,
+                                  exact_count: bool = False) -> Tuple[bool, Optional[str]]:
+        """
+        Обновляет данные материализованного представления.
+
+        Args:
+            view_name: Имя представления
+            concurrently: Обновлять без блокировки читателей (REFRESH ... CONCURRENTLY).
+                Для незаполненного представления выполняется обычный REFRESH.
+            exact_count: Считать строки COUNT(*) после обновления (полный просмотр
+                представления); по умолчанию — оценка pg_class.reltuples
+
+        Returns:
+            Tuple[bool, Optional[str]]: (успех, сообщение об ошибке)
+        """
+        if not self.is_connected():
+            return False, "Нет подключения к базе данных"
+
+        try:
+            with self._connection() as conn:
+                info = self._matview_info(conn, view_name)
+            if info is None:
+                return False, f"Материализованное представление '{view_name}' не найдено"
+
+            use_concurrently = concurrently and info["populated"]
+            if use_concurrently and not info["has_unique_index"]:
+                ok, error = self.create_matview_unique_index(view_name)
+                if not ok:
+                    self.logger.warning("REFRESH CONCURRENTLY для '%s' недоступен: %s", view_name, error)
+                    use_concurrently = False
+
+            sql = f'REFRESH MATERIALIZED VIEW {"CONCURRENTLY " if use_concurrently else ""}"{view_name}"'
+            self.logger.info("Обновление материализованного представления: %s", sql)
+
+            started = time.perf_counter()
+            with self.engine.begin() as conn:
+                # Счётчик изменений снимаем до обновления: изменения во время REFRESH считаются неучтёнными
+                base_changes = self._matview_base_changes(conn, view_name)
+                conn.execute(text(sql))
+            duration = time.perf_counter() - started
+
+            # Отдельно от REFRESH, чтобы не удерживать его блокировку
+            with self._connection() as conn:
+                if exact_count:
+                    rows = conn.execute(text(f'SELECT COUNT(*) FROM "{view_name}"')).scalar()
+                else:
+                    rows = conn.execute(text(
+                        "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:view AS regclass)"
+                    ), {"view": f'"{view_name}"'}).scalar()
+                    # -1 — статистика ещё не собиралась
+                    rows = rows if rows is not None and rows >= 0 else None
+
+            with self._matview_lock:
+                self._matview_stats[view_name] = {
+                    "last_refresh": datetime.now(),
+                    "duration": duration,
+                    "rows": rows,
+                    "rows_exact": exact_count,
+                    "concurrently": use_concurrently,
+                    "base_changes": base_changes,
+                    "error": None,
+                }
+            self.logger.info("'%s' обновлено за %.2f с, строк: %s", view_name, duration, rows)
+            return True, None
+        except Exception as e:
+            error_msg = f"Ошибка обновления '{view_name}': {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            with self._matview_lock:
+                self._matview_stats.setdefault(view_name, {})["error"] = error_msg
+            return False, error_msg
+
+    def get_matview_status(self, view_name: str = None) -> List[Dict[str, Any]]:
+        """
+        Состояние материализованных представлений.
+
+        Returns:
+            Список словарей: name, populated, has_unique_index, size_bytes,
+            last_refresh, duration, rows (rows_exact=False — оценка), concurrently, age_seconds,
+            changes_since_refresh, stale, interval, error.
+            Поля последнего обновления равны None, если представление
+            ещё не обновлялось в этом сеансе.
+        """
+        if not self.is_connected():
+            return []
+
+        names = [view_name] if view_name else self.get_materialized_views()
+        jobs = self.matview_scheduler.jobs()
+        status = []
+        try:
+            with self._connection() as conn:
+                for name in names:
+                    info = self._matview_info(conn, name)
+                    if info is None:
+                        continue
+                    with self._matview_lock:
+                        stats = dict(self._matview_stats.get(name, {}))
+
+                    changes = None
+                    if stats.get("base_changes") is not None:
+                        changes = self._matview_base_changes(conn, name) - stats["base_changes"]
+                    last_refresh = stats.get("last_refresh")
+
+                    status.append({
+                        "name": name,
+                        **info,
+                        "last_refresh": last_refresh,
+                        "duration": stats.get("duration"),
+                        "rows": stats.get("rows"),
+                        "rows_exact": stats.get("rows_exact"),
+                        "concurrently": stats.get("concurrently"),
+                        "age_seconds": (datetime.now() - last_refresh).total_seconds() if last_refresh else None,
+                        "changes_since_refresh": changes,
+                        # После сброса статистики счётчик может уменьшиться — тоже считаем устаревшим
+                        "stale": (not info["populated"]) or (changes != 0 if changes is not None else None),
+                        "interval": jobs.get(name, {}).get("interval"),
+                        "error": stats.get("error"),
+                    })
+            return status
+        except Exception as e:
+            self.logger.error("Ошибка получения состояния представлений: %s", self.format_db_error(e))
+            return []
+
+    # ------------------------------------------------------------------
+    # Расписание
+    # ------------------------------------------------------------------
+    def schedule_matview_refresh(self, view_name: str, interval_seconds: float,
+                                 concurrently: bool = True, only_if_stale: bool = True) -> bool:
+        """
+        Включает фоновое обновление представления с заданным интервалом.
+
+        Args:
+            view_name: Имя представления
+            interval_seconds: Интервал между обновлениями
+            concurrently: Использовать REFRESH ... CONCURRENTLY
+            only_if_stale: Пропускать обновление, если базовые таблицы не менялись
+        """
+        if not self.is_connected():
+            return False
+        with self._matview_lock:
+            self._matview_jobs[view_name] = {"concurrently": concurrently, "only_if_stale": only_if_stale}
+        self.matview_scheduler.schedule(view_name, interval_seconds)
+        self.logger.info("Обновление '%s' запланировано каждые %g с", view_name, interval_seconds)
+        return True
+
+    def unschedule_matview_refresh(self, view_name: str) -> bool:
+        """Отключает фоновое обновление представления."""
+        with self._matview_lock:
+            self._matview_jobs.pop(view_name, None)
+        removed = self.matview_scheduler.unschedule(view_name)
+        if removed:
+            self.logger.info("Плановое обновление '%s' отключено", view_name)
+        return removed
+
+    def _scheduled_matview_refresh(self, view_name: str) -> bool:
+        """Вызывается потоком планировщика."""
+        if not self.is_connected():
+            return False
+        with self._matview_lock:
+            options = dict(self._matview_jobs.get(view_name, {}))
+
+        if options.get("only_if_stale", True):
+            status = self.get_matview_status(view_name)
+            if status and status[0]["stale"] is False:
+                self.logger.debug("'%s' актуально — плановое обновление пропущено", view_name)
+                return True
+
+        ok, _ = self.refresh_materialized_view(view_name, options.get("concurrently", True))
+        return ok
@@ -3,8 +3,8 @@
 """
 
 import logging
-from sqlalchemy import MetaData, Table, Column, Integer, String, Numeric, Date, ForeignKey, Boolean, Enum, ARRAY, UniqueConstraint, CheckConstraint, inspect, text
-from typing import List, Dict, Any, Optional
+from sqlalchemy import MetaData, Table, Column, Integer, String, Numeric, Date, ForeignKey, Boolean, Enum, ARRAY, UniqueConstraint, CheckConstraint, text
+from typing import List, Dict, Any, Optional, Iterable, Set
 
 
 class MetadataMixin:
@@ -93,8 +93,7 @@ class MetadataMixin:
             return False
 
         try:
-            inspector = inspect(self.engine)
-            existing = set(inspector.get_table_names())
+            existing = set(self.schema_cache.get_table_names())
             expected = set(self.tables)
 
             if expected.issubset(existing):
@@ -103,17 +102,18 @@ class MetadataMixin:
 
             self.logger.info("🛠 Создание таблиц схемы...")
             self.metadata.create_all(self.engine)
+            self.schema_cache.invalidate()
 
-            missing = set(self.tables) - set(inspect(self.engine).get_table_names())
+            missing = set(self.tables) - set(self.schema_cache.get_table_names())
             if missing:
-                self.logger.error(f" Не удалось создать таблицы: {', '.join(missing)}")
+                self.logger.error(" Не удалось создать таблицы: %s", ', '.join(missing))
                 return False
 
             self.logger.info(" Схема успешно создана.")
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка создания схемы: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка создания схемы: %s", self.format_db_error(e))
             return False
 
     def drop_schema(self) -> bool:
@@ -125,6 +125,7 @@ class MetadataMixin:
         try:
             self.logger.info(" Удаление всех таблиц схемы...")
             self.metadata.drop_all(self.engine)
+            self.schema_cache.invalidate()
 
             # Дополнительно удалим пользовательские ENUM-типы и наши последовательности
             with self.engine.begin() as conn:
@@ -141,7 +142,7 @@ class MetadataMixin:
                         conn.execute(text(f'DROP TYPE IF EXISTS "{schema_name}"."{type_name}" CASCADE'))
                     except Exception as e:
                         self.logger.warning(
-                            f" Не удалось удалить тип {schema_name}.{type_name}: {self.format_db_error(e)}"
+                            " Не удалось удалить тип %s.%s: %s", schema_name, type_name, self.format_db_error(e)
                         )
 
                 # --- Последовательности, созданные для PK ---
@@ -156,14 +157,15 @@ class MetadataMixin:
                         conn.execute(text(f'DROP SEQUENCE IF EXISTS "{seq_schema}"."{seq_name}" CASCADE'))
                     except Exception as e:
                         self.logger.warning(
-                            f" Не удалось удалить последовательность {seq_schema}.{seq_name}: {self.format_db_error(e)}"
+                            " Не удалось удалить последовательность %s.%s: %s",
+                            seq_schema, seq_name, self.format_db_error(e)
                         )
 
             self.logger.info(" Схема успешно очищена (все таблицы, типы и последовательности удалены).")
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка удаления схемы: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка удаления схемы: %s", self.format_db_error(e))
             return False
 
     def get_table_names(self) -> List[str]:
@@ -171,11 +173,27 @@ class MetadataMixin:
         if not self.is_connected():
             return []
         try:
-            tables = inspect(self.engine).get_table_names()
-            self.logger.info(f"Таблицы в БД ({len(tables)}): {tables}")
+            tables = self.schema_cache.get_table_names()
+            self.logger.info("Таблицы в БД (%s): %s", len(tables), tables)
             return tables
         except Exception as e:
-            self.logger.error(f" Ошибка при получении списка таблиц: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка при получении списка таблиц: %s", self.format_db_error(e))
+            return []
+
+    def get_views(self) -> List[str]:
+        """Возвращает список обычных представлений (VIEW) в БД."""
+        if not self.is_connected():
+            return []
+        try:
+            rows = self._cached_rows("""
+                SELECT table_name
+                FROM information_schema.views
+                WHERE table_schema = 'public'
+                ORDER BY table_name
+            """, [self.result_cache.SCHEMA])
+            return [row["table_name"] for row in rows]
+        except Exception as e:
+            self.logger.error(" Ошибка при получении списка представлений: %s", self.format_db_error(e))
             return []
 
     def get_column_names(self, table_name: str) -> List[str]:
@@ -184,17 +202,16 @@ class MetadataMixin:
             return []
 
         try:
-            insp = inspect(self.engine)
-            if table_name not in insp.get_table_names():
-                self.logger.error(f" Таблица '{table_name}' не существует в БД.")
+            if not self.schema_cache.has_table(table_name):
+                self.logger.error(" Таблица '%s' не существует в БД.", table_name)
                 return []
 
-            columns = [col['name'] for col in insp.get_columns(table_name)]
-            self.logger.info(f" Колонки таблицы '{table_name}' ({len(columns)}): {columns}")
+            columns = self.schema_cache.get_column_names(table_name)
+            self.logger.info(" Колонки таблицы '%s' (%s): %s", table_name, len(columns), columns)
             return columns
 
         except Exception as e:
-            self.logger.error(f" Ошибка получения колонок '{table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка получения колонок '%s': %s", table_name, self.format_db_error(e))
             return []
 
     def get_tables(self) -> List[str]:
@@ -211,8 +228,7 @@ class MetadataMixin:
             return None
             
         try:
-            insp = inspect(self.engine)
-            columns = insp.get_columns(table_name)
+            columns = self.schema_cache.get_columns(table_name)
             
             for col in columns:
                 if col['name'] == column_name:
@@ -226,20 +242,75 @@ class MetadataMixin:
             return None
             
         except Exception as e:
-            self.logger.error(f" Ошибка получения информации о столбце '{table_name}.{column_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка получения информации о столбце '%s.%s': %s",
+                              table_name, column_name, self.format_db_error(e))
             return None
 
-    def _refresh_metadata(self):
-        """Обновляет внутренние метаданные и структуру таблиц после изменений в БД (ALTER, DROP, CREATE)."""
+    def _refresh_metadata(self, tables: Optional[Iterable[str]] = None):
+        """
+        Обновляет внутренние метаданные и структуру таблиц после изменений в БД (ALTER, DROP, CREATE).
+
+        Args:
+            tables: Имена изменённых таблиц — перечитываются только они (и таблицы,
+                ссылающиеся на них внешними ключами). None — полное отражение схемы.
+        """
         if not self.is_connected():
             self.logger.warning(" Невозможно обновить метаданные — отсутствует подключение к БД.")
             return
 
+        if tables is not None and self.metadata is not None:
+            try:
+                self._reflect_tables(set(tables))
+                return
+            except Exception as e:
+                self.logger.error(
+                    " Ошибка точечного обновления метаданных, выполняется полное: %s", self.format_db_error(e)
+                )
+
         try:
             md = MetaData()
             md.reflect(bind=self.engine)
             self.metadata = md
             self.tables = dict(md.tables)
-            self.logger.info(f" Метаданные обновлены: {len(self.tables)} таблиц загружено.")
+            self.schema_cache.invalidate()
+            # Структура таблиц могла измениться — кэш свободных ID больше не актуален
+            self.id_allocator.reset()
+            self.logger.info(" Метаданные обновлены: %s таблиц загружено.", len(self.tables))
         except Exception as e:
-            self.logger.error(f" Ошибка при обновлении метаданных: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка при обновлении метаданных: %s", self.format_db_error(e))
+
+    def _reflect_tables(self, names: Set[str]):
+        """Заново отражает только указанные таблицы в self.metadata."""
+        # Внешние ключи зависимых таблиц указывают на старые объекты Column — перечитываем и их
+        dependents = {
+            table.name for table in self.metadata.tables.values()
+            if any(fk.target_fullname.split(".")[-2] in names for fk in table.foreign_keys)
+        }
+        names = names | dependents
+
+        self.schema_cache.invalidate(names)
+        for name in names:
+            table = self.metadata.tables.get(name)
+            if table is not None:
+                self.metadata.remove(table)
+            self.id_allocator.reset(name)
+
+        existing = set(self.schema_cache.get_table_names())
+        for name in sorted(names & existing):
+            # Таблица могла уже попасть в метаданные при отражении ссылающейся на неё
+            if name not in self.metadata.tables:
+                Table(name, self.metadata, autoload_with=self.engine)
+
+        self.tables = dict(self.metadata.tables)
+        self.logger.info(" Метаданные обновлены точечно: %s", ', '.join(sorted(names)) or '—')
+
+    def _tables_using_type(self, type_name: str) -> Set[str]:
+        """Возвращает таблицы, столбцы которых (или элементы массивов) имеют указанный тип."""
+        result = set()
+        for table in self.metadata.tables.values():
+            for column in table.columns:
+                item_type = getattr(column.type, "item_type", None)
+                if type_name in (getattr(column.type, "name", None), getattr(item_type, "name", None)):
+                    result.add(table.name)
+                    break
+        return result
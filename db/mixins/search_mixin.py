@@ -2,9 +2,13 @@
 Миксин для поиска и фильтрации данных
 """
 
+import json
 import logging
 from sqlalchemy import func, select, asc, desc, text, inspect
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..plan_analysis import analyze_plan, plan_relations
+from ..sql_utils import ddl_target_relations
 
 
 class SearchMixin:
@@ -40,7 +44,7 @@ class SearchMixin:
             if columns:
                 valid_cols = [getattr(table.c, c) for c in columns if hasattr(table.c, c)]
                 if not valid_cols:
-                    self.logger.warning(f"Указанные колонки не найдены в '{table_name}'")
+                    self.logger.warning("Указанные колонки не найдены в '%s'", table_name)
                     return []
                 stmt = stmt.with_only_columns(*valid_cols)
 
@@ -59,7 +63,7 @@ class SearchMixin:
                         params[key] = val
                         i += 1
                     else:
-                        self.logger.warning(f"Колонка '{col}' не найдена ({prefix})")
+                        self.logger.warning("Колонка '%s' не найдена (%s)", col, prefix)
                 return exprs
 
             # WHERE
@@ -93,16 +97,16 @@ class SearchMixin:
             if offset:
                 stmt = stmt.offset(offset)
 
-            self.logger.info(f"Выполнение SELECT из '{table_name}'")
-            with self.engine.connect() as conn:
+            self.logger.info("Выполнение SELECT из '%s'", table_name)
+            with self._connection() as conn:
                 result = conn.execute(stmt, params)
                 rows = [dict(row._mapping) for row in result]
 
-            self.logger.info(f"Получено {len(rows)} строк из '{table_name}'")
+            self.logger.info("Получено %s строк из '%s'", len(rows), table_name)
             return rows
 
         except Exception as e:
-            self.logger.error(f"Ошибка SELECT с фильтрами: {self.format_db_error(e)}")
+            self.logger.error("Ошибка SELECT с фильтрами: %s", self.format_db_error(e))
             return []
 
     def execute_aggregate_query(
@@ -138,7 +142,7 @@ class SearchMixin:
                     return None
 
                 base_query = f"SELECT {select_clause} {base_query[from_idx:]}"
-                self.logger.debug(f"Агрегатный SELECT: {base_query}")
+                self.logger.debug("Агрегатный SELECT: %s", base_query)
 
             # Добавляем GROUP BY
             if group_by:
@@ -151,11 +155,11 @@ class SearchMixin:
             # Выполняем через основной метод
             result = self.execute_query(base_query, fetch="dict")
             count = len(result) if isinstance(result, list) else 1 if result else 0
-            self.logger.info(f"Агрегатный запрос успешно выполнен — получено {count} строк")
+            self.logger.info("Агрегатный запрос успешно выполнен — получено %s строк", count)
             return result
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения агрегатного запроса: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения агрегатного запроса: %s", self.format_db_error(e))
             return None
 
     def text_search(
@@ -173,10 +177,13 @@ class SearchMixin:
         if not self.is_connected():
             return []
 
+        # Поиск по словам и нечёткий поиск выполняются через индексы FullTextSearchMixin
+        if search_type.upper() == "FULLTEXT":
+            return self.full_text_search(table_name, column_name, search_query)
+        if search_type.upper() == "FUZZY":
+            return self.similarity_search(table_name, column_name, search_query)
+
         try:
-            # Экранируем поисковый запрос для безопасности
-            escaped_query = search_query.replace("'", "''")
-            
             # Определяем тип поиска
             search_type = search_type.upper()
             if search_type == "LIKE" and not case_sensitive:
@@ -184,53 +191,37 @@ class SearchMixin:
             elif search_type == "NOT_LIKE" and not case_sensitive:
                 search_type = "NOT_ILIKE"
 
-            # Формируем SQL запрос в зависимости от типа поиска
-            if search_type == "LIKE":
-                # Чувствительный к регистру LIKE (без автоматических %)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text LIKE \'{escaped_query}\''
-            elif search_type == "ILIKE":
-                # Нечувствительный к регистру ILIKE (без автоматических %)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text ILIKE \'{escaped_query}\''
-            elif search_type == "NOT_LIKE":
-                # НЕ LIKE (чувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text NOT LIKE \'{escaped_query}\''
-            elif search_type == "NOT_ILIKE":
-                # НЕ ILIKE (нечувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text NOT ILIKE \'{escaped_query}\''
-            elif search_type == "SIMILAR_TO":
-                # SIMILAR TO (SQL регулярные выражения)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text SIMILAR TO \'{escaped_query}\''
-            elif search_type == "NOT_SIMILAR_TO":
-                # NOT SIMILAR TO (отрицание SQL регулярных выражений)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text NOT SIMILAR TO \'{escaped_query}\''
-            elif search_type == "REGEX":
-                # Регулярное выражение (чувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text ~ \'{escaped_query}\''
-            elif search_type == "IREGEX":
-                # Регулярное выражение (нечувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text ~* \'{escaped_query}\''
-            elif search_type == "NOT_REGEX":
-                # НЕ регулярное выражение (чувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text !~ \'{escaped_query}\''
-            elif search_type == "NOT_IREGEX":
-                # НЕ регулярное выражение (нечувствительный к регистру)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text !~* \'{escaped_query}\''
-            else:
-                # По умолчанию используем ILIKE (без автоматических %)
-                sql_query = f'SELECT * FROM "{table_name}" WHERE "{column_name}"::text ILIKE \'{escaped_query}\''
-
-            self.logger.info(f" Поиск в '{table_name}.{column_name}' ({search_type}) с запросом '{search_query}'")
-            self.logger.info(f"📝 SQL: {sql_query}")
-
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql_query))
+            # Операторы поиска; выражение столбца совпадает с выражением триграммного индекса
+            operators = {
+                "LIKE": "LIKE",
+                "ILIKE": "ILIKE",
+                "NOT_LIKE": "NOT LIKE",
+                "NOT_ILIKE": "NOT ILIKE",
+                "SIMILAR_TO": "SIMILAR TO",
+                "NOT_SIMILAR_TO": "NOT SIMILAR TO",
+                "REGEX": "~",
+                "IREGEX": "~*",
+                "NOT_REGEX": "!~",
+                "NOT_IREGEX": "!~*",
+            }
+            # По умолчанию используем ILIKE (без автоматических %)
+            operator = operators.get(search_type, "ILIKE")
+            expression, indexable = self._search_expression(table_name, column_name)
+            sql_query = f'SELECT * FROM "{table_name}" WHERE {expression} {operator} :search_query'
+
+            self.logger.info(" Поиск в '%s.%s' (%s) с запросом '%s'",
+                             table_name, column_name, search_type, search_query)
+            self.logger.info("📝 SQL: %s (индексируемое выражение: %s)", sql_query, 'да' if indexable else 'нет')
+
+            with self._connection() as conn:
+                result = conn.execute(text(sql_query), {"search_query": search_query})
                 rows = [dict(row._mapping) for row in result]
 
-            self.logger.info(f" Найдено {len(rows)} строк по '{search_query}' ({search_type})")
+            self.logger.info(" Найдено %s строк по '%s' (%s)", len(rows), search_query, search_type)
             return rows
 
         except Exception as e:
-            self.logger.error(f"Ошибка текстового поиска: {self.format_db_error(e)}")
+            self.logger.error("Ошибка текстового поиска: %s", self.format_db_error(e))
             return []
     
 
@@ -254,22 +245,20 @@ class SearchMixin:
             return []
             
         try:
-            # Проверяем существование таблицы через inspect
-            insp = inspect(self.engine)
-            if table_name not in insp.get_table_names():
-                self.logger.error(f" Таблица '{table_name}' не найдена")
+            # Проверяем существование таблицы по кэшу схемы
+            if not self.schema_cache.has_table(table_name):
+                self.logger.error(" Таблица '%s' не найдена", table_name)
                 return []
             
             # Проверяем существование столбца
-            columns = [col['name'] for col in insp.get_columns(table_name)]
+            columns = self.schema_cache.get_column_names(table_name)
             if column_name not in columns:
-                self.logger.error(f" Столбец '{column_name}' не найден в таблице '{table_name}'")
+                self.logger.error(" Столбец '%s' не найден в таблице '%s'", column_name, table_name)
                 return []
             
             # Формируем SQL запрос в зависимости от типа поиска
-            # Преобразуем столбец в текст для универсального поиска
-            # Используем COALESCE для обработки NULL значений
-            column_as_text = f'COALESCE(CAST("{column_name}" AS TEXT), \'\')'
+            # Выражение столбца совпадает с выражением триграммного индекса (если он создан)
+            column_as_text, _ = self._search_expression(table_name, column_name)
             
             if search_type == "SIMILAR_TO":
                 # SIMILAR TO поиск (SQL standard regex)
@@ -278,7 +267,7 @@ class SearchMixin:
                 
             elif search_type == "NOT_SIMILAR_TO":
                 # NOT SIMILAR TO поиск
-                where_clause = f'{column_as_text} NOT SIMILAR TO :search_query'
+                where_clause = f'({column_as_text} NOT SIMILAR TO :search_query OR {column_as_text} IS NULL)'
                 escaped_query = search_query
                 
             elif "LIKE" in search_type:
@@ -287,8 +276,8 @@ class SearchMixin:
                     # Чувствительный к регистру
                     where_clause = f'{column_as_text} LIKE :search_query'
                 else:
-                    # Нечувствительный к регистру
-                    where_clause = f'LOWER({column_as_text}) LIKE LOWER(:search_query)'
+                    # Нечувствительный к регистру (ILIKE поддерживается индексом pg_trgm)
+                    where_clause = f'{column_as_text} ILIKE :search_query'
                     
                 # Экранируем специальные символы для LIKE
                 escaped_query = search_query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
@@ -299,10 +288,10 @@ class SearchMixin:
                     # НЕ соответствует регулярному выражению
                     if "*" in search_type:
                         # Нечувствительный к регистру
-                        where_clause = f'{column_as_text} !~* :search_query'
+                        where_clause = f'({column_as_text} !~* :search_query OR {column_as_text} IS NULL)'
                     else:
                         # Чувствительный к регистру
-                        where_clause = f'{column_as_text} !~ :search_query'
+                        where_clause = f'({column_as_text} !~ :search_query OR {column_as_text} IS NULL)'
                 else:
                     # Соответствует регулярному выражению
                     if "*" in search_type:
@@ -314,16 +303,16 @@ class SearchMixin:
                         
                 escaped_query = search_query
             else:
-                self.logger.error(f" Неподдерживаемый тип поиска: {search_type}")
+                self.logger.error(" Неподдерживаемый тип поиска: %s", search_type)
                 return []
             
             # Формируем полный SQL запрос
             sql_query = f'SELECT * FROM "{table_name}" WHERE {where_clause}'
             
-            self.logger.info(f" Выполняется поиск: {sql_query} с параметром: {escaped_query}")
+            self.logger.info(" Выполняется поиск: %s с параметром: %s", sql_query, escaped_query)
             
             # Выполняем запрос
-            with self.engine.connect() as conn:
+            with self._connection() as conn:
                 result = conn.execute(text(sql_query), {"search_query": escaped_query})
                 rows = result.fetchall()
                 
@@ -343,11 +332,11 @@ class SearchMixin:
                         row_dict[col] = value
                     results.append(row_dict)
                 
-                self.logger.info(f" Найдено {len(results)} записей")
+                self.logger.info(" Найдено %s записей", len(results))
                 return results
                 
         except Exception as e:
-            self.logger.error(f" Ошибка поиска по тексту: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка поиска по тексту: %s", self.format_db_error(e))
             return []
 
     def execute_custom_query(self, sql_query: str) -> List[Dict[str, Any]]:
@@ -365,10 +354,10 @@ class SearchMixin:
             return []
             
         try:
-            self.logger.info(f" Выполняется SQL запрос: {sql_query}")
+            self.logger.info(" Выполняется SQL запрос: %s", sql_query)
             
             # Выполняем запрос
-            with self.engine.connect() as conn:
+            with self._connection() as conn:
                 result = conn.execute(text(sql_query))
                 rows = result.fetchall()
                 
@@ -394,13 +383,69 @@ class SearchMixin:
                         row_dict[col] = value
                     results.append(row_dict)
                 
-                self.logger.info(f" Запрос выполнен успешно. Найдено {len(results)} записей")
+                self.logger.info(" Запрос выполнен успешно. Найдено %s записей", len(results))
                 return results
                 
         except Exception as e:
-            self.logger.error(f" Ошибка выполнения SQL запроса: {self.format_db_error(e)}")
+            self.logger.error(" Ошибка выполнения SQL запроса: %s", self.format_db_error(e))
             return []
 
+    def explain_query(self, sql_query: str, analyze: bool = True,
+                      buffers: bool = True) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Получает план выполнения запроса (EXPLAIN ... FORMAT JSON) и разбирает его.
+
+        При analyze=True запрос действительно выполняется, но внутри транзакции,
+        которая всегда откатывается, поэтому изменяющие CTE не сохраняются.
+
+        Args:
+            sql_query: SQL запрос
+            analyze: Выполнить запрос и собрать фактическое время и число строк
+            buffers: Собрать статистику обращений к буферам (только вместе с ANALYZE)
+
+        Returns:
+            Tuple[Optional[Dict], Optional[str]]: (результат analyze_plan с ключом 'raw', ошибка)
+        """
+        if not self.is_connected():
+            return None, "Нет подключения к базе данных"
+
+        options = [f"ANALYZE {str(analyze).upper()}", "FORMAT JSON"]
+        if analyze and buffers:
+            options.append("BUFFERS TRUE")
+        explain_sql = f"EXPLAIN ({', '.join(options)}) {sql_query.strip().rstrip(';')}"
+
+        try:
+            self.logger.info(" Получение плана запроса: %s", explain_sql)
+            with self.engine.connect() as conn:
+                trans = conn.begin()
+                try:
+                    explain = conn.execute(text(explain_sql)).scalar()
+                    if isinstance(explain, str):
+                        explain = json.loads(explain)
+                    explain = explain[0]
+
+                    relations = sorted(plan_relations(explain["Plan"]))
+                    relation_rows = {}
+                    if relations:
+                        rows = conn.execute(text("""
+                            SELECT c.relname, c.reltuples
+                            FROM pg_class c
+                            JOIN pg_namespace n ON n.oid = c.relnamespace
+                            WHERE n.nspname = current_schema() AND c.relname = ANY(:names)
+                        """), {"names": relations}).fetchall()
+                        relation_rows = {name: float(reltuples) for name, reltuples in rows}
+                finally:
+                    trans.rollback()
+
+            result = analyze_plan(explain, relation_rows)
+            result["raw"] = explain
+            self.logger.info(" План получен, предупреждений: %s", len(result['warnings']))
+            return result, None
+        except Exception as e:
+            error_msg = f"Ошибка получения плана запроса: {self.format_db_error(e)}"
+            self.logger.error(error_msg)
+            return None, error_msg
+
     def get_foreign_keys(self, table_name: str) -> List[Dict[str, Any]]:
         """
         Возвращает информацию о внешних ключах для указанной таблицы.
@@ -410,13 +455,12 @@ class SearchMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f"Таблица '{table_name}' не существует")
+                self.logger.error("Таблица '%s' не существует", table_name)
                 return []
 
-            insp = inspect(self.engine)
             foreign_keys = []
 
-            for fk in insp.get_foreign_keys(table_name):
+            for fk in self.schema_cache.get_foreign_keys(table_name):
                 foreign_keys.append({
                     "name": fk.get("name"),
                     "constrained_columns": fk.get("constrained_columns", []),
@@ -426,11 +470,11 @@ class SearchMixin:
                     "onupdate": fk.get("onupdate")
                 })
 
-            self.logger.info(f"Найдено {len(foreign_keys)} внешних ключей в '{table_name}'")
+            self.logger.info("Найдено %s внешних ключей в '%s'", len(foreign_keys), table_name)
             return foreign_keys
 
         except Exception as e:
-            self.logger.error(f"Ошибка получения внешних ключей для '{table_name}': {self.format_db_error(e)}")
+            self.logger.error("Ошибка получения внешних ключей для '%s': %s", table_name, self.format_db_error(e))
             return []
 
     def get_joined_summary(
@@ -455,138 +499,239 @@ class SearchMixin:
             return []
 
         try:
-            # Определяем имена таблиц (поддержка старых и новых параметров)
-            table1_name = left_table or table1
-            table2_name = right_table or table2
-            
-            if not table1_name or not table2_name:
-                self.logger.error("Не указаны имена таблиц для соединения")
+            query = self._build_joined_query(
+                left_table or table1, right_table or table2, join_on, join_condition,
+                join_type, columns, sort_columns or order_by, where_conditions
+            )
+            if query is None:
                 return []
-                
-            if not self.record_exists_ex_table(table1_name) or not self.record_exists_ex_table(table2_name):
-                self.logger.error("Одна или обе таблицы не существуют")
-                return []
-
-            # Используем предопределенные соединения или пользовательское условие
-            if join_on:
-                # Обрабатываем join_on как список кортежей или строку
-                if isinstance(join_on, list):
-                    # Если это список кортежей, формируем условие JOIN
-                    join_conditions = []
-                    for col1, col2 in join_on:
-                        join_conditions.append(f'"{table1_name}"."{col1}" = "{table2_name}"."{col2}"')
-                    join_clause = " AND ".join(join_conditions)
-                else:
-                    # Если это строка, используем как есть
-                    join_clause = join_on
-            elif join_condition:
-                join_clause = join_condition
-            else:
-                predefined_joins = self.get_predefined_joins()
-                join_key = (table1_name, table2_name)
-                if join_key not in predefined_joins:
-                    self.logger.error(f"Не найдено предопределенное соединение между '{table1_name}' и '{table2_name}'")
-                    return []
-                
-                col1, col2 = predefined_joins[join_key]
-                join_clause = f'"{table1_name}"."{col1}" = "{table2_name}"."{col2}"'
 
-            # Формируем SELECT
-            if columns:
-                # Обрабатываем колонки с префиксами t1/t2
-                processed_columns = []
-                for col in columns:
-                    if col.startswith("t1."):
-                        # Заменяем t1 на реальное имя левой таблицы
-                        col_name = col[3:]  # убираем "t1."
-                        processed_columns.append(f'"{table1_name}"."{col_name}"')
-                    elif col.startswith("t2."):
-                        # Заменяем t2 на реальное имя правой таблицы
-                        col_name = col[3:]  # убираем "t2."
-                        processed_columns.append(f'"{table2_name}"."{col_name}"')
-                    else:
-                        # Если колонка уже содержит имя таблицы, используем как есть
-                        processed_columns.append(f'"{col}"')
-                select_clause = ", ".join(processed_columns)
-            else:
-                select_clause = f'"{table1_name}".*, "{table2_name}".*'
-
-            # Базовый запрос с поддержкой типа соединения
-            join_keyword = join_type.upper() if join_type else "INNER"
-            sql = f'SELECT {select_clause} FROM "{table1_name}" {join_keyword} JOIN "{table2_name}" ON {join_clause}'
-
-            # WHERE условия
-            if where_conditions:
-                where_clauses = []
-                for col, val in where_conditions.items():
-                    if "." in col:
-                        where_clauses.append(f'"{col}" = :{col.replace(".", "_")}')
-                    else:
-                        where_clauses.append(f'"{table1_name}"."{col}" = :{col}')
-                if where_clauses:
-                    sql += " WHERE " + " AND ".join(where_clauses)
-
-            # ORDER BY (поддержка sort_columns и order_by)
-            order_columns = sort_columns or order_by
-            if order_columns:
-                order_clauses = []
-                for col, asc in order_columns:
-                    # Обрабатываем колонки с префиксами t1/t2
-                    if col.startswith("t1."):
-                        col_name = col[3:]  # убираем "t1."
-                        order_clauses.append(f'"{table1_name}"."{col_name}" {"ASC" if asc else "DESC"}')
-                    elif col.startswith("t2."):
-                        col_name = col[3:]  # убираем "t2."
-                        order_clauses.append(f'"{table2_name}"."{col_name}" {"ASC" if asc else "DESC"}')
-                    elif "." in col:
-                        order_clauses.append(f'"{col}" {"ASC" if asc else "DESC"}')
-                    else:
-                        # Если колонка без префикса, пытаемся определить к какой таблице она принадлежит
-                        # Сначала проверяем левую таблицу, потом правую
-                        if self.record_exists_ex_table(table1_name):
-                            table1_cols = self.get_table_columns(table1_name)
-                            if isinstance(table1_cols, list) and len(table1_cols) > 0:
-                                if isinstance(table1_cols[0], dict):
-                                    table1_col_names = [col['name'] for col in table1_cols]
-                                else:
-                                    table1_col_names = table1_cols
-                                if col in table1_col_names:
-                                    order_clauses.append(f'"{table1_name}"."{col}" {"ASC" if asc else "DESC"}')
-                                    continue
-                        
-                        if self.record_exists_ex_table(table2_name):
-                            table2_cols = self.get_table_columns(table2_name)
-                            if isinstance(table2_cols, list) and len(table2_cols) > 0:
-                                if isinstance(table2_cols[0], dict):
-                                    table2_col_names = [col['name'] for col in table2_cols]
-                                else:
-                                    table2_col_names = table2_cols
-                                if col in table2_col_names:
-                                    order_clauses.append(f'"{table2_name}"."{col}" {"ASC" if asc else "DESC"}')
-                                    continue
-                        
-                        # Если не найдена ни в одной таблице, используем левую по умолчанию
-                        order_clauses.append(f'"{table1_name}"."{col}" {"ASC" if asc else "DESC"}')
-                if order_clauses:
-                    sql += " ORDER BY " + ", ".join(order_clauses)
+            sql = f'SELECT {query["select"]} FROM {query["from"]}'
+            if query["where"]:
+                sql += " WHERE " + " AND ".join(query["where"])
+            if query["order"]:
+                sql += " ORDER BY " + ", ".join(
+                    f'{expr} {"ASC" if asc else "DESC"}' for expr, asc in query["order"]
+                )
 
             # LIMIT
             if limit:
                 sql += f" LIMIT {limit}"
 
-            self.logger.info(f"Выполнение JOIN: {sql}")
+            self.logger.info("Выполнение JOIN: %s", sql)
             
-            with self.engine.connect() as conn:
-                result = conn.execute(text(sql), where_conditions or {})
+            with self._connection() as conn:
+                result = conn.execute(text(sql), query["params"])
                 rows = [dict(row._mapping) for row in result]
 
-            self.logger.info(f"Получено {len(rows)} строк из JOIN")
+            self.logger.info("Получено %s строк из JOIN", len(rows))
             return rows
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения JOIN: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения JOIN: %s", self.format_db_error(e))
             return []
 
+    def get_joined_page(
+            self,
+            left_table: str,
+            right_table: str,
+            join_on=None,
+            join_type: str = "INNER",
+            columns: List[str] = None,
+            sort_columns: List[tuple] = None,
+            where_conditions: Dict[str, Any] = None,
+            after: Optional[tuple] = None,
+            limit: int = 200
+    ) -> Tuple[List[Dict[str, Any]], Optional[tuple]]:
+        """
+        Возвращает одну страницу JOIN-запроса с keyset-пагинацией (без OFFSET).
+
+        Ключ страницы — (первый столбец сортировки, PK левой таблицы, PK правой таблицы).
+
+        Returns:
+            (строки страницы, курсор для следующей страницы или None, если данные закончились)
+        """
+        if not self.is_connected():
+            return [], None
+
+        try:
+            query = self._build_joined_query(
+                left_table, right_table, join_on, None, join_type, columns, sort_columns, where_conditions
+            )
+            if query is None:
+                return [], None
+
+            left_pk = f'"{left_table}"."{self._get_primary_key_column(left_table)}"'
+            right_pk = f'"{right_table}"."{self._get_primary_key_column(right_table)}"'
+            outer = (join_type or "INNER").upper() != "INNER"
+
+            if query["order"]:
+                sort_expr, ascending = query["order"][0]
+            else:
+                sort_expr, ascending = left_pk, True
+            # Для OUTER JOIN любой из ключей может оказаться NULL
+            keys = [(sort_expr, ascending, True)]
+            keys.append((left_pk, ascending, outer))
+            keys.append((right_pk, ascending, outer))
+
+            key_select = ", ".join(f'{expr} AS "__keyset_{i}"' for i, (expr, _, _) in enumerate(keys))
+            sql = f'SELECT {query["select"]}, {key_select} FROM {query["from"]}'
+
+            where = list(query["where"])
+            params = dict(query["params"])
+            if after is not None:
+                condition_sql, keyset_params = self._keyset_condition(keys, after)
+                where.append(f"({condition_sql})")
+                params.update(keyset_params)
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+
+            sql += " ORDER BY " + ", ".join(self._keyset_order_sql(expr, asc_) for expr, asc_, _ in keys)
+            sql += f" LIMIT {int(limit)}"
+
+            self.logger.info("Keyset-страница JOIN: %s", sql)
+            rows = self._cached_rows(sql, [left_table, right_table], params)
+
+            next_cursor = None
+            for row in rows:
+                next_cursor = tuple(row.pop(f"__keyset_{i}") for i in range(len(keys)))
+            if len(rows) < limit:
+                next_cursor = None
+
+            self.logger.info("Получено %s строк страницы JOIN", len(rows))
+            return rows, next_cursor
+
+        except Exception as e:
+            self.logger.error("Ошибка keyset-пагинации JOIN: %s", self.format_db_error(e))
+            return [], None
+
+    def _build_joined_query(
+            self,
+            table1_name: str,
+            table2_name: str,
+            join_on=None,
+            join_condition: str = None,
+            join_type: str = "INNER",
+            columns: List[str] = None,
+            order_columns: List[tuple] = None,
+            where_conditions: Dict[str, Any] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Собирает части JOIN-запроса: SELECT, FROM ... JOIN ... ON, условия WHERE и ORDER BY.
+
+        Returns:
+            Словарь {"select", "from", "where": [...], "params": {...}, "order": [(выражение, asc)]}
+            или None при ошибке
+        """
+        if not table1_name or not table2_name:
+            self.logger.error("Не указаны имена таблиц для соединения")
+            return None
+            
+        if not self.record_exists_ex_table(table1_name) or not self.record_exists_ex_table(table2_name):
+            self.logger.error("Одна или обе таблицы не существуют")
+            return None
+        # Колонки обеих таблиц читаем один раз (из кэша схемы), а не на каждый столбец ORDER BY
+        table1_col_names = set(self.schema_cache.get_column_names(table1_name))
+        table2_col_names = set(self.schema_cache.get_column_names(table2_name))
+
+        # Используем предопределенные соединения или пользовательское условие
+        if join_on:
+            # Обрабатываем join_on как список кортежей или строку
+            if isinstance(join_on, list):
+                # Если это список кортежей, формируем условие JOIN
+                join_conditions = []
+                for col1, col2 in join_on:
+                    join_conditions.append(f'"{table1_name}"."{col1}" = "{table2_name}"."{col2}"')
+                join_clause = " AND ".join(join_conditions)
+            else:
+                # Если это строка, используем как есть
+                join_clause = join_on
+        elif join_condition:
+            join_clause = join_condition
+        else:
+            predefined_joins = self.get_predefined_joins()
+            join_key = (table1_name, table2_name)
+            if join_key not in predefined_joins:
+                self.logger.error("Не найдено предопределенное соединение между '%s' и '%s'", table1_name, table2_name)
+                return None
+            
+            col1, col2 = predefined_joins[join_key]
+            join_clause = f'"{table1_name}"."{col1}" = "{table2_name}"."{col2}"'
+
+        # Формируем SELECT
+        if columns:
+            # Обрабатываем колонки с префиксами t1/t2
+            processed_columns = []
+            for col in columns:
+                if col.startswith("t1."):
+                    # Заменяем t1 на реальное имя левой таблицы
+                    col_name = col[3:]  # убираем "t1."
+                    processed_columns.append(f'"{table1_name}"."{col_name}"')
+                elif col.startswith("t2."):
+                    # Заменяем t2 на реальное имя правой таблицы
+                    col_name = col[3:]  # убираем "t2."
+                    processed_columns.append(f'"{table2_name}"."{col_name}"')
+                else:
+                    # Если колонка уже содержит имя таблицы, используем как есть
+                    processed_columns.append(f'"{col}"')
+            select_clause = ", ".join(processed_columns)
+        else:
+            select_clause = f'"{table1_name}".*, "{table2_name}".*'
+
+        # Базовый запрос с поддержкой типа соединения
+        join_keyword = join_type.upper() if join_type else "INNER"
+        from_clause = f'"{table1_name}" {join_keyword} JOIN "{table2_name}" ON {join_clause}'
+
+        # WHERE условия; имена параметров — по порядковому номеру (как ks_N в keyset-условии),
+        # потому что ключ может содержать точку или другие недопустимые для параметра символы
+        where_clauses = []
+        where_params = {}
+        if where_conditions:
+            for i, (col, val) in enumerate(where_conditions.items()):
+                if col.startswith("t1."):
+                    column_sql = f'"{table1_name}"."{col[3:]}"'
+                elif col.startswith("t2."):
+                    column_sql = f'"{table2_name}"."{col[3:]}"'
+                elif "." in col:
+                    table_part, col_part = col.split(".", 1)
+                    column_sql = f'"{table_part}"."{col_part}"'
+                else:
+                    column_sql = f'"{table1_name}"."{col}"'
+                where_clauses.append(f'{column_sql} = :w_{i}')
+                where_params[f"w_{i}"] = val
+
+        # ORDER BY (поддержка sort_columns и order_by)
+        order_clauses = []
+        if order_columns:
+            for col, asc in order_columns:
+                # Обрабатываем колонки с префиксами t1/t2
+                if col.startswith("t1."):
+                    col_name = col[3:]  # убираем "t1."
+                    order_clauses.append((f'"{table1_name}"."{col_name}"', asc))
+                elif col.startswith("t2."):
+                    col_name = col[3:]  # убираем "t2."
+                    order_clauses.append((f'"{table2_name}"."{col_name}"', asc))
+                elif "." in col:
+                    order_clauses.append((f'"{col}"', asc))
+                else:
+                    # Если колонка без префикса, пытаемся определить к какой таблице она принадлежит
+                    # Сначала проверяем левую таблицу, потом правую
+                    if col in table1_col_names:
+                        order_clauses.append((f'"{table1_name}"."{col}"', asc))
+                    elif col in table2_col_names:
+                        order_clauses.append((f'"{table2_name}"."{col}"', asc))
+                    else:
+                        # Если не найдена ни в одной таблице, используем левую по умолчанию
+                        order_clauses.append((f'"{table1_name}"."{col}"', asc))
+
+        return {
+            "select": select_clause,
+            "from": from_clause,
+            "where": where_clauses,
+            "params": where_params,
+            "order": order_clauses,
+        }
+
     def execute_ddl(self, sql_query: str) -> bool:
         """
         Выполняет DDL (Data Definition Language) запрос.
@@ -603,18 +748,39 @@ class SearchMixin:
             return False
             
         try:
-            self.logger.info(f"Выполняется DDL запрос: {sql_query[:200]}...")
+            self.logger.info("Выполняется DDL запрос: %s...", sql_query[:200])
             
             with self.engine.begin() as conn:
                 conn.execute(text(sql_query))
                 
             self.logger.info("DDL запрос выполнен успешно")
             
-            # Обновляем метаданные после DDL операции
-            self._refresh_metadata()
+            # Обновляем метаданные только затронутых таблиц
+            self._refresh_after_ddl(sql_query)
             
             return True
             
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения DDL запроса: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения DDL запроса: %s", self.format_db_error(e))
             return False
+
+    def _refresh_after_ddl(self, sql_query: str):
+        """Определяет по тексту DDL затронутые таблицы и обновляет метаданные только для них."""
+        targets = ddl_target_relations(sql_query)
+        if targets is None:
+            self.logger.info("Не удалось определить объекты DDL — полное обновление метаданных")
+            self._refresh_metadata()
+            return
+
+        tables = set()
+        for kind, name in targets:
+            if kind == "table":
+                tables.add(name)
+            elif kind == "type":
+                tables |= self._tables_using_type(name)
+            else:
+                # Представления не входят в self.tables — достаточно сбросить кэш схемы
+                self.schema_cache.invalidate([name])
+
+        if tables:
+            self._refresh_metadata(tables)
@@ -72,18 +72,18 @@ class StringOperationsMixin:
                 func_sql = f"CONCAT_WS('{sep}', {col}, '{concat_str}') AS concat_ws_result"
 
             else:
-                self.logger.error(f"Неизвестная строковая функция: {func}")
+                self.logger.error("Неизвестная строковая функция: %s", func)
                 return []
 
             query = f"SELECT {col}, {func_sql} FROM \"{table_name}\" WHERE {col} IS NOT NULL LIMIT 10"
-            self.logger.info(f"Выполнение строковой функции: {func} на '{table_name}.{column_name}'")
+            self.logger.info("Выполнение строковой функции: %s на '%s.%s'", func, table_name, column_name)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка строковой функции: {self.format_db_error(e)}")
+            self.logger.error("Ошибка строковой функции: %s", self.format_db_error(e))
             return []
 
     def substring_function(self, table_name: str, column_name: str, start: int, length: int = None) -> List[Dict[str, Any]]:
@@ -100,14 +100,15 @@ class StringOperationsMixin:
             for_clause = f" FOR {length}" if length else ""
             query = f"SELECT {col}, SUBSTRING({col} FROM {start}{for_clause}) AS substring_result FROM {table}"
 
-            self.logger.info(f"Выполнение SUBSTRING для {table_name}.{column_name} (start={start}, length={length})")
+            self.logger.info("Выполнение SUBSTRING для %s.%s (start=%s, length=%s)",
+                             table_name, column_name, start, length)
             result = self.execute_query(query, fetch="dict")
 
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения SUBSTRING: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения SUBSTRING: %s", self.format_db_error(e))
             return []
 
     def trim_functions(self, table_name: str, column_name: str, trim_type: str = "BOTH", characters: str = None) -> List[Dict[str, Any]]:
@@ -130,7 +131,7 @@ class StringOperationsMixin:
         try:
             trim_type = trim_type.upper().strip()
             if trim_type not in {"BOTH", "LEADING", "TRAILING"}:
-                self.logger.warning(f"Некорректный trim_type '{trim_type}', используется BOTH по умолчанию")
+                self.logger.warning("Некорректный trim_type '%s', используется BOTH по умолчанию", trim_type)
                 trim_type = "BOTH"
 
             col = f'"{column_name}"'
@@ -141,16 +142,16 @@ class StringOperationsMixin:
             else:
                 query = f"SELECT {col}, TRIM({trim_type} FROM {col}) AS trim_result FROM {table}"
 
-            self.logger.info(f"Выполнение TRIM для {table_name}.{column_name} ({trim_type}, chars={characters})")
+            self.logger.info("Выполнение TRIM для %s.%s (%s, chars=%s)", table_name, column_name, trim_type, characters)
 
             result = self.execute_query(query, fetch='dict')
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
             msg = self.format_db_error(e)
-            self.logger.error(f"Ошибка выполнения TRIM: {msg}")
+            self.logger.error("Ошибка выполнения TRIM: %s", msg)
             return []
 
     def pad_functions(self, table_name: str, column_name: str, length: int,
@@ -175,7 +176,7 @@ class StringOperationsMixin:
         try:
             pad_type = pad_type.upper().strip()
             if pad_type not in {"LPAD", "RPAD"}:
-                self.logger.warning(f"Некорректный pad_type '{pad_type}', используется RPAD по умолчанию")
+                self.logger.warning("Некорректный pad_type '%s', используется RPAD по умолчанию", pad_type)
                 pad_type = "RPAD"
 
             # Проверяем входные значения
@@ -193,16 +194,16 @@ class StringOperationsMixin:
             query = f"SELECT {col}, {pad_type}({col}, {length}, '{pad_string}') AS pad_result FROM {table}"
 
             self.logger.info(
-                f"Выполнение {pad_type} для {table_name}.{column_name}, длина={length}, pad='{pad_string}'")
+                "Выполнение %s для %s.%s, длина=%s, pad='%s'", pad_type, table_name, column_name, length, pad_string)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
             msg = self.format_db_error(e)
-            self.logger.error(f"Ошибка выполнения {pad_type}: {msg}")
+            self.logger.error("Ошибка выполнения %s: %s", pad_type, msg)
             return []
 
     def concat_operator(self, table_name: str, columns: List[str], separator: str = ' ') -> List[Dict[str, Any]]:
@@ -224,7 +225,7 @@ class StringOperationsMixin:
         try:
             # Проверяем наличие таблицы в метаданных
             if table_name not in self.tables:
-                self.logger.error(f"Таблица '{table_name}' не найдена в метаданных")
+                self.logger.error("Таблица '%s' не найдена в метаданных", table_name)
                 return []
 
             # Проверяем колонки
@@ -237,7 +238,7 @@ class StringOperationsMixin:
                     invalid_columns.append(col)
 
             if invalid_columns:
-                self.logger.warning(f"Некорректные колонки пропущены: {invalid_columns}")
+                self.logger.warning("Некорректные колонки пропущены: %s", invalid_columns)
 
             if not valid_columns:
                 self.logger.error("Нет корректных колонок для объединения")
@@ -252,16 +253,16 @@ class StringOperationsMixin:
             query = f'SELECT {concat_expr} AS concat_result FROM "{table_name}"'
 
             self.logger.info(
-                f"Выполнение конкатенации столбцов {valid_columns} через '{separator}' в таблице '{table_name}'")
+                "Выполнение конкатенации столбцов %s через '%s' в таблице '%s'", valid_columns, separator, table_name)
 
             result = self.execute_query(query, fetch="dict")
 
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
             return result or []
 
         except Exception as e:
             msg = self.format_db_error(e)
-            self.logger.error(f"Ошибка конкатенации строк: {msg}")
+            self.logger.error("Ошибка конкатенации строк: %s", msg)
             return []
 
     def replace_function(self, table_name: str, column_name: str, old_string: str, new_string: str) -> List[Dict[str, Any]]:
@@ -291,15 +292,16 @@ class StringOperationsMixin:
             
             query = f"SELECT {col}, REPLACE({col}, '{old_escaped}', '{new_escaped}') AS replace_result FROM {table}"
 
-            self.logger.info(f"Выполнение REPLACE для {table_name}.{column_name}: '{old_string}' -> '{new_string}'")
+            self.logger.info("Выполнение REPLACE для %s.%s: '%s' -> '%s'",
+                             table_name, column_name, old_string, new_string)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения REPLACE: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения REPLACE: %s", self.format_db_error(e))
             return []
 
     def case_function(self, table_name: str, column_name: str, cases: Dict[str, str], default_value: str = None) -> List[Dict[str, Any]]:
@@ -335,15 +337,15 @@ class StringOperationsMixin:
             
             query = f"SELECT {col}, {case_expr} AS case_result FROM {table}"
 
-            self.logger.info(f"Выполнение CASE для {table_name}.{column_name}")
+            self.logger.info("Выполнение CASE для %s.%s", table_name, column_name)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения CASE: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения CASE: %s", self.format_db_error(e))
             return []
 
     def position_function(self, table_name: str, column_name: str, substring: str) -> List[Dict[str, Any]]:
@@ -371,15 +373,15 @@ class StringOperationsMixin:
             
             query = f"SELECT {col}, POSITION('{substring_escaped}' IN {col}) AS position_result FROM {table}"
 
-            self.logger.info(f"Выполнение POSITION для {table_name}.{column_name}: поиск '{substring}'")
+            self.logger.info("Выполнение POSITION для %s.%s: поиск '%s'", table_name, column_name, substring)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения POSITION: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения POSITION: %s", self.format_db_error(e))
             return []
 
     def split_function(self, table_name: str, column_name: str, delimiter: str = ' ') -> List[Dict[str, Any]]:
@@ -407,15 +409,16 @@ class StringOperationsMixin:
             
             query = f"SELECT {col}, STRING_TO_ARRAY({col}, '{delimiter_escaped}') AS split_result FROM {table}"
 
-            self.logger.info(f"Выполнение STRING_TO_ARRAY для {table_name}.{column_name}: разделитель '{delimiter}'")
+            self.logger.info("Выполнение STRING_TO_ARRAY для %s.%s: разделитель '%s'",
+                             table_name, column_name, delimiter)
 
             result = self.execute_query(query, fetch="dict")
-            self.logger.info(f"Результатов: {len(result) if result else 0}")
+            self.logger.info("Результатов: %s", len(result) if result else 0)
 
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка выполнения STRING_TO_ARRAY: {self.format_db_error(e)}")
+            self.logger.error("Ошибка выполнения STRING_TO_ARRAY: %s", self.format_db_error(e))
             return []
 
     def create_string_results_table(self, table_name: str = "string_function_results") -> bool:
@@ -435,7 +438,7 @@ class StringOperationsMixin:
         try:
             # Проверяем, существует ли таблица
             if self.record_exists_ex_table(table_name):
-                self.logger.info(f"Таблица '{table_name}' уже существует")
+                self.logger.info("Таблица '%s' уже существует", table_name)
                 return True
 
             # Создаем таблицу для результатов строковых функций
@@ -453,19 +456,19 @@ class StringOperationsMixin:
             );
             """
             
-            self.logger.info(f"Создание таблицы результатов строковых функций: {table_name}")
+            self.logger.info("Создание таблицы результатов строковых функций: %s", table_name)
             
             with self.engine.begin() as conn:
                 conn.execute(text(create_sql))
             
             # Обновляем метаданные
-            self._refresh_metadata()
+            self._refresh_metadata([table_name])
             
-            self.logger.info(f" Таблица '{table_name}' успешно создана")
+            self.logger.info(" Таблица '%s' успешно создана", table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка создания таблицы результатов: {self.format_db_error(e)}")
+            self.logger.error("Ошибка создания таблицы результатов: %s", self.format_db_error(e))
             return False
 
     def save_string_function_result(self, 
@@ -520,11 +523,12 @@ class StringOperationsMixin:
             with self.engine.begin() as conn:
                 conn.execute(text(insert_sql), params)
             
-            self.logger.info(f"Результат функции {function_name} сохранен в {results_table}")
+            self._invalidate_results([results_table], self.change_journal.INSERT)
+            self.logger.info("Результат функции %s сохранен в %s", function_name, results_table)
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка сохранения результата: {self.format_db_error(e)}")
+            self.logger.error("Ошибка сохранения результата: %s", self.format_db_error(e))
             return False
 
     def save_string_function_results_batch(self,
@@ -600,11 +604,12 @@ class StringOperationsMixin:
             with self.engine.begin() as conn:
                 conn.execute(text(insert_sql), batch_data)
             
-            self.logger.info(f"Сохранено {len(batch_data)} результатов функции {function_name} в {results_table}")
+            self._invalidate_results([results_table], self.change_journal.INSERT)
+            self.logger.info("Сохранено %s результатов функции %s в %s", len(batch_data), function_name, results_table)
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка пакетного сохранения результатов: {self.format_db_error(e)}")
+            self.logger.error("Ошибка пакетного сохранения результатов: %s", self.format_db_error(e))
             return False
 
     def get_string_function_results(self, 
@@ -631,7 +636,7 @@ class StringOperationsMixin:
         try:
             # Проверяем существование таблицы
             if not self.record_exists_ex_table(results_table):
-                self.logger.warning(f"Таблица '{results_table}' не существует")
+                self.logger.warning("Таблица '%s' не существует", results_table)
                 return []
 
             # Формируем запрос с фильтрами
@@ -662,12 +667,12 @@ class StringOperationsMixin:
             params['limit'] = limit
             
             result = self.execute_query(query, fetch="dict", params=params)
-            self.logger.info(f"Получено {len(result) if result else 0} записей из {results_table}")
+            self.logger.info("Получено %s записей из %s", len(result) if result else 0, results_table)
             
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка получения результатов: {self.format_db_error(e)}")
+            self.logger.error("Ошибка получения результатов: %s", self.format_db_error(e))
             return []
 
     def clear_string_function_results(self, 
@@ -692,7 +697,7 @@ class StringOperationsMixin:
         try:
             # Проверяем существование таблицы
             if not self.record_exists_ex_table(results_table):
-                self.logger.warning(f"Таблица '{results_table}' не существует")
+                self.logger.warning("Таблица '%s' не существует", results_table)
                 return True
 
             # Формируем запрос с фильтрами
@@ -717,11 +722,12 @@ class StringOperationsMixin:
                 result = conn.execute(text(delete_sql), params)
                 deleted_count = result.rowcount
             
-            self.logger.info(f"Удалено {deleted_count} записей из {results_table}")
+            self._invalidate_results([results_table], self.change_journal.DELETE)
+            self.logger.info("Удалено %s записей из %s", deleted_count, results_table)
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка очистки результатов: {self.format_db_error(e)}")
+            self.logger.error("Ошибка очистки результатов: %s", self.format_db_error(e))
             return False
 
     def update_string_values_in_table(self, 
@@ -750,21 +756,22 @@ class StringOperationsMixin:
             update_sql = self._build_update_sql(table_name, column_name, function_name, **params)
             
             if not update_sql:
-                self.logger.error(f"Не удалось сформировать SQL для функции {function_name}")
+                self.logger.error("Не удалось сформировать SQL для функции %s", function_name)
                 return False
             
-            self.logger.info(f"Обновление значений в {table_name}.{column_name} функцией {function_name}")
-            self.logger.debug(f"SQL: {update_sql}")
+            self.logger.info("Обновление значений в %s.%s функцией %s", table_name, column_name, function_name)
+            self.logger.debug("SQL: %s", update_sql)
             
             with self.engine.begin() as conn:
                 result = conn.execute(text(update_sql))
                 updated_count = result.rowcount
             
-            self.logger.info(f" Обновлено {updated_count} записей в {table_name}.{column_name}")
+            self._invalidate_results([table_name], self.change_journal.UPDATE)
+            self.logger.info(" Обновлено %s записей в %s.%s", updated_count, table_name, column_name)
             return True
 
         except Exception as e:
-            self.logger.error(f"Ошибка обновления значений: {self.format_db_error(e)}")
+            self.logger.error("Ошибка обновления значений: %s", self.format_db_error(e))
             return False
 
     def _build_update_sql(self, table_name: str, column_name: str, function_name: str, **params) -> str:
@@ -821,7 +828,7 @@ class StringOperationsMixin:
             concat_escaped = concat_string.replace("'", "''")
             function_expr = f"CONCAT({col}, '{concat_escaped}')"
         else:
-            self.logger.error(f"Неподдерживаемая функция: {func}")
+            self.logger.error("Неподдерживаемая функция: %s", func)
             return ""
         
         # Формируем полный UPDATE запрос
@@ -893,7 +900,7 @@ class StringOperationsMixin:
                 concat_escaped = concat_string.replace("'", "''")
                 function_expr = f"CONCAT({col}, '{concat_escaped}')"
             else:
-                self.logger.error(f"Неподдерживаемая функция: {func}")
+                self.logger.error("Неподдерживаемая функция: %s", func)
                 return []
             
             # Формируем запрос для предварительного просмотра
@@ -906,11 +913,11 @@ class StringOperationsMixin:
             LIMIT {limit}
             """
             
-            self.logger.info(f"Предварительный просмотр {func} для {table_name}.{column_name}")
+            self.logger.info("Предварительный просмотр %s для %s.%s", func, table_name, column_name)
             
             result = self.execute_query(preview_sql, fetch="dict")
             return result or []
 
         except Exception as e:
-            self.logger.error(f"Ошибка предварительного просмотра: {self.format_db_error(e)}")
+            self.logger.error("Ошибка предварительного просмотра: %s", self.format_db_error(e))
             return []
@@ -3,8 +3,9 @@
 """
 
 import logging
+import time
 from sqlalchemy import inspect, text
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional
 
 
 class TableOperationsMixin:
@@ -15,34 +16,47 @@ class TableOperationsMixin:
         # Инициализируем логгер для этого миксина
         self.logger = logging.getLogger("DB")
     
-    def add_column(self, table_name: str, column_name: str, column_type, **kwargs) -> bool:
+    def add_column(self, table_name: str, column_name: str, column_type, online: bool = False,
+                   batch_size: int = 10_000, throttle: float = 0.0,
+                   progress_callback: Optional[Callable[[int, int], Optional[bool]]] = None,
+                   lock_timeout_ms: int = 5000, **kwargs) -> bool:
         """Добавляет новый столбец и поэтапно применяет ограничения, чтобы это работало для таблиц с данными.
 
         Этапы:
           1) Добавляем столбец без жёстких ограничений (всегда NULL, с DEFAULT если задан)
           2) Проставляем DEFAULT существующим строкам (UPDATE ... WHERE col IS NULL)
           3) По очереди добавляем CHECK/NOT NULL/UNIQUE/PRIMARY KEY/FOREIGN KEY
-          
+
+        В онлайн-режиме (online=True) всё выполняется короткими транзакциями без
+        долгих блокировок таблицы — см. _add_column_online. Режим не атомарен:
+        при ошибке на позднем этапе столбец остаётся добавленным.
+
         Args:
             table_name: Имя таблицы
             column_name: Имя нового столбца
             column_type: Тип столбца (SQLAlchemy type или строка для пользовательского типа)
+            online: Онлайн-режим для больших таблиц
+            batch_size: Число строк в одном пакете заполнения (онлайн-режим)
+            throttle: Пауза между пакетами, секунды (онлайн-режим)
+            progress_callback: progress_callback(обработано, всего) после каждого пакета;
+                вернул False — заполнение прерывается (онлайн-режим)
+            lock_timeout_ms: lock_timeout для каждого ALTER TABLE (онлайн-режим)
         """
         if not self.is_connected():
             return False
 
         try:
-            self.logger.info(f"🧩 ALTER TABLE '{table_name}': добавление колонки '{column_name}'")
+            self.logger.info("🧩 ALTER TABLE '%s': добавление колонки '%s'", table_name, column_name)
 
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f" Таблица '{table_name}' не существует в БД")
+                self.logger.error(" Таблица '%s' не существует в БД", table_name)
                 return False
 
             # Если column_type - это строка, значит это пользовательский тип из БД
             if isinstance(column_type, str):
                 type_str = column_type
                 is_integer_type = False
-                self.logger.info(f"Используется пользовательский тип: {type_str}")
+                self.logger.info("Используется пользовательский тип: %s", type_str)
             else:
                 type_str = column_type.compile(dialect=self.engine.dialect)
                 # Определим, является ли тип целочисленным, чтобы уметь авто-заполнять PK
@@ -54,6 +68,10 @@ class TableOperationsMixin:
             
             default_val = kwargs.get("default")
 
+            if online:
+                return self._add_column_online(table_name, column_name, type_str, default_val, kwargs,
+                                               batch_size, throttle, progress_callback, lock_timeout_ms)
+
             # 1) Добавляем столбец максимально мягко: допускаем NULL
             default_sql = (
                 f" DEFAULT '{default_val}'" if isinstance(default_val, str) else f" DEFAULT {default_val}"
@@ -153,7 +171,8 @@ class TableOperationsMixin:
                             )
                             conn.execute(setval_sql, {"t": table_name, "c": column_name, "m": max_val})
                         except Exception as e:
-                            self.logger.warning(f"⚠ Не удалось включить IDENTITY для {table_name}.{column_name}: {self.format_db_error(e)}")
+                            self.logger.warning("⚠ Не удалось включить IDENTITY для %s.%s: %s",
+                                                table_name, column_name, self.format_db_error(e))
 
                 # 7) FOREIGN KEY
                 if "foreign_key" in kwargs and kwargs["foreign_key"]:
@@ -172,16 +191,245 @@ class TableOperationsMixin:
                         conn.execute(text(val_sql))
                     except Exception as e:
                         # Если валидация не прошла, оставляем NOT VALID и сообщаем пользователю, что нужно заполнить данные
-                        self.logger.warning(f"️ Валидация FK не прошла, ограничение оставлено NOT VALID: {self.format_db_error(e)}")
+                        self.logger.warning("️ Валидация FK не прошла, ограничение оставлено NOT VALID: %s",
+                                            self.format_db_error(e))
+
+            self._refresh_metadata([table_name])
+            self.logger.info(" Колонка '%s' успешно добавлена в '%s'", column_name, table_name)
+            return True
+
+        except Exception as e:
+            self.logger.error(" Ошибка добавления колонки '%s': %s", column_name, self.format_db_error(e))
+            return False
+
+    def _add_column_online(self, table_name: str, column_name: str, type_str: str, default_val: Any,
+                           constraints: Dict[str, Any], batch_size: int, throttle: float,
+                           progress_callback: Optional[Callable[[int, int], Optional[bool]]],
+                           lock_timeout_ms: int) -> bool:
+        """Онлайн-вариант add_column: вместо одной долгой транзакции — короткие шаги.
+
+        Этапы:
+          1) ADD COLUMN под lock_timeout. На PostgreSQL 11+ DEFAULT-константа не переписывает
+             таблицу; на старых серверах DEFAULT ставится только для новых строк
+          2) Старые серверы: пакетное заполнение существующих строк (_backfill_column)
+          3) CHECK и NOT NULL — CHECK ... NOT VALID + VALIDATE CONSTRAINT (запись не блокируется);
+             на PostgreSQL 12+ SET NOT NULL опирается на проверенный CHECK без повторного сканирования
+          4) UNIQUE — CREATE UNIQUE INDEX CONCURRENTLY + ADD CONSTRAINT ... USING INDEX
+          5) FOREIGN KEY — NOT VALID + VALIDATE CONSTRAINT отдельными транзакциями
+
+        PRIMARY KEY в этом режиме не поддерживается: автозаполнение ключа переписывает всю таблицу.
+        """
+        if constraints.get("primary_key"):
+            self.logger.error(" PRIMARY KEY в онлайн-режиме не поддерживается — используйте обычный режим")
+            return False
+        if batch_size <= 0:
+            self.logger.error(" Размер пакета должен быть положительным: %s", batch_size)
+            return False
+
+        stage = "ADD COLUMN"
+        try:
+            add_sql = f'ALTER TABLE "{table_name}" ADD COLUMN "{column_name}" {type_str}'
+            default_sql = (
+                f"'{default_val}'" if isinstance(default_val, str) else f"{default_val}"
+            ) if default_val is not None else None
+            fast_default = (self.engine.dialect.server_version_info or (0,)) >= (11,)
+
+            # 1) Столбец
+            if default_sql is None:
+                self._execute_online_ddl([f"{add_sql};"], lock_timeout_ms)
+            elif fast_default:
+                self._execute_online_ddl([f"{add_sql} DEFAULT {default_sql};"], lock_timeout_ms)
+            else:
+                self._execute_online_ddl([
+                    f"{add_sql};",
+                    f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" SET DEFAULT {default_sql};',
+                ], lock_timeout_ms)
+
+                # 2) Заполнение существующих строк
+                stage = "заполнение"
+                updated = self._backfill_column(table_name, column_name, default_val,
+                                                batch_size, throttle, progress_callback, lock_timeout_ms)
+                if updated is None:
+                    self._refresh_metadata([table_name])
+                    return False
 
-            self._refresh_metadata()
-            self.logger.info(f" Колонка '{column_name}' успешно добавлена в '{table_name}'")
+            # 3) CHECK
+            if constraints.get("check"):
+                stage = "CHECK"
+                self._add_constraint_online(table_name, f"ck_{table_name}_{column_name}",
+                                            f'CHECK ({constraints["check"]})', lock_timeout_ms)
+
+            # 3.1) NOT NULL
+            if constraints.get("nullable") is False:
+                stage = "NOT NULL"
+                nn_name = f"nn_{table_name}_{column_name}"
+                self._add_constraint_online(table_name, nn_name, f'CHECK ("{column_name}" IS NOT NULL)',
+                                            lock_timeout_ms)
+                self._execute_online_ddl([
+                    f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" SET NOT NULL;',
+                    f'ALTER TABLE "{table_name}" DROP CONSTRAINT "{nn_name}";',
+                ], lock_timeout_ms)
+
+            # 4) UNIQUE
+            if constraints.get("unique"):
+                stage = "UNIQUE"
+                with self._connection() as conn:
+                    dups = conn.execute(text(
+                        f'SELECT 1 FROM "{table_name}" WHERE "{column_name}" IS NOT NULL '
+                        f'GROUP BY "{column_name}" HAVING COUNT(*)>1 LIMIT 1'
+                    )).first()
+                if dups:
+                    self.logger.error(" Невозможно создать UNIQUE — найдены дубликаты (столбец '%s' уже добавлен)",
+                                      column_name)
+                    self._refresh_metadata([table_name])
+                    return False
+                uq_name = f"uq_{table_name}_{column_name}"
+                self._create_unique_index_concurrently(table_name, column_name, uq_name)
+                try:
+                    self._execute_online_ddl([
+                        f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{uq_name}" UNIQUE USING INDEX "{uq_name}";'
+                    ], lock_timeout_ms)
+                except Exception:
+                    # Иначе повторная попытка упадёт на уже существующем индексе
+                    self._drop_index_concurrently(uq_name)
+                    raise
+
+            # 5) FOREIGN KEY
+            if constraints.get("foreign_key"):
+                stage = "FOREIGN KEY"
+                ref_table, ref_column = constraints["foreign_key"].split(".", 1)
+                fk_name = f"fk_{table_name}_{column_name}_{ref_table}_{ref_column}"
+                self._execute_online_ddl([
+                    f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{fk_name}" '
+                    f'FOREIGN KEY ("{column_name}") REFERENCES "{ref_table}"("{ref_column}") NOT VALID;'
+                ], lock_timeout_ms)
+                try:
+                    self._execute_online_ddl([f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{fk_name}";'],
+                                             lock_timeout_ms)
+                except Exception as e:
+                    self.logger.warning("️ Валидация FK не прошла, ограничение оставлено NOT VALID: %s",
+                                        self.format_db_error(e))
+
+            self._refresh_metadata([table_name])
+            self.logger.info(" Колонка '%s' добавлена в '%s' (онлайн-режим)", column_name, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка добавления колонки '{column_name}': {self.format_db_error(e)}")
+            self.logger.error(" Онлайн-добавление '%s.%s' остановлено на этапе '%s': %s",
+                              table_name, column_name, stage, self.format_db_error(e))
+            if stage != "ADD COLUMN":
+                self._refresh_metadata([table_name])
             return False
 
+    def _execute_online_ddl(self, statements: List[str], lock_timeout_ms: int):
+        """Выполняет DDL одной короткой транзакцией с lock_timeout.
+
+        ALTER TABLE, ждущий блокировку за долгим запросом, сам блокирует все следующие
+        запросы к таблице — lock_timeout обрывает такое ожидание ошибкой.
+        """
+        with self.engine.begin() as conn:
+            conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+            for sql in statements:
+                self.logger.debug(sql)
+                conn.execute(text(sql))
+
+    def _add_constraint_online(self, table_name: str, constraint_name: str, definition: str,
+                               lock_timeout_ms: int):
+        """ADD CONSTRAINT ... NOT VALID, затем VALIDATE CONSTRAINT; непрошедшее проверку ограничение удаляется."""
+        self._execute_online_ddl([
+            f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{constraint_name}" {definition} NOT VALID;'
+        ], lock_timeout_ms)
+        try:
+            self._execute_online_ddl([f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{constraint_name}";'],
+                                     lock_timeout_ms)
+        except Exception:
+            self._execute_online_ddl([
+                f'ALTER TABLE "{table_name}" DROP CONSTRAINT IF EXISTS "{constraint_name}";'
+            ], lock_timeout_ms)
+            raise
+
+    def _create_unique_index_concurrently(self, table_name: str, column_name: str, index_name: str):
+        """CREATE UNIQUE INDEX CONCURRENTLY (вне транзакции); при ошибке удаляет невалидный индекс."""
+        sql = f'CREATE UNIQUE INDEX CONCURRENTLY "{index_name}" ON "{table_name}" ("{column_name}");'
+        self.logger.debug(sql)
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            try:
+                conn.execute(text(sql))
+            except Exception:
+                # Прерванная сборка оставляет индекс в состоянии INVALID
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}";'))
+                raise
+
+    def _drop_index_concurrently(self, index_name: str):
+        """DROP INDEX CONCURRENTLY IF EXISTS (вне транзакции)."""
+        with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}";'))
+
+    def _backfill_column(self, table_name: str, column_name: str, value: Any, batch_size: int,
+                         throttle: float = 0.0,
+                         progress_callback: Optional[Callable[[int, int], Optional[bool]]] = None,
+                         lock_timeout_ms: int = 5000) -> Optional[int]:
+        """Заполняет NULL-значения столбца пакетами по диапазонам первичного ключа.
+
+        Каждый пакет — отдельная транзакция по диапазону (last, upper] ключа: блокируются
+        только строки пакета, а autovacuum и репликация успевают за обновлениями.
+        Как и DDL, пакет не ждёт чужие блокировки дольше lock_timeout_ms.
+
+        Returns:
+            Число обновлённых строк или None, если progress_callback прервал заполнение
+        """
+        pk_columns = inspect(self.engine).get_pk_constraint(table_name).get("constrained_columns") or []
+        if len(pk_columns) != 1:
+            raise ValueError(f"Пакетное заполнение требует первичного ключа из одного столбца: {pk_columns}")
+        pk = pk_columns[0]
+
+        with self._connection() as conn:
+            # Оценка по статистике: COUNT(*) на большой таблице сам по себе долгий
+            total = conn.execute(text(
+                "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"
+            ), {"t": f'"{table_name}"'}).scalar() or 0
+
+        self.logger.info("Пакетное заполнение '%s.%s': ~%s строк, пакет %s", table_name, column_name, total, batch_size)
+        started = time.perf_counter()
+        done = updated = batches = 0
+        last = None
+        while True:
+            if last is None:
+                after_last, key = "TRUE", {}
+            else:
+                after_last, key = f'"{pk}" > :last', {"last": last}
+            bounds_sql = text(
+                f'SELECT COUNT(*), MAX("{pk}") FROM (SELECT "{pk}" FROM "{table_name}" '
+                f'WHERE {after_last} ORDER BY "{pk}" LIMIT :n) batch'
+            )
+            update_sql = text(
+                f'UPDATE "{table_name}" SET "{column_name}" = :value '
+                f'WHERE {after_last} AND "{pk}" <= :upper AND "{column_name}" IS NULL'
+            )
+            with self.engine.begin() as conn:
+                conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+                count, upper = conn.execute(bounds_sql, {**key, "n": batch_size}).one()
+                if not count:
+                    break
+                updated += conn.execute(update_sql, {**key, "upper": upper, "value": value}).rowcount
+            done += count
+            batches += 1
+            last = upper
+            self.logger.debug("Пакет %s: ключ до %s, обработано %s строк", batches, upper, done)
+
+            if progress_callback is not None and progress_callback(done, max(total, done)) is False:
+                self.logger.warning("️ Заполнение '%s.%s' прервано: обработано %s строк, последний ключ %s",
+                                    table_name, column_name, done, last)
+                return None
+            if count < batch_size:
+                break
+            if throttle > 0:
+                time.sleep(throttle)
+
+        self.logger.info("Заполнено %s строк '%s.%s' за %s пакетов (%.1f с)",
+                         updated, table_name, column_name, batches, time.perf_counter() - started)
+        return updated
+
     def drop_column_safe(self, table_name: str, column_name: str, force: bool = False) -> bool:
         """
         Безопасное удаление столбца с проверкой зависимостей.
@@ -194,14 +442,14 @@ class TableOperationsMixin:
         try:
             # --- Проверка существования таблицы ---
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f" Таблица '{table_name}' не существует в БД.")
+                self.logger.error(" Таблица '%s' не существует в БД.", table_name)
                 return False
 
             # --- Проверка существования колонки ---
             columns = self.get_column_names(table_name)
             actual_col = next((c for c in columns if c.lower() == column_name.lower()), None)
             if not actual_col:
-                self.logger.error(f" Столбец '{column_name}' не найден в таблице '{table_name}'.")
+                self.logger.error(" Столбец '%s' не найден в таблице '%s'.", column_name, table_name)
                 return False
 
             # --- Проверка зависимостей ---
@@ -209,29 +457,30 @@ class TableOperationsMixin:
             if not force:
                 if dependencies.get("foreign_keys"):
                     self.logger.error(
-                        f"️ Столбец '{actual_col}' участвует во внешних ключах: {dependencies['foreign_keys']}")
+                        "️ Столбец '%s' участвует во внешних ключах: %s", actual_col, dependencies['foreign_keys'])
                     return False
                 if dependencies.get("constraints"):
                     self.logger.warning(
-                        f"️ Столбец '{actual_col}' используется в ограничениях: {dependencies['constraints']}")
+                        "️ Столбец '%s' используется в ограничениях: %s", actual_col, dependencies['constraints'])
                 if dependencies.get("indexes"):
-                    self.logger.warning(f"️ Столбец '{actual_col}' используется в индексах: {dependencies['indexes']}")
+                    self.logger.warning("️ Столбец '%s' используется в индексах: %s",
+                                        actual_col, dependencies['indexes'])
 
             # --- Удаление ---
             sql = f'ALTER TABLE "{table_name}" DROP COLUMN "{actual_col}"{" CASCADE" if force else ""};'
-            self.logger.info(f" ALTER TABLE: удаление столбца '{actual_col}' из '{table_name}' (force={force})")
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.info(" ALTER TABLE: удаление столбца '%s' из '%s' (force=%s)", actual_col, table_name, force)
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" Столбец '{actual_col}' успешно удалён из таблицы '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Столбец '%s' успешно удалён из таблицы '%s'.", actual_col, table_name)
             return True
 
         except Exception as e:
             self.logger.error(
-                f" Ошибка при удалении столбца '{column_name}' из '{table_name}': {self.format_db_error(e)}")
+                " Ошибка при удалении столбца '%s' из '%s': %s", column_name, table_name, self.format_db_error(e))
             return False
 
     def get_column_dependencies(self, table_name: str, column_name: str) -> Dict[str, List[str]]:
@@ -248,35 +497,34 @@ class TableOperationsMixin:
             return deps
 
         try:
-            insp = inspect(self.engine)
-
             # --- Внешние ключи ---
-            for fk in insp.get_foreign_keys(table_name):
+            for fk in self.schema_cache.get_foreign_keys(table_name):
                 if column_name in fk.get("constrained_columns", []):
                     ref_cols = ", ".join(fk.get("referred_columns", []))
                     deps["foreign_keys"].append(f"{fk['referred_table']}({ref_cols})")
 
             # --- CHECK-ограничения ---
-            for chk in insp.get_check_constraints(table_name):
+            for chk in self.schema_cache.get_check_constraints(table_name):
                 sqltext = str(chk.get("sqltext", "")).lower()
                 if column_name.lower() in sqltext:
                     deps["constraints"].append(chk.get("name", "(без имени)"))
 
             # --- Индексы ---
-            for idx in insp.get_indexes(table_name):
+            for idx in self.schema_cache.get_indexes(table_name):
                 if column_name in idx.get("column_names", []):
                     deps["indexes"].append(idx.get("name", "(без имени)"))
 
             total = sum(len(v) for v in deps.values())
             self.logger.info(
-                f"🔎 Зависимости столбца '{column_name}' в '{table_name}': {total} найдено "
-                f"(FK={len(deps['foreign_keys'])}, CHECK={len(deps['constraints'])}, IDX={len(deps['indexes'])})"
+                "🔎 Зависимости столбца '%s' в '%s': %s найдено (FK=%s, CHECK=%s, IDX=%s)",
+                column_name, table_name, total, len(deps['foreign_keys']), len(deps['constraints']), len(deps['indexes'])
             )
 
             return deps
 
         except Exception as e:
-            self.logger.error(f" Ошибка анализа зависимостей '{table_name}.{column_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка анализа зависимостей '%s.%s': %s",
+                              table_name, column_name, self.format_db_error(e))
             return deps
 
     def rename_table(self, old_table_name: str, new_table_name: str) -> bool:
@@ -288,27 +536,27 @@ class TableOperationsMixin:
         try:
             # --- Проверки существования ---
             if not self.record_exists_ex_table(old_table_name):
-                self.logger.error(f" Таблица '{old_table_name}' не существует.")
+                self.logger.error(" Таблица '%s' не существует.", old_table_name)
                 return False
             if self.record_exists_ex_table(new_table_name):
-                self.logger.error(f" Таблица '{new_table_name}' уже существует.")
+                self.logger.error(" Таблица '%s' уже существует.", new_table_name)
                 return False
 
             # --- Выполнение ---
             sql = f'ALTER TABLE "{old_table_name}" RENAME TO "{new_table_name}";'
-            self.logger.info(f"Переименование таблицы: '{old_table_name}' → '{new_table_name}'")
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.info("Переименование таблицы: '%s' → '%s'", old_table_name, new_table_name)
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
             # --- Обновление метаданных ---
-            self._refresh_metadata()
-            self.logger.info(f" Таблица успешно переименована: '{old_table_name}' → '{new_table_name}'")
+            self._refresh_metadata([old_table_name, new_table_name])
+            self.logger.info(" Таблица успешно переименована: '%s' → '%s'", old_table_name, new_table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка переименования таблицы '{old_table_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка переименования таблицы '%s': %s", old_table_name, self.format_db_error(e))
             return False
 
     def rename_column(self, table_name: str, old_column_name: str, new_column_name: str) -> bool:
@@ -320,7 +568,7 @@ class TableOperationsMixin:
         try:
             # --- Проверки существования таблицы ---
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f" Таблица '{table_name}' не существует.")
+                self.logger.error(" Таблица '%s' не существует.", table_name)
                 return False
 
             columns = self.get_column_names(table_name)
@@ -328,10 +576,10 @@ class TableOperationsMixin:
             actual_new = next((c for c in columns if c.lower() == new_column_name.lower()), None)
 
             if not actual_old:
-                self.logger.error(f" Столбец '{old_column_name}' не найден в таблице '{table_name}'.")
+                self.logger.error(" Столбец '%s' не найден в таблице '%s'.", old_column_name, table_name)
                 return False
             if actual_new:
-                self.logger.error(f"️ Столбец '{new_column_name}' уже существует в '{table_name}'.")
+                self.logger.error("️ Столбец '%s' уже существует в '%s'.", new_column_name, table_name)
                 return False
 
             # --- Проверка зависимостей (предупреждения, но не блокировка) ---
@@ -339,25 +587,27 @@ class TableOperationsMixin:
             total_deps = sum(len(v) for v in deps.values())
             if total_deps > 0:
                 self.logger.warning(
-                    f"️ Переименование '{actual_old}' затронет {total_deps} зависимостей "
-                    f"(FK={len(deps['foreign_keys'])}, CHECK={len(deps['constraints'])}, IDX={len(deps['indexes'])})"
+                    "️ Переименование '%s' затронет %s зависимостей (FK=%s, CHECK=%s, IDX=%s)",
+                    actual_old, total_deps, len(deps['foreign_keys']), len(deps['constraints']), len(deps['indexes'])
                 )
 
             # --- Выполнение SQL ---
             sql = f'ALTER TABLE "{table_name}" RENAME COLUMN "{actual_old}" TO "{new_column_name}";'
-            self.logger.info(f" Переименование столбца: '{table_name}.{actual_old}' → '{new_column_name}'")
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.info(" Переименование столбца: '%s.%s' → '%s'", table_name, actual_old, new_column_name)
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
             # --- Обновляем метаданные ---
-            self._refresh_metadata()
-            self.logger.info(f" Столбец '{actual_old}' успешно переименован в '{new_column_name}' в '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Столбец '%s' успешно переименован в '%s' в '%s'.",
+                             actual_old, new_column_name, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f" Ошибка переименования '{table_name}.{old_column_name}': {self.format_db_error(e)}")
+            self.logger.error(" Ошибка переименования '%s.%s': %s",
+                              table_name, old_column_name, self.format_db_error(e))
             return False
 
     def alter_column_type(self, table_name: str, column_name: str, new_type: str, using_expr: str = None):
@@ -374,15 +624,14 @@ class TableOperationsMixin:
             if not new_type:
                 return "Не указан новый тип столбца"
 
-            insp = inspect(self.engine)
-            if table_name not in insp.get_table_names():
-                self.logger.error(f" Таблица '{table_name}' не найдена.")
+            if not self.schema_cache.has_table(table_name):
+                self.logger.error(" Таблица '%s' не найдена.", table_name)
                 return f"Таблица '{table_name}' не найдена."
 
             # Проверяем наличие колонки
-            columns = [c['name'] for c in insp.get_columns(table_name)]
+            columns = self.schema_cache.get_column_names(table_name)
             if column_name not in columns:
-                self.logger.error(f" Колонка '{column_name}' не найдена в '{table_name}'.")
+                self.logger.error(" Колонка '%s' не найдена в '%s'.", column_name, table_name)
                 return f"Колонка '{column_name}' не найдена в '{table_name}'."
 
             with self.engine.begin() as conn:
@@ -447,7 +696,7 @@ class TableOperationsMixin:
                     
                     # Создаём ENUM-тип
                     create_enum_sql = f"CREATE TYPE {enum_name} AS ENUM ({', '.join(enum_values)});"
-                    self.logger.info(f" Создание ENUM-типа: {enum_name}")
+                    self.logger.info(" Создание ENUM-типа: %s", enum_name)
                     conn.execute(text(create_enum_sql))
                     
                     # Простое USING выражение - всегда через text
@@ -479,18 +728,18 @@ class TableOperationsMixin:
                 # =====================================================
                 # 🚀 Выполнение изменения
                 # =====================================================
-                self.logger.info(f"Изменение типа: '{table_name}.{column_name}' → '{new_type}'")
-                self.logger.debug(f"SQL: {alter_sql}")
+                self.logger.info("Изменение типа: '%s.%s' → '%s'", table_name, column_name, new_type)
+                self.logger.debug("SQL: %s", alter_sql)
                 conn.execute(text(alter_sql))
 
             # Обновляем метаданные
-            self._refresh_metadata()
-            self.logger.info(f" Тип столбца '{column_name}' успешно изменён на '{new_type}' в '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Тип столбца '%s' успешно изменён на '%s' в '%s'.", column_name, new_type, table_name)
             return True
 
         except Exception as e:
             error_msg = f"Ошибка изменения типа столбца '{table_name}.{column_name}': {self.format_db_error(e)}"
-            self.logger.error(f" {error_msg}")
+            self.logger.error(" %s", error_msg)
             return error_msg
 
     def set_column_nullable(self, table_name: str, column_name: str, nullable: bool) -> bool:
@@ -501,40 +750,41 @@ class TableOperationsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f" Таблица '{table_name}' не существует.")
+                self.logger.error(" Таблица '%s' не существует.", table_name)
                 return False
 
             columns = self.get_column_names(table_name)
             if column_name not in columns:
-                self.logger.error(f" Столбец '{column_name}' не найден в '{table_name}'.")
+                self.logger.error(" Столбец '%s' не найден в '%s'.", column_name, table_name)
                 return False
 
             # Проверяем, есть ли NULL значения, если пытаемся сделать NOT NULL
             if not nullable:
-                with self.engine.connect() as conn:
+                with self._connection() as conn:
                     null_count = conn.execute(text(
                         f'SELECT COUNT(*) FROM "{table_name}" WHERE "{column_name}" IS NULL'
                     )).scalar() or 0
                     
                     if null_count > 0:
-                        self.logger.error(f"  Невозможно установить NOT NULL: найдено {null_count} NULL значений.")
+                        self.logger.error("  Невозможно установить NOT NULL: найдено %s NULL значений.", null_count)
                         return False
 
             # Выполняем изменение
             action = "DROP NOT NULL" if nullable else "SET NOT NULL"
             sql = f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" {action};'
-            self.logger.info(f"{action} для столбца '{table_name}.{column_name}'")
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.info("%s для столбца '%s.%s'", action, table_name, column_name)
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" Столбец '{column_name}' успешно изменён в '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" Столбец '%s' успешно изменён в '%s'.", column_name, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f"  Ошибка изменения NULL для '{table_name}.{column_name}': {self.format_db_error(e)}")
+            self.logger.error("  Ошибка изменения NULL для '%s.%s': %s",
+                              table_name, column_name, self.format_db_error(e))
             return False
 
     def set_column_default(self, table_name: str, column_name: str, default_value: Any) -> bool:
@@ -545,12 +795,12 @@ class TableOperationsMixin:
 
         try:
             if not self.record_exists_ex_table(table_name):
-                self.logger.error(f"  Таблица '{table_name}' не существует.")
+                self.logger.error("  Таблица '%s' не существует.", table_name)
                 return False
 
             columns = self.get_column_names(table_name)
             if column_name not in columns:
-                self.logger.error(f"  Столбец '{column_name}' не найден в '{table_name}'.")
+                self.logger.error("  Столбец '%s' не найден в '%s'.", column_name, table_name)
                 return False
 
             # Формируем SQL для установки DEFAULT
@@ -563,17 +813,18 @@ class TableOperationsMixin:
                     default_str = str(default_value)
                 sql = f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" SET DEFAULT {default_str};'
 
-            self.logger.info(f"Установка DEFAULT для столбца '{table_name}.{column_name}'")
-            self.logger.debug(f"SQL → {sql}")
+            self.logger.info("Установка DEFAULT для столбца '%s.%s'", table_name, column_name)
+            self.logger.debug("SQL → %s", sql)
 
             with self.engine.begin() as conn:
                 conn.execute(text(sql))
 
-            self._refresh_metadata()
-            self.logger.info(f" DEFAULT для столбца '{column_name}' успешно установлен в '{table_name}'.")
+            self._refresh_metadata([table_name])
+            self.logger.info(" DEFAULT для столбца '%s' успешно установлен в '%s'.", column_name, table_name)
             return True
 
         except Exception as e:
-            self.logger.error(f"  Ошибка установки DEFAULT для '{table_name}.{column_name}': {self.format_db_error(e)}")
+            self.logger.error("  Ошибка установки DEFAULT для '%s.%s': %s",
+                              table_name, column_name, self.format_db_error(e))
             return False
 
@@ -0,0 +1,132 @@
+"""
+Разбор планов EXPLAIN (FORMAT JSON): метрики узлов и предупреждения
+"""
+
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+# Seq Scan по таблице с таким числом строк (по pg_class.reltuples) считается подозрительным
+LARGE_TABLE_ROWS = 10000
+# Во сколько раз фактическое число строк должно отличаться от оценки, чтобы считать её ошибочной
+MISESTIMATE_FACTOR = 10
+# Расхождения на малых количествах строк не влияют на выбор плана
+MISESTIMATE_MIN_ROWS = 100
+
+
+def iter_plan_nodes(plan: Dict[str, Any], depth: int = 0) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Обходит узлы плана в глубину: (глубина, узел)."""
+    yield depth, plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child, depth + 1)
+
+
+def plan_relations(plan: Dict[str, Any]) -> Set[str]:
+    """Таблицы, которые читает план."""
+    return {node["Relation Name"] for _, node in iter_plan_nodes(plan) if "Relation Name" in node}
+
+
+def _node_label(node: Dict[str, Any]) -> str:
+    label = node["Node Type"]
+    if node.get("Parallel Aware"):
+        label = f"Parallel {label}"
+    if node.get("Join Type") and "Join" in label:
+        label = f"{node['Join Type']} {label}"
+    if node.get("Strategy") and node["Node Type"] == "Aggregate":
+        label = f"{label} ({node['Strategy']})"
+    return label
+
+
+def _node_target(node: Dict[str, Any]) -> str:
+    target = node.get("Relation Name") or node.get("CTE Name") or node.get("Function Name") or ""
+    alias = node.get("Alias")
+    if target and alias and alias != target:
+        target = f"{target} {alias}"
+    if node.get("Index Name"):
+        target = f"{target} ({node['Index Name']})" if target else node["Index Name"]
+    return target
+
+
+def _analyze_node(node: Dict[str, Any], relation_rows: Dict[str, float]) -> Dict[str, Any]:
+    loops = node.get("Actual Loops")
+    actual_rows = node.get("Actual Rows")
+    total_time = node.get("Actual Total Time")
+    if total_time is not None and loops:
+        # Время и строки в EXPLAIN ANALYZE — средние на один цикл
+        total_time *= loops
+
+    children = [_analyze_node(child, relation_rows) for child in node.get("Plans", [])]
+    self_time = None
+    if total_time is not None:
+        child_time = sum(child["total_time"] or 0 for child in children
+                         if child["parent_relationship"] != "InitPlan")
+        self_time = max(0.0, total_time - child_time)
+
+    warnings = []
+    relation = node.get("Relation Name")
+    if node["Node Type"] == "Seq Scan" and relation:
+        table_rows = relation_rows.get(relation, 0)
+        if table_rows >= LARGE_TABLE_ROWS:
+            message = f"Seq Scan по большой таблице {relation} (~{int(table_rows)} строк)"
+            removed = node.get("Rows Removed by Filter")
+            if removed and actual_rows is not None and removed > actual_rows * MISESTIMATE_FACTOR:
+                message += f": отброшено фильтром {removed}, возможно, нужен индекс по условию"
+            warnings.append(message)
+
+    plan_rows = node.get("Plan Rows")
+    if actual_rows is not None and plan_rows is not None and loops:
+        high, low = max(actual_rows, plan_rows), max(min(actual_rows, plan_rows), 1)
+        if high >= MISESTIMATE_MIN_ROWS and high / low >= MISESTIMATE_FACTOR:
+            direction = "занижена" if actual_rows > plan_rows else "завышена"
+            warnings.append(
+                f"Оценка строк {direction} в {high / low:.0f} раз "
+                f"(план {plan_rows}, факт {actual_rows}) — проверьте статистику (ANALYZE)"
+            )
+
+    return {
+        "node_type": node["Node Type"],
+        "label": _node_label(node),
+        "target": _node_target(node),
+        "parent_relationship": node.get("Parent Relationship"),
+        "condition": node.get("Index Cond") or node.get("Hash Cond") or node.get("Merge Cond")
+                     or node.get("Filter") or node.get("Join Filter"),
+        "plan_rows": plan_rows,
+        "actual_rows": actual_rows,
+        "loops": loops,
+        "total_cost": node.get("Total Cost"),
+        "total_time": total_time,
+        "self_time": self_time,
+        "shared_hit": node.get("Shared Hit Blocks"),
+        "shared_read": node.get("Shared Read Blocks"),
+        "temp_written": node.get("Temp Written Blocks"),
+        "warnings": warnings,
+        "children": children,
+    }
+
+
+def analyze_plan(explain: Dict[str, Any], relation_rows: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Преобразует результат EXPLAIN (FORMAT JSON) в дерево узлов с метриками.
+
+    Args:
+        explain: Элемент массива, который возвращает EXPLAIN (FORMAT JSON)
+        relation_rows: Оценка числа строк таблиц (pg_class.reltuples) для поиска Seq Scan
+
+    Returns:
+        {'root': узел, 'planning_time', 'execution_time', 'warnings': [(узел, текст)]}
+        Узел: label, target, condition, plan_rows, actual_rows, loops, total_cost,
+        total_time, self_time (мс), shared_hit, shared_read, temp_written, warnings, children.
+    """
+    root = _analyze_node(explain["Plan"], relation_rows or {})
+
+    warnings = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        warnings.extend((node["label"], message) for message in node["warnings"])
+        stack.extend(reversed(node["children"]))
+
+    return {
+        "root": root,
+        "planning_time": explain.get("Planning Time"),
+        "execution_time": explain.get("Execution Time"),
+        "warnings": warnings,
+    }
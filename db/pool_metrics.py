@@ -0,0 +1,109 @@
+"""
+Пул соединений с учётом ожиданий и счётчики его работы
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """
+    Счётчики пула соединений: выдачи, новые соединения, ожидания свободного
+    соединения, проверки простаивавших соединений и повторное использование
+    соединения сессии (DB.session).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Обнуляет счётчики."""
+        with self._lock:
+            self.checkouts = 0
+            self.connects = 0
+            self.waits = 0
+            self.wait_time = 0.0
+            self.max_wait = 0.0
+            self.timeouts = 0
+            self.peak_overflow = 0
+            self.pings = 0
+            self.ping_failures = 0
+            self.invalidations = 0
+            self.session_reuses = 0
+
+    def add(self, name: str, value: int = 1):
+        """Увеличивает счётчик name."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def record_acquire(self, elapsed: float, overflow: int, waited: bool, timed_out: bool = False):
+        """Учитывает получение соединения из пула (вызывается MeteredQueuePool)."""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+            self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def stats(self, pool: Optional[QueuePool] = None) -> Dict[str, Any]:
+        """Счётчики и, если передан пул, его текущее состояние."""
+        with self._lock:
+            result = {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "waits": self.waits,
+                "wait_time_ms": self.wait_time * 1000,
+                "max_wait_ms": self.max_wait * 1000,
+                "timeouts": self.timeouts,
+                "peak_overflow": self.peak_overflow,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "invalidations": self.invalidations,
+                "session_reuses": self.session_reuses,
+            }
+        if isinstance(pool, QueuePool):
+            result.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+            )
+        return result
+
+
+class MeteredQueuePool(QueuePool):
+    """
+    QueuePool, учитывающий ожидания: соединение запрошено, когда все
+    соединения пула и переполнения (max_overflow) уже выданы.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        max_overflow = getattr(self, "_max_overflow", -1)
+        waited = max_overflow > -1 and self.checkedin() == 0 and self.overflow() >= max_overflow
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.metrics.record_acquire(time.perf_counter() - start, max(0, self.overflow()),
+                                        waited, timed_out)
+
+    def recreate(self):
+        # engine.dispose() заменяет пул новым экземпляром — счётчики переносим
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
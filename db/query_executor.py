@@ -0,0 +1,172 @@
+"""
+Фоновое выполнение запросов к БД на QThreadPool, чтобы не блокировать цикл событий Qt
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Optional, Set, Union
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class QueryTaskSignals(QObject):
+    """Сигналы фоновой задачи (испускаются из рабочего потока, доставляются в поток GUI)."""
+
+    started = Signal()
+    # Процент выполнения (-1 — неопределённый прогресс) и текстовое описание этапа
+    progress = Signal(int, str)
+    finished = Signal(object)
+    failed = Signal(str)
+    cancelled = Signal()
+
+
+class QueryTask(QRunnable):
+    """
+    Задача, выполняющая метод DB в рабочем потоке.
+
+    Отмена выполняется через pg_cancel_backend по PID серверного процесса
+    соединения, которое задача держит в момент отмены.
+    """
+
+    def __init__(self, db, func: Callable, *args, description: str = "", **kwargs):
+        super().__init__()
+        # Задачу удерживает QueryExecutor — Qt не должен удалять её сам
+        self.setAutoDelete(False)
+        self.db = db
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.description = description or getattr(func, "__name__", "query")
+        self.signals = QueryTaskSignals()
+        self.logger = logging.getLogger("DB")
+        self._cancel_requested = threading.Event()
+        self._thread_id: Optional[int] = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def run(self):
+        if self.is_cancelled:
+            self.signals.cancelled.emit()
+            return
+
+        self._thread_id = threading.get_ident()
+        self.signals.started.emit()
+        self.signals.progress.emit(-1, self.description)
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as e:
+            self._thread_id = None
+            if self.is_cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.logger.error("Ошибка фоновой задачи '%s': %s", self.description, e)
+                self.signals.failed.emit(str(e))
+            return
+
+        self._thread_id = None
+        if self.is_cancelled:
+            # Методы DB перехватывают ошибки сами, поэтому отмену определяем по флагу
+            self.signals.cancelled.emit()
+            return
+
+        self.signals.progress.emit(100, self.description)
+        self.signals.finished.emit(result)
+
+    def cancel(self) -> bool:
+        """
+        Запрашивает отмену задачи. Если запрос уже выполняется на сервере,
+        отправляет pg_cancel_backend для соединения рабочего потока.
+        """
+        self._cancel_requested.set()
+        thread_id = self._thread_id
+        if thread_id is None:
+            return True
+
+        pid = self.db.get_backend_pid(thread_id)
+        if pid is None:
+            return True
+        self.logger.info("Отмена задачи '%s' (backend PID=%s)", self.description, pid)
+        return self.db.cancel_backend(pid)
+
+
+class QueryExecutor(QObject):
+    """
+    Исполнитель запросов для класса DB на базе QThreadPool.
+
+    Пример:
+        executor = QueryExecutor(db)
+        task = executor.submit(db.get_sorted_data, "Books", [("title", True)],
+                               on_result=self.show_rows, on_error=self.show_error)
+        task.cancel()
+    """
+
+    # Количество выполняющихся задач изменилось (для индикаторов занятости)
+    busy_changed = Signal(int)
+
+    def __init__(self, db, pool: QThreadPool = None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.pool = pool or QThreadPool.globalInstance()
+        self._tasks: Set[QueryTask] = set()
+
+    def submit(
+            self,
+            func: Union[str, Callable],
+            *args,
+            on_result: Callable[[Any], None] = None,
+            on_error: Callable[[str], None] = None,
+            on_progress: Callable[[int, str], None] = None,
+            on_cancelled: Callable[[], None] = None,
+            description: str = "",
+            **kwargs
+    ) -> QueryTask:
+        """
+        Ставит вызов в очередь пула потоков.
+
+        Args:
+            func: Метод DB (или имя метода) либо произвольная функция
+            on_result: Обработчик результата (вызывается в потоке GUI)
+            on_error: Обработчик ошибки
+            on_progress: Обработчик прогресса (процент, описание)
+            on_cancelled: Обработчик отмены
+            description: Текст для индикатора прогресса
+
+        Returns:
+            Созданная задача (можно отменить через task.cancel())
+        """
+        if isinstance(func, str):
+            func = getattr(self.db, func)
+
+        task = QueryTask(self.db, func, *args, description=description, **kwargs)
+        if on_result:
+            task.signals.finished.connect(on_result)
+        if on_error:
+            task.signals.failed.connect(on_error)
+        if on_progress:
+            task.signals.progress.connect(on_progress)
+        if on_cancelled:
+            task.signals.cancelled.connect(on_cancelled)
+
+        for signal in (task.signals.finished, task.signals.failed, task.signals.cancelled):
+            signal.connect(lambda *_, t=task: self._on_task_done(t))
+
+        self._tasks.add(task)
+        self.busy_changed.emit(len(self._tasks))
+        self.pool.start(task)
+        return task
+
+    def _on_task_done(self, task: QueryTask):
+        if task in self._tasks:
+            self._tasks.discard(task)
+            self.busy_changed.emit(len(self._tasks))
+
+    def active_count(self) -> int:
+        """Количество задач в очереди и в работе."""
+        return len(self._tasks)
+
+    def cancel_all(self):
+        """Отменяет все незавершённые задачи."""
+        for task in list(self._tasks):
+            task.cancel()
@@ -0,0 +1,113 @@
+"""
+Журнал выполненных приложением запросов (по событиям курсора SQLAlchemy)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .sql_utils import normalize_sql
+
+
+class QueryLog:
+    """
+    Собирает статистику по шаблонам запросов: число вызовов, суммарное
+    и максимальное время, пример запроса с подставленными значениями
+    (пригоден для EXPLAIN). Хранит не более max_entries шаблонов —
+    при переполнении вытесняется давно не встречавшийся.
+
+    Подключается к движку через before_cursor_execute/after_cursor_execute/handle_error.
+    Служебные запросы к системному каталогу и сами EXPLAIN не учитываются.
+    """
+
+    _IGNORED_MARKERS = ("pg_catalog.", "information_schema.", "pg_class", "pg_namespace",
+                        "pg_attribute", "pg_stat_", "pg_index", "pg_extension", "pg_database",
+                        "pg_depend", "pg_constraint", "pg_matviews", "pg_trigger", "hypopg")
+    _IGNORED_PREFIXES = ("EXPLAIN", "SET ", "SHOW ", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT",
+                         "RELEASE", "SELECT 1", "SELECT pg_", "SELECT set_config", "SELECT current_")
+
+    def __init__(self, max_entries: int = 500):
+        self.logger = logging.getLogger("DB")
+        self.max_entries = max_entries
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Обработчики событий движка
+    # ------------------------------------------------------------------
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if not self.enabled or self._is_ignored(statement):
+            return
+        self.record(statement, elapsed_ms, parameters=None if executemany else parameters, cursor=cursor)
+
+    def handle_error(self, exception_context):
+        # Запрос завершился ошибкой — after_cursor_execute не будет вызван
+        connection = exception_context.connection
+        if connection is not None:
+            starts = connection.info.get("query_start_time")
+            if starts:
+                starts.pop()
+
+    # ------------------------------------------------------------------
+    # Учёт
+    # ------------------------------------------------------------------
+    def _is_ignored(self, statement: str) -> bool:
+        head = statement.lstrip()[:40].upper()
+        if any(head.startswith(prefix.upper()) for prefix in self._IGNORED_PREFIXES):
+            return True
+        lowered = statement.lower()
+        return any(marker in lowered for marker in self._IGNORED_MARKERS)
+
+    def record(self, statement: str, elapsed_ms: float, parameters=None, cursor=None):
+        """Добавляет выполнение запроса в статистику."""
+        template = normalize_sql(statement)
+        with self._lock:
+            entry = self._entries.get(template)
+            if entry is None:
+                entry = {"query": template, "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                         "sample": self._render_sample(statement, parameters, cursor)}
+                self._entries[template] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(template)
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_seen"] = time.time()
+
+    @staticmethod
+    def _render_sample(statement: str, parameters, cursor) -> Optional[str]:
+        """Запрос с подставленными значениями (для EXPLAIN) или None."""
+        mogrify = getattr(cursor, "mogrify", None)
+        if mogrify is None:
+            return None if parameters else statement
+        try:
+            # Те же аргументы, что и при выполнении, — получаем ровно тот текст, что ушёл на сервер
+            sample = mogrify(statement, parameters)
+            return sample.decode() if isinstance(sample, bytes) else sample
+        except Exception:
+            return None
+
+    def top(self, limit: int = 50, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Самые затратные шаблоны запросов."""
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries.values()]
+        for entry in entries:
+            entry["mean_ms"] = entry["total_ms"] / entry["calls"]
+        entries.sort(key=lambda entry: entry[order_by], reverse=True)
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
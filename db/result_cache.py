@@ -0,0 +1,157 @@
+"""
+Кэш результатов запросов на чтение с инвалидацией по версиям таблиц
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+
+class ResultCache:
+    """
+    LRU-кэш результатов SELECT с ограничением времени жизни записей.
+
+    Ключ — SQL-текст (с нормализованными пробелами) и параметры запроса.
+    Каждая запись помнит таблицы, из которых прочитана, и их версии на момент
+    чтения. Запись таблицы (invalidate) увеличивает её версию и удаляет
+    зависящие записи, поэтому результат, прочитанный параллельно с изменением,
+    тоже не будет выдан. TTL защищает от изменений, сделанных в обход приложения.
+
+    Для запросов к системному каталогу (пользовательские типы, список
+    представлений) используется псевдотаблица SCHEMA — она сбрасывается при DDL.
+    """
+
+    SCHEMA = "__schema__"
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        self.logger = logging.getLogger("DB")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        # Полный сброс меняет поколение — так устаревают и ещё не сохранённые результаты
+        self._generation = 0
+        # Таблицы, содержимое которых меняется вместе с данной (триггеры итоговых таблиц)
+        self._dependents: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(sql: str, params: Any = None) -> Tuple[str, str]:
+        """Ключ кэша: SQL без лишних пробелов и параметры в стабильном порядке."""
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        return " ".join(sql.split()), repr(params)
+
+    def get_or_load(self, sql: str, params: Any, tables: Iterable[str], loader: Callable[[], Any]) -> Any:
+        """
+        Возвращает результат из кэша или выполняет loader и запоминает результат.
+
+        Исключения loader не перехватываются и не кэшируются.
+
+        Args:
+            sql: Текст запроса
+            params: Параметры запроса
+            tables: Таблицы, от данных которых зависит результат
+            loader: Функция, выполняющая запрос
+        """
+        if not self.enabled:
+            return loader()
+
+        key = self.make_key(sql, params)
+        tables = frozenset(tables)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry["value"])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            # Версии фиксируем до чтения: изменение во время запроса сделает запись устаревшей
+            versions = {table: self._versions.get(table, 0) for table in tables}
+            generation = self._generation
+
+        value = loader()
+
+        with self._lock:
+            entry = {"value": copy.deepcopy(value), "versions": versions,
+                     "generation": generation, "created": now}
+            if self._is_fresh(entry, now):
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        if now - entry["created"] > self.ttl or entry["generation"] != self._generation:
+            return False
+        return all(self._versions.get(table, 0) == version for table, version in entry["versions"].items())
+
+    def add_dependency(self, table_name: str, dependent: str):
+        """Регистрирует таблицу, которая меняется при изменении table_name (например, триггером)."""
+        with self._lock:
+            self._dependents.setdefault(table_name, set()).add(dependent)
+
+    def invalidate(self, table_names: Optional[Iterable[str]] = None) -> Optional[Set[str]]:
+        """
+        Сбрасывает результаты, прочитанные из указанных таблиц.
+
+        Args:
+            table_names: Изменённые таблицы (None — сбросить весь кэш)
+
+        Returns:
+            Изменённые таблицы вместе с зависимыми (None — сброшено всё)
+        """
+        with self._lock:
+            self.invalidations += 1
+            if table_names is None:
+                self._generation += 1
+                self._entries.clear()
+                return None
+
+            pending, affected = list(table_names), set()
+            while pending:
+                table = pending.pop()
+                if table not in affected:
+                    affected.add(table)
+                    pending.extend(self._dependents.get(table, ()))
+
+            for table in affected:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if affected & entry["versions"].keys()]
+            for key in stale:
+                del self._entries[key]
+            return affected
+
+    def on_schema_changed(self, table_names: Optional[Iterable[str]] = None):
+        """Обработчик DDL (подписан на SchemaCache): сбрасывает таблицы и запросы к каталогу."""
+        self.invalidate(None if table_names is None else [*table_names, self.SCHEMA])
+
+    def clear(self):
+        """Полностью очищает кэш."""
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Статистика попаданий в кэш."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,125 @@
+"""
+Кэш результатов SQLAlchemy Inspector с инвалидацией по DDL
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import inspect
+
+
+class SchemaCache:
+    """
+    Запоминает ответы Inspector (список таблиц, колонки, ключи, ограничения, индексы)
+    по таблицам, чтобы диалоги не обращались к системному каталогу на каждый вызов.
+
+    Кэш сбрасывается методами DDL через invalidate(): целиком или только
+    для изменённых таблиц (список таблиц БД сбрасывается всегда).
+    Подписчики add_listener() получают те же имена таблиц (None — всё).
+    """
+
+    _TABLES_KEY = "__tables__"
+
+    def __init__(self, engine=None):
+        self.logger = logging.getLogger("DB")
+        self._engine = engine
+        self._lock = threading.RLock()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        # Счётчик инвалидаций: ответ, полученный до DDL, не должен попасть в кэш после неё
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._listeners: List[Callable[[Optional[List[str]]], None]] = []
+
+    def add_listener(self, callback: Callable[[Optional[List[str]]], None]):
+        """Подписывает callback(table_names) на сброс кэша (None — сброшено всё)."""
+        self._listeners.append(callback)
+
+    def _notify(self, table_names: Optional[List[str]]):
+        for callback in self._listeners:
+            callback(table_names)
+
+    def bind(self, engine):
+        """Привязывает кэш к новому движку (после connect/disconnect) и очищает его."""
+        with self._lock:
+            self._engine = engine
+            self._generation += 1
+            self._cache.clear()
+        self._notify(None)
+
+    def invalidate(self, table_names: Optional[Iterable[str]] = None):
+        """
+        Сбрасывает кэш.
+
+        Args:
+            table_names: Таблицы, структура которых изменилась (None — сбросить всё)
+        """
+        if table_names is not None:
+            table_names = list(table_names)
+        with self._lock:
+            self._generation += 1
+            if table_names is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self._TABLES_KEY, None)
+                for table_name in table_names:
+                    self._cache.pop(table_name, None)
+        self._notify(table_names)
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика попаданий в кэш."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "tables": len(self._cache)}
+
+    # ------------------------------------------------------------------
+    # Методы Inspector
+    # ------------------------------------------------------------------
+    def get_table_names(self) -> List[str]:
+        return list(self._get(self._TABLES_KEY, "get_table_names"))
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name in self._get(self._TABLES_KEY, "get_table_names")
+
+    def get_columns(self, table_name: str) -> List[Dict[str, Any]]:
+        return [dict(col) for col in self._get(table_name, "get_columns")]
+
+    def get_column_names(self, table_name: str) -> List[str]:
+        return [col["name"] for col in self._get(table_name, "get_columns")]
+
+    def get_foreign_keys(self, table_name: str) -> List[Dict[str, Any]]:
+        return [dict(fk) for fk in self._get(table_name, "get_foreign_keys")]
+
+    def get_check_constraints(self, table_name: str) -> List[Dict[str, Any]]:
+        return [dict(chk) for chk in self._get(table_name, "get_check_constraints")]
+
+    def get_unique_constraints(self, table_name: str) -> List[Dict[str, Any]]:
+        return [dict(uq) for uq in self._get(table_name, "get_unique_constraints")]
+
+    def get_indexes(self, table_name: str) -> List[Dict[str, Any]]:
+        return [dict(idx) for idx in self._get(table_name, "get_indexes")]
+
+    def get_pk_constraint(self, table_name: str) -> Dict[str, Any]:
+        return dict(self._get(table_name, "get_pk_constraint"))
+
+    def _get(self, key: str, method: str):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and method in entry:
+                self.hits += 1
+                return entry[method]
+            generation = self._generation
+
+        if self._engine is None:
+            raise RuntimeError("SchemaCache не привязан к подключению")
+
+        # Запрос к каталогу выполняем вне блокировки
+        insp = inspect(self._engine)
+        args = () if key == self._TABLES_KEY else (key,)
+        result = getattr(insp, method)(*args)
+
+        with self._lock:
+            self.misses += 1
+            if generation == self._generation:
+                self._cache.setdefault(key, {})[method] = result
+        return result
@@ -0,0 +1,97 @@
+"""
+Вспомогательные функции для разбора SQL-текста
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Имя объекта: "Quoted" или unquoted, с необязательной схемой
+_NAME = r'(?:(?:"[^"]+"|[A-Za-z_][\w$]*)\s*\.\s*)?(?:"[^"]+"|[A-Za-z_][\w$]*)'
+_NAME_LIST = rf'{_NAME}(?:\s*,\s*{_NAME})*'
+
+_DDL_PATTERNS = [
+    ("table", re.compile(
+        rf'^CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:GLOBAL|LOCAL)\s+)?(?:TEMP(?:ORARY)?\s+|UNLOGGED\s+)?'
+        rf'TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?({_NAME})', re.I)),
+    ("table", re.compile(
+        rf'^ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?({_NAME})(?:.*?\bRENAME\s+TO\s+({_NAME}))?', re.I | re.S)),
+    ("table", re.compile(rf'^(?:DROP|TRUNCATE)\s+TABLE\s+(?:IF\s+EXISTS\s+)?({_NAME_LIST})', re.I)),
+    ("table", re.compile(
+        rf'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:(?:IF\s+NOT\s+EXISTS\s+)?{_NAME}\s+)?'
+        rf'ON\s+(?:ONLY\s+)?({_NAME})', re.I)),
+    ("table", re.compile(rf'^COMMENT\s+ON\s+TABLE\s+({_NAME})', re.I)),
+    ("table", re.compile(rf'^COMMENT\s+ON\s+COLUMN\s+({_NAME})\s*\.\s*(?:"[^"]+"|[A-Za-z_][\w$]*)', re.I)),
+    ("view", re.compile(
+        rf'^(?:CREATE\s+(?:OR\s+REPLACE\s+)?(?:(?:TEMP|TEMPORARY|RECURSIVE)\s+)?|ALTER\s+|DROP\s+|REFRESH\s+)'
+        rf'(?:MATERIALIZED\s+)?VIEW\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?(?:CONCURRENTLY\s+)?({_NAME_LIST})', re.I)),
+    ("type", re.compile(rf'^(?:CREATE|ALTER|DROP)\s+(?:TYPE|DOMAIN)\s+(?:IF\s+EXISTS\s+)?({_NAME_LIST})', re.I)),
+]
+
+
+def split_sql_statements(sql: str) -> List[str]:
+    """Делит текст на отдельные операторы по ';' (без учёта строковых литералов)."""
+    return [stmt.strip() for stmt in sql.split(";") if stmt.strip()]
+
+
+def strip_sql_comments(sql: str) -> str:
+    """Удаляет комментарии -- ... и /* ... */."""
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
+    return re.sub(r"--[^\n]*", " ", sql)
+
+
+def unquote_identifier(name: str) -> str:
+    """
+    Приводит имя объекта к виду, в котором его хранит PostgreSQL:
+    без схемы, без кавычек; имена без кавычек — в нижнем регистре.
+    """
+    name = name.strip()
+    match = re.match(r'^(?:(?:"[^"]+"|[A-Za-z_][\w$]*)\s*\.\s*)?("[^"]+"|[A-Za-z_][\w$]*)$', name)
+    if match:
+        name = match.group(1)
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1]
+    return name.lower()
+
+
+def ddl_target_relations(sql: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Определяет объекты, затронутые DDL-запросом.
+
+    Returns:
+        Список пар (вид объекта, имя): вид — "table", "view" или "type".
+        None — если разобрать запрос не удалось (нужно полное обновление метаданных).
+    """
+    if "$$" in sql:
+        # Тела функций/DO-блоков содержат ';' и произвольный SQL
+        return None
+
+    targets: List[Tuple[str, str]] = []
+    for stmt in split_sql_statements(strip_sql_comments(sql)):
+        if re.match(r"^(GRANT|REVOKE|ANALYZE|VACUUM|CREATE\s+(SCHEMA|EXTENSION|SEQUENCE)|SET)\b", stmt, re.I):
+            continue
+        for kind, pattern in _DDL_PATTERNS:
+            match = pattern.match(stmt)
+            if match:
+                for group in match.groups():
+                    if group:
+                        names = re.findall(_NAME, group)
+                        targets.extend((kind, unquote_identifier(name)) for name in names)
+                break
+        else:
+            return None
+    return targets
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Приводит запрос к шаблону: литералы и параметры заменяются на '?',
+    списки IN (?, ?, ...) сворачиваются, пробелы схлопываются.
+    Запросы, отличающиеся только значениями, получают одинаковый шаблон.
+    """
+    sql = strip_sql_comments(sql)
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+", "?", sql)
+    sql = re.sub(r"(?<![\w\"$.])-?\d+(?:\.\d+)?(?![\w\"])", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(...)", sql)
+    sql = re.sub(r"ARRAY\[\s*\?(?:\s*,\s*\?)*\s*\]", "ARRAY[...]", sql, flags=re.I)
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
@@ -1,47 +1,30 @@
 import sys
 import logging
 import os
+import re
+import subprocess
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QLabel, QLineEdit, QFormLayout
 )
-from tabs.menu import MainWindow
-from db.Class_DB_refactored import DB
 from PySide6.QtCore import Qt, QTimer, QEvent
 from PySide6.QtGui import QFont, QColor, QPalette
-from plyer import notification
+
+from db.log_pipeline import setup_logging as setup_log_pipeline
+
+# Главное окно, класс DB (SQLAlchemy) и plyer импортируются при подключении, а не при
+# запуске: окно подключения появляется, не дожидаясь загрузки всех модулей приложения.
+# Режим "python main.py --import-profile" проверяет, что так и осталось.
+DEFERRED_IMPORTS = ("tabs.menu", "tabs.modules", "custom", "db.Class_DB_refactored", "db.mixins",
+                    "db.query_executor", "sqlalchemy", "psycopg2", "plyer")
 
 
 def setup_logging():
     """Настройка централизованного логирования в файл db/db_app.log"""
-    # Создаем папку db если её нет
-    os.makedirs('db', exist_ok=True)
-    
-    # Настраиваем корневой логгер
-    root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    
-    # Очищаем все существующие обработчики
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-    
-    # Создаем обработчик для записи в файл
-    file_handler = logging.FileHandler('db/db_app.log', encoding='utf-8', mode='a')
-    file_handler.setLevel(logging.INFO)
-    
-    # Формат сообщений
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-    file_handler.setFormatter(formatter)
-    
-    # Добавляем обработчик к корневому логгеру
-    root_logger.addHandler(file_handler)
-    
-    # Также добавляем консольный вывод для отладки
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
+    # Запись в файл (JSON, ротация по размеру) и в консоль выполняет отдельный поток,
+    # вызывающий код только кладёт запись в очередь
+    setup_log_pipeline('db/db_app.log')
+
     logging.info("=== Запуск приложения ===")
     logging.info("Логирование настроено в db/db_app.log")
 
@@ -343,6 +326,7 @@ class DBConnectionWindow(QMainWindow):
             not self.field_valid['password']
         ])
         if has_errors:
+            from plyer import notification
             notification.notify(
                 title="Ошибки ввода",
                 message="Пожалуйста, исправьте ошибки в форме перед подключением",
@@ -362,22 +346,10 @@ class DBConnectionWindow(QMainWindow):
         user = self.user_input.text().strip()
         password = self.password_input.text()
         port = int(port)
-        """Настройка логгера"""
-        logger = logging.getLogger("DB")
-        logger.setLevel(logging.DEBUG)
-        logger.handlers.clear()
-        """Убедимся, что директория db существует, или логируем в текущую"""
-        try:
-            file_handler = logging.FileHandler("db/db_app.log", encoding='utf-8')
-            log_file_path = "db/db_app.log"
-        except FileNotFoundError:
-            file_handler = logging.FileHandler("db/db_app.log", encoding='utf-8')
-            log_file_path = "db/db_app.log"
-
-        file_handler.setFormatter(
-            logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        )
-        logger.addHandler(file_handler)
+        """Записи логгера DB пишутся обработчиками корневого логгера (см. setup_logging)"""
+        log_file_path = "db/db_app.log"
+        from db.Class_DB_refactored import DB
+        from db.query_executor import QueryExecutor
         db = DB(
             host=host,
             port=port,
@@ -386,11 +358,23 @@ class DBConnectionWindow(QMainWindow):
             password=password,
             log_file=log_file_path
         )
-        connected = db.connect()
+        # Подключение и чтение метаданных выполняются в фоне, окно остаётся отзывчивым
+        self.connect_executor = QueryExecutor(db, parent=self)
+        self.connect_executor.submit(
+            db.connect,
+            on_result=lambda connected: self._on_connect_finished(db, connected),
+            on_error=lambda error: self._on_connect_finished(db, False),
+            description="Подключение к базе данных"
+        )
+
+    def _on_connect_finished(self, db, connected: bool):
+        """Завершение фонового подключения к базе данных"""
+        from plyer import notification
         if connected:
+            from tabs.menu import MainWindow
             notification.notify(
                 title="✅ Успешное подключение",
-                message=f"Подключено к базе: {dbname}@{host}:{port}",
+                message=f"Подключено к базе: {db.dbname}@{db.host}:{db.port}",
                 timeout=5
             )
             self.db_instance = db
@@ -563,7 +547,52 @@ class DBConnectionWindow(QMainWindow):
         self.dbname_error.setVisible(False)
 
 
+def report_import_profile(limit: int = 15) -> int:
+    """
+    Режим профилирования запуска (python main.py --import-profile).
+
+    Импортирует main в отдельном процессе с -X importtime — ровно то, что нужно
+    до показа окна подключения, — и печатает общее время и самые долгие импорты.
+    Возвращает 1, если при запуске загружается что-то из DEFERRED_IMPORTS.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        return result.returncode
+
+    # Строка: "import time:  self [us] | cumulative | imported package" (вложенность — отступом)
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            entries.append((int(match.group(2)), int(match.group(1)), len(match.group(3)), match.group(4)))
+
+    total_ms = sum(self_us for _, self_us, _, _ in entries) / 1000
+    print(f"Импорт до окна подключения: {total_ms:.1f} мс, модулей: {len(entries)}")
+    print("Самые долгие импорты верхнего уровня (с вложенными):")
+    top_level = sorted((entry for entry in entries if entry[2] == 1), reverse=True)
+    for cumulative_us, _, _, name in top_level[:limit]:
+        print(f"  {cumulative_us / 1000:8.1f} мс  {name}")
+
+    deferred = sorted({name for _, _, _, name in entries
+                       if any(name == prefix or name.startswith(prefix + ".") for prefix in DEFERRED_IMPORTS)})
+    if deferred:
+        print("Модули, которые должны загружаться после запуска, импортированы сразу:")
+        for name in deferred:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
 if __name__ == "__main__":
+    if "--import-profile" in sys.argv:
+        sys.exit(report_import_profile())
+
     # Настраиваем логирование перед запуском приложения
     setup_logging()
     
@@ -1,22 +1,25 @@
+from contextlib import nullcontext
+
 from PySide6.QtWidgets import (
     QMainWindow, QToolBar, QSizePolicy, QWidgetAction, QTableView,
     QMessageBox, QDialog, QVBoxLayout, QLabel, QPushButton, QWidget,
-    QHBoxLayout, QApplication, QMenu
+    QHBoxLayout, QApplication, QMenu, QProgressBar
 )
 from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QStandardItem, QStandardItemModel, QPalette, QColor
-from decimal import Decimal
-from datetime import date
+from PySide6.QtGui import QStandardItemModel, QPalette, QColor
 from plyer import notification
-from tabs.modules.data_operations import AddRecordDialog, DeleteRecordDialog, EditRecordDialog, ShowTableDialog
-from tabs.modules.table_operations import AddColumnDialog
-from tabs.modules.custom_types import CustomTypesDialog
+from custom.keyset_table_model import KeysetTableModel
+from custom.columnar_table_model import ColumnarTableModel
+from db.query_executor import QueryExecutor
 
 
 class MainWindow(QMainWindow):
     def __init__(self, db_instance=None):
         super().__init__()
         self.db_instance = db_instance
+        """Фоновый исполнитель запросов — долгие операции не блокируют интерфейс"""
+        self.query_executor = QueryExecutor(db_instance, parent=self)
+        self.query_executor.busy_changed.connect(self.on_query_busy_changed)
         self.setWindowTitle("СИСТЕМА УПРАВЛЕНИЯ БИБЛИОТЕКОЙ")
         self.setGeometry(200, 100, 1200, 800)
         """Устанавливаем тёмную палитру"""
@@ -50,6 +53,8 @@ class MainWindow(QMainWindow):
         self.apply_styles()
         self.sort_order = {}
         self.current_table_data = []
+        self.keyset_model = None
+        self.result_model = None
         self.last_table_name = None
         self.last_join_params = None
         self.sort = {}
@@ -183,6 +188,22 @@ class MainWindow(QMainWindow):
         views_button.setMenu(views_menu)
         center_layout.addWidget(views_button)
 
+        # === Выпадающая кнопка "Производительность" ===
+        performance_button = QPushButton("Производительность")
+        performance_menu = QMenu(performance_button)
+
+        # Добавляем пункты меню производительности
+        performance_menu.addAction("Советник по индексам", lambda: self.open_index_advisor_dialog())
+        performance_menu.addAction("Метрики методов и запросов", lambda: self.open_performance_dialog())
+        performance_menu.addAction("Статистика кэша и пула", lambda: self.show_cache_stats())
+
+        # Применяем стиль
+        self.style_dropdown_button(performance_button, performance_menu)
+
+        # Назначаем меню кнопке
+        performance_button.setMenu(performance_menu)
+        center_layout.addWidget(performance_button)
+
         alter_menu_button = QPushButton("Структура")
         alter_menu_button.setMinimumHeight(45)
         alter_menu_button.setMinimumWidth(160)
@@ -400,13 +421,59 @@ class MainWindow(QMainWindow):
         status_widget.setLayout(status_layout)
         status_icon = QLabel("[*]")
         status_icon.setObjectName("statusIcon")
-        status_text = QLabel("Подключено к базе данных")
-        status_text.setObjectName("statusText")
+        self.status_text = QLabel("Подключено к базе данных")
+        self.status_text.setObjectName("statusText")
         status_layout.addWidget(status_icon)
-        status_layout.addWidget(status_text)
+        status_layout.addWidget(self.status_text)
         status_layout.addStretch()
+        """Индикатор фоновых запросов"""
+        self.query_progress = QProgressBar()
+        self.query_progress.setRange(0, 0)
+        self.query_progress.setMaximumWidth(160)
+        self.query_progress.setTextVisible(False)
+        self.query_progress.setVisible(False)
+        self.cancel_query_button = QPushButton("Отменить")
+        self.cancel_query_button.setVisible(False)
+        self.cancel_query_button.clicked.connect(self.query_executor.cancel_all)
+        status_layout.addWidget(self.query_progress)
+        status_layout.addWidget(self.cancel_query_button)
         layout.addWidget(status_widget)
 
+    def on_query_busy_changed(self, active_count):
+        """Показывает индикатор, пока выполняются фоновые запросы"""
+        busy = active_count > 0
+        self.query_progress.setVisible(busy)
+        self.cancel_query_button.setVisible(busy)
+        if not busy:
+            self.status_text.setText("Подключено к базе данных")
+
+    def on_query_progress(self, percent, description):
+        """Отображает этап выполнения фонового запроса"""
+        if percent < 0:
+            self.status_text.setText(f"{description}...")
+        else:
+            self.status_text.setText(f"{description}: {percent}%")
+
+    def run_in_background(self, func, *args, on_result=None, description="", **kwargs):
+        """Выполняет метод DB в пуле потоков с отображением прогресса и возможностью отмены"""
+        return self.query_executor.submit(
+            func, *args,
+            on_result=on_result,
+            on_error=lambda error: notification.notify(
+                title="Ошибка",
+                message=f"{description}: {error}"[:250],
+                timeout=5
+            ),
+            on_progress=self.on_query_progress,
+            on_cancelled=lambda: notification.notify(
+                title="Отменено",
+                message=f"{description}: операция отменена",
+                timeout=3
+            ),
+            description=description,
+            **kwargs
+        )
+
     def setup_data_table(self, layout):
         """Настраивает таблицу для отображения данных"""
         table_container = QWidget()
@@ -661,8 +728,14 @@ class MainWindow(QMainWindow):
             )
             return
 
-        success = self.db_instance.create_schema()
+        self.run_in_background(
+            self.db_instance.create_schema,
+            on_result=self._on_create_schema_finished,
+            description="Создание схемы"
+        )
 
+    def _on_create_schema_finished(self, success):
+        """Обработка результата фонового создания схемы."""
         if success:
             notification.notify(
                 title="Успех",
@@ -700,8 +773,14 @@ class MainWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
 
-        success = self.db_instance.drop_schema()
+        self.run_in_background(
+            self.db_instance.drop_schema,
+            on_result=self._on_drop_schema_finished,
+            description="Удаление схемы"
+        )
 
+    def _on_drop_schema_finished(self, success):
+        """Обработка результата фонового удаления схемы."""
         if success:
             notification.notify(
                 title="Схема удалена",
@@ -727,35 +806,99 @@ class MainWindow(QMainWindow):
                 self._clear_layout(item.layout())
 
     def edit_data(self):
-        dialog = EditRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP,
-                                  parent=self)
-        dialog.exec()
-        self._display_data_in_table()
+        from tabs.modules.data_operations import EditRecordDialog
+        with self._db_session():
+            dialog = EditRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP,
+                                      parent=self)
+            self._exec_data_dialog(dialog)
 
     def add_data(self):
-        dialog = AddRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP, self)
-        dialog.exec()
-        self._display_data_in_table()
+        from tabs.modules.data_operations import AddRecordDialog
+        with self._db_session():
+            dialog = AddRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP, self)
+            self._exec_data_dialog(dialog)
 
     def delete_data(self):
-        dialog = DeleteRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP,
-                                    parent=self)
+        from tabs.modules.data_operations import DeleteRecordDialog
+        with self._db_session():
+            dialog = DeleteRecordDialog(self.db_instance, self.COLUMN_HEADERS_MAP, self.REVERSE_COLUMN_HEADERS_MAP,
+                                        parent=self)
+            self._exec_data_dialog(dialog)
+
+    def _db_session(self):
+        """
+        Одно соединение с БД на всё время работы диалога: диалоги делают много
+        мелких запросов (списки таблиц, столбцов, проверки), и каждый иначе брал бы
+        соединение из пула заново.
+        """
+        return self.db_instance.session() if self.db_instance else nullcontext()
+
+    def _exec_data_dialog(self, dialog):
+        """
+        Открывает диалог изменения данных и обновляет таблицу: изменённые строки
+        применяются к загруженным данным на месте, полный перезапрос — только если иначе нельзя.
+        """
+        journal = self.db_instance.change_journal if self.db_instance else None
+        position = journal.position() if journal else None
         dialog.exec()
-        self._display_data_in_table()
+
+        changes = journal.since(position) if journal else None
+        if changes == []:
+            return
+        if changes is None or not self._apply_row_changes(changes):
+            self._display_data_in_table()
+
+    def _apply_row_changes(self, changes) -> bool:
+        """Применяет изменения из журнала к таблице на экране. False — нужен перезапрос."""
+        model = self.data_table.model()
+        if not isinstance(model, KeysetTableModel) or not isinstance(getattr(self, 'sort', None), dict):
+            return False
+        if self.sort.get('mode') != 'single':
+            return False
+
+        table_name = self.sort.get('table_name')
+        journal = self.db_instance.change_journal
+        for change in changes:
+            if change["table"] not in (table_name, None):
+                continue
+            if change["operation"] == journal.INSERT:
+                applied = model.apply_insert(change["rows"])
+            elif change["operation"] == journal.UPDATE:
+                applied = model.apply_update(change["rows"])
+            elif change["operation"] == journal.DELETE:
+                applied = model.apply_delete([row[change["key"]] for row in change["rows"]])
+            else:
+                applied = False
+            if not applied:
+                return False
+
+        self.current_table_data = model.loaded_rows()
+        return True
 
     def on_header_clicked(self, logical_index: int):
         """
-        Обрабатывает клик по заголовку столбца: меняет параметр сортировки в self.sort и перезагружает данные.
+        Обрабатывает клик по заголовку столбца: меняет параметр сортировки в self.sort.
+        Полностью загруженный результат сортируется в памяти, иначе данные запрашиваются заново.
         """
         if self.data_table.model().rowCount() == 0:
             return
 
-        header_item = self.data_table.model().horizontalHeaderItem(logical_index)
-        if header_item is None:
+        display_name = self.data_table.model().headerData(logical_index, Qt.Horizontal, Qt.DisplayRole)
+        if display_name is None:
             return
 
-        display_name = header_item.text()
         original_column_name = self.REVERSE_COLUMN_HEADERS_MAP.get(display_name, display_name)
+        header = self.data_table.horizontalHeader()
+        model = self.data_table.model()
+
+        # Результат расширенного SELECT/CTE всегда загружен целиком — сортируем в памяти
+        if isinstance(model, ColumnarTableModel):
+            ascending = not (header.sortIndicatorSection() == logical_index
+                             and header.sortIndicatorOrder() == Qt.AscendingOrder)
+            order = Qt.AscendingOrder if ascending else Qt.DescendingOrder
+            model.sort(logical_index, order)
+            header.setSortIndicator(logical_index, order)
+            return
 
         if not hasattr(self, 'sort') or not isinstance(self.sort, dict):
             return
@@ -772,13 +915,22 @@ class MainWindow(QMainWindow):
                 new_sort_columns = [(original_column_name, True)]
 
         self.sort['sort_columns'] = new_sort_columns
+
+        # Все строки уже загружены — пересортировываем без запроса к БД
+        _, new_ascending = new_sort_columns[0]
+        if isinstance(model, KeysetTableModel) and model.sort_loaded(logical_index, new_ascending):
+            header.setSortIndicator(logical_index, Qt.AscendingOrder if new_ascending else Qt.DescendingOrder)
+            return
+
         self._display_data_in_table()
 
     def show_table(self):
-        dialog = ShowTableDialog(self.db_instance, parent=self)
-        if dialog.exec() == QDialog.Accepted and dialog.result:
-            self.sort = dialog.result
-            self._display_data_in_table()
+        from tabs.modules.data_operations import ShowTableDialog
+        with self._db_session():
+            dialog = ShowTableDialog(self.db_instance, parent=self)
+            if dialog.exec() == QDialog.Accepted and dialog.result:
+                self.sort = dialog.result
+                self._display_data_in_table()
             
     def open_text_search(self):
         """Открывает диалоговое окно поиска по тексту"""
@@ -791,8 +943,9 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.search_operations import TextSearchDialog
-        dialog = TextSearchDialog(self.db_instance, parent=self)
-        dialog.exec()
+        with self._db_session():
+            dialog = TextSearchDialog(self.db_instance, parent=self)
+            dialog.exec()
         
     def open_advanced_select(self):
         """Открывает диалоговое окно расширенного SELECT"""
@@ -805,9 +958,10 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.search_operations import AdvancedSelectDialog
-        dialog = AdvancedSelectDialog(self.db_instance, parent=self)
-        dialog.results_to_main_table.connect(self.display_advanced_select_results)
-        dialog.exec()
+        with self._db_session():
+            dialog = AdvancedSelectDialog(self.db_instance, parent=self)
+            dialog.results_to_main_table.connect(self.display_advanced_select_results)
+            dialog.exec()
         
     def open_string_functions(self):
         """Открывает диалоговое окно строковых функций"""
@@ -820,8 +974,9 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.string_operations import StringFunctionsDialog
-        dialog = StringFunctionsDialog(self.db_instance, parent=self)
-        dialog.exec()
+        with self._db_session():
+            dialog = StringFunctionsDialog(self.db_instance, parent=self)
+            dialog.exec()
     
     def open_views_dialog(self):
         """Открывает диалоговое окно управления представлениями (VIEW)"""
@@ -834,8 +989,9 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.search_operations import ViewsDialog
-        dialog = ViewsDialog(self.db_instance, parent=self)
-        dialog.exec()
+        with self._db_session():
+            dialog = ViewsDialog(self.db_instance, parent=self)
+            dialog.exec()
     
     def open_materialized_views_dialog(self):
         """Открывает диалоговое окно управления материализованными представлениями"""
@@ -848,9 +1004,69 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.search_operations import MaterializedViewsDialog
-        dialog = MaterializedViewsDialog(self.db_instance, parent=self)
-        dialog.exec()
+        with self._db_session():
+            dialog = MaterializedViewsDialog(self.db_instance, parent=self)
+            dialog.exec()
     
+    def open_index_advisor_dialog(self):
+        """Открывает диалоговое окно советника по индексам"""
+        if not self.db_instance or not self.db_instance.is_connected():
+            notification.notify(
+                title="Ошибка подключения",
+                message="Нет подключения к базе данных!",
+                timeout=3
+            )
+            return
+
+        from tabs.modules.performance import IndexAdvisorDialog
+        with self._db_session():
+            dialog = IndexAdvisorDialog(self.db_instance, parent=self)
+            dialog.exec()
+
+    def open_performance_dialog(self):
+        """Открывает диалоговое окно метрик производительности"""
+        if not self.db_instance:
+            notification.notify(
+                title="Ошибка подключения",
+                message="Нет подключения к базе данных!",
+                timeout=3
+            )
+            return
+
+        from tabs.modules.performance import PerformanceDialog
+        dialog = PerformanceDialog(self.db_instance, parent=self)
+        dialog.exec()
+
+    def show_cache_stats(self):
+        """Показывает попадания и промахи кэша результатов и кэша схемы, счётчики пула соединений"""
+        if not self.db_instance or not self.db_instance.is_connected():
+            notification.notify(
+                title="Ошибка подключения",
+                message="Нет подключения к базе данных!",
+                timeout=3
+            )
+            return
+
+        stats = self.db_instance.get_cache_stats()
+        results, schema, keys = stats["results"], stats["schema"], stats["keys"]
+        pool = self.db_instance.get_pool_stats()
+        QMessageBox.information(
+            self,
+            "Статистика кэша и пула",
+            f"Кэш результатов: попаданий {results['hits']}, промахов {results['misses']} "
+            f"({results['hit_ratio']:.0%}), записей {results['entries']}, "
+            f"вытеснено {results['evictions']}, сбросов {results['invalidations']}\n"
+            f"Кэш схемы: попаданий {schema['hits']}, промахов {schema['misses']}, таблиц {schema['tables']}\n"
+            f"Кэш ключей (внешние ключи): попаданий {keys['hits']}, запрошено {keys['misses']}, "
+            f"хранится {keys['keys']}\n"
+            f"Пул соединений: выдано {pool['checkouts']}, открыто новых {pool['connects']}, "
+            f"занято {pool.get('checked_out', 0)} из {pool.get('size', 0)} "
+            f"(+{pool.get('overflow', 0)} сверх пула, максимум {pool['peak_overflow']}), "
+            f"ожиданий {pool['waits']} ({pool['wait_time_ms']:.0f} мс, таймаутов {pool['timeouts']}), "
+            f"проверок простоя {pool['pings']} (неудачных {pool['ping_failures']}), "
+            f"повторных использований в сессиях {pool['session_reuses']}"
+        )
+
     def open_cte_dialog(self):
         """Открывает диалоговое окно конструктора CTE (WITH-запросы)"""
         if not self.db_instance or not self.db_instance.is_connected():
@@ -862,9 +1078,10 @@ class MainWindow(QMainWindow):
             return
             
         from tabs.modules.search_operations import CTEDialog
-        dialog = CTEDialog(self.db_instance, parent=self)
-        dialog.results_to_main_table.connect(self.display_advanced_select_results)
-        dialog.exec()
+        with self._db_session():
+            dialog = CTEDialog(self.db_instance, parent=self)
+            dialog.results_to_main_table.connect(self.display_advanced_select_results)
+            dialog.exec()
     
     def open_custom_types(self):
         """Открывает диалоговое окно управления пользовательскими типами"""
@@ -876,81 +1093,57 @@ class MainWindow(QMainWindow):
             )
             return
         
-        dialog = CustomTypesDialog(self.db_instance, parent=self)
-        dialog.exec()
+        from tabs.modules.custom_types import CustomTypesDialog
+        with self._db_session():
+            dialog = CustomTypesDialog(self.db_instance, parent=self)
+            dialog.exec()
         
     def display_advanced_select_results(self, results):
         """Отображает результаты расширенного SELECT в основной таблице"""
         if not results:
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Нет данных"])
-            self.data_table.setVisible(True)
+            self._show_table_message("Нет данных")
             return
             
-        # Получаем заголовки столбцов
-        if results and isinstance(results[0], dict):
-            original_headers = list(results[0].keys())
-        else:
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Неверный формат результатов"])
-            self.data_table.setVisible(True)
+        if not isinstance(results[0], dict):
+            self._show_table_message("Неверный формат результатов")
             return
             
-        # Преобразуем заголовки
-        column_headers = [
-            self.COLUMN_HEADERS_MAP.get(col, col)
-            for col in original_headers
-        ]
-        
-        # Очищаем и настраиваем таблицу
-        self.table_model.clear()
-        self.table_model.setHorizontalHeaderLabels(column_headers)
-        
-        # Заполняем данные
-        for row_dict in results:
-            row_items = []
-            for col_name in original_headers:
-                value = row_dict.get(col_name, "")
-                if isinstance(value, list):
-                    value = ", ".join(map(str, value))
-                elif isinstance(value, (int, float, Decimal)):
-                    value = f"{value:.2f}" if isinstance(value, (float, Decimal)) else str(value)
-                elif isinstance(value, date):
-                    value = value.strftime("%Y-%m-%d")
-                elif hasattr(value, 'isoformat'):  # datetime/date
-                    value = value.isoformat()
-                elif value is None:
-                    value = ""
-                else:
-                    value = str(value)
-                item = QStandardItem(value)
-                item.setEditable(False)
-                row_items.append(item)
-            self.table_model.appendRow(row_items)
+        # Колоночная модель: значения форматируются только для видимых ячеек
+        model = ColumnarTableModel(header_map=self.COLUMN_HEADERS_MAP, parent=self)
+        model.set_rows(results)
+        self.keyset_model = None
+        self.result_model = model
+        self.data_table.setModel(model)
             
         # Настраиваем таблицу
         self.data_table.setVisible(True)
         self.data_table.resizeColumnsToContents()
         self.data_table.horizontalHeader().setStretchLastSection(True)
         
-        # Сохраняем данные для возможного использования
-        self.current_table_data = results
+        # Строки-словари не удерживаем: данные уже в модели
+        self.current_table_data = []
         
         # Показываем уведомление
         notification.notify(
             title="Результаты загружены",
-            message=f"Найдено {len(results)} записей",
+            message=f"Найдено {model.rowCount()} записей",
             timeout=3
         )
 
+    def _show_table_message(self, message: str):
+        """Показывает в основной таблице служебное сообщение вместо данных."""
+        self.data_table.setModel(self.table_model)
+        self.table_model.clear()
+        self.table_model.setHorizontalHeaderLabels([message])
+        self.data_table.setVisible(True)
+
     def _display_data_in_table(self):
         """
-        Выполняет запрос на основе self.sort и отображает результат в self.data_table через QStandardItemModel.
+        Выполняет запрос на основе self.sort и отображает результат в self.data_table.
+        Данные подгружаются страницами через KeysetTableModel по мере прокрутки.
         """
         if not hasattr(self, 'sort') or not isinstance(self.sort, dict):
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Ошибка: параметры запроса не заданы"])
-            self.data_table.setVisible(True)
+            self._show_table_message("Ошибка: параметры запроса не заданы")
             self.data_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
             return
 
@@ -961,19 +1154,20 @@ class MainWindow(QMainWindow):
             sort_columns = self.sort.get('sort_columns')
 
             if not table_name or not sort_columns:
-                self.table_model.clear()
-                self.table_model.setHorizontalHeaderLabels(["Ошибка: недостаточно параметров для single-запроса"])
-                self.data_table.setVisible(True)
+                self._show_table_message("Ошибка: недостаточно параметров для single-запроса")
                 return
 
             # Получаем выбранные пользователем столбцы (если ShowTableDialog их вернул)
             selected_columns = self.sort.get('columns')
-            data = self.db_instance.get_sorted_data(
-                table_name=table_name,
-                sort_columns=sort_columns,
-                columns=selected_columns
-            )
-            self.current_table_data = data
+
+            def fetch_page(cursor, limit):
+                return self.db_instance.get_sorted_page(
+                    table_name=table_name,
+                    sort_columns=sort_columns,
+                    columns=selected_columns,
+                    after=cursor,
+                    limit=limit
+                )
         elif mode == 'join':
             left_table = self.sort.get('left_table')
             right_table = self.sort.get('right_table')
@@ -982,68 +1176,50 @@ class MainWindow(QMainWindow):
             columns = self.sort.get('columns')
             sort_columns = self.sort.get('sort_columns')
             if not all([left_table, right_table, join_on, columns, sort_columns]):
-                self.table_model.clear()
-                self.table_model.setHorizontalHeaderLabels(["Ошибка: недостаточно параметров для join-запроса"])
-                self.data_table.setVisible(True)
+                self._show_table_message("Ошибка: недостаточно параметров для join-запроса")
                 return
-            data = self.db_instance.get_joined_summary(
-                left_table=left_table,
-                right_table=right_table,
-                join_on=join_on,
-                join_type=join_type,  # Передаём тип соединения
-                columns=columns,
-                sort_columns=sort_columns
-            )
-            self.current_table_data = data
+
+            def fetch_page(cursor, limit):
+                return self.db_instance.get_joined_page(
+                    left_table=left_table,
+                    right_table=right_table,
+                    join_on=join_on,
+                    join_type=join_type,  # Передаём тип соединения
+                    columns=columns,
+                    sort_columns=sort_columns,
+                    after=cursor,
+                    limit=limit
+                )
         else:
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Неизвестный режим отображения"])
-            self.data_table.setVisible(True)
+            self._show_table_message("Неизвестный режим отображения")
             return
 
+        # Для одной таблицы изменения строк можно применять на месте — модели нужен PK и порядок
+        key_column, sort_column, ascending = None, None, True
+        if mode == 'single' and table_name in self.db_instance.tables:
+            table = self.db_instance.tables[table_name]
+            pk_columns = [col.name for col in table.primary_key.columns]
+            if len(pk_columns) == 1:
+                key_column = pk_columns[0]
+                sort_column, ascending = sort_columns[0]
+                if sort_column not in table.c:
+                    sort_column, ascending = key_column, True
+
+        model = KeysetTableModel(fetch_page, header_map=self.COLUMN_HEADERS_MAP, key_column=key_column,
+                                 sort_column=sort_column, ascending=ascending, parent=self)
+        model.load_first_page()
+        self.current_table_data = model.loaded_rows()
+
         # Отрисовка данных
-        if not self.current_table_data or not isinstance(self.current_table_data, list) or len(
-                self.current_table_data) == 0:
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Нет данных"])
-            self.data_table.setVisible(True)
+        if model.rowCount() == 0:
+            self._show_table_message("Нет данных")
             self.data_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
             return
 
-        sample_row = self.current_table_data[0]
-        if not isinstance(sample_row, dict):
-            self.table_model.clear()
-            self.table_model.setHorizontalHeaderLabels(["Ошибка: данные не в формате словаря"])
-            self.data_table.setVisible(True)
-            return
-
-        original_headers = list(sample_row.keys())
-        column_headers = [
-            self.COLUMN_HEADERS_MAP.get(col, col)
-            for col in original_headers
-        ]
-
-        self.table_model.clear()
-        self.table_model.setHorizontalHeaderLabels(column_headers)
-
-        for row_dict in self.current_table_data:
-            row_items = []
-            for col_name in original_headers:
-                value = row_dict.get(col_name, "")
-                if isinstance(value, list):
-                    value = ", ".join(map(str, value))
-                elif isinstance(value, (int, float, Decimal)):
-                    value = f"{value:.2f}" if isinstance(value, (float, Decimal)) else str(value)
-                elif isinstance(value, date):
-                    value = value.strftime("%Y-%m-%d")
-                elif value is None:
-                    value = ""
-                else:
-                    value = str(value)
-                item = QStandardItem(value)
-                item.setEditable(False)
-                row_items.append(item)
-            self.table_model.appendRow(row_items)
+        original_headers = model.column_names()
+        self.keyset_model = model
+        self.result_model = None
+        self.data_table.setModel(model)
 
         self.data_table.resizeColumnsToContents()
         self.data_table.horizontalHeader().setStretchLastSection(True)
@@ -1085,6 +1261,7 @@ class MainWindow(QMainWindow):
             return
 
         if action_type == "add":
+            from tabs.modules.table_operations import AddColumnDialog
             dialog = AddColumnDialog(self.db_instance, parent=self)
             if dialog.exec() == QDialog.Accepted:
                 # Если столбец успешно добавлен, обновляем данные таблицы, если она открыта
@@ -1168,6 +1345,9 @@ class MainWindow(QMainWindow):
             self.close()
 
     def closeEvent(self, event):
+        # Прерываем выполняющиеся на сервере запросы перед закрытием пула
+        self.query_executor.cancel_all()
+        self.query_executor.pool.waitForDone(3000)
         if hasattr(self, 'db_instance') and self.db_instance:
             try:
                 self.db_instance.disconnect()
@@ -8,5 +8,6 @@ __all__ = [
     'table_operations', 
     'search_operations',
     'string_operations',
-    'constraints'
+    'constraints',
+    'performance'
 ]
@@ -2,8 +2,12 @@
 Диалоги для работы с ограничениями
 """
 
-from .constraints_basic_dialog import ConstraintsBasicDialog
-from .constraints_dialog_standalone import ConstraintsDialogStandalone
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'ConstraintsBasicDialog': '.constraints_basic_dialog',
+    'ConstraintsDialogStandalone': '.constraints_dialog_standalone',
+})
 
 __all__ = [
     'ConstraintsBasicDialog',
@@ -2,7 +2,11 @@
 Диалоги для работы с пользовательскими типами данных
 """
 
-from .custom_types_dialog import CustomTypesDialog
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'CustomTypesDialog': '.custom_types_dialog',
+})
 
 __all__ = [
     'CustomTypesDialog'
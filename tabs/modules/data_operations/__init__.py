@@ -2,10 +2,14 @@
 Диалоги для операций с данными (CRUD)
 """
 
-from .add_dialog import AddRecordDialog
-from .update_dialog import EditRecordDialog
-from .delete_dialog import DeleteRecordDialog
-from .get_table import ShowTableDialog
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'AddRecordDialog': '.add_dialog',
+    'EditRecordDialog': '.update_dialog',
+    'DeleteRecordDialog': '.delete_dialog',
+    'ShowTableDialog': '.get_table',
+})
 
 __all__ = [
     'AddRecordDialog',
@@ -940,7 +940,7 @@ class AddRecordDialog(QDialog):
 
         # === Попытка вставки записи ===
         try:
-            success = self.db_instance.insert_data(table_name, data)
+            success, error = self.db_instance.insert_data(table_name, data)
 
             if success:
                 notification.notify(
@@ -952,7 +952,7 @@ class AddRecordDialog(QDialog):
             else:
                 notification.notify(
                     title=" Ошибка базы данных",
-                    message=f"Не удалось добавить запись в таблицу '{table_name}'",
+                    message=(error or f"Не удалось добавить запись в таблицу '{table_name}'")[:250],
                     timeout=5
                 )
                 # Подсветим все поля как "ошибочные при вставке"
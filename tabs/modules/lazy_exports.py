@@ -0,0 +1,36 @@
+"""
+Отложенный импорт диалогов: модуль диалога загружается при первом обращении к его имени
+"""
+
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(namespace: Dict[str, Any],
+                 exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Создаёт __getattr__ и __dir__ модуля пакета (PEP 562): `from пакет import Диалог`
+    импортирует только модуль этого диалога, а не все модули пакета.
+
+    Args:
+        namespace: globals() файла __init__.py пакета
+        exports: Экспортируемое имя → модуль пакета, в котором оно определено (".module")
+
+    Returns:
+        (__getattr__, __dir__)
+    """
+    package = namespace["__name__"]
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module_name, package), name)
+        # Следующие обращения не проходят через __getattr__
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted({*namespace, *exports})
+
+    return __getattr__, __dir__
@@ -0,0 +1,15 @@
+"""
+Диалоги анализа производительности
+"""
+
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'IndexAdvisorDialog': '.index_advisor_dialog',
+    'PerformanceDialog': '.performance_dialog',
+})
+
+__all__ = [
+    'IndexAdvisorDialog',
+    'PerformanceDialog'
+]
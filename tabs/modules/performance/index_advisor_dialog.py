@@ -0,0 +1,342 @@
+"""
+Диалог советника по индексам: затратные запросы и предлагаемые индексы
+"""
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QMessageBox, QSplitter, QCheckBox, QSpinBox
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPalette, QColor
+
+from db.query_executor import QueryExecutor
+
+
+class IndexAdvisorDialog(QDialog):
+    """
+    Показывает самые затратные запросы (pg_stat_statements или журнал
+    приложения) и индексы, которые могли бы их ускорить. Выбранные индексы
+    создаются через CREATE INDEX CONCURRENTLY в фоне.
+    """
+
+    QUERY_COLUMNS = ["Запрос", "Вызовы", "Всего, мс", "Среднее, мс", "Макс., мс"]
+    CANDIDATE_COLUMNS = ["", "Таблица", "Тип", "Столбцы", "Причина", "Время запросов, мс", "Выигрыш", "Определение"]
+    METHOD_TITLES = {"btree": "B-tree", "gin": "GIN (массив)", "trigram": "GIN pg_trgm"}
+
+    def __init__(self, db_instance, parent=None):
+        super().__init__(parent)
+        self.db_instance = db_instance
+        self.query_executor = QueryExecutor(self.db_instance, parent=self)
+        self.candidates = []
+        self.setWindowTitle("Советник по индексам")
+        self.setModal(True)
+        self.setMinimumSize(1100, 750)
+        self.resize(1200, 800)
+
+        self.set_dark_palette()
+
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        self.setLayout(main_layout)
+
+        header_label = QLabel("СОВЕТНИК ПО ИНДЕКСАМ")
+        header_label.setObjectName("headerLabel")
+        header_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(header_label)
+
+        self.info_label = QLabel(
+            "Анализируются самые затратные запросы приложения. Кандидаты, уже покрытые "
+            "существующими индексами, не показываются. Выигрыш оценивается по гипотетическим "
+            "индексам (расширение hypopg), если оно доступно."
+        )
+        self.info_label.setObjectName("infoLabel")
+        self.info_label.setWordWrap(True)
+        main_layout.addWidget(self.info_label)
+
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(QLabel("Запросов для анализа:"))
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(5, 500)
+        self.limit_spin.setValue(50)
+        controls_layout.addWidget(self.limit_spin)
+        self.estimate_check = QCheckBox("Оценивать выигрыш (hypopg)")
+        self.estimate_check.setChecked(True)
+        controls_layout.addWidget(self.estimate_check)
+        controls_layout.addStretch()
+        self.analyze_btn = QPushButton("Анализировать")
+        self.analyze_btn.clicked.connect(self.analyze)
+        controls_layout.addWidget(self.analyze_btn)
+        clear_btn = QPushButton("Очистить журнал")
+        clear_btn.clicked.connect(self.clear_log)
+        controls_layout.addWidget(clear_btn)
+        main_layout.addLayout(controls_layout)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        self.queries_table = QTableWidget(0, len(self.QUERY_COLUMNS))
+        self.queries_table.setHorizontalHeaderLabels(self.QUERY_COLUMNS)
+        self.queries_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.queries_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.queries_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        splitter.addWidget(self.queries_table)
+
+        self.candidates_table = QTableWidget(0, len(self.CANDIDATE_COLUMNS))
+        self.candidates_table.setHorizontalHeaderLabels(self.CANDIDATE_COLUMNS)
+        self.candidates_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.candidates_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.candidates_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.candidates_table.horizontalHeader().setStretchLastSection(True)
+        splitter.addWidget(self.candidates_table)
+        splitter.setSizes([300, 300])
+        main_layout.addWidget(splitter)
+
+        buttons_layout = QHBoxLayout()
+        self.create_btn = QPushButton("Создать выбранные (CONCURRENTLY)")
+        self.create_btn.clicked.connect(self.create_selected_indexes)
+        self.create_btn.setEnabled(False)
+        buttons_layout.addWidget(self.create_btn)
+        buttons_layout.addStretch()
+        close_btn = QPushButton("Закрыть")
+        close_btn.setObjectName("closeButton")
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(close_btn)
+        main_layout.addLayout(buttons_layout)
+
+        self.apply_styles()
+        self.analyze()
+
+    def set_dark_palette(self):
+        """Устанавливает тёмную цветовую палитру"""
+        dark_palette = QPalette()
+        dark_palette.setColor(QPalette.Window, QColor(18, 18, 24))
+        dark_palette.setColor(QPalette.WindowText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Base, QColor(25, 25, 35))
+        dark_palette.setColor(QPalette.AlternateBase, QColor(35, 35, 45))
+        dark_palette.setColor(QPalette.Text, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Button, QColor(40, 40, 50))
+        dark_palette.setColor(QPalette.ButtonText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Highlight, QColor(64, 255, 218))
+        dark_palette.setColor(QPalette.HighlightedText, QColor(18, 18, 24))
+        self.setPalette(dark_palette)
+
+    def analyze(self):
+        """Запускает подбор индексов в фоне"""
+        self.analyze_btn.setEnabled(False)
+        self.create_btn.setEnabled(False)
+        self.query_executor.submit(
+            self.db_instance.suggest_indexes,
+            self.limit_spin.value(),
+            estimate=self.estimate_check.isChecked(),
+            on_result=self.on_analyzed,
+            on_error=self.on_analyze_failed,
+            description="Подбор индексов"
+        )
+
+    def on_analyzed(self, result):
+        """Заполняет таблицы запросов и кандидатов"""
+        self.analyze_btn.setEnabled(True)
+        source = "pg_stat_statements" if result["source"] == "pg_stat_statements" else "журнал приложения"
+        estimate = "оценка выигрыша через hypopg" if result["hypopg"] else "без оценки выигрыша (hypopg недоступен)"
+        self.info_label.setText(
+            f"Источник статистики: {source}. Запросов: {len(result['queries'])}, "
+            f"кандидатов: {len(result['candidates'])}; {estimate}."
+        )
+
+        self.queries_table.setRowCount(len(result["queries"]))
+        for row, query in enumerate(result["queries"]):
+            values = [query["query"], query["calls"], query["total_ms"], query["mean_ms"], query["max_ms"]]
+            for column, value in enumerate(values):
+                text = f"{value:.2f}" if isinstance(value, float) else str(value)
+                item = QTableWidgetItem(text)
+                if column == 0:
+                    item.setToolTip(query.get("sample") or query["query"])
+                self.queries_table.setItem(row, column, item)
+
+        self.candidates = result["candidates"]
+        self.candidates_table.setRowCount(len(self.candidates))
+        for row, candidate in enumerate(self.candidates):
+            check_item = QTableWidgetItem()
+            check_item.setFlags(Qt.ItemIsUserCheckable | Qt.ItemIsEnabled)
+            check_item.setCheckState(Qt.Unchecked)
+            self.candidates_table.setItem(row, 0, check_item)
+
+            benefit = candidate["benefit"]
+            values = [
+                candidate["table"],
+                self.METHOD_TITLES.get(candidate["method"], candidate["method"]),
+                ", ".join(candidate["columns"]),
+                candidate["reason"],
+                f"{candidate['total_ms']:.2f}",
+                f"{benefit:.0%}" if benefit is not None else "—",
+                f'CREATE INDEX CONCURRENTLY "{candidate["name"]}" {candidate["definition"]}',
+            ]
+            for column, value in enumerate(values, start=1):
+                self.candidates_table.setItem(row, column, QTableWidgetItem(value))
+        self.create_btn.setEnabled(bool(self.candidates))
+
+    def on_analyze_failed(self, error):
+        """Обработка ошибки анализа"""
+        self.analyze_btn.setEnabled(True)
+        self.show_error(f"Не удалось подобрать индексы: {error}")
+
+    def selected_candidates(self):
+        """Кандидаты, отмеченные пользователем"""
+        return [
+            candidate for row, candidate in enumerate(self.candidates)
+            if self.candidates_table.item(row, 0).checkState() == Qt.Checked
+        ]
+
+    def create_selected_indexes(self):
+        """Создаёт отмеченные индексы без блокировки записи"""
+        selected = self.selected_candidates()
+        if not selected:
+            self.show_error("Отметьте индексы для создания")
+            return
+
+        names = "\n".join(candidate["name"] for candidate in selected)
+        reply = QMessageBox.question(
+            self,
+            "Создание индексов",
+            f"Создать индексы (CREATE INDEX CONCURRENTLY)?\n\n{names}",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        self.create_btn.setEnabled(False)
+        self.query_executor.submit(
+            self.create_indexes,
+            selected,
+            on_result=self.on_indexes_created,
+            on_error=self.on_analyze_failed,
+            description="Создание индексов"
+        )
+
+    def create_indexes(self, candidates):
+        """Создаёт индексы по очереди (выполняется в фоновом потоке)"""
+        errors = []
+        for candidate in candidates:
+            success, error = self.db_instance.create_index_concurrently(
+                candidate["table"], candidate["name"], candidate["definition"]
+            )
+            if not success:
+                errors.append(error)
+        return len(candidates) - len(errors), errors
+
+    def on_indexes_created(self, result):
+        """Сообщает об итогах и повторяет анализ"""
+        created, errors = result
+        if errors:
+            self.show_error(f"Создано индексов: {created}\n\n" + "\n".join(errors))
+        else:
+            QMessageBox.information(self, "Информация", f"Создано индексов: {created}")
+        self.analyze()
+
+    def clear_log(self):
+        """Очищает журнал запросов приложения"""
+        self.db_instance.reset_query_stats()
+        self.queries_table.setRowCount(0)
+        self.candidates_table.setRowCount(0)
+        self.candidates = []
+        self.create_btn.setEnabled(False)
+
+    def done(self, result):
+        """Отменяет незавершённый анализ при закрытии диалога"""
+        self.query_executor.cancel_all()
+        super().done(result)
+
+    def show_error(self, message):
+        """Показывает сообщение об ошибке"""
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def apply_styles(self):
+        """Применяет стили"""
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1,
+                                          stop: 0 #0a0a0f,
+                                          stop: 1 #1a1a2e);
+            }
+
+            QLabel {
+                color: #f8f8f2;
+                font-family: 'Consolas', 'Fira Code', monospace;
+            }
+
+            #headerLabel {
+                font-size: 20px;
+                font-weight: bold;
+                color: #64ffda;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 15px;
+                background: rgba(10, 10, 15, 0.7);
+                border-radius: 8px;
+            }
+
+            #infoLabel {
+                color: #8892b0;
+                font-size: 12px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 10px;
+                background: rgba(100, 255, 218, 0.1);
+                border-radius: 6px;
+                border-left: 3px solid #64ffda;
+            }
+
+            QTableWidget {
+                background: rgba(15, 15, 25, 0.8);
+                border: 2px solid #44475a;
+                border-radius: 6px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                color: #f8f8f2;
+                gridline-color: #44475a;
+            }
+
+            QHeaderView::section {
+                background: #44475a;
+                color: #64ffda;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
+
+            QSpinBox, QCheckBox {
+                color: #f8f8f2;
+                font-family: 'Consolas', 'Fira Code', monospace;
+            }
+
+            QSpinBox {
+                background: rgba(15, 15, 25, 0.8);
+                border: 2px solid #44475a;
+                border-radius: 6px;
+                padding: 4px;
+            }
+
+            QPushButton {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #44475a,
+                                          stop: 1 #2a2a3a);
+                border: 2px solid #6272a4;
+                border-radius: 6px;
+                color: #f8f8f2;
+                font-size: 12px;
+                font-weight: bold;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 6px 10px;
+            }
+
+            QPushButton:hover {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #6272a4,
+                                          stop: 1 #44475a);
+                border: 2px solid #64ffda;
+                color: #64ffda;
+            }
+
+            QPushButton:disabled {
+                color: #6272a4;
+                border: 2px solid #44475a;
+            }
+        """)
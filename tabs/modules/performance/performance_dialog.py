@@ -0,0 +1,293 @@
+"""
+Диалог метрик производительности: задержки методов DB и SQL-запросов
+"""
+
+from datetime import datetime
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QMessageBox, QTabWidget, QCheckBox, QFileDialog
+)
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QPalette, QColor
+
+
+class PerformanceDialog(QDialog):
+    """
+    Показывает метрики, которые приложение собирает само: время вызова
+    методов DB и время выполнения SQL-шаблонов (p50/p95/p99 по гистограмме),
+    число строк, примерный объём данных и ошибки. Метрики можно выгрузить
+    в текстовом формате Prometheus или в JSON.
+    """
+
+    METRIC_COLUMNS = ["Вызовы", "Ошибки", "Всего, мс", "p50, мс", "p95, мс", "p99, мс", "Макс., мс", "Строки", "Объём"]
+    REFRESH_INTERVAL_MS = 2000
+
+    def __init__(self, db_instance, parent=None):
+        super().__init__(parent)
+        self.db_instance = db_instance
+        self.setWindowTitle("Производительность")
+        self.setModal(True)
+        self.setMinimumSize(1100, 700)
+        self.resize(1200, 780)
+
+        self.set_dark_palette()
+
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        self.setLayout(main_layout)
+
+        header_label = QLabel("ПРОИЗВОДИТЕЛЬНОСТЬ")
+        header_label.setObjectName("headerLabel")
+        header_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(header_label)
+
+        self.info_label = QLabel()
+        self.info_label.setObjectName("infoLabel")
+        self.info_label.setWordWrap(True)
+        main_layout.addWidget(self.info_label)
+
+        controls_layout = QHBoxLayout()
+        self.tracking_check = QCheckBox("Собирать метрики")
+        self.tracking_check.setChecked(self.db_instance.instrumentation.enabled)
+        self.tracking_check.toggled.connect(self.db_instance.set_performance_tracking)
+        controls_layout.addWidget(self.tracking_check)
+        self.auto_refresh_check = QCheckBox("Автообновление")
+        self.auto_refresh_check.toggled.connect(self.toggle_auto_refresh)
+        controls_layout.addWidget(self.auto_refresh_check)
+        controls_layout.addStretch()
+        refresh_btn = QPushButton("Обновить")
+        refresh_btn.clicked.connect(self.refresh)
+        controls_layout.addWidget(refresh_btn)
+        reset_btn = QPushButton("Сбросить")
+        reset_btn.clicked.connect(self.reset_metrics)
+        controls_layout.addWidget(reset_btn)
+        main_layout.addLayout(controls_layout)
+
+        self.tabs = QTabWidget()
+        self.methods_table = self.create_table("Метод")
+        self.tabs.addTab(self.methods_table, "Методы")
+        self.statements_table = self.create_table("Запрос")
+        self.tabs.addTab(self.statements_table, "SQL")
+        main_layout.addWidget(self.tabs)
+
+        buttons_layout = QHBoxLayout()
+        prometheus_btn = QPushButton("Экспорт Prometheus")
+        prometheus_btn.clicked.connect(lambda: self.export_metrics("prometheus"))
+        buttons_layout.addWidget(prometheus_btn)
+        json_btn = QPushButton("Экспорт JSON")
+        json_btn.clicked.connect(lambda: self.export_metrics("json"))
+        buttons_layout.addWidget(json_btn)
+        buttons_layout.addStretch()
+        close_btn = QPushButton("Закрыть")
+        close_btn.setObjectName("closeButton")
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(close_btn)
+        main_layout.addLayout(buttons_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+        self.apply_styles()
+        self.refresh()
+
+    def create_table(self, name_title):
+        """Создаёт таблицу метрик с первым столбцом name_title"""
+        columns = [name_title] + self.METRIC_COLUMNS
+        table = QTableWidget(0, len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectRows)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        return table
+
+    def set_dark_palette(self):
+        """Устанавливает тёмную цветовую палитру"""
+        dark_palette = QPalette()
+        dark_palette.setColor(QPalette.Window, QColor(18, 18, 24))
+        dark_palette.setColor(QPalette.WindowText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Base, QColor(25, 25, 35))
+        dark_palette.setColor(QPalette.AlternateBase, QColor(35, 35, 45))
+        dark_palette.setColor(QPalette.Text, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Button, QColor(40, 40, 50))
+        dark_palette.setColor(QPalette.ButtonText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Highlight, QColor(64, 255, 218))
+        dark_palette.setColor(QPalette.HighlightedText, QColor(18, 18, 24))
+        self.setPalette(dark_palette)
+
+    def refresh(self):
+        """Перечитывает снимок метрик"""
+        snapshot = self.db_instance.get_performance_snapshot()
+        started = datetime.fromtimestamp(snapshot["started_at"]).strftime("%H:%M:%S")
+        total_ms = sum(entry["total_ms"] for entry in snapshot["statements"])
+        self.info_label.setText(
+            f"Метрики с {started}. Методов: {len(snapshot['methods'])}, "
+            f"SQL-шаблонов: {len(snapshot['statements'])}, время в БД: {total_ms:.1f} мс. "
+            f"Объём данных оценивается по возвращённым строкам."
+        )
+        self.fill_table(self.methods_table, snapshot["methods"], "name")
+        self.fill_table(self.statements_table, snapshot["statements"], "query")
+
+    def fill_table(self, table, entries, name_key):
+        """Заполняет таблицу метрик (строки уже отсортированы по суммарному времени)"""
+        table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            values = [
+                entry[name_key], entry["calls"], entry["errors"], entry["total_ms"], entry["p50_ms"],
+                entry["p95_ms"], entry["p99_ms"], entry["max_ms"], entry["rows"], self.format_bytes(entry["bytes"]),
+            ]
+            for column, value in enumerate(values):
+                if value is None:
+                    value = "—"
+                item = QTableWidgetItem(f"{value:.2f}" if isinstance(value, float) else str(value))
+                if column == 0:
+                    item.setToolTip(entry[name_key])
+                elif column == 2 and entry["errors"]:
+                    item.setForeground(QColor(255, 85, 85))
+                table.setItem(row, column, item)
+
+    @staticmethod
+    def format_bytes(size):
+        """Размер в удобных единицах"""
+        for unit in ("Б", "КБ", "МБ"):
+            if size < 1024:
+                return f"{size:.0f} {unit}"
+            size /= 1024
+        return f"{size:.1f} ГБ"
+
+    def toggle_auto_refresh(self, enabled):
+        """Включает или выключает периодическое обновление"""
+        if enabled:
+            self.refresh_timer.start()
+        else:
+            self.refresh_timer.stop()
+
+    def reset_metrics(self):
+        """Обнуляет накопленные метрики"""
+        self.db_instance.reset_performance_metrics()
+        self.refresh()
+
+    def export_metrics(self, fmt):
+        """Сохраняет метрики в файл выбранного формата"""
+        suffix, file_filter = (".prom", "Prometheus (*.prom)") if fmt == "prometheus" else (".json", "JSON (*.json)")
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт метрик", f"db_metrics{suffix}", file_filter)
+        if not path:
+            return
+        success, error = self.db_instance.export_performance_metrics(path, fmt)
+        if success:
+            QMessageBox.information(self, "Информация", f"Метрики сохранены в {path}")
+        else:
+            self.show_error(f"Не удалось сохранить метрики: {error}")
+
+    def done(self, result):
+        """Останавливает автообновление при закрытии диалога"""
+        self.refresh_timer.stop()
+        super().done(result)
+
+    def show_error(self, message):
+        """Показывает сообщение об ошибке"""
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def apply_styles(self):
+        """Применяет стили"""
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1,
+                                          stop: 0 #0a0a0f,
+                                          stop: 1 #1a1a2e);
+            }
+
+            QLabel {
+                color: #f8f8f2;
+                font-family: 'Consolas', 'Fira Code', monospace;
+            }
+
+            #headerLabel {
+                font-size: 20px;
+                font-weight: bold;
+                color: #64ffda;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 15px;
+                background: rgba(10, 10, 15, 0.7);
+                border-radius: 8px;
+            }
+
+            #infoLabel {
+                color: #8892b0;
+                font-size: 12px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 10px;
+                background: rgba(100, 255, 218, 0.1);
+                border-radius: 6px;
+                border-left: 3px solid #64ffda;
+            }
+
+            QTableWidget {
+                background: rgba(15, 15, 25, 0.8);
+                border: 2px solid #44475a;
+                border-radius: 6px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                color: #f8f8f2;
+                gridline-color: #44475a;
+            }
+
+            QHeaderView::section {
+                background: #44475a;
+                color: #64ffda;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
+
+            QCheckBox {
+                color: #f8f8f2;
+                font-family: 'Consolas', 'Fira Code', monospace;
+            }
+
+            QTabWidget::pane {
+                border: none;
+            }
+
+            QTabBar::tab {
+                background: #2a2a3a;
+                color: #f8f8f2;
+                padding: 6px 14px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                border-top-left-radius: 6px;
+                border-top-right-radius: 6px;
+            }
+
+            QTabBar::tab:selected {
+                background: #44475a;
+                color: #64ffda;
+            }
+
+            QPushButton {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #44475a,
+                                          stop: 1 #2a2a3a);
+                border: 2px solid #6272a4;
+                border-radius: 6px;
+                color: #f8f8f2;
+                font-size: 12px;
+                font-weight: bold;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 6px 10px;
+            }
+
+            QPushButton:hover {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #6272a4,
+                                          stop: 1 #44475a);
+                border: 2px solid #64ffda;
+                color: #64ffda;
+            }
+
+            QPushButton:disabled {
+                color: #6272a4;
+                border: 2px solid #44475a;
+            }
+        """)
@@ -2,14 +2,21 @@
 Диалоги для операций поиска и выборки данных
 """
 
-from .text_search_dialog import TextSearchDialog
-from .advanced_select_dialog import AdvancedSelectDialog, AggregateFunctionDialog, GroupingSetDialog
-from .case_expression_dialog import CaseExpressionDialog
-from .null_functions_dialog import NullFunctionsDialog
-from .subquery_filter_dialog import SubqueryFilterDialog
-from .views_dialog import ViewsDialog
-from .materialized_views_dialog import MaterializedViewsDialog
-from .cte_dialog import CTEDialog
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'TextSearchDialog': '.text_search_dialog',
+    'AdvancedSelectDialog': '.advanced_select_dialog',
+    'AggregateFunctionDialog': '.advanced_select_dialog',
+    'GroupingSetDialog': '.advanced_select_dialog',
+    'CaseExpressionDialog': '.case_expression_dialog',
+    'NullFunctionsDialog': '.null_functions_dialog',
+    'SubqueryFilterDialog': '.subquery_filter_dialog',
+    'ViewsDialog': '.views_dialog',
+    'MaterializedViewsDialog': '.materialized_views_dialog',
+    'CTEDialog': '.cte_dialog',
+    'ExplainPlanDialog': '.explain_plan_dialog',
+})
 
 __all__ = [
     'TextSearchDialog',
@@ -21,5 +28,6 @@ __all__ = [
     'SubqueryFilterDialog',
     'ViewsDialog',
     'MaterializedViewsDialog',
-    'CTEDialog'
+    'CTEDialog',
+    'ExplainPlanDialog'
 ]
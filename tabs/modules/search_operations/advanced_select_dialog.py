@@ -2,17 +2,15 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QComboBox, QFormLayout, QMessageBox, QWidget, QTextEdit, QCheckBox,
     QGroupBox, QScrollArea, QListWidget, QListWidgetItem, QSplitter,
-    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox,
+    QProgressBar
 )
 from PySide6.QtCore import Qt, QSize, Signal
 from PySide6.QtGui import QFont, QPalette, QColor
 from plyer import notification
 import re
 
-# Import new dialogs
-from .case_expression_dialog import CaseExpressionDialog
-from .null_functions_dialog import NullFunctionsDialog
-from .subquery_filter_dialog import SubqueryFilterDialog
+from db.query_executor import QueryExecutor
 
 
 class SortColumnWidget(QWidget):
@@ -181,6 +179,10 @@ class AdvancedSelectDialog(QDialog):
         self.preview_button.setObjectName("previewButton")
         self.preview_button.clicked.connect(self.preview_sql)
         
+        self.explain_button = QPushButton("План запроса (EXPLAIN ANALYZE)")
+        self.explain_button.setObjectName("previewButton")
+        self.explain_button.clicked.connect(self.explain_query_plan)
+        
         self.clear_button = QPushButton("Очистить")
         self.clear_button.setObjectName("clearButton")
         self.clear_button.clicked.connect(self.clear_all)
@@ -189,9 +191,27 @@ class AdvancedSelectDialog(QDialog):
         self.close_button.setObjectName("closeButton")
         self.close_button.clicked.connect(self.accept)
         
+        # Индикатор и отмена фонового выполнения запроса
+        self.query_progress = QProgressBar()
+        self.query_progress.setRange(0, 0)
+        self.query_progress.setMaximumWidth(160)
+        self.query_progress.setTextVisible(False)
+        self.query_progress.setVisible(False)
+        
+        self.cancel_query_button = QPushButton("Отменить запрос")
+        self.cancel_query_button.setObjectName("clearButton")
+        self.cancel_query_button.setVisible(False)
+        self.cancel_query_button.clicked.connect(self.cancel_running_query)
+        
+        self.query_executor = QueryExecutor(self.db_instance, parent=self)
+        self.running_task = None
+        
         buttons_layout.addWidget(self.execute_button)
         buttons_layout.addWidget(self.preview_button)
+        buttons_layout.addWidget(self.explain_button)
         buttons_layout.addWidget(self.clear_button)
+        buttons_layout.addWidget(self.query_progress)
+        buttons_layout.addWidget(self.cancel_query_button)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.close_button)
         
@@ -909,6 +929,7 @@ class AdvancedSelectDialog(QDialog):
     def add_case_expression(self):
         """Добавляет CASE выражение"""
         # Создаем диалог для создания CASE выражения
+        from .case_expression_dialog import CaseExpressionDialog
         dialog = CaseExpressionDialog(self.selected_columns, self)
         if dialog.exec() == QDialog.Accepted:
             case_expr = dialog.get_case_expression()
@@ -920,6 +941,7 @@ class AdvancedSelectDialog(QDialog):
     def add_null_function(self):
         """Добавляет функцию работы с NULL (COALESCE или NULLIF)"""
         # Создаем диалог для выбора функции NULL
+        from .null_functions_dialog import NullFunctionsDialog
         dialog = NullFunctionsDialog(self.selected_columns, self)
         if dialog.exec() == QDialog.Accepted:
             null_func = dialog.get_null_function()
@@ -950,6 +972,7 @@ class AdvancedSelectDialog(QDialog):
             return
         
         # Создаем диалог для создания подзапроса
+        from .subquery_filter_dialog import SubqueryFilterDialog
         dialog = SubqueryFilterDialog(self.db_instance, table_name, self)
         if dialog.exec() == QDialog.Accepted:
             subquery_condition = dialog.get_subquery_condition()
@@ -1267,25 +1290,101 @@ class AdvancedSelectDialog(QDialog):
                 self.show_error("Не удалось построить запрос. Убедитесь, что выбрана таблица и столбцы.")
                 return
                 
-            # Выполняем запрос
-            results = self.db_instance.execute_custom_query(sql_query)
+            # Выполняем запрос в фоне, чтобы диалог оставался отзывчивым
+            self.set_query_running(True)
+            self.running_task = self.query_executor.submit(
+                self.db_instance.execute_custom_query,
+                sql_query,
+                on_result=self.on_query_finished,
+                on_error=self.on_query_failed,
+                on_cancelled=self.on_query_cancelled,
+                description="Выполнение запроса"
+            )
             
-            if not results:
-                self.show_error("Запрос не вернул результатов")
+        except Exception as e:
+            error_msg = f"Ошибка при выполнении запроса: {e}"
+            self.show_error(error_msg)
+            
+    def set_query_running(self, running):
+        """Переключает состояние кнопок на время выполнения запроса"""
+        self.execute_button.setEnabled(not running)
+        self.explain_button.setEnabled(not running)
+        self.query_progress.setVisible(running)
+        self.cancel_query_button.setVisible(running)
+        if not running:
+            self.running_task = None
+            
+    def explain_query_plan(self):
+        """Строит запрос и показывает его план выполнения (EXPLAIN ANALYZE)"""
+        try:
+            if not self.db_instance or not self.db_instance.is_connected():
+                self.show_error("Нет подключения к базе данных")
                 return
-                
-            # Отправляем результаты в главную таблицу
-            self.results_to_main_table.emit(results)
             
-            # Показываем уведомление об успехе
-            self.show_info(f"Запрос выполнен успешно! Найдено {len(results)} записей. Результаты отправлены в главную таблицу.")
+            sql_query = self.build_sql_query()
+            if not sql_query:
+                self.show_error("Не удалось построить запрос. Убедитесь, что выбрана таблица и столбцы.")
+                return
             
-            # Закрываем диалог
-            self.accept()
+            # EXPLAIN ANALYZE выполняет запрос — тоже в фоне и с возможностью отмены
+            self.set_query_running(True)
+            self.running_task = self.query_executor.submit(
+                self.db_instance.explain_query,
+                sql_query,
+                on_result=lambda result, sql=sql_query: self.on_explain_finished(sql, result),
+                on_error=self.on_query_failed,
+                on_cancelled=self.on_query_cancelled,
+                description="Получение плана запроса"
+            )
             
         except Exception as e:
-            error_msg = f"Ошибка при выполнении запроса: {e}"
-            self.show_error(error_msg)
+            self.show_error(f"Ошибка при получении плана запроса: {e}")
+            
+    def on_explain_finished(self, sql_query, result):
+        """Открывает просмотр плана после завершения EXPLAIN"""
+        self.set_query_running(False)
+        plan, error = result
+        if plan is None:
+            self.show_error(error or "Не удалось получить план запроса")
+            return
+        from .explain_plan_dialog import ExplainPlanDialog
+        ExplainPlanDialog(plan, sql_query, parent=self).exec()
+            
+    def cancel_running_query(self):
+        """Отменяет выполняющийся запрос на сервере"""
+        if self.running_task:
+            self.running_task.cancel()
+            
+    def on_query_finished(self, results):
+        """Обработка результатов фонового запроса"""
+        self.set_query_running(False)
+        if not results:
+            self.show_error("Запрос не вернул результатов")
+            return
+            
+        # Отправляем результаты в главную таблицу
+        self.results_to_main_table.emit(results)
+        
+        # Показываем уведомление об успехе
+        self.show_info(f"Запрос выполнен успешно! Найдено {len(results)} записей. Результаты отправлены в главную таблицу.")
+        
+        # Закрываем диалог
+        self.accept()
+        
+    def on_query_failed(self, error):
+        """Обработка ошибки фонового запроса"""
+        self.set_query_running(False)
+        self.show_error(f"Ошибка при выполнении запроса: {error}")
+        
+    def on_query_cancelled(self):
+        """Обработка отмены фонового запроса"""
+        self.set_query_running(False)
+        self.show_info("Выполнение запроса отменено")
+        
+    def done(self, result):
+        # Не оставляем запрос выполняться после закрытия диалога
+        self.query_executor.cancel_all()
+        super().done(result)
             
     def build_sql_query(self):
         """Строит SQL запрос на основе настроек"""
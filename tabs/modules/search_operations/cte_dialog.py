@@ -6,12 +6,14 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QComboBox, QFormLayout, QMessageBox, QWidget, QTextEdit, QCheckBox,
     QGroupBox, QScrollArea, QListWidget, QListWidgetItem, QSplitter,
-    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox, QProgressBar
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QPalette, QColor
 from plyer import notification
 
+from db.query_executor import QueryExecutor
+
 
 class CTEDialog(QDialog):
     """Диалог для работы с Common Table Expressions (CTE)"""
@@ -22,6 +24,8 @@ class CTEDialog(QDialog):
     def __init__(self, db_instance, parent=None):
         super().__init__(parent)
         self.db_instance = db_instance
+        self.query_executor = QueryExecutor(self.db_instance, parent=self)
+        self.running_task = None
         self.setWindowTitle("Конструктор CTE (WITH-запросы)")
         self.setModal(True)
         self.setMinimumSize(1000, 800)
@@ -191,9 +195,12 @@ class CTEDialog(QDialog):
         # Кнопки действий
         actions_layout = QHBoxLayout()
         
-        execute_btn = QPushButton("Выполнить и отправить в главную таблицу")
-        execute_btn.setObjectName("executeButton")
-        execute_btn.clicked.connect(self.execute_query)
+        self.execute_btn = QPushButton("Выполнить и отправить в главную таблицу")
+        self.execute_btn.setObjectName("executeButton")
+        self.execute_btn.clicked.connect(self.execute_query)
+        
+        self.explain_btn = QPushButton("План запроса (EXPLAIN ANALYZE)")
+        self.explain_btn.clicked.connect(self.explain_query_plan)
         
         copy_btn = QPushButton("Копировать SQL")
         copy_btn.clicked.connect(self.copy_sql)
@@ -206,9 +213,24 @@ class CTEDialog(QDialog):
         close_btn.setObjectName("closeButton")
         close_btn.clicked.connect(self.accept)
         
-        actions_layout.addWidget(execute_btn)
+        # Индикатор и отмена фонового выполнения запроса
+        self.query_progress = QProgressBar()
+        self.query_progress.setRange(0, 0)
+        self.query_progress.setMaximumWidth(160)
+        self.query_progress.setTextVisible(False)
+        self.query_progress.setVisible(False)
+        
+        self.cancel_query_button = QPushButton("Отменить запрос")
+        self.cancel_query_button.setObjectName("clearButton")
+        self.cancel_query_button.setVisible(False)
+        self.cancel_query_button.clicked.connect(self.cancel_running_query)
+        
+        actions_layout.addWidget(self.execute_btn)
+        actions_layout.addWidget(self.explain_btn)
         actions_layout.addWidget(copy_btn)
         actions_layout.addWidget(clear_btn)
+        actions_layout.addWidget(self.query_progress)
+        actions_layout.addWidget(self.cancel_query_button)
         actions_layout.addStretch()
         actions_layout.addWidget(close_btn)
         
@@ -455,26 +477,98 @@ class CTEDialog(QDialog):
             self.sql_preview.setPlainText("Не удалось построить запрос")
             
     def execute_query(self):
-        """Выполняет запрос и отправляет результаты"""
+        """Выполняет запрос в фоне и отправляет результаты"""
         try:
             sql = self.build_sql_query()
             if not sql:
                 self.show_error("Не удалось построить запрос")
                 return
                 
-            results = self.db_instance.execute_custom_query(sql)
+            self.set_query_running(True)
+            self.running_task = self.query_executor.submit(
+                self.db_instance.execute_custom_query,
+                sql,
+                on_result=self.on_query_finished,
+                on_error=self.on_query_failed,
+                on_cancelled=self.on_query_cancelled,
+                description="Выполнение запроса"
+            )
             
-            if not results:
-                self.show_info("Запрос выполнен, но не вернул результатов")
+        except Exception as e:
+            self.show_error(f"Ошибка выполнения: {e}")
+            
+    def explain_query_plan(self):
+        """Показывает план выполнения построенного запроса (EXPLAIN ANALYZE)"""
+        try:
+            sql = self.build_sql_query()
+            if not sql:
+                self.show_error("Не удалось построить запрос")
                 return
-                
-            # Отправляем результаты в главную таблицу
-            self.results_to_main_table.emit(results)
-            self.show_info(f"Запрос выполнен успешно! Найдено {len(results)} записей.")
-            self.accept()
+            
+            # EXPLAIN ANALYZE выполняет запрос — тоже в фоне и с возможностью отмены
+            self.set_query_running(True)
+            self.running_task = self.query_executor.submit(
+                self.db_instance.explain_query,
+                sql,
+                on_result=lambda result, query=sql: self.on_explain_finished(query, result),
+                on_error=self.on_query_failed,
+                on_cancelled=self.on_query_cancelled,
+                description="Получение плана запроса"
+            )
             
         except Exception as e:
-            self.show_error(f"Ошибка выполнения: {e}")
+            self.show_error(f"Ошибка получения плана: {e}")
+            
+    def set_query_running(self, running):
+        """Переключает состояние кнопок на время выполнения запроса"""
+        self.execute_btn.setEnabled(not running)
+        self.explain_btn.setEnabled(not running)
+        self.query_progress.setVisible(running)
+        self.cancel_query_button.setVisible(running)
+        if not running:
+            self.running_task = None
+            
+    def cancel_running_query(self):
+        """Отменяет выполняющийся запрос на сервере"""
+        if self.running_task:
+            self.running_task.cancel()
+            
+    def on_query_finished(self, results):
+        """Обработка результатов фонового запроса"""
+        self.set_query_running(False)
+        if not results:
+            self.show_info("Запрос выполнен, но не вернул результатов")
+            return
+            
+        # Отправляем результаты в главную таблицу
+        self.results_to_main_table.emit(results)
+        self.show_info(f"Запрос выполнен успешно! Найдено {len(results)} записей.")
+        self.accept()
+            
+    def on_explain_finished(self, sql, result):
+        """Открывает просмотр плана после завершения EXPLAIN"""
+        self.set_query_running(False)
+        plan, error = result
+        if plan is None:
+            self.show_error(error or "Не удалось получить план запроса")
+            return
+        from .explain_plan_dialog import ExplainPlanDialog
+        ExplainPlanDialog(plan, sql, parent=self).exec()
+        
+    def on_query_failed(self, error):
+        """Обработка ошибки фонового запроса"""
+        self.set_query_running(False)
+        self.show_error(f"Ошибка выполнения: {error}")
+        
+    def on_query_cancelled(self):
+        """Обработка отмены фонового запроса"""
+        self.set_query_running(False)
+        self.show_info("Выполнение запроса отменено")
+        
+    def done(self, result):
+        """Отменяет незавершённый запрос или EXPLAIN ANALYZE при закрытии диалога"""
+        self.query_executor.cancel_all()
+        super().done(result)
             
     def copy_sql(self):
         """Копирует SQL в буфер обмена"""
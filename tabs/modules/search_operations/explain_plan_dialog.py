@@ -0,0 +1,251 @@
+"""
+Диалог просмотра плана выполнения запроса (EXPLAIN / EXPLAIN ANALYZE)
+"""
+
+import json
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget,
+    QTreeWidgetItem, QTextEdit, QSplitter, QApplication, QHeaderView
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPalette, QColor, QBrush
+
+
+class ExplainPlanDialog(QDialog):
+    """
+    Показывает дерево плана: время узла (общее и собственное), строки
+    (оценка и факт), циклы и буферы. Узлы с Seq Scan по большим таблицам
+    и с ошибочной оценкой числа строк подсвечиваются.
+    """
+
+    COLUMNS = ["Узел", "Объект", "Время, мс", "Собств., мс", "Строки (план / факт)",
+               "Циклы", "Буферы (hit / read)", "Стоимость"]
+
+    def __init__(self, plan, sql_query, parent=None):
+        super().__init__(parent)
+        self.plan = plan
+        self.sql_query = sql_query
+        self.setWindowTitle("План выполнения запроса")
+        self.setModal(True)
+        self.setMinimumSize(1100, 700)
+        self.resize(1200, 750)
+
+        self.set_dark_palette()
+
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        self.setLayout(main_layout)
+
+        header_label = QLabel("ПЛАН ВЫПОЛНЕНИЯ (EXPLAIN ANALYZE)")
+        header_label.setObjectName("headerLabel")
+        header_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(header_label)
+
+        summary_label = QLabel(self.build_summary())
+        summary_label.setObjectName("infoLabel")
+        summary_label.setWordWrap(True)
+        main_layout.addWidget(summary_label)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        self.plan_tree = QTreeWidget()
+        self.plan_tree.setHeaderLabels(self.COLUMNS)
+        self.plan_tree.setAlternatingRowColors(True)
+        self.plan_tree.header().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.plan_tree.currentItemChanged.connect(self.on_node_selected)
+        splitter.addWidget(self.plan_tree)
+
+        self.details_text = QTextEdit()
+        self.details_text.setReadOnly(True)
+        splitter.addWidget(self.details_text)
+        splitter.setSizes([500, 150])
+        main_layout.addWidget(splitter)
+
+        buttons_layout = QHBoxLayout()
+        copy_json_btn = QPushButton("Копировать план (JSON)")
+        copy_json_btn.clicked.connect(self.copy_plan_json)
+        copy_sql_btn = QPushButton("Копировать SQL")
+        copy_sql_btn.clicked.connect(self.copy_sql)
+        close_btn = QPushButton("Закрыть")
+        close_btn.setObjectName("closeButton")
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(copy_json_btn)
+        buttons_layout.addWidget(copy_sql_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(close_btn)
+        main_layout.addLayout(buttons_layout)
+
+        self.populate_tree()
+        self.apply_styles()
+
+    def set_dark_palette(self):
+        """Устанавливает тёмную цветовую палитру"""
+        dark_palette = QPalette()
+        dark_palette.setColor(QPalette.Window, QColor(18, 18, 24))
+        dark_palette.setColor(QPalette.WindowText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Base, QColor(25, 25, 35))
+        dark_palette.setColor(QPalette.AlternateBase, QColor(35, 35, 45))
+        dark_palette.setColor(QPalette.Text, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Button, QColor(40, 40, 50))
+        dark_palette.setColor(QPalette.ButtonText, QColor(240, 240, 240))
+        dark_palette.setColor(QPalette.Highlight, QColor(64, 255, 218))
+        dark_palette.setColor(QPalette.HighlightedText, QColor(18, 18, 24))
+        self.setPalette(dark_palette)
+
+    def build_summary(self):
+        """Формирует строку с общим временем и количеством предупреждений"""
+        parts = []
+        if self.plan.get("planning_time") is not None:
+            parts.append(f"Планирование: {self.plan['planning_time']:.2f} мс")
+        if self.plan.get("execution_time") is not None:
+            parts.append(f"Выполнение: {self.plan['execution_time']:.2f} мс")
+        warnings = self.plan.get("warnings", [])
+        if warnings:
+            parts.append(f"Предупреждений: {len(warnings)} (узлы подсвечены)")
+        else:
+            parts.append("Проблемных узлов не найдено")
+        return "   |   ".join(parts)
+
+    def populate_tree(self):
+        """Заполняет дерево узлов плана"""
+        self.plan_tree.clear()
+        root_item = self.create_item(self.plan["root"])
+        self.plan_tree.addTopLevelItem(root_item)
+        self.plan_tree.expandAll()
+        self.plan_tree.setCurrentItem(root_item)
+
+    def create_item(self, node):
+        """Создаёт элемент дерева для узла плана и его потомков"""
+        def fmt(value, digits=2):
+            if value is None:
+                return "—"
+            return f"{value:.{digits}f}" if isinstance(value, float) else str(value)
+
+        rows = f"{fmt(node['plan_rows'], 0)} / {fmt(node['actual_rows'], 0)}"
+        buffers = "—"
+        if node["shared_hit"] is not None:
+            buffers = f"{node['shared_hit']} / {node['shared_read']}"
+
+        item = QTreeWidgetItem([
+            node["label"],
+            node["target"],
+            fmt(node["total_time"]),
+            fmt(node["self_time"]),
+            rows,
+            fmt(node["loops"]),
+            buffers,
+            fmt(node["total_cost"]),
+        ])
+        item.setData(0, Qt.UserRole, node)
+
+        if node["warnings"]:
+            warning_brush = QBrush(QColor(255, 85, 85, 90))
+            for column in range(len(self.COLUMNS)):
+                item.setBackground(column, warning_brush)
+                item.setToolTip(column, "\n".join(node["warnings"]))
+
+        for child in node["children"]:
+            item.addChild(self.create_item(child))
+        return item
+
+    def on_node_selected(self, current, previous=None):
+        """Показывает условие и предупреждения выбранного узла"""
+        if current is None:
+            self.details_text.clear()
+            return
+        node = current.data(0, Qt.UserRole)
+        lines = [f"{node['label']} {node['target']}".strip()]
+        if node["condition"]:
+            lines.append(f"Условие: {node['condition']}")
+        if node["temp_written"]:
+            lines.append(f"Записано во временные файлы: {node['temp_written']} блоков")
+        for warning in node["warnings"]:
+            lines.append(f"⚠ {warning}")
+        self.details_text.setPlainText("\n".join(lines))
+
+    def copy_plan_json(self):
+        """Копирует исходный план в формате JSON"""
+        QApplication.clipboard().setText(json.dumps(self.plan.get("raw", {}), ensure_ascii=False, indent=2))
+
+    def copy_sql(self):
+        """Копирует SQL запроса"""
+        QApplication.clipboard().setText(self.sql_query)
+
+    def apply_styles(self):
+        """Применяет стили"""
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1,
+                                          stop: 0 #0a0a0f,
+                                          stop: 1 #1a1a2e);
+            }
+
+            #headerLabel {
+                font-size: 20px;
+                font-weight: bold;
+                color: #64ffda;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 15px;
+                background: rgba(10, 10, 15, 0.7);
+                border-radius: 8px;
+            }
+
+            #infoLabel {
+                color: #8892b0;
+                font-size: 12px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 10px;
+                background: rgba(100, 255, 218, 0.1);
+                border-radius: 6px;
+                border-left: 3px solid #64ffda;
+            }
+
+            QTreeWidget {
+                background: rgba(15, 15, 25, 0.8);
+                border: 2px solid #44475a;
+                border-radius: 6px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                color: #f8f8f2;
+            }
+
+            QHeaderView::section {
+                background: #44475a;
+                color: #64ffda;
+                padding: 6px;
+                border: none;
+                font-weight: bold;
+            }
+
+            QTextEdit {
+                background: rgba(15, 15, 25, 0.8);
+                border: 2px solid #44475a;
+                border-radius: 6px;
+                padding: 8px;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                color: #50fa7b;
+                font-size: 12px;
+            }
+
+            QPushButton {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #44475a,
+                                          stop: 1 #2a2a3a);
+                border: 2px solid #6272a4;
+                border-radius: 6px;
+                color: #f8f8f2;
+                font-size: 12px;
+                font-weight: bold;
+                font-family: 'Consolas', 'Fira Code', monospace;
+                padding: 6px 10px;
+            }
+
+            QPushButton:hover {
+                background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                          stop: 0 #6272a4,
+                                          stop: 1 #44475a);
+                border: 2px solid #64ffda;
+                color: #64ffda;
+            }
+        """)
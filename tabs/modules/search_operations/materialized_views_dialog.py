@@ -6,11 +6,14 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
     QComboBox, QFormLayout, QMessageBox, QWidget, QTextEdit, QCheckBox,
     QGroupBox, QScrollArea, QListWidget, QListWidgetItem, QSplitter,
-    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView
+    QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QSpinBox
 )
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QPalette, QColor
 from plyer import notification
+import re
+
+from db.query_executor import QueryExecutor
 
 
 class MaterializedViewsDialog(QDialog):
@@ -19,6 +22,7 @@ class MaterializedViewsDialog(QDialog):
     def __init__(self, db_instance, parent=None):
         super().__init__(parent)
         self.db_instance = db_instance
+        self.query_executor = QueryExecutor(self.db_instance, parent=self)
         self.setWindowTitle("Управление материализованными представлениями")
         self.setModal(True)
         self.setMinimumSize(950, 750)
@@ -121,6 +125,12 @@ class MaterializedViewsDialog(QDialog):
         self.matview_table_combo.currentTextChanged.connect(self.on_matview_table_changed)
         settings_layout.addRow("Базовая таблица:", self.matview_table_combo)
         
+        # Итоговая таблица вместо MATERIALIZED VIEW
+        self.summary_table_check = QCheckBox(
+            "Итоговая таблица с инкрементальным пересчётом (COUNT/SUM/MIN/MAX обновляются триггером, без REFRESH)"
+        )
+        settings_layout.addRow("", self.summary_table_check)
+        
         layout.addWidget(settings_group)
         
         # Группа выбора столбцов
@@ -264,8 +274,45 @@ class MaterializedViewsDialog(QDialog):
         self.matview_definition_text.setMaximumHeight(120)
         info_layout.addWidget(self.matview_definition_text)
         
+        self.matview_status_label = QLabel("")
+        self.matview_status_label.setObjectName("infoLabel")
+        self.matview_status_label.setWordWrap(True)
+        info_layout.addWidget(self.matview_status_label)
+        
         layout.addWidget(info_group)
         
+        # Группа обновления
+        refresh_group = QGroupBox("Обновление данных")
+        refresh_layout = QVBoxLayout()
+        refresh_group.setLayout(refresh_layout)
+        
+        self.concurrent_refresh_check = QCheckBox(
+            "CONCURRENTLY — не блокировать чтение во время обновления "
+            "(уникальный индекс создаётся автоматически)"
+        )
+        self.concurrent_refresh_check.setChecked(True)
+        refresh_layout.addWidget(self.concurrent_refresh_check)
+        
+        schedule_layout = QHBoxLayout()
+        schedule_layout.addWidget(QLabel("Обновлять каждые"))
+        self.refresh_interval_spin = QSpinBox()
+        self.refresh_interval_spin.setRange(1, 1440)
+        self.refresh_interval_spin.setValue(15)
+        self.refresh_interval_spin.setSuffix(" мин")
+        schedule_layout.addWidget(self.refresh_interval_spin)
+        
+        schedule_btn = QPushButton("Включить расписание")
+        schedule_btn.clicked.connect(self.schedule_matview_refresh)
+        schedule_layout.addWidget(schedule_btn)
+        
+        unschedule_btn = QPushButton("Отключить расписание")
+        unschedule_btn.clicked.connect(self.unschedule_matview_refresh)
+        schedule_layout.addWidget(unschedule_btn)
+        schedule_layout.addStretch()
+        refresh_layout.addLayout(schedule_layout)
+        
+        layout.addWidget(refresh_group)
+        
         # Группа данных
         data_group = QGroupBox("Данные материализованного представления")
         data_layout = QVBoxLayout()
@@ -283,16 +330,16 @@ class MaterializedViewsDialog(QDialog):
         show_data_btn = QPushButton("Показать данные")
         show_data_btn.clicked.connect(self.show_matview_data)
         
-        refresh_data_btn = QPushButton("REFRESH (Обновить данные)")
-        refresh_data_btn.setObjectName("refreshButton")
-        refresh_data_btn.clicked.connect(self.refresh_matview_data)
+        self.refresh_data_btn = QPushButton("REFRESH (Обновить данные)")
+        self.refresh_data_btn.setObjectName("refreshButton")
+        self.refresh_data_btn.clicked.connect(self.refresh_matview_data)
         
         delete_btn = QPushButton("Удалить")
         delete_btn.setObjectName("deleteButton")
         delete_btn.clicked.connect(self.delete_matview)
         
         actions_layout.addWidget(show_data_btn)
-        actions_layout.addWidget(refresh_data_btn)
+        actions_layout.addWidget(self.refresh_data_btn)
         actions_layout.addStretch()
         actions_layout.addWidget(delete_btn)
         layout.addLayout(actions_layout)
@@ -459,6 +506,10 @@ class MaterializedViewsDialog(QDialog):
                 self.show_error(f"Ошибка в WHERE условии: {error_msg}")
                 return
             
+            if self.summary_table_check.isChecked():
+                self.create_summary_table(mv_name, table_name, groupby_cols, where_clause)
+                return
+            
             sql = f'CREATE MATERIALIZED VIEW "{mv_name}" AS SELECT {select_clause} FROM "{table_name}"'
             if where_clause:
                 sql += f" WHERE {where_clause}"
@@ -480,6 +531,42 @@ class MaterializedViewsDialog(QDialog):
         except Exception as e:
             self.show_error(f"Ошибка: {e}")
             
+    def create_summary_table(self, name, table_name, groupby_cols, where_clause):
+        """Создает итоговую таблицу, поддерживаемую триггером, из настроек вкладки"""
+        if where_clause:
+            self.show_error("Условие WHERE не поддерживается для итоговой таблицы")
+            return
+        if not groupby_cols:
+            self.show_error("Для итоговой таблицы выберите столбцы GROUP BY")
+            return
+        
+        aggregates = {}
+        for i in range(self.matview_aggregates.count()):
+            agg_text = self.matview_aggregates.item(i).text()
+            match = re.match(r'^(COUNT|SUM|MIN|MAX)\((\*|"([^"]+)")\)(?: AS "([^"]+)")?$', agg_text, re.I)
+            if not match:
+                self.show_error(f"Агрегат '{agg_text}' не поддерживается итоговой таблицей (только COUNT, SUM, MIN, MAX)")
+                return
+            func, column, alias = match.group(1).upper(), match.group(3), match.group(4)
+            alias = alias or f"{func.lower()}_{column or 'all'}"
+            aggregates[alias] = (func, column)
+        if not aggregates:
+            self.show_error("Для итоговой таблицы добавьте хотя бы одну агрегатную функцию")
+            return
+        
+        success, error = self.db_instance.create_summary_table(
+            name, table_name, [col.strip('"') for col in groupby_cols], aggregates
+        )
+        if success:
+            self.show_info(
+                f"Итоговая таблица '{name}' создана и будет обновляться автоматически "
+                f"при изменении '{table_name}'."
+            )
+            self.matview_name_input.clear()
+            self.matview_aggregates.clear()
+        else:
+            self.show_error(error or "Не удалось создать итоговую таблицу")
+            
     def refresh_matviews_list(self):
         """Обновляет список материализованных представлений"""
         try:
@@ -529,6 +616,8 @@ class MaterializedViewsDialog(QDialog):
                 self.matview_definition_text.setPlainText(definition)
             else:
                 self.matview_definition_text.setPlainText("Не удалось получить определение")
+            
+            self.update_matview_status(mv_name)
                 
         except Exception as e:
             self.matview_definition_text.setPlainText(f"Ошибка: {e}")
@@ -589,18 +678,108 @@ class MaterializedViewsDialog(QDialog):
                 self.show_error("Некорректное имя представления")
                 return
             
-            sql = f'REFRESH MATERIALIZED VIEW "{mv_name}"'
-            success = self.db_instance.execute_ddl(sql)
-            
-            if success:
-                self.show_info(f"Данные '{mv_name}' успешно обновлены (REFRESH)!")
-                self.show_matview_data()
-            else:
-                self.show_error("Не удалось обновить данные")
+            # Обновление может занимать долго — выполняем в фоне
+            self.refresh_data_btn.setEnabled(False)
+            self.query_executor.submit(
+                self.db_instance.refresh_materialized_view,
+                mv_name,
+                concurrently=self.concurrent_refresh_check.isChecked(),
+                on_result=lambda result, name=mv_name: self.on_matview_refreshed(name, result),
+                on_error=self.on_matview_refresh_failed,
+                description=f"REFRESH {mv_name}"
+            )
                 
         except Exception as e:
+            self.refresh_data_btn.setEnabled(True)
             self.show_error(f"Ошибка: {e}")
             
+    def on_matview_refreshed(self, mv_name, result):
+        """Обработка завершения фонового REFRESH"""
+        self.refresh_data_btn.setEnabled(True)
+        success, error = result
+        if success:
+            self.show_info(f"Данные '{mv_name}' успешно обновлены (REFRESH)!")
+            self.show_matview_data()
+            self.update_matview_status(mv_name)
+        else:
+            self.show_error(error or "Не удалось обновить данные")
+            
+    def on_matview_refresh_failed(self, error):
+        """Обработка ошибки фонового REFRESH"""
+        self.refresh_data_btn.setEnabled(True)
+        self.show_error(f"Не удалось обновить данные: {error}")
+        
+    def update_matview_status(self, mv_name):
+        """Показывает время последнего обновления, актуальность и расписание"""
+        status = self.db_instance.get_matview_status(mv_name)
+        if not status:
+            self.matview_status_label.setText("")
+            return
+        status = status[0]
+        
+        lines = []
+        if status["last_refresh"]:
+            mode = ", CONCURRENTLY" if status["concurrently"] else ""
+            if status["rows"] is None:
+                rows = "н/д"
+            else:
+                rows = status["rows"] if status["rows_exact"] else f"≈{status['rows']}"
+            lines.append(
+                f"Последнее обновление: {status['last_refresh']:%d.%m.%Y %H:%M:%S} "
+                f"({status['duration']:.2f} с, строк: {rows}{mode})"
+            )
+        else:
+            lines.append("Последнее обновление: не выполнялось в этом сеансе")
+        
+        if not status["populated"]:
+            lines.append("Представление не заполнено данными")
+        elif status["stale"]:
+            lines.append(f"Данные устарели: изменений в базовых таблицах — {status['changes_since_refresh']}")
+        elif status["stale"] is False:
+            lines.append("Данные актуальны")
+        
+        if status["has_unique_index"]:
+            lines.append("Уникальный индекс для CONCURRENTLY: есть")
+        else:
+            lines.append("Уникальный индекс для CONCURRENTLY: будет создан при обновлении")
+        
+        if status["interval"]:
+            lines.append(f"Плановое обновление: каждые {status['interval'] / 60:g} мин")
+        if status["error"]:
+            lines.append(f"Последняя ошибка: {status['error']}")
+        
+        self.matview_status_label.setText("\n".join(lines))
+        
+    def schedule_matview_refresh(self):
+        """Включает фоновое обновление выбранного представления"""
+        selected_item = self.matviews_list.currentItem()
+        if not selected_item:
+            self.show_error("Выберите материализованное представление")
+            return
+        
+        mv_name = selected_item.text()
+        minutes = self.refresh_interval_spin.value()
+        if self.db_instance.schedule_matview_refresh(
+                mv_name, minutes * 60, concurrently=self.concurrent_refresh_check.isChecked()):
+            self.show_info(f"'{mv_name}' будет обновляться каждые {minutes} мин (если изменились базовые таблицы)")
+            self.update_matview_status(mv_name)
+        else:
+            self.show_error("Не удалось включить расписание")
+            
+    def unschedule_matview_refresh(self):
+        """Отключает фоновое обновление выбранного представления"""
+        selected_item = self.matviews_list.currentItem()
+        if not selected_item:
+            self.show_error("Выберите материализованное представление")
+            return
+        
+        mv_name = selected_item.text()
+        if self.db_instance.unschedule_matview_refresh(mv_name):
+            self.show_info(f"Плановое обновление '{mv_name}' отключено")
+            self.update_matview_status(mv_name)
+        else:
+            self.show_info(f"Для '{mv_name}' расписание не задано")
+            
     def delete_matview(self):
         """Удаляет материализованное представление"""
         try:
@@ -627,6 +806,7 @@ class MaterializedViewsDialog(QDialog):
             if reply != QMessageBox.Yes:
                 return
                 
+            self.db_instance.unschedule_matview_refresh(mv_name)
             sql = f'DROP MATERIALIZED VIEW IF EXISTS "{mv_name}" CASCADE'
             success = self.db_instance.execute_ddl(sql)
             
@@ -641,6 +821,11 @@ class MaterializedViewsDialog(QDialog):
         except Exception as e:
             self.show_error(f"Ошибка: {e}")
             
+    def done(self, result):
+        """Отменяет незавершённое обновление при закрытии диалога"""
+        self.query_executor.cancel_all()
+        super().done(result)
+        
     def show_info(self, message):
         """Показывает информационное сообщение"""
         QMessageBox.information(self, "Информация", message)
@@ -93,7 +93,9 @@ class TextSearchDialog(QDialog):
             "~ - POSIX регулярное выражение (чувствительное к регистру)",
             "~* - POSIX регулярное выражение (нечувствительное к регистру)",
             "!~ - НЕ соответствует POSIX регулярному выражению (чувствительное к регистру)",
-            "!~* - НЕ соответствует POSIX регулярному выражению (нечувствительное к регистру)"
+            "!~* - НЕ соответствует POSIX регулярному выражению (нечувствительное к регистру)",
+            "FULLTEXT - Полнотекстовый поиск по словам (русская морфология)",
+            "FUZZY - Нечёткий поиск по триграммам (устойчив к опечаткам)"
         ])
         search_layout.addRow("Тип поиска:", self.search_type_combo)
         
@@ -305,7 +307,11 @@ class TextSearchDialog(QDialog):
             self.case_sensitive_check.setVisible(False)
         
         # Обновляем placeholder в зависимости от типа поиска
-        if "SIMILAR TO" in search_type:
+        if "FULLTEXT" in search_type:
+            self.search_input.setPlaceholderText('Например: война мир, "точная фраза", -исключить')
+        elif "FUZZY" in search_type:
+            self.search_input.setPlaceholderText("Введите слово (допускаются опечатки)...")
+        elif "SIMILAR TO" in search_type:
             self.search_input.setPlaceholderText("Например: %(a|b)% или %[0-9]{3}%")
         elif "LIKE" in search_type:
             self.search_input.setPlaceholderText("Введите текст для поиска...")
@@ -332,7 +338,7 @@ class TextSearchDialog(QDialog):
         
         # Проверяем на специальные символы для регулярных выражений
         search_type = self.search_type_combo.currentText()
-        if "LIKE" not in search_type:
+        if not any(kind in search_type for kind in ("LIKE", "FULLTEXT", "FUZZY")):
             # Для регулярных выражений проверяем корректность
             try:
                 import re
@@ -469,7 +475,11 @@ class TextSearchDialog(QDialog):
     
     def extract_search_type_code(self, search_type_full):
         """Извлекает код типа поиска из полного описания"""
-        if "NOT SIMILAR TO" in search_type_full:
+        if search_type_full.startswith("FULLTEXT"):
+            return "FULLTEXT"
+        elif search_type_full.startswith("FUZZY"):
+            return "FUZZY"
+        elif "NOT SIMILAR TO" in search_type_full:
             return "NOT_SIMILAR_TO"
         elif "SIMILAR TO" in search_type_full:
             return "SIMILAR_TO"
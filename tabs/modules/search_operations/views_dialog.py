@@ -415,21 +415,9 @@ class ViewsDialog(QDialog):
             if not self.db_instance or not self.db_instance.is_connected():
                 return
                 
-            # Запрос для получения списка представлений
-            sql = """
-                SELECT table_name 
-                FROM information_schema.views 
-                WHERE table_schema = 'public'
-                ORDER BY table_name
-            """
-            
-            results = self.db_instance.execute_custom_query(sql)
-            
             self.views_list.clear()
-            for row in results:
-                view_name = row.get('table_name', '')
-                if view_name:
-                    self.views_list.addItem(view_name)
+            for view_name in self.db_instance.get_views():
+                self.views_list.addItem(view_name)
                     
         except Exception as e:
             self.show_error(f"Ошибка при получении списка представлений: {e}")
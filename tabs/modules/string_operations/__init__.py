@@ -2,7 +2,11 @@
 Диалоги для строковых операций
 """
 
-from .string_functions_dialog import StringFunctionsDialog
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'StringFunctionsDialog': '.string_functions_dialog',
+})
 
 __all__ = [
     'StringFunctionsDialog'
@@ -2,10 +2,15 @@
 Диалоги для операций с таблицами и столбцами
 """
 
-from .add_column import AddColumnDialog, ConstraintsDialog
-from .drop_column_dialog import DropColumnDialog
-from .rename_dialog import RenameDialog
-from .change_type_dialog import ChangeTypeDialog
+from ..lazy_exports import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(globals(), {
+    'AddColumnDialog': '.add_column',
+    'ConstraintsDialog': '.add_column',
+    'DropColumnDialog': '.drop_column_dialog',
+    'RenameDialog': '.rename_dialog',
+    'ChangeTypeDialog': '.change_type_dialog',
+})
 
 __all__ = [
     'AddColumnDialog',
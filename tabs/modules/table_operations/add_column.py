@@ -1,11 +1,13 @@
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QWidget,
-    QGroupBox, QFormLayout, QComboBox, QLineEdit, QCheckBox, QMessageBox
+    QGroupBox, QFormLayout, QComboBox, QLineEdit, QCheckBox, QMessageBox, QSpinBox,
+    QProgressDialog
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPalette, QColor
 from custom.array_line_edit import ArrayLineEdit
 from custom.enum_editor import EnumEditor
+from db.query_executor import QueryExecutor
 import re
 import logging
 
@@ -435,6 +437,10 @@ class AddColumnDialog(QDialog):
         self._setup_logging()
         # Храним выбранные ранее ограничения, чтобы сохранялись между открытиями окна
         self.constraints: dict = {}
+        # Добавление столбца выполняется в фоне (на больших таблицах — минуты)
+        self.query_executor = QueryExecutor(self.db_instance, parent=self)
+        self.add_task = None
+        self.progress = None
         
         # Словари для валидации
         self.input_widgets = {}
@@ -574,6 +580,33 @@ class AddColumnDialog(QDialog):
         self.on_type_changed(self.type_combo.currentText())
         layout.addWidget(box_params)
 
+        # 3) Режим выполнения
+        box_mode = QGroupBox("РЕЖИМ ВЫПОЛНЕНИЯ")
+        box_mode.setObjectName("settingsGroup")
+        form_mode = QFormLayout(box_mode)
+        form_mode.setLabelAlignment(Qt.AlignRight)
+        self.online_check = QCheckBox("Онлайн-режим (большие таблицы, без долгих блокировок)")
+        self.online_check.setToolTip(
+            "Короткие транзакции: заполнение пакетами, NOT NULL через CHECK NOT VALID + VALIDATE,\n"
+            "UNIQUE через CREATE INDEX CONCURRENTLY. PRIMARY KEY в этом режиме недоступен."
+        )
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(100, 1_000_000)
+        self.batch_spin.setSingleStep(1000)
+        self.batch_spin.setValue(10_000)
+        self.throttle_spin = QSpinBox()
+        self.throttle_spin.setRange(0, 10_000)
+        self.throttle_spin.setSingleStep(50)
+        self.throttle_spin.setSuffix(" мс")
+        form_mode.addRow("", self.online_check)
+        form_mode.addRow(self._label("Строк в пакете:"), self.batch_spin)
+        form_mode.addRow(self._label("Пауза между пакетами:"), self.throttle_spin)
+        self.online_check.toggled.connect(self.batch_spin.setEnabled)
+        self.online_check.toggled.connect(self.throttle_spin.setEnabled)
+        self.batch_spin.setEnabled(False)
+        self.throttle_spin.setEnabled(False)
+        layout.addWidget(box_mode)
+
         # Кнопки
         btn_row = QWidget()
         btn_l = QHBoxLayout(btn_row)
@@ -598,16 +631,9 @@ class AddColumnDialog(QDialog):
         return l
 
     def _setup_logging(self):
-        """Настройка логирования в db/db_app.log"""
+        """Настройка логирования в db/db_app.log (через обработчики корневого логгера)"""
         self.logger = logging.getLogger('AddColumnDialog')
         self.logger.setLevel(logging.INFO)
-        
-        # Проверяем, есть ли уже обработчик
-        if not self.logger.handlers:
-            handler = logging.FileHandler('db/db_app.log', encoding='utf-8')
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
     
     def validate_column_name(self, name: str) -> tuple[bool, str]:
         """Валидация имени столбца"""
@@ -695,8 +721,10 @@ class AddColumnDialog(QDialog):
             #settingsGroup { border:2px solid #44475a; border-radius:12px; padding:16px; background:rgba(15,15,25,.6); }
             #settingsGroup::title { left:18px; padding:0 8px; color:#64ffda; font-weight:bold; }
             #fieldLabel { color:#ffffff; font-weight:bold; }
-            QLineEdit, QComboBox { background: rgba(15, 15, 25, 0.8); border:2px solid #44475a; border-radius:8px; padding:10px; color:#ffffff; }
-            QLineEdit:focus, QComboBox:focus { border:2px solid #64ffda; }
+            QLineEdit, QComboBox, QSpinBox { background: rgba(15, 15, 25, 0.8); border:2px solid #44475a; border-radius:8px; padding:10px; color:#ffffff; }
+            QLineEdit:focus, QComboBox:focus, QSpinBox:focus { border:2px solid #64ffda; }
+            QSpinBox:disabled { color:#6272a4; }
+            QCheckBox { color:#ffffff; font-weight:bold; }
             QComboBox QAbstractItemView { background: rgba(15, 15, 25, 0.95); border:2px solid #64ffda; border-radius:8px; color:#ffffff; selection-background-color: #64ffda; selection-color: #0a0a0f; }
             QComboBox::drop-down { border: none; background: rgba(15, 15, 25, 0.8); }
             QComboBox::down-arrow { border: none; }
@@ -867,19 +895,19 @@ class AddColumnDialog(QDialog):
         def is_integer_dtype(t: str) -> bool:
             return t in {"Integer", "SmallInteger", "BigInteger"}
 
-        def table_row_count(tbl: str) -> int:
+        def table_has_rows(tbl: str) -> bool:
+            # EXISTS вместо COUNT(*): на большой таблице подсчёт строк заморозил бы окно
             try:
                 from sqlalchemy import text as _sql_text
                 with self.db_instance.engine.connect() as _conn:
-                    return _conn.execute(_sql_text(f'SELECT COUNT(*) FROM "{tbl}"')).scalar() or 0
+                    return bool(_conn.execute(_sql_text(f'SELECT EXISTS (SELECT 1 FROM "{tbl}")')).scalar())
             except Exception:
-                return 0
+                return False
 
         # Если выбран PK или AUTOINCREMENT – приводим тип к целочисленному при необходимости
         if kwargs.get("primary_key") or kwargs.get("autoincrement"):
             if not is_integer_dtype(dtype):
-                rc = table_row_count(table_name)
-                if rc > 0:
+                if table_has_rows(table_name):
                     QMessageBox.information(self, "Изменён тип",
                                             "Для первичного ключа в непустой таблице выбран целочисленный тип Integer.")
                     self.type_combo.setCurrentText("Integer")
@@ -913,12 +941,9 @@ class AddColumnDialog(QDialog):
 
         # Если таблица непуста и NOT NULL без DEFAULT — ослабляем до NULL, чтобы избежать NotNullViolation
         try:
-            from sqlalchemy import text as _sql_text
             # Ослабляем NOT NULL только когда это не PK-сценарий — при PK мы заполним значения сами
             if kwargs.get("nullable") is False and not kwargs.get("default") and not kwargs.get("primary_key"):
-                with self.db_instance.engine.connect() as _conn:
-                    rc = _conn.execute(_sql_text(f'SELECT COUNT(*) FROM "{table_name}"')).scalar() or 0
-                if rc > 0:
+                if table_has_rows(table_name):
                     self.logger.warning("Таблица непуста — NOT NULL без DEFAULT понижен до NULL")
                     QMessageBox.warning(self, "Предупреждение",
                                         "Таблица содержит данные. NOT NULL без значения по умолчанию недопустим.\n"
@@ -927,22 +952,104 @@ class AddColumnDialog(QDialog):
         except Exception:
             pass
 
+        online = self.online_check.isChecked()
+        if online and kwargs.get("primary_key"):
+            QMessageBox.warning(self, "Ошибка валидации",
+                                "PRIMARY KEY нельзя добавить в онлайн-режиме. Снимите флажок онлайн-режима.")
+            return
+
         # Логирование попытки добавления
-        self.logger.info(f"Попытка добавления столбца '{column_name}' в таблицу '{table_name}' с типом '{dtype}'")
-        
-        try:
-            success = self.db_instance.add_column(table_name, column_name, column_type, **kwargs)
-            if success:
-                QMessageBox.information(self, "Успех", f"Столбец '{column_name}' успешно добавлен в таблицу '{table_name}'.")
-                self.logger.info(f"Столбец '{column_name}' успешно добавлен в таблицу '{table_name}'")
-                self.accept()
-            else:
-                QMessageBox.critical(self, "Ошибка", "Не удалось добавить столбец. Проверьте параметры.")
-                self.logger.error(f"Не удалось добавить столбец '{column_name}' в таблицу '{table_name}'")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка базы данных", f"Ошибка при добавлении столбца: {str(e)}")
-            self.logger.error(f"Ошибка БД при добавлении столбца '{column_name}': {str(e)}")
+        self.logger.info(f"Попытка добавления столбца '{column_name}' в таблицу '{table_name}' с типом '{dtype}'"
+                         f"{' (онлайн-режим)' if online else ''}")
+
+        if online:
+            kwargs.update(online=True, batch_size=self.batch_spin.value(),
+                          throttle=self.throttle_spin.value() / 1000,
+                          progress_callback=self._on_backfill_progress)
+
+        # Онлайн-режим рассчитан на большие таблицы: выполняем в фоне, окно остаётся отзывчивым
+        self.btn_ok.setEnabled(False)
+        self.progress = QProgressDialog("Добавление столбца...", "ОСТАНОВИТЬ", 0, 0, self)
+        self.progress.setWindowTitle("ДОБАВЛЕНИЕ СТОЛБЦА")
+        self.progress.setWindowModality(Qt.WindowModal)
+        self.progress.setMinimumDuration(500)
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
+        self.progress.canceled.connect(self._cancel_add_column)
+        self.add_task = self.query_executor.submit(
+            self.db_instance.add_column,
+            table_name, column_name, column_type,
+            on_result=lambda success: self._on_add_column_finished(success, table_name, column_name, online),
+            on_error=lambda error: self._on_add_column_failed(error, column_name),
+            on_progress=self._on_add_column_progress,
+            on_cancelled=lambda: self._on_add_column_cancelled(column_name, online),
+            description="Добавление столбца",
+            **kwargs
+        )
+
+    def _on_backfill_progress(self, done: int, total: int) -> bool:
+        """Вызывается из рабочего потока после каждого пакета; False — прервать заполнение"""
+        task = self.add_task
+        if task is None:
+            return True
+        percent = min(100, done * 100 // total) if total else -1
+        task.signals.progress.emit(percent, f"Заполнение существующих строк: {done} из ~{total}")
+        return not task.is_cancelled
+
+    def _on_add_column_progress(self, percent: int, description: str):
+        """Отображает этап фонового добавления столбца"""
+        if self.progress is None:
+            return
+        self.progress.setLabelText(f"{description}...")
+        if percent < 0:
+            self.progress.setRange(0, 0)
+        else:
+            self.progress.setRange(0, 100)
+            self.progress.setValue(percent)
+
+    def _cancel_add_column(self):
+        """Отменяет выполняющееся добавление столбца (pg_cancel_backend текущего запроса)"""
+        if self.add_task is not None:
+            self.add_task.cancel()
+
+    def _finish_add_column(self):
+        self.add_task = None
+        self.btn_ok.setEnabled(True)
+        if self.progress is not None:
+            self.progress.canceled.disconnect(self._cancel_add_column)
+            self.progress.close()
+            self.progress = None
+
+    def _on_add_column_finished(self, success: bool, table_name: str, column_name: str, online: bool):
+        self._finish_add_column()
+        if success:
+            QMessageBox.information(self, "Успех", f"Столбец '{column_name}' успешно добавлен в таблицу '{table_name}'.")
+            self.logger.info(f"Столбец '{column_name}' успешно добавлен в таблицу '{table_name}'")
+            self.accept()
+        else:
+            message = "Не удалось добавить столбец. Проверьте параметры."
+            if online:
+                message += "\nВ онлайн-режиме столбец мог остаться добавленным без части ограничений — см. журнал."
+            QMessageBox.critical(self, "Ошибка", message)
+            self.logger.error(f"Не удалось добавить столбец '{column_name}' в таблицу '{table_name}'")
+
+    def _on_add_column_failed(self, error: str, column_name: str):
+        self._finish_add_column()
+        QMessageBox.critical(self, "Ошибка базы данных", f"Ошибка при добавлении столбца: {error}")
+        self.logger.error(f"Ошибка БД при добавлении столбца '{column_name}': {error}")
+
+    def _on_add_column_cancelled(self, column_name: str, online: bool):
+        self._finish_add_column()
+        message = f"Добавление столбца '{column_name}' остановлено."
+        if online:
+            message += "\nСтолбец мог остаться добавленным без части ограничений — см. журнал."
+        QMessageBox.warning(self, "Отменено", message)
+        self.logger.warning(f"Добавление столбца '{column_name}' отменено пользователем")
 
+    def done(self, result):
+        # Не оставляем ALTER TABLE выполняться после закрытия диалога
+        self.query_executor.cancel_all()
+        super().done(result)
 
     def set_field_error(self, field_name, error_message):
         """Устанавливает сообщение об ошибке для поля"""
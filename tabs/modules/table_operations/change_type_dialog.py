@@ -23,16 +23,9 @@ class ChangeTypeDialog(QDialog):
         self._apply_styles()
     
     def _setup_logging(self):
-        """Настройка логирования в db/db_app.log"""
+        """Настройка логирования в db/db_app.log (через обработчики корневого логгера)"""
         self.logger = logging.getLogger('ChangeTypeDialog')
         self.logger.setLevel(logging.INFO)
-        
-        # Проверяем, есть ли уже обработчик
-        if not self.logger.handlers:
-            handler = logging.FileHandler('db/db_app.log', encoding='utf-8')
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
 
     def _set_dark_palette(self):
         pal = QPalette()
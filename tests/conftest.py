@@ -0,0 +1,39 @@
+"""
+Общие фикстуры: база во временном кластере PostgreSQL (см. benchmarks.cluster)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def cluster():
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("psycopg2")
+    from benchmarks.cluster import TempCluster
+
+    temp = TempCluster(dbname="library_test")
+    try:
+        temp.start()
+    except RuntimeError as e:
+        temp.stop()
+        pytest.skip(f"временный кластер PostgreSQL недоступен: {e}")
+    yield temp
+    temp.stop()
+
+
+@pytest.fixture
+def db(cluster):
+    """Подключение к базе с пересозданной пустой схемой."""
+    from db.Class_DB_refactored import DB
+
+    instance = DB(**cluster.connection_params())
+    assert instance.connect()
+    instance.drop_schema()
+    assert instance.create_schema()
+    yield instance
+    instance.disconnect()
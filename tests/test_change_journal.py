@@ -0,0 +1,26 @@
+"""
+Журнал изменений: какие таблицы отмечаются для перечитывания
+"""
+
+BOOK = {"title": "Война и мир", "authors": ["Л. Н. Толстой"], "genre": "Роман",
+        "deposit_amount": 500, "daily_rental_rate": 20}
+
+
+def journal_since(db, position):
+    return [(change["table"], change["operation"]) for change in db.change_journal.since(position)]
+
+
+def test_insert_does_not_reload_referencing_tables(db):
+    position = db.change_journal.position()
+    success, error = db.insert_data("Books", BOOK)
+    assert success, error
+    assert journal_since(db, position) == [("Books", db.change_journal.INSERT)]
+
+
+def test_delete_reloads_referencing_tables(db):
+    success, error = db.insert_data("Books", BOOK)
+    assert success, error
+    position = db.change_journal.position()
+    assert db.delete_data("Books", {"title": BOOK["title"]})
+    assert journal_since(db, position) == [("Books", db.change_journal.DELETE),
+                                           ("Issued_Books", db.change_journal.RELOAD)]
@@ -0,0 +1,33 @@
+"""
+Проверка внешних ключей перед вставкой: приведение значений к типу ключа
+"""
+
+import pytest
+
+
+@pytest.fixture
+def book_id(db):
+    success, error = db.insert_data("Books", {
+        "title": "Война и мир", "authors": ["Л. Н. Толстой"], "genre": "Роман",
+        "deposit_amount": 500, "daily_rental_rate": 20,
+    })
+    assert success, error
+    return db.get_table_data("Books")[0]["id_book"]
+
+
+def test_key_as_text_is_checked(db, book_id):
+    rows = [{"book_id": str(book_id)}, {"book_id": str(book_id + 1)}]
+    errors = db.check_foreign_keys("Issued_Books", rows)
+    assert 0 not in errors
+    assert 1 in errors
+
+
+@pytest.mark.parametrize("make_value", [
+    lambda key: key + 0.7,      # int() отбросил бы дробную часть, PostgreSQL округлит вверх
+    lambda key: f"{key}.7",
+    lambda key: True,
+    lambda key: "abc",
+])
+def test_lossy_key_is_missing(db, book_id, make_value):
+    errors = db.check_foreign_keys("Issued_Books", [{"book_id": make_value(book_id)}])
+    assert 0 in errors
@@ -0,0 +1,60 @@
+"""
+Точечные изменения KeysetTableModel при частично загруженном результате
+"""
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from custom.keyset_table_model import KeysetTableModel
+
+
+def make_model(rows, sort_column, page_size=2):
+    """Модель поверх списка строк; порядок страниц — побайтовый, как при collation "C"."""
+    def fetch_page(cursor, limit):
+        ordered = sorted(rows, key=lambda row: (row[sort_column], row["id"]))
+        if cursor is not None:
+            ordered = [row for row in ordered if (row[sort_column], row["id"]) > cursor]
+        page = ordered[:limit]
+        more = len(ordered) > limit
+        return page, (page[-1][sort_column], page[-1]["id"]) if more else None
+
+    model = KeysetTableModel(fetch_page, page_size=page_size, key_column="id", sort_column=sort_column)
+    model.load_first_page()
+    return model
+
+
+def titles(model):
+    while model.canFetchMore():
+        model.fetchMore()
+    return [row["title"] for row in model.loaded_rows()]
+
+
+def test_text_insert_into_partial_result_needs_reload():
+    rows = [{"id": i, "title": title} for i, title in enumerate(["A", "B", "a", "b"], 1)]
+    model = make_model(rows, "title")
+
+    new_row = {"id": 5, "title": "a0"}
+    assert not model.apply_insert([new_row])
+
+    # Перезапрос, который выполнит MainWindow, вернёт строку один раз
+    rows.append(new_row)
+    model.load_first_page()
+    assert titles(model) == ["A", "B", "a", "a0", "b"]
+
+
+def test_text_insert_into_full_result_is_patched():
+    rows = [{"id": i, "title": title} for i, title in enumerate(["A", "B"], 1)]
+    model = make_model(rows, "title")
+    assert model.is_fully_loaded()
+
+    assert model.apply_insert([{"id": 3, "title": "A0"}])
+    assert titles(model) == ["A", "A0", "B"]
+
+
+def test_numeric_insert_into_partial_result_is_patched():
+    rows = [{"id": i, "year": year} for i, year in enumerate([1990, 2000, 2010, 2020], 1)]
+    model = make_model(rows, "year")
+
+    assert model.apply_insert([{"id": 5, "year": 1995}])
+    assert [row["year"] for row in model.loaded_rows()] == [1990, 1995, 2000]
@@ -0,0 +1,39 @@
+"""
+Поиск по тексту: обработка NULL в отрицающих операторах
+"""
+
+import pytest
+
+
+@pytest.fixture
+def readers(db):
+    for middle_name in ("Иванович", None):
+        success, error = db.insert_data("Readers", {
+            "last_name": "Петров", "first_name": "Пётр", "middle_name": middle_name,
+            "address": "ул. Ленина, 1", "phone": f"+7900000000{0 if middle_name else 1}",
+            "discount_category": "Обычный",
+        })
+        assert success, error
+    return db
+
+
+# Кластер создаётся с --no-locale: регистр кириллицы в ~* не сворачивается,
+# поэтому шаблоны для ~* и !~* записаны в нижнем регистре
+@pytest.mark.parametrize("search_type, query", [
+    ("NOT_SIMILAR_TO", "%вич"),
+    ("!~", "вич$"),
+    ("!~*", "вич$"),
+])
+def test_negated_search_matches_null(readers, search_type, query):
+    rows = readers.text_search_advanced("Readers", "middle_name", query, search_type)
+    assert [row["middle_name"] for row in rows] == [None]
+
+
+@pytest.mark.parametrize("search_type, query", [
+    ("SIMILAR_TO", "%вич"),
+    ("~", "вич$"),
+    ("~*", "вич$"),
+])
+def test_positive_search_skips_null(readers, search_type, query):
+    rows = readers.text_search_advanced("Readers", "middle_name", query, search_type)
+    assert [row["middle_name"] for row in rows] == ["Иванович"]